@@ -1,5 +1,11 @@
 """
 Leon Agent Manager - Spawns and monitors Claude Code agents via OpenClaw
+
+Agent exits are event-driven: each spawned process is watched through a pidfd
+registered with the event loop (a waiter thread where pidfd_open is not
+available), so callers `await wait_for_exit()` / `wait_any()` instead of
+polling check_status(). Output files are followed by LogTail readers that
+only read newly appended bytes and keep a bounded tail in memory.
 """
 
 import asyncio
@@ -7,6 +13,7 @@ import logging
 import os
 import re
 import subprocess
+import threading
 import uuid
 from datetime import datetime
 from pathlib import Path
@@ -14,6 +21,87 @@ from typing import Optional
 
 logger = logging.getLogger("leon.agents")
 
+# Markers claude prints (to stdout or stderr) when the Anthropic API returns a 500
+API_500_MARKERS = (b'"type":"api_error"', b"Internal server error", b"API Error: 500")
+
+
+class LogTail:
+    """
+    Follows an append-only log file: each update() reads only the bytes
+    appended since the last call, keeps the last max_bytes in memory, and
+    classifies new bytes as they arrive (API 500 markers, any non-blank output).
+
+    Usage:
+        tail = LogTail("data/agent_outputs/agent_ab12.log")
+        tail.update()
+        tail.tail(80)        # last 80 lines
+        tail.text(500)       # last 500 characters
+    """
+
+    _CARRY = max(len(m) for m in API_500_MARKERS) - 1
+
+    def __init__(self, path, max_bytes: int = 64 * 1024, from_end: bool = False):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._from_end = from_end  # skip straight to the last max_bytes on first read
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self._buf = bytearray()
+        self._carry = b""
+        self.has_output = False  # any non-whitespace byte seen
+        self.api_500 = False
+
+    def update(self) -> int:
+        """Read what was appended since the last call. Returns the number of new bytes."""
+        try:
+            with open(self.path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size < self.offset:  # truncated or replaced: start over
+                    self._reset()
+                if self._from_end:
+                    self._from_end = False
+                    self.offset = max(self.offset, size - self.max_bytes)
+                if size == self.offset:
+                    return 0
+                f.seek(self.offset)
+                new = f.read(size - self.offset)
+        except FileNotFoundError:
+            return 0
+        self.offset += len(new)
+
+        if not self.has_output and new.strip():
+            self.has_output = True
+        if not self.api_500:
+            window = self._carry + new
+            self.api_500 = any(m in window for m in API_500_MARKERS)
+            self._carry = window[-self._CARRY:]
+
+        self._buf += new
+        if len(self._buf) > self.max_bytes:
+            del self._buf[:len(self._buf) - self.max_bytes]
+        return len(new)
+
+    def text(self, max_chars: Optional[int] = None) -> str:
+        """The buffered tail (at most max_chars characters of it)."""
+        buf = bytes(self._buf)
+        if self.offset > len(buf):
+            # Buffer starts mid-file: drop a partial UTF-8 character at the front
+            i = 0
+            while i < min(len(buf), 3) and (buf[i] & 0xC0) == 0x80:
+                i += 1
+            buf = buf[i:]
+        text = buf.decode("utf-8", errors="replace")
+        return text[-max_chars:] if max_chars else text
+
+    def tail(self, n: int) -> list[str]:
+        """The last n lines (a partial first line of the buffer is dropped)."""
+        lines = self.text().splitlines()
+        if self.offset > len(self._buf) and lines:
+            lines = lines[1:]
+        return lines[-n:] if n > 0 else []
+
 
 class AgentManager:
     """Spawns, monitors, and manages Claude Code agent processes"""
@@ -22,6 +110,7 @@ class AgentManager:
         self.openclaw = openclaw
         self.config = config
         self.active_agents: dict[str, dict] = {}
+        self._exit_events: dict[str, asyncio.Event] = {}
         self.output_dir = Path(config.get("output_directory", "data/agent_outputs"))
         self.brief_dir = Path(config.get("brief_directory", "data/task_briefs"))
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -111,9 +200,113 @@ class AgentManager:
             "_file_handles": [stdout_fh, stderr_fh],
         }
 
+        self._watch_exit(agent_id)
         logger.info(f"Agent {agent_id} spawned (PID {process.pid})")
         return agent_id
 
+    # ------------------------------------------------------------------
+    # Completion events
+    # ------------------------------------------------------------------
+
+    def _watch_exit(self, agent_id: str) -> asyncio.Event:
+        """Return the event that is set when the agent's process exits.
+
+        Registers a pidfd reader on the running loop the first time; falls back
+        to a daemon thread blocked in process.wait() without pidfd support.
+        """
+        event = self._exit_events.get(agent_id)
+        if event is not None:
+            return event
+        event = self._exit_events[agent_id] = asyncio.Event()
+        agent = self.active_agents[agent_id]
+        process: subprocess.Popen = agent["process"]
+        if process.poll() is not None:
+            event.set()
+            return event
+
+        loop = asyncio.get_running_loop()
+        try:
+            pidfd = os.pidfd_open(process.pid)
+        except (AttributeError, OSError):
+            pidfd = None
+
+        if pidfd is not None:
+            def on_exit():
+                self._close_pidfd(agent, loop)
+                process.poll()  # reap
+                event.set()
+
+            agent["_pidfd"] = pidfd
+            loop.add_reader(pidfd, on_exit)
+        else:
+            def wait():
+                try:
+                    process.wait()
+                except Exception:
+                    pass
+                try:
+                    loop.call_soon_threadsafe(event.set)
+                except RuntimeError:
+                    pass  # loop already closed
+
+            threading.Thread(target=wait, name=f"wait-{agent_id}", daemon=True).start()
+        return event
+
+    @staticmethod
+    def _close_pidfd(agent: dict, loop=None):
+        pidfd = agent.pop("_pidfd", None)
+        if pidfd is None:
+            return
+        try:
+            (loop or asyncio.get_running_loop()).remove_reader(pidfd)
+        except (RuntimeError, ValueError):
+            pass
+        try:
+            os.close(pidfd)
+        except OSError:
+            pass
+
+    def has_exited(self, agent_id: str) -> bool:
+        agent = self.active_agents.get(agent_id)
+        return agent is None or agent["process"].poll() is not None
+
+    def needs_check(self, agent_id: str) -> bool:
+        """True once check_status() has something to act on: exit or timeout."""
+        if self.has_exited(agent_id):
+            return True
+        started = datetime.fromisoformat(self.active_agents[agent_id]["started_at"])
+        return (datetime.now() - started).total_seconds() > self.timeout
+
+    async def wait_for_exit(self, agent_id: str, timeout: Optional[float] = None) -> bool:
+        """Wait until the agent's process exits. Returns False on timeout."""
+        return bool(await self.wait_any([agent_id], timeout=timeout))
+
+    async def wait_any(self, agent_ids: Optional[list] = None,
+                       timeout: Optional[float] = None) -> list[str]:
+        """
+        Wait until at least one of agent_ids has exited, or until timeout.
+        Returns the IDs that have exited. Without agent_ids, waits on every
+        agent that is still running (so an exited agent nobody has cleaned up
+        yet does not turn a caller's loop into a busy loop).
+        """
+        if agent_ids is None:
+            ids = [aid for aid in self.active_agents if not self.has_exited(aid)]
+        else:
+            ids = [aid for aid in agent_ids if aid in self.active_agents]
+        if not ids:
+            if timeout:
+                await asyncio.sleep(timeout)
+            return []
+        events = {aid: self._watch_exit(aid) for aid in ids}
+        if not any(ev.is_set() for ev in events.values()):
+            waiters = [asyncio.ensure_future(ev.wait()) for ev in events.values()]
+            try:
+                await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for w in waiters:
+                    w.cancel()
+        return [aid for aid, ev in events.items() if ev.is_set()]
+
     async def check_status(self, agent_id: str) -> dict:
         """Check whether an agent is still running, completed, or failed."""
         if agent_id not in self.active_agents:
@@ -123,18 +316,20 @@ class AgentManager:
         process: subprocess.Popen = agent["process"]
 
         is_running = process.poll() is None
-        output = self._read_output(agent["output_file"])
-        errors = self._read_output(agent["error_file"])
+        out_tail = self._log_tail(agent, "output_file")
+        err_tail = self._log_tail(agent, "error_file")
+        output = out_tail.text(500)
+        errors = err_tail.text(500)
 
         # Proper completion detection: check return code + output
         completed = (
             (not is_running)
             and (process.returncode == 0)
-            and bool(output.strip())
+            and out_tail.has_output
         )
         failed = (
             (not is_running)
-            and (process.returncode != 0 or not output.strip())
+            and (process.returncode != 0 or not out_tail.has_output)
         )
 
         # Timeout check
@@ -150,11 +345,8 @@ class AgentManager:
         # Anthropic 500 errors don't count against retry budget — wait 30s and try again
         # Check BOTH stdout (.log) and stderr (.err) since claude prints 500s to stdout
         if failed and not is_running:
-            combined_text = (output or "") + (errors or "")
             errors_text = errors or ""
-            is_api_500 = ('"type":"api_error"' in combined_text or
-                          "Internal server error" in combined_text or
-                          "API Error: 500" in combined_text)
+            is_api_500 = out_tail.api_500 or err_tail.api_500
             if is_api_500 and agent.get("api500_retries", 0) < 5:
                 agent["api500_retries"] = agent.get("api500_retries", 0) + 1
                 logger.warning(f"Agent {agent_id} hit Anthropic 500 (attempt {agent['api500_retries']}/5) — waiting 30s then retrying")
@@ -225,6 +417,8 @@ class AgentManager:
 
         # Remove old agent from tracking
         self.active_agents.pop(agent_id, None)
+        self._exit_events.pop(agent_id, None)
+        self._close_pidfd(agent)
 
         logger.info(f"Retried agent {agent_id} -> {new_id} (attempt {retry_count + 1})")
         return new_id
@@ -235,6 +429,7 @@ class AgentManager:
             return {"error": "Agent not found"}
 
         agent = self.active_agents[agent_id]
+        # Read once, in full — file lists can appear anywhere in the output
         output = self._read_output(agent["output_file"])
         errors = self._read_output(agent["error_file"])
 
@@ -281,7 +476,10 @@ class AgentManager:
     def cleanup_agent(self, agent_id: str):
         """Remove agent from active tracking (call after results are collected)."""
         self._close_file_handles(agent_id)
-        self.active_agents.pop(agent_id, None)
+        agent = self.active_agents.pop(agent_id, None)
+        self._exit_events.pop(agent_id, None)
+        if agent:
+            self._close_pidfd(agent)
 
     async def shutdown(self):
         """Terminate all active agents and close all file handles.
@@ -304,7 +502,9 @@ class AgentManager:
             else:
                 # Already exited — just close file handles
                 self._close_file_handles(agent_id)
+            self._close_pidfd(agent)
         self.active_agents.clear()
+        self._exit_events.clear()
         logger.info("All agents shut down")
 
     # ------------------------------------------------------------------
@@ -352,6 +552,23 @@ class AgentManager:
         except FileNotFoundError:
             return ""
 
+    @staticmethod
+    def _log_tail(agent: dict, key: str) -> LogTail:
+        """The agent's LogTail for agent[key] ("output_file"/"error_file"), brought up to date."""
+        tails = agent.setdefault("_tails", {})
+        tail = tails.get(key)
+        if tail is None:
+            tail = tails[key] = LogTail(agent[key])
+        tail.update()
+        return tail
+
+    def tail(self, agent_id: str, n: int = 80) -> Optional[list[str]]:
+        """Last n lines of an active agent's stdout log, or None if it is not tracked."""
+        agent = self.active_agents.get(agent_id)
+        if agent is None:
+            return None
+        return self._log_tail(agent, "output_file").tail(n)
+
     def _extract_summary(self, output: str) -> str:
         lines = output.strip().split("\n")
         if not lines:
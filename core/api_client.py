@@ -24,6 +24,8 @@ from typing import Optional
 
 import httpx
 
+from .tracing import span, traced
+
 logger = logging.getLogger("leon.api")
 
 GROQ_API_BASE        = "https://api.groq.com/openai/v1"
@@ -343,6 +345,7 @@ class AnthropicAPI:
     # Provider backends
     # ------------------------------------------------------------------
 
+    @traced("llm.groq")
     async def _groq_request(self, messages: list, system: str = "", model: str = None) -> str:
         """Call Groq's OpenAI-compatible API (free tier)."""
         groq_messages = []
@@ -396,6 +399,7 @@ class AnthropicAPI:
                 logger.error(f"Groq request failed: {e}")
                 return f"Groq error: {e}"
 
+    @traced("llm.ollama")
     async def _ollama_request(self, messages: list, system: str = "") -> str:
         """Call local Ollama instance (completely free)."""
         ollama_messages = []
@@ -428,6 +432,7 @@ class AnthropicAPI:
             logger.error(f"Ollama request failed: {e}")
             return f"Ollama error: {e}"
 
+    @traced("llm.claude_cli")
     async def _claude_cli_request(self, prompt: str, model: str = "claude-sonnet-4-6") -> str:
         """Send a prompt through claude --print using the subscription auth."""
         # Strip all Claude Code session env vars so the subprocess doesn't think it's nested
@@ -465,13 +470,14 @@ class AnthropicAPI:
         """Try a single provider for create_message. Returns the response or an error string."""
         if provider == "api_key" and self.client:
             try:
-                response = await self.client.messages.create(
-                    model=self.model,
-                    max_tokens=self.max_tokens,
-                    temperature=self.temperature,
-                    system=system,
-                    messages=messages,
-                )
+                with span("llm.anthropic"):
+                    response = await self.client.messages.create(
+                        model=self.model,
+                        max_tokens=self.max_tokens,
+                        temperature=self.temperature,
+                        system=system,
+                        messages=messages,
+                    )
                 return response.content[0].text
             except Exception as e:
                 logger.error(f"Anthropic API error: {e}")
@@ -515,11 +521,12 @@ class AnthropicAPI:
                     ]
                 else:
                     content = prompt
-                response = await self.client.messages.create(
-                    model=self.model,
-                    max_tokens=self.max_tokens,
-                    messages=[{"role": "user", "content": content}],
-                )
+                with span("llm.anthropic"):
+                    response = await self.client.messages.create(
+                        model=self.model,
+                        max_tokens=self.max_tokens,
+                        messages=[{"role": "user", "content": content}],
+                    )
                 return response.content[0].text
             except Exception as e:
                 logger.error(f"Anthropic API error: {e}")
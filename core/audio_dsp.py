@@ -0,0 +1,279 @@
+"""
+Leon Audio DSP — shared PCM math for the voice pipelines.
+
+Both the local mic pipeline (core/voice.py, 16 kHz mono, 30 ms frames) and the
+Discord voice handler (48 kHz stereo, 20 ms frames) work on raw signed 16-bit
+little-endian PCM. Everything here views that PCM with np.frombuffer (no copy)
+and does the per-sample work in NumPy:
+
+    rms(frame)                          # energy of one frame
+    frame_rms(pcm, 480)                 # energy of every 480-sample frame at once
+    to_mono(stereo) / to_stereo(mono)   # channel down/up-mixing
+    resample(pcm, 48000, 16000)         # rate conversion
+    wav_bytes(pcm, 16000)               # WAV container for Whisper uploads
+
+EnergyVAD is the frame-by-frame speech detector both pipelines feed: it turns
+a stream of frames into utterances (bytes), with optional ambient calibration,
+a pre-roll ring so the onset of speech isn't cut off, and a rolling ambient
+ring for re-calibration while idle.
+"""
+
+import io
+import logging
+import wave
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("leon.audio")
+
+SAMPLE_WIDTH = 2          # 16-bit PCM throughout
+PCM_DTYPE = np.dtype("<i2")
+
+# Calibration: thresholds relative to the ambient (median) RMS
+SPEECH_RATIO  = 1.5       # start recording above ambient × this
+SILENCE_RATIO = 1.25      # count silence below ambient × this
+RECALIBRATE_DELTA = 300   # only adopt a re-calibrated speech threshold that moved this much
+
+
+# ── PCM helpers ──────────────────────────────────────────────────────────────
+
+def samples(pcm: bytes) -> np.ndarray:
+    """int16 view over PCM bytes (zero-copy; a trailing odd byte is ignored)."""
+    return np.frombuffer(pcm, dtype=PCM_DTYPE, count=len(pcm) // SAMPLE_WIDTH)
+
+
+def rms(pcm: bytes) -> float:
+    """Root-mean-square amplitude of a PCM buffer (all channels), 0.0 if empty."""
+    x = samples(pcm)
+    if not x.size:
+        return 0.0
+    x = x.astype(np.int64)
+    return float(np.sqrt(np.dot(x, x) / x.size))
+
+
+def frame_rms(pcm: bytes, frame_samples: int) -> np.ndarray:
+    """RMS of each complete frame_samples-long frame in pcm, as one array."""
+    x = samples(pcm)
+    n = x.size // frame_samples
+    if not n:
+        return np.zeros(0)
+    frames = x[: n * frame_samples].reshape(n, frame_samples).astype(np.float64)
+    return np.sqrt(np.einsum("ij,ij->i", frames, frames) / frame_samples)
+
+
+def to_mono(pcm: bytes, channels: int = 2) -> bytes:
+    """Average interleaved channels into mono (floor of the mean, like integer //)."""
+    x = samples(pcm)
+    x = x[: x.size - x.size % channels].reshape(-1, channels)
+    return (x.sum(axis=1, dtype=np.int32) // channels).astype(PCM_DTYPE).tobytes()
+
+
+def to_stereo(pcm: bytes) -> bytes:
+    """Duplicate mono PCM into interleaved L/R stereo."""
+    return np.repeat(samples(pcm), 2).tobytes()
+
+
+def resample(pcm: bytes, src_rate: int, dst_rate: int) -> bytes:
+    """
+    Convert mono PCM from src_rate to dst_rate. Integer down-sampling ratios
+    (48 kHz → 16 kHz) average each group of samples, which also low-passes;
+    anything else is linearly interpolated.
+    """
+    if src_rate == dst_rate:
+        return bytes(pcm)
+    x = samples(pcm)
+    if src_rate % dst_rate == 0:
+        k = src_rate // dst_rate
+        x = x[: x.size - x.size % k].reshape(-1, k)
+        return np.round(x.mean(axis=1)).astype(PCM_DTYPE).tobytes()
+    n_out = int(x.size * dst_rate / src_rate)
+    positions = np.arange(n_out) * (src_rate / dst_rate)
+    out = np.interp(positions, np.arange(x.size), x.astype(np.float64))
+    return np.round(out).astype(PCM_DTYPE).tobytes()
+
+
+def wav_bytes(pcm: bytes, sample_rate: int, channels: int = 1) -> bytes:
+    """Wrap raw PCM in a WAV container."""
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(SAMPLE_WIDTH)
+        wf.setframerate(sample_rate)
+        wf.writeframes(pcm)
+    return buf.getvalue()
+
+
+# ── Voice activity detection ─────────────────────────────────────────────────
+
+class EnergyVAD:
+    """
+    Energy-threshold VAD state machine, one frame at a time.
+
+    Usage:
+        vad = EnergyVAD(16000, 480, threshold=250, start_frames=2, silence_s=2.0,
+                        min_s=0.3, max_s=25.0, preroll_frames=2, ambient_window=150)
+        vad.calibrate(frame_rms(b"".join(ambient_frames), 480))
+        utterance = vad.feed(frame)     # bytes when an utterance ends, else None
+
+    A frame above `threshold` is loud; `start_frames` loud frames in a row start
+    an utterance (the last `preroll_frames` frames before it are kept, so the
+    onset is included). While recording, frames below `silence_threshold` add
+    to the silence run and loud frames reset it; frames in between do neither.
+    The utterance ends after `silence_s` of silence — measured in frames, or in
+    seconds since the last loud frame when feed() is given `now` — or at
+    `max_s`, and is dropped if shorter than `min_s`. With keep_quiet=False only
+    loud frames are kept. pending() is the utterance recorded so far; after an
+    utterance ends, speech_bytes is where its last loud frame ended.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        frame_samples: int,
+        channels: int = 1,
+        threshold: float = 250.0,
+        silence_threshold: Optional[float] = None,
+        start_frames: int = 2,
+        silence_s: float = 2.0,
+        min_s: float = 0.3,
+        max_s: float = 25.0,
+        preroll_frames: int = 0,
+        keep_quiet: bool = True,
+        ambient_window: int = 0,
+    ):
+        self.frame_s = frame_samples / sample_rate
+        self.base_threshold = threshold
+        self.threshold = threshold
+        self.silence_threshold = threshold if silence_threshold is None else silence_threshold
+        self._base_silence = self.silence_threshold
+        self.start_frames = start_frames
+        self.silence_s = silence_s
+        self.keep_quiet = keep_quiet
+        bytes_per_s = sample_rate * channels * SAMPLE_WIDTH
+        self._silence_frames = int(silence_s / self.frame_s)
+        self._min_bytes = int(bytes_per_s * min_s)
+        self._max_bytes = int(bytes_per_s * max_s)
+
+        self._preroll: deque[bytes] = deque(maxlen=preroll_frames)
+        self._ambient = np.zeros(ambient_window)   # ring of idle-frame RMS values
+        self._ambient_pos = 0
+        self._ambient_full = False
+
+        self._buf = bytearray()
+        self.recording = False
+        self.last_rms = 0.0
+        self.frames_seen = 0
+        self._loud_streak = 0
+        self._silence_streak = 0
+        self._last_loud_ts: Optional[float] = None
+        self._speech_end = 0
+        self.speech_bytes = 0
+
+    # ── Calibration ──────────────────────────────────────────────────────────
+
+    def calibrate(self, ambient_rms) -> Optional[float]:
+        """Set thresholds from ambient frame RMS values (median); returns the ambient level."""
+        values = np.asarray(ambient_rms, dtype=np.float64)
+        if not values.size:
+            return None
+        ambient = float(np.median(values))
+        self.threshold, self.silence_threshold = self._thresholds(ambient)
+        return ambient
+
+    def _thresholds(self, ambient: float) -> tuple[float, float]:
+        return (max(self.base_threshold, ambient * SPEECH_RATIO),
+                max(self._base_silence, ambient * SILENCE_RATIO))
+
+    def _track_ambient(self, level: float):
+        """Rolling re-calibration from idle frames (every full window's worth of frames)."""
+        size = self._ambient.size
+        self._ambient[self._ambient_pos] = level
+        self._ambient_pos = (self._ambient_pos + 1) % size
+        self._ambient_full = self._ambient_full or self._ambient_pos == 0
+        if not (self._ambient_full and self.frames_seen % size == 0):
+            return
+        ambient = float(np.median(self._ambient))
+        speech, silence = self._thresholds(ambient)
+        if abs(speech - self.threshold) > RECALIBRATE_DELTA:
+            self.threshold, self.silence_threshold = speech, silence
+            logger.info("VAD re-calibrated: ambient=%.0f → speech=%.0f silence=%.0f",
+                        ambient, speech, silence)
+
+    # ── State machine ────────────────────────────────────────────────────────
+
+    def reset(self):
+        """Drop any partial utterance (e.g. while our own TTS is playing)."""
+        self._buf.clear()
+        self._preroll.clear()
+        self.recording = False
+        self._loud_streak = 0
+        self._silence_streak = 0
+        self._last_loud_ts = None
+        self._speech_end = 0
+
+    def pending(self) -> bytes:
+        """The utterance recorded so far (empty when not recording)."""
+        return bytes(self._buf)
+
+    @property
+    def pending_bytes(self) -> int:
+        return len(self._buf)
+
+    def feed(self, frame: bytes, now: Optional[float] = None) -> Optional[bytes]:
+        """Process one frame; returns the finished utterance, if this frame ended one."""
+        level = rms(frame)
+        self.last_rms = level
+        self.frames_seen += 1
+        loud = level > self.threshold
+
+        if not self.recording:
+            if self._ambient.size:
+                self._track_ambient(level)
+            self._loud_streak = self._loud_streak + 1 if loud else 0
+            if self._loud_streak < self.start_frames:
+                self._preroll.append(frame)
+                return None
+            # Speech started — keep the frames that led up to it
+            self.recording = True
+            self._silence_streak = 0
+            self._last_loud_ts = now
+            for earlier in self._preroll:
+                self._buf += earlier
+            self._preroll.clear()
+            self._buf += frame
+            self._speech_end = len(self._buf)
+            return None
+
+        if loud:
+            self._loud_streak += 1
+            self._silence_streak = 0
+            self._last_loud_ts = now
+        else:
+            self._loud_streak = 0
+            if level < self.silence_threshold:
+                self._silence_streak += 1
+        if loud or self.keep_quiet:
+            self._buf += frame
+        if loud:
+            self._speech_end = len(self._buf)
+
+        if now is not None and self._last_loud_ts is not None:
+            silent_long_enough = not loud and now - self._last_loud_ts >= self.silence_s
+        else:
+            silent_long_enough = self._silence_streak >= self._silence_frames
+        if silent_long_enough or len(self._buf) >= self._max_bytes:
+            return self._finish()
+        return None
+
+    def _finish(self) -> Optional[bytes]:
+        utterance = bytes(self._buf)
+        self.speech_bytes = self._speech_end
+        self._speech_end = 0
+        self._buf.clear()
+        self.recording = False
+        self._loud_streak = 0
+        self._silence_streak = 0
+        self._last_loud_ts = None
+        return utterance if len(utterance) >= self._min_bytes else None
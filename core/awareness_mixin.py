@@ -81,6 +81,15 @@ class AwarenessMixin:
             except Exception as e:
                 logger.debug("RAM watchdog error: %s", e)
 
+    async def _run_scheduled_task(self, task: dict) -> tuple[bool, str]:
+        """ScheduledTaskExecutor runner: built-ins directly, anything else as user input."""
+        cmd = task["command"]
+        if cmd.startswith("__") and cmd.endswith("__"):
+            from .scheduler import run_builtin
+            return await run_builtin(cmd, leon=self)
+        await self.process_user_input(cmd)
+        return True, "ok"
+
     async def _awareness_loop(self):
         """Continuously monitor active agents and update state."""
         logger.info("Awareness loop started")
@@ -91,6 +100,8 @@ class AwarenessMixin:
                 # Do NOT pre-clean failed agents here — that would bypass the retry logic.
                 agent_ids = list(self.agent_manager.active_agents.keys())
                 for agent_id in agent_ids:
+                    if not self.agent_manager.needs_check(agent_id):
+                        continue  # still running, within its timeout
                     status = await self.agent_manager.check_status(agent_id)
 
                     if status.get("retrying"):
@@ -287,43 +298,14 @@ class AwarenessMixin:
                     self._bridge_connected = False
                     self._right_brain_status = {}
 
-                # Check scheduled tasks
+                # Push memory changes to Right Brain (deltas since its last ack)
+                if self.brain_role == "left":
+                    await self._push_memory_sync()
+
+                # Start due scheduled tasks (they run in the background,
+                # limited per resource class by the executor)
                 if self.scheduler:
-                    due_tasks = self.scheduler.get_due_tasks()
-                    for sched_task in due_tasks:
-                        cmd = sched_task.get("command", "")
-                        if cmd:
-                            logger.info(f"Running scheduled task: {sched_task['name']} -> {cmd}")
-                            timeout_s = sched_task.get("max_runtime_minutes", 60) * 60
-                            try:
-                                if cmd.startswith("__") and cmd.endswith("__"):
-                                    # Built-in scheduler commands — dispatch directly
-                                    from .scheduler import run_builtin
-                                    success, msg = await asyncio.wait_for(
-                                        run_builtin(cmd, leon=self),
-                                        timeout=timeout_s,
-                                    )
-                                    if success:
-                                        self.scheduler.mark_completed(sched_task["name"])
-                                    else:
-                                        self.scheduler.mark_failed(sched_task["name"], msg)
-                                else:
-                                    await asyncio.wait_for(
-                                        self.process_user_input(cmd),
-                                        timeout=timeout_s,
-                                    )
-                                    self.scheduler.mark_completed(sched_task["name"])
-                            except asyncio.TimeoutError:
-                                _timeout_msg = (
-                                    f"Timed out after {sched_task.get('max_runtime_minutes', 60)}m"
-                                )
-                                logger.error(
-                                    f"Scheduled task timed out: {sched_task['name']} ({_timeout_msg})"
-                                )
-                                self.scheduler.mark_failed(sched_task["name"], _timeout_msg)
-                            except Exception as e:
-                                logger.error(f"Scheduled task failed: {sched_task['name']}: {e}")
-                                self.scheduler.mark_failed(sched_task["name"], str(e))
+                    self.scheduled_executor.dispatch_due()
 
                 # Watchdog: check agent resource usage
                 await self._watchdog_check()
@@ -408,4 +390,5 @@ class AwarenessMixin:
             except Exception as e:
                 logger.error(f"Awareness loop error: {e}")
 
-            await asyncio.sleep(10)
+            # Next tick in 10s, or as soon as a running agent exits
+            await self.agent_manager.wait_any(timeout=10)
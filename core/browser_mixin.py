@@ -8,12 +8,15 @@ All self.* references resolve through Leon's MRO at runtime.
 import asyncio
 import logging
 
+from .tracing import traced
+
 logger = logging.getLogger("leon")
 
 
 class BrowserMixin:
     """Browser automation and web search methods."""
 
+    @traced("web_search")
     async def _web_search(self, query: str) -> str:
         """
         Real web search via DuckDuckGo HTML — no API key, no browser, no Agent Zero.
@@ -0,0 +1,205 @@
+"""
+Leon Context Builder — token-budgeted memory context for LLM prompts.
+
+Every conversational turn used to paste all active tasks, all projects and
+every learned fact into the system prompt, plus the last 20 raw messages, so
+prompt size (latency, cost) grew with memory. Each section now has a token
+budget (SECTION_BUDGETS, estimated with router.model_router.estimate_tokens)
+and is cut to fit with a "(+N more)" marker:
+
+    context = ContextBuilder(memory)
+    context.section("tasks")            # rendered once per memory version
+    context.history(message)            # recent turns + relevant older ones
+    context.prompt_tokens(system, messages)
+
+Rendered sections are cached until memory.version (the memory log sequence
+number) changes — changes made through MemorySystem methods invalidate them.
+
+Conversation history keeps the newest RECENT_MESSAGES verbatim. Older turns
+from the last HISTORY_SCAN messages are only sent if they share words with the
+current message, best match first, each message clipped to
+OLDER_MESSAGE_TOKENS, within HISTORY_BUDGET. History is selected in
+exchanges (a user message and the replies to it) so roles stay paired.
+"""
+
+import json
+import logging
+import re
+from typing import Callable, Optional
+
+from router.model_router import estimate_tokens
+
+logger = logging.getLogger("leon")
+
+SECTION_BUDGETS = {
+    "tasks": 600,            # active tasks
+    "projects": 300,         # known projects with status
+    "project_names": 150,    # known project names (request analysis)
+    "learned": 600,          # what Leon has learned about the user
+}
+LINE_MAX_CHARS = 300         # one task / fact longer than this is clipped
+HISTORY_BUDGET = 3000        # tokens of conversation history per request
+HISTORY_SCAN = 40            # how far back older turns are considered
+RECENT_MESSAGES = 8          # newest messages always sent (budget permitting)
+OLDER_MESSAGE_TOKENS = 200   # older turns are clipped to this
+
+_WORD = re.compile(r"[a-z0-9][a-z0-9'_-]+")
+_STOPWORDS = frozenset({
+    "the", "and", "for", "you", "your", "are", "was", "were", "this", "that",
+    "with", "what", "can", "could", "would", "should", "have", "has", "had",
+    "not", "but", "its", "it's", "i'm", "let", "get", "got", "just", "now",
+    "how", "why", "when", "where", "who", "from", "about", "into", "out",
+    "our", "all", "any", "some", "then", "than", "them", "they", "there",
+    "here", "will", "did", "does", "yes", "yeah", "okay", "please", "leon",
+})
+
+
+def _clip(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+
+def _words(text: str) -> set:
+    return {w for w in _WORD.findall(text.lower()) if w not in _STOPWORDS}
+
+
+def fit_lines(lines: list[str], budget: int, sep: str = "\n") -> str:
+    """Join lines in order while they fit in `budget` tokens, noting how many were left out."""
+    kept: list[str] = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line + sep) or 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    if len(kept) < len(lines):
+        kept.append(f"(+{len(lines) - len(kept)} more)")
+    return sep.join(kept)
+
+
+class ContextBuilder:
+    """Renders memory into prompt sections within per-section token budgets."""
+
+    def __init__(
+        self,
+        memory,
+        budgets: Optional[dict] = None,
+        history_budget: int = HISTORY_BUDGET,
+    ):
+        self.memory = memory
+        self.budgets = {**SECTION_BUDGETS, **(budgets or {})}
+        self.history_budget = history_budget
+        self._renderers: dict[str, Callable[[], str]] = {
+            "tasks": self._render_tasks,
+            "projects": self._render_projects,
+            "project_names": self._render_project_names,
+            "learned": self._render_learned,
+        }
+        self._cache: dict[str, tuple] = {}   # name → (memory version, text)
+
+    # ── Sections ─────────────────────────────────────────────────────────────
+
+    def section(self, name: str) -> str:
+        """Rendered section `name`, from cache if memory hasn't changed since."""
+        version = getattr(self.memory, "version", None)
+        if not isinstance(version, int):   # no change feed — render every time
+            return self._renderers[name]()
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        text = self._renderers[name]()
+        self._cache[name] = (version, text)
+        return text
+
+    def _render_tasks(self) -> str:
+        tasks = self.memory.get_all_active_tasks()
+        if not tasks:
+            return "None"
+        lines = []
+        for task in tasks.values():
+            if not isinstance(task, dict):
+                lines.append(_clip(json.dumps(task, default=str), LINE_MAX_CHARS))
+                continue
+            meta = [str(task[k]) for k in ("project", "status") if task.get(k)]
+            if task.get("started_at"):
+                meta.append(f"since {str(task['started_at'])[:16]}")
+            line = str(task.get("description", "")) + (f" [{', '.join(meta)}]" if meta else "")
+            lines.append("- " + _clip(line, LINE_MAX_CHARS))
+        return "\n" + fit_lines(lines, self.budgets["tasks"])
+
+    def _render_projects(self) -> str:
+        projects = self.memory.list_projects()
+        if not projects:
+            return "None"
+        lines = [f"{p['name']} ({p.get('status') or 'unknown'})" for p in projects]
+        return fit_lines(lines, self.budgets["projects"], sep=", ")
+
+    def _render_project_names(self) -> str:
+        projects = self.memory.list_projects()
+        if not projects:
+            return "None"
+        return fit_lines([p["name"] for p in projects], self.budgets["project_names"], sep=", ")
+
+    def _render_learned(self) -> str:
+        learned = self.memory.memory.get("learned_context", {})
+        if not learned:
+            return "None"
+        lines = [_clip(f"  {k}: {v}", LINE_MAX_CHARS) for k, v in learned.items()]
+        return fit_lines(lines, self.budgets["learned"])
+
+    # ── Conversation history ─────────────────────────────────────────────────
+
+    def history(self, message: str) -> list[dict]:
+        """
+        Messages to send for a turn answering `message` (already the last entry
+        of the conversation history), oldest first.
+        """
+        recent = self.memory.get_recent_context(limit=HISTORY_SCAN)
+        exchanges: list[list[dict]] = []
+        for m in recent:
+            entry = {"role": m["role"], "content": m["content"]}
+            if not exchanges or m["role"] == "user":
+                exchanges.append([entry])
+            else:
+                exchanges[-1].append(entry)
+
+        chosen: dict[int, list[dict]] = {}
+        used = 0
+        n_recent = 0
+        # Newest exchanges verbatim; the latest one is sent whatever its size
+        for i in range(len(exchanges) - 1, -1, -1):
+            if n_recent >= RECENT_MESSAGES:
+                break
+            cost = sum(estimate_tokens(m["content"]) for m in exchanges[i])
+            if chosen and used + cost > self.history_budget:
+                break
+            chosen[i] = exchanges[i]
+            used += cost
+            n_recent += len(exchanges[i])
+
+        # Older exchanges by relevance to the current message, clipped
+        topic = _words(message)
+        older_max_chars = OLDER_MESSAGE_TOKENS * 4
+        scored = []
+        for i, exchange in enumerate(exchanges[:min(chosen, default=0)]):
+            score = len(topic & _words(" ".join(m["content"] for m in exchange)))
+            if score:
+                scored.append((score, i))
+        for _, i in sorted(scored, reverse=True):
+            clipped = [{**m, "content": _clip(m["content"], older_max_chars)} for m in exchanges[i]]
+            cost = sum(estimate_tokens(m["content"]) for m in clipped)
+            if used + cost > self.history_budget:
+                continue
+            chosen[i] = clipped
+            used += cost
+
+        return [m for i in sorted(chosen) for m in chosen[i]]
+
+    # ── Accounting ───────────────────────────────────────────────────────────
+
+    @staticmethod
+    def prompt_tokens(system: str, messages: list[dict]) -> dict:
+        history = sum(estimate_tokens(m["content"]) for m in messages)
+        system_tokens = estimate_tokens(system)
+        return {"system": system_tokens, "history": history, "total": system_tokens + history,
+                "messages": len(messages)}
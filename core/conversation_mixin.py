@@ -6,12 +6,16 @@ Extracted from leon.py (Issue #19) to reduce the main module's size and
 centralise all conversation-processing concerns.
 """
 
-import json
 import logging
 import re
+import time
 from datetime import datetime
 from typing import Optional
 
+from .context_builder import ContextBuilder
+from .safe_tasks import create_safe_task
+from .tracing import span, traced
+
 logger = logging.getLogger("leon")
 
 
@@ -84,6 +88,10 @@ def _is_trivial_conversation(msg: str) -> bool:
     return False
 
 
+# A prefetched analysis (see prefetch_analysis) older than this is not reused
+_PREFETCH_TTL_S = 30.0
+
+
 class ConversationMixin:
     """Methods for processing user conversations and generating responses.
 
@@ -98,23 +106,31 @@ class ConversationMixin:
         self.permissions        (optional)
     """
 
+    # ------------------------------------------------------------------
+    # Prompt context
+    # ------------------------------------------------------------------
+
+    def _context_builder(self) -> ContextBuilder:
+        """Per-instance ContextBuilder (sections cached across turns)."""
+        builder = getattr(self, "_context", None)
+        if builder is None or builder.memory is not self.memory:
+            builder = self._context = ContextBuilder(self.memory)
+        return builder
+
     # ------------------------------------------------------------------
     # Request analysis
     # ------------------------------------------------------------------
 
+    @traced("analyze_request")
     async def _analyze_request(self, message: str) -> Optional[dict]:
         """Use the API to classify and decompose the user's request."""
-        # Build context from memory
-        active_tasks = self.memory.get_all_active_tasks()
-        projects = self.memory.list_projects()
-        project_names = [p['name'] for p in projects] if projects else []
-
+        context = self._context_builder()
         prompt = f"""Analyze this user request and classify it.
 
 User message: "{message}"
 
-Current active tasks: {json.dumps(list(active_tasks.values()), default=str) if active_tasks else "None"}
-Known projects: {json.dumps(project_names) if project_names else "None"}
+Current active tasks: {context.section("tasks")}
+Known projects: {context.section("project_names")}
 
 Respond with ONLY valid JSON (no markdown fences):
 {{
@@ -135,42 +151,75 @@ Rules:
 
 For "plan" type, set plan_goal to a precise one-line description of what should be achieved, and plan_project to the most relevant known project name (or 'unknown')."""
 
-        result = await self.api.analyze_json(prompt)
+        tokens = context.prompt_tokens("", [{"role": "user", "content": prompt}])
+        logger.info("Analysis prompt: ~%d tokens", tokens["total"])
+
+        with span("llm_analyze", prompt_tokens=tokens["total"]):
+            result = await self.api.analyze_json(prompt)
         if result:
             logger.info(f"Analysis: type={result.get('type')}, tasks={len(result.get('tasks', []))}")
         return result
 
+    def prefetch_analysis(self, message: str):
+        """
+        Start classifying a message that is about to arrive — voice partials
+        (VoiceSystem.on_partial_command) call this before end-of-speech, so the
+        LLM round trip overlaps the user's trailing silence. Only the latest
+        prefetch is kept; _analysis_for() uses it if the final text matches.
+        Must be called on the main event loop.
+        """
+        from .stt_stream import normalized
+        key = normalized(message)
+        pending = getattr(self, "_prefetched_analysis", None)
+        if pending is not None:
+            if pending[0] == key:
+                return
+            pending[1].cancel()
+            self._prefetched_analysis = None
+        if not key or _is_trivial_conversation(message):
+            return  # the trivial fast path never classifies
+        task = create_safe_task(self._analyze_request(message), name="analysis-prefetch")
+        self._prefetched_analysis = (key, task, time.monotonic())
+
+    async def _analysis_for(self, message: str) -> Optional[dict]:
+        """_analyze_request(message), reusing a matching prefetch if there is one."""
+        pending = getattr(self, "_prefetched_analysis", None)
+        self._prefetched_analysis = None
+        if pending is not None:
+            from .stt_stream import normalized
+            key, task, started = pending
+            fresh = time.monotonic() - started < _PREFETCH_TTL_S
+            if key == normalized(message) and fresh and not task.cancelled():
+                with span("analyze_request_prefetched"):
+                    return await task
+            task.cancel()
+        return await self._analyze_request(message)
+
     # ------------------------------------------------------------------
     # Conversational response
     # ------------------------------------------------------------------
 
+    @traced("respond_conversationally")
     async def _respond_conversationally(self, message: str) -> str:
         """Direct API response for simple queries - no agent needed."""
         logger.info("Responding conversationally")
 
-        # Build context
-        recent = self.memory.get_recent_context(limit=20)
-        active = self.memory.get_all_active_tasks()
-        projects = self.memory.list_projects()
-
-        # Inject memory context into system prompt
+        # Memory sections are budgeted and cached per memory version
+        context = self._context_builder()
         vision_desc = self.vision.describe_scene() if self.vision and self.vision._running else "Vision inactive"
 
-        learned = self.memory.memory.get("learned_context", {})
-        learned_str = "\n".join(f"  {k}: {v}" for k, v in learned.items()) if learned else "None"
-
         now = datetime.now()
         context_block = f"""
 ## Current Time
 {now.strftime("%A, %B %d, %Y — %I:%M %p %Z")} (user is in Florida, Eastern Time)
 
 ## Current State
-Active tasks: {json.dumps(list(active.values()), default=str) if active else "None"}
-Known projects: {json.dumps([{{'name': p['name'], 'status': p.get('status')}} for p in projects], default=str) if projects else "None"}
+Active tasks: {context.section("tasks")}
+Known projects: {context.section("projects")}
 Vision: {vision_desc}
 
 ## What I know about the user
-{learned_str}
+{context.section("learned")}
 
 ## HARD RULES — Never break these in any response
 - NEVER present a numbered list of options asking the user to choose. Pick and act.
@@ -180,12 +229,14 @@ Vision: {vision_desc}
 - The only question allowed is "Anything else?" after completing something.
 """
 
-        messages = [{"role": m["role"], "content": m["content"]} for m in recent]
+        messages = context.history(message)
+        system = self.system_prompt + context_block
+        tokens = context.prompt_tokens(system, messages)
+        logger.info("Prompt: ~%d tokens (system %d, history %d in %d messages)",
+                    tokens["total"], tokens["system"], tokens["history"], tokens["messages"])
 
-        return await self.api.create_message(
-            system=self.system_prompt + context_block,
-            messages=messages,
-        )
+        with span("llm_respond", prompt_tokens=tokens["total"]):
+            return await self.api.create_message(system=system, messages=messages)
 
     # ------------------------------------------------------------------
     # Memory extraction
@@ -216,6 +267,7 @@ Vision: {vision_desc}
     # Permission checks
     # ------------------------------------------------------------------
 
+    @traced("permission_check")
     def _check_sensitive_permissions(self, message: str) -> Optional[str]:
         """Check if the message requests a sensitive action that needs approval."""
         msg = message.lower()
@@ -0,0 +1,169 @@
+r"""
+Leon Keyword Router — compiled first-match routing tables.
+
+Routing used to try every entry of a table in order: a list of regexes for the
+system-skill pre-router, and chains of `any(p in msg for p in [...])` in
+_route_special_commands. KeywordRouter compiles an ordered table once:
+
+    router = KeywordRouter([
+        (("night mode on", "keep working"), "night_mode_on"),    # substrings
+        (re.compile(r'\bcpu\s+(?:usage|load)\b'), ("cpu_usage", {})),  # regex
+    ])
+    router.first("keep working on it")    # -> "night_mode_on"
+    router.matches(text)                  # every matching value, in table order
+
+Each route is reduced to literals: the phrases themselves, or for a regex the
+strings one of which occurs in every match (taken from the parsed pattern).
+All literals go into one prefix-trie regex, so a single scan over the text
+finds which routes can match. Phrase routes are decided by that scan; regex
+routes are confirmed with their own pattern, in table order, so the result is
+exactly what trying the table entry by entry would give. Regexes whose literals
+can't be derived (IGNORECASE, no required text) are always confirmed.
+
+Text is matched as given — callers lowercase it, as the tables assume.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Iterable, Optional
+
+try:
+    from re import _parser as _sre_parse   # Python 3.11+
+except ImportError:                         # pragma: no cover
+    import sre_parse as _sre_parse
+
+SCAN_CACHE_SIZE = 256   # Recent texts whose matches are remembered (same message, several callers)
+
+
+def required_literals(pattern: re.Pattern) -> Optional[frozenset]:
+    """
+    Strings one of which occurs in every match of pattern, or None if none can
+    be derived. Conservative: only mandatory literal runs count.
+    """
+    if pattern.flags & re.IGNORECASE:
+        return None
+    try:
+        parsed = _sre_parse.parse(pattern.pattern, pattern.flags)
+    except Exception:
+        return None
+    return _sequence_literals(list(parsed))
+
+
+def _sequence_literals(items: list) -> Optional[frozenset]:
+    candidates = []
+    run: list[str] = []
+
+    def close_run():
+        if run:
+            candidates.append(frozenset(["".join(run)]))
+            run.clear()
+
+    for op, av in items:
+        if op is _sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        if op in (_sre_parse.AT, _sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+            continue  # zero-width: the literal run stays contiguous
+        close_run()
+        if op is _sre_parse.SUBPATTERN:
+            sub = _sequence_literals(list(av[-1]))
+        elif op is _sre_parse.BRANCH:
+            branches = [_sequence_literals(list(b)) for b in av[1]]
+            sub = None if any(b is None for b in branches) else frozenset().union(*branches)
+        elif op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT) and av[0] >= 1:
+            sub = _sequence_literals(list(av[2]))
+        else:
+            sub = None
+        if sub:
+            candidates.append(sub)
+    close_run()
+    if not candidates:
+        return None
+    # Most selective set: the one whose shortest literal is longest
+    return max(candidates, key=lambda s: (min(map(len, s)), -len(s)))
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching the longest of words at a position (shared prefixes factored)."""
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class KeywordRouter:
+    """
+    Ordered (matcher, value) table compiled for one-pass classification.
+    A matcher is a phrase, a tuple/list/set of phrases (substring match) or a
+    compiled regex (search).
+    """
+
+    def __init__(self, routes: list[tuple[Any, Any]], cache_size: int = SCAN_CACHE_SIZE):
+        self.values = [value for _, value in routes]
+        self._regexes: list[Optional[re.Pattern]] = []
+        self._always: list[int] = []           # regex routes with no usable literal
+        by_literal: dict[str, set[int]] = {}
+        for index, (matcher, _) in enumerate(routes):
+            if isinstance(matcher, re.Pattern):
+                self._regexes.append(matcher)
+                literals = required_literals(matcher)
+            else:
+                self._regexes.append(None)
+                literals = {matcher} if isinstance(matcher, str) else set(matcher)
+                if not all(literals):
+                    raise ValueError(f"Route {index} has an empty phrase")
+            if not literals:
+                self._always.append(index)
+                continue
+            for literal in literals:
+                by_literal.setdefault(literal, set()).add(index)
+
+        # A literal found at some position implies every literal that is a prefix of it
+        self._routes_for: dict[str, tuple[int, ...]] = {}
+        for literal in by_literal:
+            indices = set()
+            for end in range(1, len(literal) + 1):
+                indices |= by_literal.get(literal[:end], set())
+            self._routes_for[literal] = tuple(sorted(indices))
+        self._scanner = (
+            re.compile(f"(?=({_trie_pattern(by_literal)}))") if by_literal else None
+        )
+        self._cached_candidates = lru_cache(maxsize=cache_size)(self._candidates)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def _candidates(self, text: str) -> tuple[int, ...]:
+        """Indices of routes whose literals occur in text, in table order."""
+        found = set(self._always)
+        if self._scanner is not None:
+            for literal in {m.group(1) for m in self._scanner.finditer(text)}:
+                found.update(self._routes_for[literal])
+        return tuple(sorted(found))
+
+    def _indices(self, text: str):
+        for index in self._cached_candidates(text):
+            regex = self._regexes[index]
+            if regex is None or regex.search(text):
+                yield index
+
+    def first(self, text: str, default: Any = None) -> Any:
+        """Value of the first route (in table order) that matches text."""
+        for index in self._indices(text):
+            return self.values[index]
+        return default
+
+    def matches(self, text: str) -> list:
+        """Values of every route that matches text, in table order."""
+        return [self.values[index] for index in self._indices(text)]
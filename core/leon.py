@@ -23,13 +23,14 @@ from .memory import MemorySystem
 from .agent_manager import AgentManager
 from .task_queue import TaskQueue
 from .agent_index import AgentIndex
-from .scheduler import TaskScheduler
+from .scheduler import ScheduledTaskExecutor, TaskScheduler
+from .tracing import span, trace
 from .openclaw_interface import OpenClawInterface
 from .api_client import AnthropicAPI
 from .neural_bridge import (
     BridgeServer, BridgeMessage, ensure_bridge_certs,
     MSG_TASK_DISPATCH, MSG_TASK_STATUS, MSG_TASK_RESULT,
-    MSG_STATUS_REQUEST, MSG_STATUS_RESPONSE, MSG_MEMORY_SYNC,
+    MSG_STATUS_REQUEST, MSG_STATUS_RESPONSE, MSG_MEMORY_SYNC, MSG_MEMORY_ACK,
 )
 from .system_skills import SystemSkills
 from .hotkey_listener import HotkeyListener
@@ -38,7 +39,7 @@ from .notifications import NotificationManager, Priority
 from .project_watcher import ProjectWatcher
 from .night_mode import NightMode
 from .plan_mode import PlanMode
-from .routing_mixin import RoutingMixin
+from .routing_mixin import RoutingMixin, special_command_hits
 from .browser_mixin import BrowserMixin
 from .task_mixin import TaskMixin
 from .awareness_mixin import AwarenessMixin
@@ -215,8 +216,11 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
         self.agent_manager = AgentManager(self.openclaw, self.config["agents"])
         self.task_queue = TaskQueue(self.config["agents"]["max_concurrent"])
         self.agent_index = AgentIndex("data/agent_index.json")
-        scheduler_tasks = self.config.get("scheduler", {}).get("tasks", [])
-        self.scheduler = TaskScheduler(scheduler_tasks)
+        scheduler_cfg = self.config.get("scheduler", {})
+        self.scheduler = TaskScheduler(scheduler_cfg.get("tasks", []))
+        self.scheduled_executor = ScheduledTaskExecutor(
+            self.scheduler, self._run_scheduled_task, scheduler_cfg.get("concurrency"),
+        )
 
         # API client — try vault for API key if env var is empty
         self.api = AnthropicAPI(self.config["api"], vault=self.vault)
@@ -305,7 +309,13 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
         if _vision_enabled:
             try:
                 from vision.vision import VisionSystem
-                self.vision = VisionSystem(api_client=self.api, analysis_interval=3.0)
+                vision_cfg = self.config.get("vision", {})
+                self.vision = VisionSystem(
+                    api_client=self.api,
+                    analysis_interval=vision_cfg.get("analysis_interval", 3.0),
+                    max_idle_interval=vision_cfg.get("max_idle_interval", 300.0),
+                    contact_sheet=vision_cfg.get("contact_sheet", 0),
+                )
             except Exception as e:
                 logger.warning(f"Vision module not available: {e}")
                 self.vision = None
@@ -352,6 +362,7 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
             api_client=self.api,
             on_insight=self._handle_screen_insight,
             interval=self.config.get("system", {}).get("screen_interval", 30),
+            change_threshold=self.config.get("system", {}).get("screen_change_threshold", 12.0),
         )
 
         # Brain role: unified (single PC), left (main PC), right (homelab)
@@ -364,6 +375,7 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
         self.bridge: Optional[BridgeServer] = None
         self._bridge_connected = False
         self._right_brain_status: dict = {}
+        self._memory_peer_version: Optional[int] = None  # Right Brain's memory version (None = unknown)
         if self.brain_role == "left":
             bridge_config = self.config.get("bridge", {})
             # Load bridge token from env var or vault
@@ -389,6 +401,7 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
             self.bridge = BridgeServer(bridge_config)
             self.bridge.on(MSG_TASK_STATUS, self._handle_remote_task_status)
             self.bridge.on(MSG_TASK_RESULT, self._handle_remote_task_result)
+            self.bridge.on(MSG_MEMORY_ACK, self._handle_memory_ack)
 
         # Feature detection — set flags for optional components
         self._openclaw_available = (Path.home() / ".openclaw" / "bin" / "openclaw").exists()
@@ -514,7 +527,7 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
             create_safe_task(_resume_night(), name="resume-night-mode")
 
         # Clear stale active_tasks — any tasks from previous Leon process are dead
-        self.memory.memory["active_tasks"] = {}
+        self.memory.clear_active_tasks()
         self.memory.save(force=True)
         logger.info("Cleared stale active_tasks from memory on startup")
 
@@ -628,6 +641,7 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
                 tasks_to_cancel.append(task)
         if tasks_to_cancel:
             await asyncio.gather(*tasks_to_cancel, return_exceptions=True)
+        await self.scheduled_executor.shutdown()
         if self.vision:
             self.vision.stop()
         if self.hotkey_listener:
@@ -719,7 +733,12 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
         """
         Main entry point for user messages.
         Decides whether to respond directly or spawn agents.
+        Each call is traced (stage timings → logs_structured/traces.jsonl, /api/perf).
         """
+        with trace("process_user_input", chars=len(message)):
+            return await self._process_user_input(message)
+
+    async def _process_user_input(self, message: str) -> str:
         logger.info(f"User: {message[:80]}...")
         self.memory.add_conversation(message, role="user")
 
@@ -740,15 +759,14 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
         # Pre-router: lights — fast path, no LLM needed
         # Skip if message is clearly an auto/night mode or task command — "lab" in those
         # messages would otherwise fuzzy-match "lab ceiling" and trigger the light.
-        _is_mode_cmd = any(p in message.lower() for p in [
-            "auto mode", "night mode", "work on this", "work on this:", "queue task",
-            "add task", "keep working", "keep going", "keep coding", "start auto",
-            "enable auto", "coding mode", "go autonomous",
-        ])
+        # (phrases: the "mode_command" entry of routing_mixin._SPECIAL_ROUTES; the scan
+        # is cached, so _route_special_commands reuses it for this message)
+        _is_mode_cmd = "mode_command" in special_command_hits(message.lower())
         if not _is_mode_cmd:
             try:
                 from tools.lights import parse_and_execute as _lights_parse
-                _light_resp = _lights_parse(message)
+                with span("lights_prerouter"):
+                    _light_resp = _lights_parse(message)
                 if _light_resp is not None:
                     self.memory.add_conversation(_light_resp, role="assistant")
                     return _light_resp
@@ -765,7 +783,9 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
             r'web\s+search|search\s+online)\b',
             _re.IGNORECASE,
         )
-        if _SEARCH_PRE.search(message):
+        with span("search_prerouter"):
+            _search_hit = _SEARCH_PRE.search(message)
+        if _search_hit:
             # Strip the search verb to get the actual query
             _query = _re.sub(
                 r'\b(look\s+it\s+up|look\s+up|google\s+(?:it|that)?|search\s+(?:for|the\s+web|online)?|'
@@ -780,7 +800,9 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
 
         # Pre-router: trivial conversation — skip both classify + route
         # Saves 2 LLM calls (~2s) for greetings, thanks, reactions, etc.
-        if _is_trivial_conversation(message):
+        with span("trivial_check"):
+            _trivial = _is_trivial_conversation(message)
+        if _trivial:
             logger.info("Conversational fast path — skipping classify + route")
             response = await self._respond_conversationally(message)
             response = self._strip_sir(response)
@@ -789,7 +811,7 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
             return response
 
         # Analyze what the user wants
-        analysis = await self._analyze_request(message)
+        analysis = await self._analysis_for(message)   # may already be running (voice partials)
 
         # Plan mode — LLM detected a large autonomous build goal
         if analysis and analysis.get("type") == "plan":
@@ -1159,13 +1181,8 @@ class Leon(RoutingMixin, BrowserMixin, TaskMixin, AwarenessMixin, ReminderMixin,
                     )
                 completed = dict(task_obj)
                 completed.update({"status": result["status"], "job_id": result["job_id"]})
-                task_list = self.memory.memory.setdefault("completed_tasks", [])
-                if isinstance(task_list, dict):
-                    # Migrate legacy dict → list
-                    self.memory.memory["completed_tasks"] = list(task_list.values())
-                    task_list = self.memory.memory["completed_tasks"]
-                task_list.append(completed)
-                self.memory.memory.get("active_tasks", {}).pop(job_id_preview, None)
+                self.memory.append_completed_task(completed)  # migrates legacy dict-shaped lists
+                self.memory.remove_active_task(job_id_preview)
                 self.memory.save()
             except Exception as exc:
                 logger.exception("Agent Zero background job failed: %s", exc)
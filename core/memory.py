@@ -1,21 +1,103 @@
 """
 Leon Memory System - Persistent context across all sessions
+
+Storage: data/leon_memory.json is a snapshot of the whole memory; mutations
+made through MemorySystem methods are appended to a write-ahead log
+(data/leon_memory.wal/<first_seq>.jsonl, one record per save) instead of
+rewriting the snapshot. Once the log passes _WAL_COMPACT_BYTES a new snapshot is
+written in a background thread and the log segments it covers are deleted.
+Loading reads the snapshot and replays the records after its sequence number.
+
+Code that mutates `memory.memory` directly (not via a method) is persisted by
+the next snapshot: save() schedules one after _SAVE_DEBOUNCE_SECONDS, and
+save(force=True) / flush_if_dirty() write one immediately.
+
+Change feed: the log sequence number is the memory's version. The last
+_CHANGE_LOG_RECORDS records are also kept in memory, so sync_payload() can
+send a peer (the Right Brain's MemoryReplica) only what changed since the
+version it acknowledged. It sends a full copy only when that version has
+dropped out of the log. Direct mutations are not in the feed, so code
+outside this class should call its methods.
 """
 
+import fcntl
 import json
 import os
 import time
 import uuid
 import shutil
 import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 logger = logging.getLogger("leon.memory")
 
-_SAVE_DEBOUNCE_SECONDS = 5  # Minimum interval between disk writes
+_SAVE_DEBOUNCE_SECONDS = 5   # Minimum interval between snapshots for unlogged changes
 _BACKUP_COUNT = 3            # Number of rotated backups to keep
+_WAL_COMPACT_BYTES = 256 * 1024  # Log size that triggers a background snapshot
+_SEQ_KEY = "_wal_seq"        # Last log record contained in a snapshot
+_CHANGE_LOG_RECORDS = 2000   # Log records kept in memory for delta sync
+
+
+class MemoryReplica:
+    """
+    Read-only copy of a peer's memory, kept current from
+    MemorySystem.sync_payload() messages (the Right Brain's view of the
+    Left Brain's memory).
+    """
+
+    def __init__(self):
+        self.data: dict = {}
+        self.version: Optional[int] = None
+
+    def apply(self, payload: dict) -> bool:
+        """
+        Apply a sync payload. Returns False when a delta does not start at
+        this replica's version — acknowledge self.version so the sender
+        resends from there.
+        """
+        mode = payload.get("mode")
+        if mode == "full":
+            self.data = payload.get("memory") or {}
+            self.version = payload.get("version", 0)
+            return True
+        if mode != "delta" or self.version is None or payload.get("base", -1) > self.version:
+            return False
+        for record in payload.get("changes", []):
+            if record["seq"] <= self.version:
+                continue  # already applied
+            for op in record["ops"]:
+                _apply_op(self.data, op)
+            self.version = record["seq"]
+        return True
+
+
+def _apply_op(data: dict, op: dict):
+    """Apply one logged mutation: set / del / append (trimmed to `keep`) at a key path."""
+    *parents, last = op["path"]
+    node = data
+    for key in parents:
+        node = node.setdefault(key, {})
+    kind = op["op"]
+    if kind == "set":
+        node[last] = op["value"]
+    elif kind == "del":
+        node.pop(last, None)
+    elif kind == "append":
+        items = node.get(last)
+        if isinstance(items, dict):
+            items = list(items.values())  # legacy dict-shaped lists (completed_tasks)
+        elif not isinstance(items, list):
+            items = []
+        items.append(op["value"])
+        keep = op.get("keep")
+        if keep and len(items) > keep:
+            del items[:-keep]
+        node[last] = items
 
 
 class MemorySystem:
@@ -24,8 +106,19 @@ class MemorySystem:
     def __init__(self, memory_file: str = "data/leon_memory.json"):
         self.memory_file = Path(memory_file)
         self.memory_file.parent.mkdir(parents=True, exist_ok=True)
+        self.wal_dir = self.memory_file.with_suffix(".wal")
         self._dirty = False
         self._last_save_time = 0.0
+        self._lock = threading.RLock()      # pending ops, sequence numbers, active segment
+        self._io_lock = threading.Lock()    # snapshot writes
+        self._pending: list = []            # ops applied in memory but not yet logged
+        self._seq = 0                       # last log sequence number assigned
+        self._segment: Optional[Path] = None
+        self._wal_bytes = 0
+        self._captures = 0                  # snapshot generation counter
+        self._written_capture = 0
+        self._compactor: Optional[threading.Thread] = None
+        self._changes: deque = deque(maxlen=_CHANGE_LOG_RECORDS)  # (seq, record json)
         self.memory = self._load()
         logger.info(f"Memory loaded: {len(self.memory.get('ongoing_projects', {}))} projects tracked")
 
@@ -37,7 +130,31 @@ class MemorySystem:
         """Return the path for backup slot *n* (1-based)."""
         return self.memory_file.with_suffix(f".bak{n}")
 
+    @contextmanager
+    def _store_lock(self):
+        """Exclusive lock (across processes and instances) on the snapshot + log pair.
+
+        Held while loading and while replacing the snapshot and deleting the
+        log segments it covers; otherwise a loader could read the previous
+        snapshot and then find those segments already gone.
+        """
+        with open(self.memory_file.with_suffix(".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
     def _load(self) -> dict:
+        with self._store_lock():
+            data = self._load_snapshot()
+            if not isinstance(data, dict):
+                data = self._empty()
+            self._seq = int(data.pop(_SEQ_KEY, 0) or 0)
+            self._replay(data)
+        return data
+
+    def _load_snapshot(self) -> dict:
         # Try the primary file first
         if self.memory_file.exists():
             try:
@@ -61,37 +178,126 @@ class MemorySystem:
         logger.warning("No valid memory file or backup found, starting fresh")
         return self._empty()
 
-    def save(self, force: bool = False):
-        """Persist memory state to disk with debouncing.
+    def _segments(self) -> list:
+        """WAL segment files, oldest first (named by their first sequence number)."""
+        if not self.wal_dir.is_dir():
+            return []
+        return sorted(self.wal_dir.glob("*.jsonl"))
 
-        Writes are debounced to at most once every _SAVE_DEBOUNCE_SECONDS
-        to avoid excessive I/O on high-frequency updates. Use force=True
-        to bypass debouncing (e.g., on shutdown).
-        """
-        now = time.monotonic()
-        if not force and (now - self._last_save_time) < _SAVE_DEBOUNCE_SECONDS:
+    def _replay(self, data: dict):
+        """Apply log records newer than the snapshot to `data`."""
+        replayed = 0
+        for segment in self._segments():
+            try:
+                self._wal_bytes += segment.stat().st_size
+                lines = segment.read_text().splitlines()
+            except OSError as e:
+                logger.warning("Unreadable memory log segment %s: %s", segment.name, e)
+                continue
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                    seq = int(record["seq"])
+                    ops = record["ops"]
+                except (ValueError, KeyError, TypeError):
+                    # Torn write from a crash mid-append
+                    logger.warning("Skipping damaged record in memory log %s", segment.name)
+                    continue
+                if seq <= self._seq:
+                    continue
+                for op in ops:
+                    _apply_op(data, op)
+                self._seq = seq
+                self._changes.append((seq, line))
+                replayed += 1
+        if replayed:
             self._dirty = True
+            logger.info(f"Replayed {replayed} memory log record(s)")
+
+    def _mutate(self, op: str, path: list, value=None, keep: Optional[int] = None):
+        """Apply a mutation to self.memory and queue it for the log."""
+        entry = {"op": op, "path": path}
+        if op != "del":
+            entry["value"] = value
+        if keep:
+            entry["keep"] = keep
+        with self._lock:
+            _apply_op(self.memory, entry)
+            self._pending.append(entry)
+
+    def _append_log(self) -> bool:
+        """Write pending ops as one log record. Caller holds self._lock."""
+        if not self._pending:
+            return False
+        self._seq += 1
+        record = json.dumps({"seq": self._seq, "ts": time.time(), "ops": self._pending}, default=str)
+        self._pending = []
+        if self._segment is None:
+            self.wal_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            self._segment = self.wal_dir / f"{self._seq:012d}.jsonl"
+        with open(self._segment, "a") as f:
+            f.write(record + "\n")
+        self._wal_bytes += len(record) + 1
+        self._changes.append((self._seq, record))
+        return True
+
+    def save(self, force: bool = False):
+        """Persist memory state.
+
+        Mutations made through MemorySystem methods are appended to the log
+        immediately. A snapshot is written in the background once the log
+        passes _WAL_COMPACT_BYTES, or — for changes made directly on
+        self.memory, which the log cannot see — at most once every
+        _SAVE_DEBOUNCE_SECONDS. Use force=True to write a snapshot now
+        (e.g., on shutdown).
+        """
+        if force:
+            self._flush()
             return
-        self._flush()
+        with self._lock:
+            logged = self._append_log()
+            self._dirty = True
+            elapsed = time.monotonic() - self._last_save_time
+            compact = self._wal_bytes >= _WAL_COMPACT_BYTES or (
+                not logged and elapsed >= _SAVE_DEBOUNCE_SECONDS
+            )
+        if compact:
+            self._compact_async()
 
     def _rotate_backups(self):
-        """Rotate backup files: .bak3 is deleted, .bak2→.bak3, .bak1→.bak2, current→.bak1."""
+        """Rotate backups: .bak3 is dropped, .bak2→.bak3, .bak1→.bak2, current→.bak1.
+
+        Hard links, so no file contents are copied. Snapshots are always replaced
+        (never rewritten in place), so a backup keeps the old inode.
+        """
+        def link(src: Path, dst: Path):
+            dst.unlink(missing_ok=True)
+            try:
+                os.link(src, dst)
+            except OSError:
+                shutil.copy2(str(src), str(dst))  # filesystem without hard links
+
         try:
             # Shift older backups down (3 is oldest, gets dropped)
             for i in range(_BACKUP_COUNT, 1, -1):
                 src = self._backup_path(i - 1)
-                dst = self._backup_path(i)
                 if src.exists():
-                    shutil.copy2(str(src), str(dst))
+                    link(src, self._backup_path(i))
 
             # Current → .bak1 (only if current exists and is valid)
             if self.memory_file.exists() and self.memory_file.stat().st_size > 2:
-                shutil.copy2(str(self.memory_file), str(self._backup_path(1)))
+                link(self.memory_file, self._backup_path(1))
         except OSError as e:
             logger.warning("Backup rotation failed (non-fatal): %s", e)
 
-    def _flush(self):
-        """Immediately write memory to disk (atomic write with backup rotation)."""
+    def _capture(self) -> tuple:
+        """Serialize the current state for a snapshot. Caller holds self._lock.
+
+        Pending ops are logged first so they reach the change feed and
+        advance the version; the snapshot covers them, so the segment they
+        land in is dropped with the rest once it is written, and the next
+        log record starts a new segment.
+        """
         # Trim completed_tasks to prevent unbounded growth
         if "completed_tasks" in self.memory:
             ct = self.memory["completed_tasks"]
@@ -100,24 +306,116 @@ class MemorySystem:
                 ct = list(ct.values())
             self.memory["completed_tasks"] = ct[-500:]
 
-        # Rotate backups before writing new data
-        self._rotate_backups()
+        self._append_log()
+        self._segment = None
+        self._wal_bytes = 0
+        self._captures += 1
+        data = json.dumps({**self.memory, _SEQ_KEY: self._seq}, default=str)
+        return data, self._seq, self._captures
+
+    def _write_snapshot(self, data: str, seq: int, capture: int):
+        """Atomically replace the snapshot (with backup rotation) and drop covered log segments."""
+        with self._io_lock:
+            if capture < self._written_capture:
+                return  # a newer snapshot is already on disk
+            tmp = self.memory_file.with_suffix(".tmp")
+            with open(tmp, "w") as f:
+                f.write(data)
+            with self._store_lock():
+                self._rotate_backups()
+                os.replace(tmp, self.memory_file)
+                self._written_capture = capture
+                for segment in self._segments():
+                    try:
+                        if int(segment.stem) <= seq:
+                            segment.unlink()
+                    except (ValueError, OSError):
+                        pass
+        with self._lock:
+            if self._seq == seq and not self._pending:
+                self._dirty = False
+
+    def _compact_async(self):
+        """Snapshot in a background thread (serialization happens here, under the lock)."""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            snapshot = self._capture()
+            self._last_save_time = time.monotonic()
+
+        def run():
+            try:
+                self._write_snapshot(*snapshot)
+            except OSError as e:
+                logger.warning("Background memory snapshot failed: %s", e)
 
-        tmp = self.memory_file.with_suffix(".tmp")
-        with open(tmp, "w") as f:
-            json.dump(self.memory, f, indent=2, default=str)
-        shutil.move(str(tmp), str(self.memory_file))
-        self._dirty = False
-        self._last_save_time = time.monotonic()
+        self._compactor = threading.Thread(target=run, name="memory-compact", daemon=True)
+        self._compactor.start()
+
+    def _flush(self):
+        """Immediately write a snapshot (atomic write with backup rotation)."""
+        with self._lock:
+            snapshot = self._capture()
+            self._dirty = False
+            self._last_save_time = time.monotonic()
+        self._write_snapshot(*snapshot)
 
     def flush_if_dirty(self):
         """Flush pending changes to disk. Call on shutdown."""
-        if self._dirty:
+        if self._dirty or self._pending:
             self._flush()
 
     # alias
     save_memory = save
 
+    # ------------------------------------------------------------------
+    # Change feed (delta sync)
+    # ------------------------------------------------------------------
+
+    @property
+    def version(self) -> int:
+        """Sequence number of the last logged change."""
+        return self._seq
+
+    def changes_since(self, version: int) -> Optional[list]:
+        """
+        Log records ({seq, ts, ops}) after `version`, oldest first, or None
+        when they are no longer all in the change log (the caller needs a
+        full snapshot). Pending changes are logged first.
+        """
+        with self._lock:
+            self._append_log()
+            if version > self._seq:
+                return None  # peer is ahead of us: its version is from another store
+            if version == self._seq:
+                return []
+            if not self._changes or self._changes[0][0] > version + 1:
+                return None
+            return [json.loads(record) for seq, record in self._changes if seq > version]
+
+    def snapshot(self) -> tuple:
+        """(version, deep copy of the memory) — consistent with changes_since()."""
+        with self._lock:
+            self._append_log()
+            return self._seq, json.loads(json.dumps(self.memory, default=str))
+
+    def sync_payload(self, since: Optional[int]) -> Optional[dict]:
+        """
+        MSG_MEMORY_SYNC payload bringing a peer at version `since` up to date:
+        {"mode": "delta", "base", "version", "changes"}, or
+        {"mode": "full", "version", "memory"} when since is None or too old.
+        None when the peer is already current.
+        """
+        if since is not None:
+            changes = self.changes_since(since)
+            if changes == []:
+                return None
+            if changes is not None:
+                return {"mode": "delta", "base": since,
+                        "version": changes[-1]["seq"], "changes": changes}
+        version, data = self.snapshot()
+        return {"mode": "full", "version": version, "memory": data}
+
     def _empty(self) -> dict:
         return {
             "identity": {
@@ -146,9 +444,8 @@ class MemorySystem:
             "content": content,
             "timestamp": datetime.now().isoformat(),
         }
-        self.memory.setdefault("conversation_history", []).append(entry)
         # Keep last 200 messages
-        self.memory["conversation_history"] = self.memory["conversation_history"][-200:]
+        self._mutate("append", ["conversation_history"], entry, keep=200)
         self.save()
 
     def get_recent_context(self, limit: int = 20) -> list:
@@ -162,7 +459,7 @@ class MemorySystem:
 
     def add_project(self, name: str, path: str, tech_stack: list = None) -> str:
         project_id = uuid.uuid4().hex[:12]
-        self.memory["ongoing_projects"][project_id] = {
+        self._mutate("set", ["ongoing_projects", project_id], {
             "name": name,
             "path": path,
             "status": "active",
@@ -173,7 +470,7 @@ class MemorySystem:
                 "tech_stack": tech_stack or [],
                 "recent_changes": [],
             },
-        }
+        })
         self.save()
         logger.info(f"Added project: {name} ({project_id})")
         return project_id
@@ -208,36 +505,39 @@ class MemorySystem:
 
     def remove_active_task(self, agent_id: str):
         """Remove an active task by agent ID."""
-        self.memory["active_tasks"].pop(agent_id, None)
+        self._mutate("del", ["active_tasks", agent_id])
 
     def update_active_task(self, agent_id: str, task: dict):
         """Merge updates into an existing active task."""
         if agent_id in self.memory["active_tasks"]:
-            self.memory["active_tasks"][agent_id].update(task)
+            self._mutate("set", ["active_tasks", agent_id], {**self.memory["active_tasks"][agent_id], **task})
 
     def add_active_task(self, agent_id: str, task: dict):
-        self.memory["active_tasks"][agent_id] = {
+        self._mutate("set", ["active_tasks", agent_id], {
             "task_id": task.get("id", agent_id),
             "description": task["description"],
             "started_at": datetime.now().isoformat(),
             "project": task.get("project_name", "unknown"),
             "status": "running",
             "brief_path": task.get("brief_path", ""),
-        }
+        })
         # Update project's active agents
         pid = self._find_project_id(task.get("project_name", ""))
         if pid:
-            agents = self.memory["ongoing_projects"][pid].setdefault("active_agents", [])
+            agents = self.memory["ongoing_projects"][pid].get("active_agents", [])
             if agent_id not in agents:
-                agents.append(agent_id)
+                self._mutate("set", ["ongoing_projects", pid, "active_agents"], agents + [agent_id])
         self.save()
 
     def complete_task(self, agent_id: str, results: dict):
-        task = self.memory["active_tasks"].pop(agent_id, None)
+        task = self.memory["active_tasks"].get(agent_id)
         if not task:
             return
+        self._mutate("del", ["active_tasks", agent_id])
 
-        self.memory["completed_tasks"].append(
+        self._mutate(
+            "append",
+            ["completed_tasks"],
             {
                 "task_id": task["task_id"],
                 "description": task["description"],
@@ -246,22 +546,36 @@ class MemorySystem:
                 "project": task["project"],
                 "result_summary": results.get("summary", "Completed"),
                 "files_modified": results.get("files_modified", []),
-            }
+            },
+            keep=500,
         )
 
         pid = self._find_project_id(task["project"])
         if pid:
             proj = self.memory["ongoing_projects"][pid]
-            if agent_id in proj.get("active_agents", []):
-                proj["active_agents"].remove(agent_id)
-            proj["context"]["last_activity"] = datetime.now().isoformat()
-            proj["context"]["recent_changes"].append(results.get("summary", "Completed"))
+            agents = proj.get("active_agents", [])
+            if agent_id in agents:
+                self._mutate("set", ["ongoing_projects", pid, "active_agents"],
+                             [a for a in agents if a != agent_id])
+            self._mutate("set", ["ongoing_projects", pid, "context", "last_activity"],
+                         datetime.now().isoformat())
             # Keep recent_changes trimmed
-            proj["context"]["recent_changes"] = proj["context"]["recent_changes"][-20:]
+            self._mutate("append", ["ongoing_projects", pid, "context", "recent_changes"],
+                         results.get("summary", "Completed"), keep=20)
 
         self.save()
         logger.info(f"Task completed: {task['description'][:60]}")
 
+    def clear_active_tasks(self):
+        """Forget all active tasks (their agents died with a previous process)."""
+        self._mutate("set", ["active_tasks"], {})
+        self.save()
+
+    def append_completed_task(self, task: dict):
+        """Record a task finished outside the agent manager (e.g. Agent Zero jobs)."""
+        self._mutate("append", ["completed_tasks"], task, keep=500)
+        self.save()
+
     def get_all_active_tasks(self) -> dict:
         """Return a copy of all active tasks."""
         return dict(self.memory.get("active_tasks", {}))
@@ -271,7 +585,7 @@ class MemorySystem:
     # ------------------------------------------------------------------
 
     def set_preference(self, key: str, value):
-        self.memory.setdefault("user_preferences", {})[key] = value
+        self._mutate("set", ["user_preferences", key], value)
         self.save()
 
     def get_preference(self, key: str, default=None):
@@ -283,7 +597,7 @@ class MemorySystem:
 
     def learn(self, key: str, value):
         """Store a learned context key-value pair."""
-        self.memory.setdefault("learned_context", {})[key] = value
+        self._mutate("set", ["learned_context", key], value)
         self.save()
 
     # ------------------------------------------------------------------
@@ -304,9 +618,8 @@ class MemorySystem:
             "source":  source,
             "summary": summary[:500],
         }
-        self.memory.setdefault("memory_updates", []).append(entry)
         # Keep last 100 summaries
-        self.memory["memory_updates"] = self.memory["memory_updates"][-100:]
+        self._mutate("append", ["memory_updates"], entry, keep=100)
         self.save()
 
         # Write human-readable long_term.md
@@ -355,7 +668,7 @@ class MemorySystem:
         except Exception as e:
             logger.warning(f"Could not write archive: {e}")
 
-        self.memory["conversation_history"] = kept
+        self._mutate("set", ["conversation_history"], kept)
         self.save(force=True)
         logger.info(
             f"Memory compacted: archived {len(archive)} messages, kept {len(kept)}"
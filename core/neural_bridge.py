@@ -3,24 +3,45 @@ Neural Bridge — WebSocket communication layer between Left and Right Brain.
 
 Left Brain runs BridgeServer (accepts connection from Right Brain).
 Right Brain runs BridgeClient (connects to Left Brain).
-Both use JSON envelopes with token auth, heartbeat, and request-response.
+Both use BridgeMessage envelopes with token auth, heartbeat, and request-response.
+
+Wire protocol, negotiated in the auth handshake (see WireProtocol):
+  v1 — one JSON text frame per message (also used for the handshake itself).
+  v2 — binary frames: msgpack (or JSON) body, zstd/deflate compression above
+       a size threshold, and large messages split into chunks on their own
+       stream so heartbeats and status replies are sent between the chunks.
+A peer that does not offer v2 (or a connection without a token, which skips
+the handshake) stays on v1.
 """
 
 import asyncio
 import datetime
 import ipaddress
+import itertools
 import json
 import logging
 import os
 import ssl
+import struct
 import time
 import uuid
+import zlib
 from dataclasses import dataclass, field, asdict
 from pathlib import Path
 from typing import Any, Callable, Coroutine, Optional
 
 from aiohttp import web, WSMsgType, ClientSession, WSServerHandshakeError
 
+try:
+    import msgpack
+except ImportError:  # optional — v2 falls back to JSON bodies
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # optional — v2 falls back to deflate
+    zstandard = None
+
 logger = logging.getLogger("leon.bridge")
 
 
@@ -107,6 +128,7 @@ MSG_TASK_DISPATCH = "task_dispatch"
 MSG_TASK_STATUS = "task_status"
 MSG_TASK_RESULT = "task_result"
 MSG_MEMORY_SYNC = "memory_sync"
+MSG_MEMORY_ACK = "memory_ack"
 MSG_STATUS_REQUEST = "status_request"
 MSG_STATUS_RESPONSE = "status_response"
 
@@ -126,7 +148,10 @@ class BridgeMessage:
 
     @classmethod
     def from_json(cls, raw: str) -> "BridgeMessage":
-        data = json.loads(raw)
+        return cls.from_dict(json.loads(raw))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BridgeMessage":
         return cls(
             type=data["type"],
             payload=data.get("payload", {}),
@@ -135,6 +160,265 @@ class BridgeMessage:
         )
 
 
+# ── Wire Protocol ────────────────────────────────────────
+
+PROTOCOL_V1 = 1             # JSON text frames
+PROTOCOL_V2 = 2             # Binary frames: codec + compression + chunking
+COMPRESS_THRESHOLD = 1024   # Bodies at least this large are compressed
+CHUNK_SIZE = 64 * 1024      # Bytes per frame for large messages
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024  # Reassembled/decompressed size limit
+MAX_PARTIAL_STREAMS = 8     # Incomplete chunked messages buffered at once
+MAX_PARTIAL_BYTES = 2 * MAX_MESSAGE_BYTES  # Total bytes buffered across them
+_OFFLOAD_BYTES = 256 * 1024  # Compress bodies this large in a worker thread
+
+_FRAME_MESSAGE = 0
+_FRAME_CHUNK = 1
+_FRAME_HEADER = struct.Struct("!BB")       # kind, compression
+_CHUNK_HEADER = struct.Struct("!BBIII")    # kind, compression, stream, index, count
+_COMPRESSION_IDS = {None: 0, "deflate": 1, "zstd": 2}
+_COMPRESSION_NAMES = {v: k for k, v in _COMPRESSION_IDS.items()}
+
+
+def available_codecs() -> list[str]:
+    """Body encodings this process can speak, preferred first."""
+    return (["msgpack"] if msgpack else []) + ["json"]
+
+
+def available_compression() -> list[str]:
+    """Compression algorithms this process can speak, preferred first."""
+    return (["zstd"] if zstandard else []) + ["deflate"]
+
+
+class WireProtocol:
+    """
+    Framing for one bridge connection.
+
+    Both sides start on v1 (the handshake is JSON). The client puts offer()
+    in its auth payload; the server picks with negotiate() and returns
+    accepted() in the ack; the client applies it with from_ack(). Incoming
+    JSON text frames are always accepted, whatever was negotiated.
+
+    v2 frame: 2-byte header (kind, compression) + body, or for chunks a
+    14-byte header adding stream id, chunk index and chunk count. The
+    compression id describes the whole reassembled body. At most
+    MAX_PARTIAL_STREAMS incomplete messages (MAX_PARTIAL_BYTES in total)
+    are buffered; past either limit the oldest stream is dropped.
+    """
+
+    def __init__(self, version: int = PROTOCOL_V1, codec: str = "json",
+                 compression: Optional[str] = None,
+                 compress_threshold: int = COMPRESS_THRESHOLD,
+                 chunk_size: int = CHUNK_SIZE):
+        self.version = version
+        self.codec = codec
+        self.compression = compression
+        self.compress_threshold = compress_threshold
+        self.chunk_size = chunk_size
+        self._streams = itertools.count(1)
+        self._partial: dict[int, dict] = {}  # stream -> {"parts", "count", "size", "compression"}
+        self._partial_bytes = 0
+
+    def __repr__(self) -> str:
+        if self.version == PROTOCOL_V1:
+            return "v1 (json)"
+        return f"v2 ({self.codec}, {self.compression or 'uncompressed'})"
+
+    # ── Negotiation ──────────────────────────────────────
+
+    @staticmethod
+    def offer(max_version: int = PROTOCOL_V2) -> dict:
+        """Auth payload fields advertising what this side supports."""
+        if max_version < PROTOCOL_V2:
+            return {}
+        return {
+            "protocols": [PROTOCOL_V2, PROTOCOL_V1],
+            "codecs": available_codecs(),
+            "compression": available_compression(),
+        }
+
+    @classmethod
+    def negotiate(cls, offer: dict, max_version: int = PROTOCOL_V2) -> "WireProtocol":
+        """Server side: pick the best protocol both peers support."""
+        protocols = offer.get("protocols") or []
+        if max_version < PROTOCOL_V2 or PROTOCOL_V2 not in protocols:
+            return cls()
+        codec = next((c for c in offer.get("codecs", []) if c in available_codecs()), "json")
+        compression = next(
+            (c for c in offer.get("compression", []) if c in available_compression()), None
+        )
+        return cls(PROTOCOL_V2, codec, compression)
+
+    def accepted(self) -> dict:
+        """Ack payload fields telling the client what was picked."""
+        if self.version == PROTOCOL_V1:
+            return {}
+        return {"protocol": self.version, "codec": self.codec, "compression": self.compression}
+
+    @classmethod
+    def from_ack(cls, payload: dict) -> "WireProtocol":
+        """Client side: adopt the server's choice (an old server sends none → v1)."""
+        if payload.get("protocol") != PROTOCOL_V2:
+            return cls()
+        codec = payload.get("codec", "json")
+        compression = payload.get("compression")
+        if codec not in available_codecs() or (
+            compression is not None and compression not in available_compression()
+        ):
+            logger.warning(f"Bridge server picked unsupported encoding {codec}/{compression} — using v1")
+            return cls()
+        return cls(PROTOCOL_V2, codec, compression)
+
+    # ── Encoding ─────────────────────────────────────────
+
+    def _serialize(self, msg: BridgeMessage) -> bytes:
+        if self.codec == "msgpack":
+            return msgpack.packb(asdict(msg), use_bin_type=True)
+        return json.dumps(asdict(msg)).encode()
+
+    def _compress(self, body: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3).compress(body)
+        return zlib.compress(body, 6)
+
+    def _frames(self, body: bytes, compression: Optional[str]) -> list:
+        comp_id = _COMPRESSION_IDS[compression]
+        if len(body) <= self.chunk_size:
+            return [_FRAME_HEADER.pack(_FRAME_MESSAGE, comp_id) + body]
+        stream = next(self._streams) & 0xFFFFFFFF
+        count = -(-len(body) // self.chunk_size)
+        return [
+            _CHUNK_HEADER.pack(_FRAME_CHUNK, comp_id, stream, i, count)
+            + body[i * self.chunk_size:(i + 1) * self.chunk_size]
+            for i in range(count)
+        ]
+
+    def encode(self, msg: BridgeMessage) -> list:
+        """Frames for msg: [str] on v1, [bytes, ...] on v2."""
+        if self.version == PROTOCOL_V1:
+            return [msg.to_json()]
+        body = self._serialize(msg)
+        compression = None
+        if self.compression and len(body) >= self.compress_threshold:
+            body, compression = self._compress(body), self.compression
+        return self._frames(body, compression)
+
+    async def encode_async(self, msg: BridgeMessage) -> list:
+        """encode(), compressing large bodies off the event loop."""
+        if self.version == PROTOCOL_V1:
+            return [msg.to_json()]
+        body = self._serialize(msg)
+        compression = None
+        if self.compression and len(body) >= self.compress_threshold:
+            if len(body) >= _OFFLOAD_BYTES:
+                body = await asyncio.to_thread(self._compress, body)
+            else:
+                body = self._compress(body)
+            compression = self.compression
+        return self._frames(body, compression)
+
+    # ── Decoding ─────────────────────────────────────────
+
+    def decode(self, data) -> Optional[BridgeMessage]:
+        """
+        Parse one received frame. Returns None while a chunked message is
+        incomplete. Raises ValueError/KeyError for malformed input.
+        """
+        if isinstance(data, str):
+            return BridgeMessage.from_json(data)
+        data = bytes(data)
+        if len(data) < _FRAME_HEADER.size:
+            raise ValueError("Truncated bridge frame")
+        kind, comp_id = _FRAME_HEADER.unpack_from(data)
+        if kind == _FRAME_MESSAGE:
+            return self._parse(data[_FRAME_HEADER.size:], comp_id)
+        if kind != _FRAME_CHUNK or len(data) < _CHUNK_HEADER.size:
+            raise ValueError(f"Unknown bridge frame kind {kind}")
+
+        _, comp_id, stream, index, count = _CHUNK_HEADER.unpack_from(data)
+        part = data[_CHUNK_HEADER.size:]
+        entry = self._partial.get(stream)
+        if entry is None:
+            if index != 0:
+                raise ValueError(f"Bridge stream {stream} starts at chunk {index}")
+            while len(self._partial) >= MAX_PARTIAL_STREAMS:
+                self._drop_oldest("too many incomplete streams")
+            entry = self._partial[stream] = {
+                "parts": [], "count": count, "size": 0, "compression": comp_id,
+            }
+        if index != len(entry["parts"]) or count != entry["count"]:
+            self._drop(stream)
+            raise ValueError(f"Bridge stream {stream}: chunk {index}/{count} out of order")
+        entry["parts"].append(part)
+        entry["size"] += len(part)
+        self._partial_bytes += len(part)
+        if entry["size"] > MAX_MESSAGE_BYTES:
+            self._drop(stream)
+            raise ValueError(f"Bridge stream {stream} exceeds {MAX_MESSAGE_BYTES} bytes")
+        while self._partial_bytes > MAX_PARTIAL_BYTES and len(self._partial) > 1:
+            self._drop_oldest("incomplete streams exceed the buffer limit", keep=stream)
+        if len(entry["parts"]) < count:
+            return None
+        self._drop(stream)
+        return self._parse(b"".join(entry["parts"]), entry["compression"])
+
+    def _drop(self, stream: int) -> Optional[dict]:
+        entry = self._partial.pop(stream, None)
+        if entry is not None:
+            self._partial_bytes -= entry["size"]
+        return entry
+
+    def _drop_oldest(self, reason: str, keep: Optional[int] = None):
+        oldest = next(s for s in self._partial if s != keep)
+        entry = self._drop(oldest)
+        logger.warning("Bridge stream %d dropped after %d/%d chunks: %s",
+                       oldest, len(entry["parts"]), entry["count"], reason)
+
+    def _parse(self, body: bytes, comp_id: int) -> BridgeMessage:
+        compression = _COMPRESSION_NAMES.get(comp_id, "unknown")
+        try:
+            if compression == "deflate":
+                d = zlib.decompressobj()
+                body = d.decompress(body, MAX_MESSAGE_BYTES)
+                if d.unconsumed_tail:
+                    raise ValueError("decompressed message too large")
+            elif compression == "zstd":
+                if zstandard is None:
+                    raise ValueError("zstd frame received but zstandard is not installed")
+                body = zstandard.ZstdDecompressor().decompress(body, max_output_size=MAX_MESSAGE_BYTES)
+            elif compression is not None:
+                raise ValueError(f"unknown compression id {comp_id}")
+
+            if body[:1] in (b"{", b"["):
+                data = json.loads(body)
+            elif msgpack is not None:
+                data = msgpack.unpackb(body, raw=False)
+            else:
+                raise ValueError("msgpack frame received but msgpack is not installed")
+        except ValueError:
+            raise
+        except Exception as e:  # zlib.error, zstd/msgpack errors
+            raise ValueError(f"Undecodable bridge frame: {e}") from e
+        if not isinstance(data, dict):
+            raise ValueError("Bridge frame body is not a message")
+        return BridgeMessage.from_dict(data)
+
+    def reset(self):
+        """Drop partially received messages (on disconnect)."""
+        self._partial.clear()
+        self._partial_bytes = 0
+
+
+async def _send_frames(ws, frames: list):
+    """Write a message's frames; other sends can run between chunks."""
+    if isinstance(frames[0], str):
+        await ws.send_str(frames[0])
+        return
+    for i, frame in enumerate(frames):
+        if i:
+            await asyncio.sleep(0)  # let heartbeats / replies go out between chunks
+        await ws.send_bytes(frame)
+
+
 # ── Bridge Server (Left Brain) ──────────────────────────
 
 class BridgeServer:
@@ -149,9 +433,11 @@ class BridgeServer:
         self.token = os.environ.get("LEON_BRIDGE_TOKEN") or config.get("token", "")
         self.cert_path = config.get("cert_path", "")
         self.key_path = config.get("key_path", "")
+        self.max_protocol = config.get("protocol", PROTOCOL_V2)
 
         self._handlers: dict[str, Callable] = {}
         self._ws: Optional[web.WebSocketResponse] = None
+        self._protocol = WireProtocol()
         self._app: Optional[web.Application] = None
         self._runner: Optional[web.AppRunner] = None
         self._pending: dict[str, asyncio.Future] = {}
@@ -235,7 +521,7 @@ class BridgeServer:
             logger.warning("Bridge send failed — not connected")
             return
         try:
-            await self._ws.send_str(msg.to_json())
+            await _send_frames(self._ws, await self._protocol.encode_async(msg))
         except Exception as e:
             logger.error(f"Bridge send error: {e}")
             self._connected = False
@@ -265,7 +551,9 @@ class BridgeServer:
         ws = web.WebSocketResponse(heartbeat=20)
         await ws.prepare(request)
 
-        # Auth: first message must be an auth message with correct token
+        # Auth: first message must be an auth message with correct token.
+        # It also carries the client's protocol offer.
+        protocol = WireProtocol()
         if self.token:
             try:
                 first = await asyncio.wait_for(ws.receive(), timeout=10)
@@ -277,6 +565,7 @@ class BridgeServer:
                     logger.warning("Bridge auth failed — bad token")
                     await ws.close(code=4003, message=b"Auth failed")
                     return ws
+                protocol = WireProtocol.negotiate(auth_msg.payload, self.max_protocol)
             except asyncio.TimeoutError:
                 await ws.close(code=4002, message=b"Auth timeout")
                 return ws
@@ -285,11 +574,14 @@ class BridgeServer:
         if self._ws and not self._ws.closed:
             await self._ws.close()
         self._ws = ws
+        self._protocol = protocol
         self._connected = True
-        logger.info("Right Brain connected to bridge")
+        logger.info(f"Right Brain connected to bridge — protocol {protocol!r}")
 
-        # Send auth ack
-        await ws.send_str(BridgeMessage(type=MSG_AUTH, payload={"status": "ok"}).to_json())
+        # Send auth ack (always JSON; the negotiated protocol applies after it)
+        await ws.send_str(BridgeMessage(
+            type=MSG_AUTH, payload={"status": "ok", **protocol.accepted()}
+        ).to_json())
 
         # Start heartbeat
         if self._heartbeat_task:
@@ -298,7 +590,7 @@ class BridgeServer:
 
         try:
             async for raw_msg in ws:
-                if raw_msg.type == WSMsgType.TEXT:
+                if raw_msg.type in (WSMsgType.TEXT, WSMsgType.BINARY):
                     await self._handle_message(raw_msg.data)
                 elif raw_msg.type in (WSMsgType.ERROR, WSMsgType.CLOSE):
                     break
@@ -307,6 +599,7 @@ class BridgeServer:
         finally:
             self._connected = False
             self._ws = None
+            protocol.reset()
             self._cancel_pending("client disconnected")
             if self._heartbeat_task:
                 self._heartbeat_task.cancel()
@@ -314,12 +607,14 @@ class BridgeServer:
 
         return ws
 
-    async def _handle_message(self, raw: str):
+    async def _handle_message(self, raw):
         try:
-            msg = BridgeMessage.from_json(raw)
-        except (json.JSONDecodeError, KeyError) as e:
+            msg = self._protocol.decode(raw)
+        except (ValueError, KeyError) as e:
             logger.warning(f"Bridge bad message: {e}")
             return
+        if msg is None:
+            return  # more chunks to come
 
         # Check if this is a response to a pending request
         if msg.id in self._pending:
@@ -365,9 +660,11 @@ class BridgeClient:
         self.server_url = config.get("server_url", "wss://localhost:9100/bridge")
         self.token = os.environ.get("LEON_BRIDGE_TOKEN") or config.get("token", "")
         self.cert_path = config.get("cert_path", "")
+        self.max_protocol = config.get("protocol", PROTOCOL_V2)
 
         self._handlers: dict[str, Callable] = {}
         self._ws = None
+        self._protocol = WireProtocol()
         self._session: Optional[ClientSession] = None
         self._pending: dict[str, asyncio.Future] = {}
         self._connected = False
@@ -375,6 +672,8 @@ class BridgeClient:
         self._reconnect_delay = 1.0
         self._max_reconnect_delay = 30.0
         self._connect_task: Optional[asyncio.Task] = None
+        # Awaited after each (re)connect, before messages are read
+        self.on_connected: Optional[Callable[[], Coroutine]] = None
 
     @property
     def connected(self) -> bool:
@@ -425,7 +724,7 @@ class BridgeClient:
             logger.debug("Bridge client send skipped — not connected")
             return
         try:
-            await self._ws.send_str(msg.to_json())
+            await _send_frames(self._ws, await self._protocol.encode_async(msg))
         except Exception as e:
             logger.error(f"Bridge client send error: {e}")
             self._connected = False
@@ -490,10 +789,13 @@ class BridgeClient:
         logger.info(f"Connecting to Left Brain at {self.server_url}")
         async with self._session.ws_connect(self.server_url, ssl=ssl_ctx, heartbeat=20) as ws:
             self._ws = ws
+            self._protocol = WireProtocol()
 
-            # Authenticate
+            # Authenticate (and offer the v2 protocol)
             if self.token:
-                auth = BridgeMessage(type=MSG_AUTH, payload={"token": self.token})
+                auth = BridgeMessage(type=MSG_AUTH, payload={
+                    "token": self.token, **WireProtocol.offer(self.max_protocol),
+                })
                 await ws.send_str(auth.to_json())
 
                 # Wait for auth ack
@@ -505,14 +807,20 @@ class BridgeClient:
                 if ack.type != MSG_AUTH or ack.payload.get("status") != "ok":
                     logger.error("Bridge auth rejected")
                     return
+                self._protocol = WireProtocol.from_ack(ack.payload)
 
             self._connected = True
             self._reconnect_delay = 1.0  # Reset backoff
-            logger.info("Connected to Left Brain")
+            logger.info(f"Connected to Left Brain — protocol {self._protocol!r}")
+            if self.on_connected:
+                try:
+                    await self.on_connected()
+                except Exception as e:
+                    logger.error(f"Bridge client on_connected error: {e}")
 
             # Listen loop
             async for raw_msg in ws:
-                if raw_msg.type == WSMsgType.TEXT:
+                if raw_msg.type in (WSMsgType.TEXT, WSMsgType.BINARY):
                     await self._handle_message(raw_msg.data)
                 elif raw_msg.type in (WSMsgType.ERROR, WSMsgType.CLOSE):
                     break
@@ -520,15 +828,18 @@ class BridgeClient:
         # Connection closed
         self._connected = False
         self._ws = None
+        self._protocol.reset()
         self._cancel_pending("server disconnected")
         logger.info("Disconnected from Left Brain")
 
-    async def _handle_message(self, raw: str):
+    async def _handle_message(self, raw):
         try:
-            msg = BridgeMessage.from_json(raw)
-        except (json.JSONDecodeError, KeyError) as e:
+            msg = self._protocol.decode(raw)
+        except (ValueError, KeyError) as e:
             logger.warning(f"Bridge client bad message: {e}")
             return
+        if msg is None:
+            return  # more chunks to come
 
         # Check pending responses
         if msg.id in self._pending:
@@ -176,12 +176,12 @@ class NightMode:
     # ─── Autonomous Loop ──────────────────────────────────────────────────
 
     async def _run_loop(self):
-        """Main autonomous loop — polls every 60s and dispatches pending tasks."""
+        """Main autonomous loop — dispatches pending tasks whenever an agent exits (at least every 60s)."""
         logger.info("Night mode loop running")
         while self._active:
             try:
                 await self._try_dispatch()
-                await asyncio.sleep(60)
+                await self.leon.agent_manager.wait_any(timeout=60)
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -28,6 +28,9 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger("leon.plan")
 
+# Upper bound between status checks while waiting on a phase's agents
+_JOB_CHECK_INTERVAL = 60
+
 
 class PlanMode:
     PLAN_PATH = Path("data/current_plan.json")
@@ -306,11 +309,17 @@ Design rules:
             )
 
     async def _wait_for_jobs(self, jobs: list[tuple[dict, str]], plan: dict):
-        """Poll until all (task, agent_id) pairs have finished."""
+        """Wait until all (task, agent_id) pairs have finished.
+
+        Wakes as soon as one of the agents exits; the interval only bounds how
+        long a hung agent goes unnoticed before check_status() times it out.
+        """
         pending = list(jobs)
 
         while pending:
-            await asyncio.sleep(30)
+            await self.leon.agent_manager.wait_any(
+                [agent_id for _, agent_id in pending], timeout=_JOB_CHECK_INTERVAL,
+            )
             done = []
 
             for task, agent_id in pending:
@@ -322,6 +331,9 @@ Design rules:
                     done.append((task, agent_id))
                     continue
 
+                if not self.leon.agent_manager.needs_check(agent_id):
+                    continue  # still running, within its timeout
+
                 status = await self.leon.agent_manager.check_status(agent_id)
 
                 if status.get("retrying"):
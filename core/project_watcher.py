@@ -6,6 +6,7 @@ When agents complete and modify files, Leon can:
 - Log what changed
 - Auto-commit with descriptive messages (opt-in per project)
 - Track file modification patterns
+- Feed change events to listeners (e.g. the incremental code indexer)
 """
 
 import asyncio
@@ -36,6 +37,9 @@ class ProjectWatcher:
         watcher.start()
         ...
         changes = watcher.get_recent_changes("project-name")
+
+        # React to changes as they happen (called on the watchdog thread)
+        watcher.add_listener(lambda project, change: ...)
     """
 
     def __init__(self, projects: list):
@@ -44,16 +48,24 @@ class ProjectWatcher:
         self._changes: dict[str, list] = {}  # project_name -> [change_entries]
         self._max_changes = 200
         self._running = False
+        self._listeners: list = []
         logger.info(f"Project watcher initialized for {len(projects)} projects")
 
-    def start(self):
-        """Start watching all configured projects."""
+    def add_listener(self, callback):
+        """
+        Register callback(project_name, change_entry) for every recorded change.
+        Called on the watchdog thread — keep it short and thread-safe.
+        """
+        self._listeners.append(callback)
+
+    def start(self) -> int:
+        """Start watching all configured projects. Returns the number being watched."""
         try:
             from watchdog.observers import Observer
             from watchdog.events import FileSystemEventHandler
         except ImportError:
             logger.warning("watchdog not installed — project watcher disabled. Run: pip install watchdog")
-            return
+            return 0
 
         self._running = True
 
@@ -65,7 +77,7 @@ class ProjectWatcher:
 
             self._changes[name] = []
 
-            handler = _ChangeHandler(name, self._changes, self._max_changes)
+            handler = _ChangeHandler(name, self._changes, self._max_changes, self._listeners)
             observer = Observer()
             observer.schedule(handler, str(path), recursive=True)
             observer.daemon = True
@@ -73,6 +85,8 @@ class ProjectWatcher:
             self._observers.append(observer)
             logger.info(f"Watching project: {name} at {path}")
 
+        return len(self._observers)
+
     def stop(self):
         """Stop all watchers."""
         self._running = False
@@ -145,10 +159,12 @@ class ProjectWatcher:
 class _ChangeHandler:
     """Watchdog event handler that records file changes."""
 
-    def __init__(self, project_name: str, changes: dict, max_entries: int):
+    def __init__(self, project_name: str, changes: dict, max_entries: int,
+                 listeners: Optional[list] = None):
         self.project_name = project_name
         self.changes = changes
         self.max_entries = max_entries
+        self.listeners = listeners if listeners is not None else []
 
     def dispatch(self, event):
         """Handle any file system event."""
@@ -167,6 +183,9 @@ class _ChangeHandler:
             "type": event_type,
             "timestamp": datetime.now().isoformat(),
         }
+        dest = getattr(event, "dest_path", "")
+        if dest:
+            entry["dest_path"] = dest
 
         project_changes = self.changes.get(self.project_name, [])
         project_changes.append(entry)
@@ -174,3 +193,9 @@ class _ChangeHandler:
         # Trim
         if len(project_changes) > self.max_entries:
             self.changes[self.project_name] = project_changes[-self.max_entries:]
+
+        for listener in self.listeners:
+            try:
+                listener(self.project_name, entry)
+            except Exception as e:
+                logger.error(f"Project watcher listener failed: {e}")
@@ -19,9 +19,10 @@ import yaml
 from .neural_bridge import (
     BridgeClient, BridgeMessage,
     MSG_TASK_DISPATCH, MSG_TASK_STATUS, MSG_TASK_RESULT,
-    MSG_STATUS_REQUEST, MSG_STATUS_RESPONSE, MSG_MEMORY_SYNC,
+    MSG_STATUS_REQUEST, MSG_STATUS_RESPONSE, MSG_MEMORY_SYNC, MSG_MEMORY_ACK,
 )
 from .agent_manager import AgentManager
+from .memory import MemoryReplica
 from .task_queue import TaskQueue
 from .openclaw_interface import OpenClawInterface
 
@@ -59,13 +60,14 @@ class RightBrain:
         self.bridge.on(MSG_TASK_DISPATCH, self._handle_task_dispatch)
         self.bridge.on(MSG_STATUS_REQUEST, self._handle_status_request)
         self.bridge.on(MSG_MEMORY_SYNC, self._handle_memory_sync)
+        self.bridge.on_connected = self._ack_memory_version
 
         # Local tracking for tasks dispatched from Left Brain
         self._remote_tasks: dict[str, dict] = {}
         self._load_remote_tasks()
 
-        # Cached memory context pushed from Left Brain (read-only)
-        self._memory_cache: dict = {}
+        # Left Brain's memory (read-only), kept current by delta syncs
+        self._memory = MemoryReplica()
 
         self.running = False
         self._monitor_task: Optional[asyncio.Task] = None
@@ -241,9 +243,19 @@ class RightBrain:
         ))
 
     async def _handle_memory_sync(self, msg: BridgeMessage):
-        """Cache memory context pushed from Left Brain (read-only)."""
-        self._memory_cache.update(msg.payload)
-        logger.debug(f"Memory sync received — {len(msg.payload)} keys")
+        """Apply a memory delta (or full copy) pushed from Left Brain, then acknowledge."""
+        if self._memory.apply(msg.payload):
+            logger.debug(f"Memory sync ({msg.payload.get('mode')}) — now at v{self._memory.version}")
+        else:
+            logger.info(f"Memory delta from v{msg.payload.get('base')} does not fit "
+                        f"v{self._memory.version} — asking for a resend")
+        await self._ack_memory_version()
+
+    async def _ack_memory_version(self):
+        """Tell Left Brain which memory version we hold (None = send everything)."""
+        await self.bridge.send(BridgeMessage(
+            type=MSG_MEMORY_ACK, payload={"version": self._memory.version},
+        ))
 
     # ── Agent Monitor Loop ───────────────────────────────
 
@@ -332,4 +344,5 @@ class RightBrain:
             "tasks": self.task_queue.get_status_summary(),
             "active_agents": len(self.agent_manager.active_agents),
             "remote_tasks": len(self._remote_tasks),
+            "memory_version": self._memory.version,
         }
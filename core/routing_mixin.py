@@ -14,7 +14,9 @@ import subprocess
 from pathlib import Path
 from typing import Optional
 
+from .keyword_router import KeywordRouter
 from .safe_tasks import create_safe_task
+from .tracing import traced
 
 logger = logging.getLogger("leon")
 
@@ -95,6 +97,121 @@ _KEYWORD_ROUTES: list[tuple[re.Pattern, str, dict]] = [
     (re.compile(r'\b(?:weather|forecast)\b(?!\s+(?:in|for|at)\b)'), 'weather', {}),
 ]
 
+# Same table compiled for one-pass first-match lookup → (skill, args)
+_KEYWORD_ROUTER = KeywordRouter([(pattern, (skill, args)) for pattern, skill, args in _KEYWORD_ROUTES])
+
+# ── Special-command triggers ────────────────────────────────────────────────
+# Substring phrases (or a regex) per command, tested against the lowercased
+# message. _route_special_commands checks the matched names in this order;
+# handlers that decline a match fall through to the next one.
+
+_QUEUE_TRIGGERS = [
+    "queue task:", "add task:", "add to backlog:", "tonight do:", "tonight work on:",
+    "work on tonight:", "add to queue:", "your task:", "the task:", "task is:",
+    "go work on:", "start working on:", "go code:",
+]
+
+_SPECIAL_ROUTES: list[tuple] = [
+    (re.compile(r'\A\s*(?:help|what can you do|commands|modules)\s*\Z'), "help"),
+
+    # ── Night Mode / Autonomous Coding ──
+    (("night mode on", "turn on night mode", "auto mode on", "turn on auto mode",
+      "start auto mode", "enable auto mode", "switch to night mode", "start night mode",
+      "enable night mode", "activate night mode", "autonomous mode", "go autonomous",
+      "put it in night mode", "night mode:", "night mode,", "coding mode on",
+      "work all night", "work through the night", "work overnight",
+      "keep working", "keep going", "work continuously", "continuously work",
+      "work until done", "keep coding", "dont stop working",
+      "continue working", "continue improving", "continue doing", "keep improving",
+      "keep at it", "continue where", "carry on", "continue until",
+      "keep on working", "keep on improving", "keep going until"), "night_mode_on"),
+    (("night mode off", "turn off night mode", "auto mode off", "turn off auto mode",
+      "stop auto mode", "stop night mode", "disable night mode",
+      "pause night mode", "end night mode", "cancel night mode", "stop the agents"), "night_mode_off"),
+    (("what did you do", "overnight report", "morning briefing", "what happened last night",
+      "night report", "what got done"), "night_report"),
+    (tuple(_QUEUE_TRIGGERS), "queue_task"),
+    (("backlog", "night queue", "task queue", "what's queued", "what's in the queue",
+      "show queue", "list tasks"), "backlog"),
+    (("night mode status", "night mode", "autonomous status"), "night_mode_status"),
+    (("clear backlog", "clear queue", "cancel all tasks", "empty the queue"), "clear_backlog"),
+
+    # ── Self-repair / Agent Zero ──
+    (("apply self-repair", "apply the repair", "apply the fix and restart",
+      "apply repair and restart", "apply self repair"), "apply_repair"),
+    (("kill agent zero", "stop agent zero", "kill az job", "abort agent zero"), "agent_zero_kill"),
+    (("agent zero status", "az jobs", "agent zero jobs", "list az"), "agent_zero_status"),
+
+    # ── Plan Mode (triggering is handled by _analyze_request) ──
+    (("cancel plan", "stop plan", "abort plan", "stop the plan", "kill the plan"), "plan_cancel"),
+    (("plan status", "plan progress", "how's the plan", "what's the plan",
+      "how's it going with the plan"), "plan_status"),
+
+    # ── Hardware / business / security ──
+    (("print", "stl", "3d print", "printer", "filament", "spaghetti", "print job", "print queue"), "printing"),
+    (("what do you see", "look at", "who's here", "what's around", "describe the room", "camera"), "vision"),
+    (("crm", "pipeline", "clients", "contacts", "deals", "customer list"), "crm"),
+    (("find clients", "find leads", "hunt leads", "prospect", "generate leads", "new leads",
+      "lead search"), "leads"),
+    (("revenue", "invoice", "how much money", "financial", "earnings", "profit", "expenses",
+      "income", "billing"), "finance"),
+    (("send email", "check email", "inbox", "messages", "unread", "compose"), "comms"),
+    (("briefing", "brief me", "daily brief", "morning brief", "daily briefing", "what's happening",
+      "catch me up", "daily summary"), "briefing"),
+    (("schedule", "calendar", "appointments", "meetings today", "what's on my calendar"), "calendar"),
+    (("audit log", "security log", "audit trail", "recent actions"), "audit"),
+
+    # ── System skills — AI-classified routing for PC control commands ──
+    (("open ", "close ", "launch ", "start ", "kill ", "switch to",
+      "go to ", "navigate to ", "pull up ", "show me ",
+      "cpu", "ram", "memory", "disk", "storage", "processes", "uptime",
+      "ip address", "battery", "temperature", "temp",
+      "play", "pause", "next track", "previous track", "volume", "mute",
+      "now playing", "what's playing", "music",
+      "screenshot", "take a screenshot", "screen",
+      "clipboard", "notify", "notification", "lock screen",
+      "brightness", "find file", "recent files", "downloads", "trash",
+      "wifi", "network", "speed test", "ping",
+      "timer", "alarm", "set timer", "set alarm", "remind",
+      "search for", "google", "define", "weather",
+      "git status", "npm", "pip install", "port",
+      "what's eating", "what's hogging", "what's running",
+      "gpu", "graphics card", "vram", "cuda",
+      "workspace", "tile", "minimize", "maximize", "snap",
+      "tab", "browser", "discord", "youtube", "reddit", "twitter",
+      "github", "spotify", "netflix", "twitch", "website", "site",
+      "schedule", "cron", "scheduled", "remind me every", "every hour",
+      "every day", "every morning", "every night", "run every", "recurring",
+      # terminal & code
+      "run command", "run script", "execute", "shell", "bash ", "terminal command",
+      "python ", "run python", "python code", "run code",
+      # OCR
+      "read the screen", "what's on screen", "whats on screen", "ocr",
+      "read screen", "extract text from screen",
+      # search
+      "search for ", "look up ", "look up", "fast search", "quick search",
+      "what is ", "who is ", "define ",
+      # notes
+      "note ", "notes", "save a note", "write a note", "remember this",
+      "my notes", "search notes", "delete note",
+      # home assistant (keywords removed — lights handled by pre-router)
+      # telegram
+      "send telegram", "telegram message", "message on telegram"), "system_skill"),
+
+    # Not a command of its own: auto/night mode and task phrasing that must keep
+    # the lights pre-router away ("lab" would fuzzy-match "lab ceiling")
+    (("auto mode", "night mode", "work on this", "work on this:", "queue task",
+      "add task", "keep working", "keep going", "keep coding", "start auto",
+      "enable auto", "coding mode", "go autonomous"), "mode_command"),
+]
+
+_SPECIAL_ROUTER = KeywordRouter([(matcher, name) for matcher, name in _SPECIAL_ROUTES])
+
+
+def special_command_hits(msg: str) -> list[str]:
+    """Names of every special-command trigger in msg (lowercased), in table order."""
+    return _SPECIAL_ROUTER.matches(msg)
+
 # Desktop apps that should open via open_app, not as browser URLs
 _DESKTOP_APPS = frozenset({
     "terminal", "code", "vscode", "spotify", "files", "nautilus",
@@ -107,12 +224,14 @@ _DESKTOP_APPS = frozenset({
 class RoutingMixin:
     """Special-command routing: hardware, business, vision, security, system skills."""
 
+    @traced("route_special_commands")
     async def _route_special_commands(self, message: str) -> Optional[str]:
         """Route messages to specialized modules when keywords match."""
         msg = message.lower()
+        hits = special_command_hits(msg)   # one pass over _SPECIAL_ROUTES
 
         # Help command — list available modules
-        if msg.strip() in ("help", "what can you do", "commands", "modules"):
+        if "help" in hits:
             return self._build_help_text()
 
         # ── Night Mode / Autonomous Coding ──────────────────────────────
@@ -120,26 +239,7 @@ class RoutingMixin:
         nm = self.night_mode
 
         # Enable night mode — flexible phrasing
-        _nm_on = any(p in msg for p in [
-            "night mode on", "turn on night mode", "auto mode on", "turn on auto mode",
-            "start auto mode", "enable auto mode", "switch to night mode", "start night mode",
-            "enable night mode", "activate night mode", "autonomous mode", "go autonomous",
-            "put it in night mode", "night mode:", "night mode,", "coding mode on",
-            "work all night", "work through the night", "work overnight",
-            "keep working", "keep going", "work continuously", "continuously work",
-            "work until done", "keep coding", "dont stop working",
-            "continue working", "continue improving", "continue doing", "keep improving",
-            "keep at it", "continue where", "carry on", "continue until",
-            "keep on working", "keep on improving", "keep going until",
-        ])
-        # Disable night mode — flexible phrasing
-        _nm_off = any(p in msg for p in [
-            "night mode off", "turn off night mode", "auto mode off", "turn off auto mode",
-            "stop auto mode", "stop night mode", "disable night mode",
-            "pause night mode", "end night mode", "cancel night mode", "stop the agents",
-        ])
-
-        if _nm_on:
+        if "night_mode_on" in hits:
             await nm.enable()
             # Check if task content included in the same message
             _task_triggers = [
@@ -179,7 +279,7 @@ class RoutingMixin:
             return "Auto mode on. Queue is empty — send me the task and I'll get started."
 
         # Disable night mode
-        if _nm_off:
+        if "night_mode_off" in hits:
             await nm.disable()
             running = nm.get_running()
             if running:
@@ -187,13 +287,12 @@ class RoutingMixin:
             return "Auto mode off."
 
         # Morning briefing / overnight report
-        if any(p in msg for p in ["what did you do", "overnight report", "morning briefing", "what happened last night", "night report", "what got done"]):
+        if "night_report" in hits:
             briefing = nm.generate_morning_briefing()
             return briefing
 
         # Add task to backlog
-        queue_triggers = ["queue task:", "add task:", "add to backlog:", "tonight do:", "tonight work on:", "work on tonight:", "add to queue:", "your task:", "the task:", "task is:", "go work on:", "start working on:", "go code:"]
-        for trigger in queue_triggers:
+        for trigger in (_QUEUE_TRIGGERS if "queue_task" in hits else ()):
             if trigger in msg:
                 remainder = message[message.lower().index(trigger) + len(trigger):].strip()
                 # Parse "description for project" or "description in project"
@@ -221,25 +320,24 @@ class RoutingMixin:
                 return status
 
         # List backlog
-        if any(p in msg for p in ["backlog", "night queue", "task queue", "what's queued", "what's in the queue", "show queue", "list tasks"]):
+        if "backlog" in hits:
             backlog_text = nm.get_backlog_text()
             status_line = nm.get_status_text()
             return f"{status_line}\n\n{backlog_text}"
 
         # Night mode status
-        if any(p in msg for p in ["night mode status", "night mode", "autonomous status"]) and "on" not in msg and "off" not in msg:
+        if "night_mode_status" in hits and "on" not in msg and "off" not in msg:
             return nm.get_status_text()
 
         # Clear backlog
-        if any(p in msg for p in ["clear backlog", "clear queue", "cancel all tasks", "empty the queue"]):
+        if "clear_backlog" in hits:
             cleared = nm.clear_pending()
             if cleared:
                 return f"Cleared {cleared} pending task{'s' if cleared != 1 else ''} from the backlog."
             return "Nothing pending to clear."
 
         # ── Apply self-repair patch + restart ──────────────────────────────────
-        if any(p in msg for p in ["apply self-repair", "apply the repair", "apply the fix and restart",
-                                   "apply repair and restart", "apply self repair"]):
+        if "apply_repair" in hits:
             import glob as _glob
             leon_path = str(Path(__file__).parent.parent)
             # Find most recent self-repair diff
@@ -268,7 +366,7 @@ class RoutingMixin:
             return "Patch applied. Restarting now."
 
         # ── Agent Zero — kill switch ────────────────────────────────────────────
-        if any(p in msg for p in ["kill agent zero", "stop agent zero", "kill az job", "abort agent zero"]):
+        if "agent_zero_kill" in hits:
             try:
                 from tools.agent_zero_runner import get_runner
                 az = get_runner()
@@ -286,7 +384,7 @@ class RoutingMixin:
                 return "Agent Zero not installed — run scripts/setup-agent-zero.sh first."
 
         # ── Agent Zero — job status ─────────────────────────────────────────
-        if any(p in msg for p in ["agent zero status", "az jobs", "agent zero jobs", "list az"]):
+        if "agent_zero_status" in hits:
             try:
                 from tools.agent_zero_runner import get_runner
                 az = get_runner()
@@ -302,14 +400,14 @@ class RoutingMixin:
 
         # ── Plan Mode — cancel / status (triggering is handled by _analyze_request) ──
         # Cancel plan
-        if any(p in msg for p in ["cancel plan", "stop plan", "abort plan", "stop the plan", "kill the plan"]):
+        if "plan_cancel" in hits:
             if not self.plan_mode.active:
                 return "No plan is currently running."
             await self.plan_mode.cancel()
             return "Plan cancelled. Running agents will finish their current task."
 
         # Plan status
-        if any(p in msg for p in ["plan status", "plan progress", "how's the plan", "what's the plan", "how's it going with the plan"]):
+        if "plan_status" in hits:
             status = self.plan_mode.get_status()
             if not status["active"] and not status["goal"]:
                 return "No plan running — just describe what you want built and I'll take it from there."
@@ -351,7 +449,7 @@ class RoutingMixin:
                 return await self._handle_self_repair(message, _component, _issue)
 
         # 3D Printing
-        if any(w in msg for w in ["print", "stl", "3d print", "printer", "filament", "spaghetti", "print job", "print queue"]):
+        if "printing" in hits:
             if ("find" in msg or "search" in msg or "stl" in msg) and self.stl_searcher:
                 results = await self.stl_searcher.search(message)
                 if results:
@@ -371,31 +469,31 @@ class RoutingMixin:
                 return "\n".join(lines)
 
         # Vision
-        if any(w in msg for w in ["what do you see", "look at", "who's here", "what's around", "describe the room", "camera"]):
+        if "vision" in hits:
             if not self.vision:
                 return "Camera's not set up yet. Want me to configure it?"
             return self.vision.describe_scene()
 
         # Business — CRM
-        if any(w in msg for w in ["crm", "pipeline", "clients", "contacts", "deals", "customer list"]):
+        if "crm" in hits:
             if not self.crm:
                 return "CRM isn't set up yet. Want me to get that configured?"
             return json.dumps(self.crm.get_pipeline_summary(), indent=2, default=str)
 
         # Business — leads
-        if any(w in msg for w in ["find clients", "find leads", "hunt leads", "prospect", "generate leads", "new leads", "lead search"]):
+        if "leads" in hits:
             if self.audit_log:
                 self.audit_log.log("lead_hunt", message, "info")
             return "On it — hunting for leads now. I'll score them and have something for you shortly."
 
         # Business — finance
-        if any(w in msg for w in ["revenue", "invoice", "how much money", "financial", "earnings", "profit", "expenses", "income", "billing"]):
+        if "finance" in hits:
             if not self.finance:
                 return "Finance tracking isn't set up yet. Want me to configure it?"
             return self.finance.get_daily_summary()
 
         # Business — communications
-        if any(w in msg for w in ["send email", "check email", "inbox", "messages", "unread", "compose"]):
+        if "comms" in hits:
             if not self.comms:
                 return "Comms module isn't wired up yet. Want me to set it up?"
             # Sending email requires permission
@@ -405,19 +503,19 @@ class RoutingMixin:
             return "Comms hub's live. Check inbox, send something, or review messages?"
 
         # Business — briefing
-        if any(w in msg for w in ["briefing", "brief me", "daily brief", "morning brief", "daily briefing", "what's happening", "catch me up", "daily summary"]):
+        if "briefing" in hits:
             if not self.assistant:
                 return "Assistant module isn't loaded. Might need to check the business config."
             return await self.assistant.generate_daily_briefing()
 
         # Business — schedule/calendar
-        if any(w in msg for w in ["schedule", "calendar", "appointments", "meetings today", "what's on my calendar"]):
+        if "calendar" in hits:
             if not self.assistant:
                 return "Assistant module isn't loaded. Can't check the calendar without it."
             return await self.assistant.generate_daily_briefing()
 
         # Security
-        if any(w in msg for w in ["audit log", "security log", "audit trail", "recent actions"]):
+        if "audit" in hits:
             if not self.audit_log:
                 return "Audit system isn't loaded. Check the security module."
             entries = self.audit_log.get_recent(10)
@@ -429,45 +527,8 @@ class RoutingMixin:
             return "\n".join(lines)
 
         # System skills — AI-classified routing for PC control commands
-        # Instead of 100 keyword checks, send to AI for smart classification
-        system_hints = [
-            "open ", "close ", "launch ", "start ", "kill ", "switch to",
-            "go to ", "navigate to ", "pull up ", "show me ",
-            "cpu", "ram", "memory", "disk", "storage", "processes", "uptime",
-            "ip address", "battery", "temperature", "temp",
-            "play", "pause", "next track", "previous track", "volume", "mute",
-            "now playing", "what's playing", "music",
-            "screenshot", "take a screenshot", "screen",
-            "clipboard", "notify", "notification", "lock screen",
-            "brightness", "find file", "recent files", "downloads", "trash",
-            "wifi", "network", "speed test", "ping",
-            "timer", "alarm", "set timer", "set alarm", "remind",
-            "search for", "google", "define", "weather",
-            "git status", "npm", "pip install", "port",
-            "what's eating", "what's hogging", "what's running",
-            "gpu", "graphics card", "vram", "cuda",
-            "workspace", "tile", "minimize", "maximize", "snap",
-            "tab", "browser", "discord", "youtube", "reddit", "twitter",
-            "github", "spotify", "netflix", "twitch", "website", "site",
-            "schedule", "cron", "scheduled", "remind me every", "every hour",
-            "every day", "every morning", "every night", "run every", "recurring",
-            # terminal & code
-            "run command", "run script", "execute", "shell", "bash ", "terminal command",
-            "python ", "run python", "python code", "run code",
-            # OCR
-            "read the screen", "what's on screen", "whats on screen", "ocr",
-            "read screen", "extract text from screen",
-            # search
-            "search for ", "look up ", "look up", "fast search", "quick search",
-            "what is ", "who is ", "define ",
-            # notes
-            "note ", "notes", "save a note", "write a note", "remember this",
-            "my notes", "search notes", "delete note",
-            # home assistant (keywords removed — lights handled by pre-router)
-            # telegram
-            "send telegram", "telegram message", "message on telegram",
-        ]
-        if any(hint in msg for hint in system_hints):
+        # (hint phrases live in _SPECIAL_ROUTES)
+        if "system_skill" in hits:
             skill_result = await self._route_to_system_skill(message)
             if skill_result:
                 return skill_result
@@ -611,10 +672,11 @@ class RoutingMixin:
             return self.openclaw.cron.format_jobs(jobs)
 
         # ── Keyword pre-route: skip LLM for unambiguous system commands ────
-        for _pattern, _skill, _args in _KEYWORD_ROUTES:
-            if _pattern.search(_clean):
-                logger.info("Keyword pre-route: %s (no LLM call)", _skill)
-                return await self.system_skills.execute(_skill, _args)
+        _route = _KEYWORD_ROUTER.first(_clean)
+        if _route:
+            _skill, _args = _route
+            logger.info("Keyword pre-route: %s (no LLM call)", _skill)
+            return await self.system_skills.execute(_skill, _args)
 
         skill_list = self.system_skills.get_skill_list()
 
@@ -8,6 +8,12 @@ New features:
   - Non-interactive CI mode — never prompts for input
   - Consecutive-failure tracking → alert file after threshold
   - max_runtime_minutes enforcement
+  - Cron expressions compiled once into bitsets; each task's next fire time is
+    precomputed and kept in a heap, so a tick only looks at the earliest deadline
+  - Missed runs (machine suspended or Leon down at fire time) run once on wake;
+    set catch_up: false on a task to skip them instead
+  - ScheduledTaskExecutor runs due tasks concurrently, limited per resource
+    class (cpu / io / llm), and logs queue-wait and run time to health.jsonl
 
 Built-in commands (prefix __):
   __health_check__   — Real system metrics (CPU/RAM/disk/Ollama connectivity)
@@ -25,21 +31,45 @@ Config example (settings.yaml):
         enabled: true
         max_runtime_minutes: 1
         priority: 1
+      - name: "Morning briefing"
+        command: "__daily_summary__"
+        cron: "0 6 * * 1-5"
+        catch_up: false
+        resource_class: "io"          # default: by command (see BUILTIN_RESOURCE_CLASS)
+    concurrency: {cpu: 1, io: 4, llm: 1}
 """
 
 import asyncio
+import heapq
+import itertools
 import json
 import logging
 import shutil
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 logger = logging.getLogger("leon.scheduler")
 
 ALERT_THRESHOLD = 3          # consecutive failures before alert file written
 ALERT_DIR       = Path("data/alerts")
 STATE_PATH      = Path("data/scheduler_state.json")
+MAX_WAIT_S      = 60         # longest single sleep in wait_until_due()
+CRON_HORIZON    = timedelta(days=366 * 28)   # dom/dow/month combos repeat within 28 years
+INDEX_PARALLELISM = 2        # projects re-indexed at once by __index_all__
+CPU_SAMPLE_S    = 1.0        # CPU usage sampling window for __health_check__
+
+# Concurrent scheduled tasks per resource class (scheduler.concurrency overrides)
+DEFAULT_CONCURRENCY = {"cpu": 1, "io": 4, "llm": 1}
+# Built-ins by what they mostly wait on; other commands go through the LLM
+BUILTIN_RESOURCE_CLASS = {
+    "__health_check__":  "io",
+    "__index_all__":     "cpu",
+    "__daily_summary__": "io",
+    "__repo_hygiene__":  "io",
+}
 
 
 # ── Minimal cron parser (no external deps) ───────────────────────────────────
@@ -97,6 +127,107 @@ def _cron_matches_field(field: str, value: int) -> bool:
     return False
 
 
+def _next_bit(bits: int, start: int) -> Optional[int]:
+    """Lowest set bit position >= start, or None."""
+    rest = bits >> start
+    if not rest:
+        return None
+    return start + (rest & -rest).bit_length() - 1
+
+
+class CronExpr:
+    """
+    A 5-field cron expression compiled into one bitset per field.
+
+    Bit N of `minutes` is set when minute N matches, and so on for hours,
+    days (1-31), months (1-12) and weekdays (0=Sunday … 6=Saturday; 7 is
+    folded into 0). Day-of-month and day-of-week must both match, as in
+    _cron_is_due.
+    """
+
+    __slots__ = ("expr", "minutes", "hours", "days", "months", "weekdays")
+
+    def __init__(self, expr: str):
+        parts = expr.strip().split()
+        if len(parts) != 5:
+            raise ValueError(f"need 5 fields, got {len(parts)}")
+        minute, hour, dom, month, dow = parts
+        self.expr     = expr
+        self.minutes  = self._compile(minute, 0, 59)
+        self.hours    = self._compile(hour, 0, 23)
+        self.days     = self._compile(dom, 1, 31)
+        self.months   = self._compile(month, 1, 12)
+        weekdays      = self._compile(dow, 0, 7)
+        self.weekdays = (weekdays | (weekdays >> 7)) & 0x7F
+
+    @staticmethod
+    def _compile(field: str, lo: int, hi: int) -> int:
+        bits = 0
+        for value in range(lo, hi + 1):
+            if _cron_matches_field(field, value):
+                bits |= 1 << value
+        return bits
+
+    def _day_matches(self, dt: datetime) -> bool:
+        cron_dow = (dt.weekday() + 1) % 7   # Python 0=Mon → cron 0=Sun
+        return bool(self.days >> dt.day & 1 and self.weekdays >> cron_dow & 1)
+
+    def matches(self, dt: datetime) -> bool:
+        return bool(
+            self.months >> dt.month & 1
+            and self._day_matches(dt)
+            and self.hours >> dt.hour & 1
+            and self.minutes >> dt.minute & 1
+        )
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """First matching minute strictly after `after`, or None if it never fires."""
+        if not (self.minutes and self.hours and self.days and self.months and self.weekdays):
+            return None
+        t = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + CRON_HORIZON
+        while t < limit:
+            if not self.months >> t.month & 1:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                continue
+            if not self._day_matches(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            hour = _next_bit(self.hours, t.hour)
+            if hour is None:
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if hour != t.hour:
+                t = t.replace(hour=hour, minute=0)
+            minute = _next_bit(self.minutes, t.minute)
+            if minute is None:
+                t = t.replace(minute=0) + timedelta(hours=1)
+                continue
+            return t.replace(minute=minute)
+        return None
+
+    def next_n(self, after: datetime, n: int) -> list[datetime]:
+        """The next n fire times after `after` (fewer if the expression runs out)."""
+        times = []
+        t = after
+        while len(times) < n:
+            t = self.next_after(t)
+            if t is None:
+                break
+            times.append(t)
+        return times
+
+
+@lru_cache(maxsize=256)
+def _compile_cron(cron_expr: str) -> Optional[CronExpr]:
+    """Compiled form of cron_expr, or None (logged once) if it is invalid."""
+    try:
+        return CronExpr(cron_expr)
+    except ValueError as e:
+        logger.warning(f"Invalid cron expression ({e}): {cron_expr!r}")
+        return None
+
+
 def _cron_is_due(cron_expr: str, last_run: Optional[datetime], now: datetime) -> bool:
     """
     Return True if the cron expression fires at `now` and hasn't run since
@@ -108,22 +239,10 @@ def _cron_is_due(cron_expr: str, last_run: Optional[datetime], now: datetime) ->
 
     Day-of-week follows cron convention: 0=Sunday … 6=Saturday (7=Sunday alias).
     """
-    parts = cron_expr.strip().split()
-    if len(parts) != 5:
-        logger.warning(f"Invalid cron expression (need 5 fields): {cron_expr!r}")
+    cron = _compile_cron(cron_expr)
+    if cron is None or not cron.matches(now):
         return False
 
-    minute, hour, dom, month, dow = parts
-
-    # Convert Python weekday (0=Mon … 6=Sun) to cron dow (0=Sun … 6=Sat)
-    cron_dow = (now.weekday() + 1) % 7
-
-    if not _cron_matches_field(month,  now.month):  return False
-    if not _cron_matches_field(dow,    cron_dow):    return False
-    if not _cron_matches_field(dom,    now.day):     return False
-    if not _cron_matches_field(hour,   now.hour):    return False
-    if not _cron_matches_field(minute, now.minute):  return False
-
     # Prevent double-firing within the same minute
     if last_run and (now - last_run) < timedelta(minutes=1):
         return False
@@ -137,6 +256,11 @@ class TaskScheduler:
     """
     Manages recurring scheduled tasks.
     Supports interval_hours (original) and cron (new) scheduling.
+
+    Every enabled task has a precomputed next fire time, kept in a min-heap of
+    (deadline, seq, task index). get_due_tasks() pops only the deadlines that
+    have passed; mark_completed()/mark_failed() compute the next one and push
+    it, which leaves the old heap entry stale (its seq no longer matches).
     """
 
     def __init__(self, config: list, state_path: str = str(STATE_PATH)):
@@ -145,6 +269,19 @@ class TaskScheduler:
         self._state_path.parent.mkdir(parents=True, exist_ok=True)
         self._state: dict  = self._load_state()
         self._fail_counts: dict[str, int] = {}   # consecutive failure tracking
+        self._last_run: dict[str, datetime] = {}
+        for name, stamp in self._state.items():
+            try:
+                self._last_run[name] = datetime.fromisoformat(stamp)
+            except (TypeError, ValueError):
+                pass
+        self._next_fire: dict[int, Optional[datetime]] = {}
+        self._heap: list[tuple[datetime, int, int]] = []
+        self._heap_seq: dict[int, int] = {}
+        self._seq = itertools.count()
+        now = datetime.now()
+        for index in range(len(self._tasks)):
+            self._schedule(index, now)
         logger.info(f"Scheduler: {len(self._tasks)} task(s) configured")
 
     # ── State persistence ─────────────────────────────────────────────────────
@@ -164,52 +301,123 @@ class TaskScheduler:
             json.dump(self._state, f, indent=2, default=str)
         shutil.move(str(tmp), str(self._state_path))
 
-    # ── Due-task detection ────────────────────────────────────────────────────
-
-    def get_due_tasks(self) -> list[dict]:
-        """Return list of tasks that are due to run now, sorted by priority."""
-        now = datetime.now()
+    # ── Next-fire computation ─────────────────────────────────────────────────
+
+    def _compute_next_fire(self, task: dict, now: datetime) -> Optional[datetime]:
+        """
+        When the task should next run. A deadline in the past means it is due;
+        None means never (invalid cron).
+        """
+        last_run = self._last_run.get(task["name"])
+        cron = task.get("cron", "").strip()
+        if not cron:
+            if last_run is None:
+                return now
+            return last_run + timedelta(hours=task.get("interval_hours", 24))
+
+        compiled = _compile_cron(cron)
+        if compiled is None:
+            return None
+        if last_run is None:
+            # Never run: the current minute still counts, earlier ones don't
+            return compiled.next_after(now - timedelta(minutes=1))
+        next_at = compiled.next_after(last_run)
+        if (next_at is not None and next_at <= now - timedelta(minutes=1)
+                and not task.get("catch_up", True)):
+            # Missed while suspended/offline — skip to the next regular slot
+            next_at = compiled.next_after(now - timedelta(minutes=1))
+        return next_at
+
+    def _schedule(self, index: int, now: datetime):
+        """(Re)compute task index's next fire time and push it on the heap."""
+        task = self._tasks[index]
+        self._heap_seq.pop(index, None)   # invalidates any queued entry
+        if not task.get("enabled", True):
+            self._next_fire[index] = None
+            return
+        next_at = self._compute_next_fire(task, now)
+        self._next_fire[index] = next_at
+        if next_at is not None:
+            seq = next(self._seq)
+            self._heap_seq[index] = seq
+            heapq.heappush(self._heap, (next_at, seq, index))
+
+    def _reschedule(self, task_name: str, now: datetime):
+        for index, task in enumerate(self._tasks):
+            if task["name"] == task_name:
+                self._schedule(index, now)
+
+    def _pop_due(self, now: datetime) -> list[tuple[datetime, int, int]]:
+        """Pop the live heap entries whose deadline is <= now."""
         due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._heap_seq.get(entry[2]) == entry[1]:
+                due.append(entry)
+        return due
 
-        for task in self._tasks:
-            if not task.get("enabled", True):
-                continue
-
-            name        = task["name"]
-            last_run_str = self._state.get(name)
-            last_run    = None
-            if last_run_str:
-                try:
-                    last_run = datetime.fromisoformat(last_run_str)
-                except ValueError:
-                    pass
-
-            is_due = False
-
-            # Cron expression takes priority over interval_hours
-            cron = task.get("cron", "").strip()
-            if cron:
-                is_due = _cron_is_due(cron, last_run, now)
-            else:
-                interval_h = task.get("interval_hours", 24)
-                interval   = timedelta(hours=interval_h)
-                if last_run is None:
-                    is_due = True
-                elif (now - last_run) >= interval:
-                    is_due = True
+    # ── Due-task detection ────────────────────────────────────────────────────
 
-            if is_due:
-                due.append(task)
+    def get_due_tasks(self, now: Optional[datetime] = None) -> list[dict]:
+        """Return list of tasks that are due to run now, sorted by priority."""
+        now = now or datetime.now()
+        due = self._pop_due(now)
+        # A task stays due until it is marked completed or failed
+        for entry in due:
+            heapq.heappush(self._heap, entry)
 
+        tasks = [self._tasks[index] for _, _, index in due]
         # Sort by priority (lower number = higher priority)
-        due.sort(key=lambda t: t.get("priority", 99))
-        return due
+        tasks.sort(key=lambda t: t.get("priority", 99))
+        return tasks
+
+    def next_deadline(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Earliest fire time still in the future (already-due tasks excluded)."""
+        now = now or datetime.now()
+        due = self._pop_due(now)
+        while self._heap and self._heap_seq.get(self._heap[0][2]) != self._heap[0][1]:
+            heapq.heappop(self._heap)   # drop stale entries
+        deadline = self._heap[0][0] if self._heap else None
+        for entry in due:
+            heapq.heappush(self._heap, entry)
+        return deadline
+
+    async def wait_until_due(self, max_wait: float = MAX_WAIT_S):
+        """
+        Sleep until the next deadline, but never longer than max_wait seconds:
+        the event loop's clock stops during suspend, so the wall clock is
+        re-checked at least that often to catch up missed runs on wake.
+        """
+        deadline = self.next_deadline()
+        delay = max_wait if deadline is None else (deadline - datetime.now()).total_seconds()
+        await asyncio.sleep(min(max(delay, 0.0), max_wait))
+
+    def next_fire_times(self, task_name: str, n: int = 3) -> list[datetime]:
+        """The task's next n fire times (the first may be in the past if it is due)."""
+        for index, task in enumerate(self._tasks):
+            if task["name"] == task_name:
+                return self._next_fire_times(index, n)
+        return []
+
+    def _next_fire_times(self, index: int, n: int) -> list[datetime]:
+        first = self._next_fire.get(index)
+        if first is None or n < 1:
+            return []
+        task = self._tasks[index]
+        cron = task.get("cron", "").strip()
+        if cron:
+            return [first] + _compile_cron(cron).next_n(first, n - 1)
+        interval = timedelta(hours=task.get("interval_hours", 24))
+        return [first + interval * i for i in range(n)]
 
     def mark_completed(self, task_name: str):
         """Record successful execution."""
-        self._state[task_name] = datetime.now().isoformat()
+        now = datetime.now()
+        self._state[task_name] = now.isoformat()
+        self._last_run[task_name] = now
         self._fail_counts.pop(task_name, None)   # Reset failure counter
         self._save_state()
+        self._reschedule(task_name, now)
         logger.info(f"Scheduled task completed: {task_name}")
 
     def mark_failed(self, task_name: str, error: str = ""):
@@ -219,8 +427,11 @@ class TaskScheduler:
         logger.warning(f"Scheduled task failed ({count}x): {task_name} — {error[:100]}")
 
         # Still update last_run so we don't immediately retry a broken task
-        self._state[task_name] = datetime.now().isoformat()
+        now = datetime.now()
+        self._state[task_name] = now.isoformat()
+        self._last_run[task_name] = now
         self._save_state()
+        self._reschedule(task_name, now)
 
         if count >= ALERT_THRESHOLD:
             self._write_alert(task_name, count, error)
@@ -242,34 +453,29 @@ class TaskScheduler:
 
     # ── Summary ───────────────────────────────────────────────────────────────
 
-    def get_schedule_summary(self) -> list[dict]:
+    def get_schedule_summary(self, next_n: int = 3) -> list[dict]:
         """Status of all configured tasks (for /schedule command and leon-status)."""
         now = datetime.now()
         summary = []
 
-        for task in self._tasks:
+        for index, task in enumerate(self._tasks):
             name         = task["name"]
             enabled      = task.get("enabled", True)
             last_run_str = self._state.get(name)
             fail_count   = self._fail_counts.get(name, 0)
-
-            next_run = "now"
-            interval_h = task.get("interval_hours", 24)
-
-            if task.get("cron"):
-                next_run = f"cron: {task['cron']}"
-            elif last_run_str:
-                try:
-                    last_run = datetime.fromisoformat(last_run_str)
-                    next_at  = last_run + timedelta(hours=interval_h)
-                    if next_at > now:
-                        delta = next_at - now
-                        hours = delta.total_seconds() / 3600
-                        next_run = f"in {hours:.1f}h"
-                    else:
-                        next_run = "overdue"
-                except ValueError:
-                    next_run = "unknown"
+            fires        = self._next_fire_times(index, next_n)
+
+            if not enabled:
+                next_run = "disabled"
+            elif not fires:
+                next_run = f"never (cron: {task.get('cron', '')})"
+            elif fires[0] > now:
+                hours = (fires[0] - now).total_seconds() / 3600
+                next_run = f"in {hours:.1f}h"
+            elif name not in self._last_run:
+                next_run = "now"
+            else:
+                next_run = "overdue"
 
             summary.append({
                 "name":           name,
@@ -277,6 +483,7 @@ class TaskScheduler:
                 "enabled":        enabled,
                 "last_run":       last_run_str or "never",
                 "next_run":       next_run,
+                "next_fires":     [t.isoformat(timespec="minutes") for t in fires],
                 "fail_count":     fail_count,
                 "priority":       task.get("priority", 99),
                 "max_runtime_m":  task.get("max_runtime_minutes", 60),
@@ -285,6 +492,120 @@ class TaskScheduler:
         return summary
 
 
+# ── Concurrent executor ───────────────────────────────────────────────────────
+
+def resource_class(task: dict) -> str:
+    """Resource class of a task: its resource_class setting, else by command."""
+    if task.get("resource_class"):
+        return task["resource_class"]
+    return BUILTIN_RESOURCE_CLASS.get(task.get("command", ""), "llm")
+
+
+class ScheduledTaskExecutor:
+    """
+    Runs due scheduled tasks as background asyncio tasks.
+
+    Each resource class has its own semaphore, so a long __index_all__ (cpu)
+    doesn't hold up the health check (io). Tasks are submitted in priority
+    order and semaphores wake waiters FIFO, so priority still decides who
+    gets a free slot first. A task already queued or running is not submitted
+    twice (it stays due in the scheduler until marked).
+
+    runner(task) -> (success, message) does the actual work; the executor
+    applies max_runtime_minutes, marks the task completed/failed and writes a
+    "scheduled_task" entry to logs_structured/health.jsonl.
+    """
+
+    def __init__(self, scheduler: TaskScheduler,
+                 runner: Callable[[dict], Awaitable[tuple[bool, str]]],
+                 concurrency: Optional[dict] = None):
+        self.scheduler = scheduler
+        self._runner = runner
+        self._limits = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def _semaphore(self, rclass: str) -> asyncio.Semaphore:
+        if rclass not in self._semaphores:
+            limit = self._limits.get(rclass, 1)
+            self._semaphores[rclass] = asyncio.Semaphore(max(1, int(limit)))
+        return self._semaphores[rclass]
+
+    @property
+    def inflight(self) -> list[str]:
+        return list(self._inflight)
+
+    def submit(self, task: dict) -> bool:
+        """Start task in the background. False if it has no command or is already in flight."""
+        name = task["name"]
+        if not task.get("command") or name in self._inflight:
+            return False
+        job = asyncio.create_task(self._run(task, time.monotonic()), name=f"scheduled:{name}")
+        self._inflight[name] = job
+        job.add_done_callback(lambda _job: self._inflight.pop(name, None))
+        return True
+
+    def dispatch_due(self) -> list[str]:
+        """Submit every due task; returns the names that were started."""
+        return [t["name"] for t in self.scheduler.get_due_tasks() if self.submit(t)]
+
+    async def _run(self, task: dict, queued_at: float):
+        name = task["name"]
+        rclass = resource_class(task)
+        timeout_m = task.get("max_runtime_minutes", 60)
+        status, message = "failed", ""
+        started = None
+        try:
+            async with self._semaphore(rclass):
+                started = time.monotonic()
+                logger.info(f"Running scheduled task: {name} -> {task['command']} [{rclass}]")
+                try:
+                    ok, message = await asyncio.wait_for(self._runner(task), timeout=timeout_m * 60)
+                    status = "completed" if ok else "failed"
+                except asyncio.TimeoutError:
+                    status, message = "timeout", f"Timed out after {timeout_m}m"
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    message = str(e)
+        except asyncio.CancelledError:
+            # Shutdown: leave it due so it runs (or is caught up) next time
+            status, message = "cancelled", "Cancelled on shutdown"
+            raise
+        finally:
+            if status == "completed":
+                self.scheduler.mark_completed(name)
+            elif status != "cancelled":
+                logger.error(f"Scheduled task {status}: {name} — {message[:100]}")
+                self.scheduler.mark_failed(name, message)
+            self._log(task, rclass, status, message, queued_at, started)
+
+    def _log(self, task: dict, rclass: str, status: str, message: str,
+             queued_at: float, started: Optional[float]):
+        now = time.monotonic()
+        wait_s = (started if started is not None else now) - queued_at
+        run_s = now - started if started is not None else 0.0
+        try:
+            from core.structured_logger import get_logger
+            get_logger().scheduled_task(task["name"], task.get("command", ""), rclass,
+                                        status, wait_s, run_s, message)
+        except Exception as e:
+            logger.debug(f"Could not log scheduled task metrics: {e}")
+
+    async def drain(self):
+        """Wait for every in-flight task to finish."""
+        while self._inflight:
+            await asyncio.gather(*self._inflight.values(), return_exceptions=True)
+
+    async def shutdown(self):
+        """Cancel in-flight tasks and wait for them to unwind."""
+        jobs = list(self._inflight.values())
+        for job in jobs:
+            job.cancel()
+        if jobs:
+            await asyncio.gather(*jobs, return_exceptions=True)
+
+
 # ── Built-in task handler ─────────────────────────────────────────────────────
 
 async def run_builtin(command: str, leon=None) -> tuple[bool, str]:
@@ -348,12 +669,14 @@ async def _collect_system_metrics() -> dict:
 
     metrics: dict = {}
 
-    # CPU usage (non-blocking 1-second sample)
+    # Ollama ping runs while the CPU sample window elapses
+    ping = asyncio.create_task(_ollama_available())
+
+    # CPU usage: prime the counter, sleep the window, read the delta
     try:
-        cpu = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: psutil.cpu_percent(interval=1)
-        )
-        metrics["cpu_percent"] = cpu
+        psutil.cpu_percent(interval=None)
+        await asyncio.sleep(CPU_SAMPLE_S)
+        metrics["cpu_percent"] = psutil.cpu_percent(interval=None)
         metrics["cpu_count"] = psutil.cpu_count()
     except Exception as e:
         metrics["cpu_error"] = str(e)
@@ -383,15 +706,17 @@ async def _collect_system_metrics() -> dict:
     except Exception as e:
         metrics["leon_process_error"] = str(e)
 
-    # Ollama connectivity (simple HTTP ping, no LLM call)
+    metrics.update(await ping)
+    return metrics
+
+
+async def _ollama_available() -> dict:
+    """Ollama connectivity (simple HTTP ping, no LLM call). Never raises."""
     try:
         from router.model_router import is_ollama_available
-        metrics["ollama_available"] = await is_ollama_available()
+        return {"ollama_available": await is_ollama_available()}
     except Exception as e:
-        metrics["ollama_available"] = False
-        metrics["ollama_error"] = str(e)
-
-    return metrics
+        return {"ollama_available": False, "ollama_error": str(e)}
 
 
 async def _builtin_index_all(leon=None) -> tuple[bool, str]:
@@ -404,19 +729,23 @@ async def _builtin_index_all(leon=None) -> tuple[bool, str]:
         return False, "config/projects.yaml not found"
 
     projects = yaml.safe_load(cfg_path.read_text()).get("projects", [])
-    results = []
+    slots = asyncio.Semaphore(INDEX_PARALLELISM)
 
-    for p in projects:
-        path = Path(p.get("path", ""))
-        if not path.exists():
-            continue
+    def index_one(p: dict) -> str:
         try:
-            indexer = CodeIndexer(p["name"], str(path))
+            indexer = CodeIndexer(p["name"], p["path"])
             stats   = indexer.index(force=False)
-            results.append(f"{p['name']}: {stats['files_indexed']} files, {stats['chunks_added']} chunks")
+            return f"{p['name']}: {stats['files_indexed']} files, {stats['chunks_added']} chunks"
         except Exception as e:
-            results.append(f"{p['name']}: failed — {e}")
+            return f"{p['name']}: failed — {e}"
+
+    async def run(p: dict) -> str:
+        # Indexing is blocking — keep it off the event loop
+        async with slots:
+            return await asyncio.to_thread(index_one, p)
 
+    present = [p for p in projects if Path(p.get("path", "")).exists()]
+    results = await asyncio.gather(*(run(p) for p in present))
     return True, "Index update: " + " | ".join(results)
 
 
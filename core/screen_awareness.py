@@ -7,10 +7,19 @@ about what the user is working on. Can detect patterns like:
 - User browsing documentation (offer to summarize)
 - User writing code (offer suggestions)
 - Idle screen (suppress notifications)
+
+Change detection is perceptual: frames are grabbed as raw PPM on stdout
+(grim, or ImageMagick's import on X11), shrunk to a grayscale thumbnail and
+compared block by block with the last analyzed frame. Only a frame with a
+block that changed by more than change_threshold is analyzed, and only the
+changed region (plus a block of margin) is uploaded. Without NumPy or a
+PPM-capable grabber it falls back to whole-screen JPEGs compared byte-wise.
 """
 
 import asyncio
 import base64
+import hashlib
+import io
 import logging
 import subprocess
 import time
@@ -19,6 +28,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional, Callable
 
+try:
+    import numpy as np
+except ImportError:  # optional — perceptual change detection is disabled
+    np = None
+
 logger = logging.getLogger("leon.screen")
 
 # How often to capture (seconds)
@@ -27,6 +41,127 @@ DEFAULT_INTERVAL = 30
 MAX_HISTORY = 50
 # Minimum time between AI analyses (avoid spamming API)
 MIN_ANALYSIS_GAP = 60
+# Frame grab scale (grim -s / import -resize) — also the upload resolution
+CAPTURE_SCALE = 0.5
+# Grayscale thumbnail frames are diffed on (w, h), and its block grid (cols, rows)
+DIFF_SIZE = (128, 72)
+DIFF_GRID = (16, 9)
+# Mean absolute gray-level change (0-255) for a block to count as changed.
+# JPEG noise and a ticking clock stay well below this; a new window doesn't.
+DEFAULT_CHANGE_THRESHOLD = 12.0
+JPEG_QUALITY = 50
+
+Region = tuple[float, float, float, float]   # left, top, right, bottom (fractions)
+
+
+# ------------------------------------------------------------------
+# Frame helpers (NumPy)
+# ------------------------------------------------------------------
+
+def decode_ppm(data: bytes):
+    """Decode a binary PPM (P6, maxval 255) into an (h, w, 3) uint8 array."""
+    fields, pos = [], 0
+    while len(fields) < 4:
+        while pos < len(data) and data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b"#":
+            pos = data.index(b"\n", pos) + 1
+            continue
+        start = pos
+        while pos < len(data) and not data[pos:pos + 1].isspace():
+            pos += 1
+        if start == pos:
+            raise ValueError("truncated PPM header")
+        fields.append(data[start:pos])
+    if fields[0] != b"P6" or int(fields[3]) != 255:
+        raise ValueError(f"unsupported PPM: {fields[0]!r} maxval {fields[3]!r}")
+    width, height = int(fields[1]), int(fields[2])
+    pixels = np.frombuffer(data, dtype=np.uint8, count=width * height * 3, offset=pos + 1)
+    return pixels.reshape(height, width, 3)
+
+
+def _block_mean(values, size: tuple[int, int]):
+    """Average a 2-D array down to size (cols, rows) blocks."""
+    rows, cols = min(size[1], values.shape[0]), min(size[0], values.shape[1])
+    row_edges = np.linspace(0, values.shape[0], rows + 1).astype(int)
+    col_edges = np.linspace(0, values.shape[1], cols + 1).astype(int)
+    sums = np.add.reduceat(np.add.reduceat(values, row_edges[:-1], axis=0),
+                           col_edges[:-1], axis=1)
+    counts = np.outer(np.diff(row_edges), np.diff(col_edges))
+    return sums / counts
+
+
+def screen_thumbnail(rgb, size: tuple[int, int] = DIFF_SIZE):
+    """Grayscale (BT.601 luma), area-averaged thumbnail of an RGB frame."""
+    gray = rgb.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return _block_mean(gray, size).astype(np.float32)
+
+
+def crop_region(rgb, region: Region):
+    """The part of an (h, w, 3) frame covered by region (fractions)."""
+    height, width = rgb.shape[:2]
+    left, top, right, bottom = region
+    return rgb[int(top * height):int(np.ceil(bottom * height)),
+               int(left * width):int(np.ceil(right * width))]
+
+
+def encode_jpeg(rgb, quality: int = JPEG_QUALITY) -> Optional[bytes]:
+    """JPEG-encode an RGB array with Pillow or OpenCV; None if neither is installed."""
+    try:
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.fromarray(np.ascontiguousarray(rgb)).save(buf, "JPEG", quality=quality)
+        return buf.getvalue()
+    except ImportError:
+        pass
+    try:
+        import cv2
+        ok, buf = cv2.imencode(".jpg", np.ascontiguousarray(rgb[..., ::-1]),
+                               [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buf.tobytes() if ok else None
+    except ImportError:
+        return None
+
+
+class ScreenChangeDetector:
+    """
+    Block-difference change detector over screen thumbnails.
+
+    The reference frame only moves when accept() is called (i.e. when a frame
+    was analyzed), so slow changes accumulate instead of slipping under the
+    threshold one tick at a time.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_CHANGE_THRESHOLD,
+                 grid: tuple[int, int] = DIFF_GRID):
+        self.threshold = threshold
+        self.grid = grid
+        self.last_score = 0.0
+        self._reference = None
+
+    def changed_region(self, thumb) -> Optional[Region]:
+        """
+        Region of thumb that differs from the reference by more than the
+        threshold, padded by one block; the whole frame if there is no
+        reference yet; None if nothing changed enough.
+        """
+        if self._reference is None or self._reference.shape != thumb.shape:
+            self.last_score = 255.0
+            return (0.0, 0.0, 1.0, 1.0)
+        scores = _block_mean(np.abs(thumb - self._reference), self.grid)
+        self.last_score = float(scores.max())
+        changed = np.argwhere(scores > self.threshold)
+        if not len(changed):
+            return None
+        rows, cols = scores.shape
+        top, left = changed.min(axis=0) - 1
+        bottom, right = changed.max(axis=0) + 2
+        return (float(max(left, 0) / cols), float(max(top, 0) / rows),
+                float(min(right, cols) / cols), float(min(bottom, rows) / rows))
+
+    def accept(self, thumb):
+        """Make thumb the frame later ones are compared against."""
+        self._reference = thumb
 
 
 class ScreenAwareness:
@@ -42,6 +177,7 @@ class ScreenAwareness:
         api_client=None,
         on_insight: Optional[Callable] = None,
         interval: float = DEFAULT_INTERVAL,
+        change_threshold: float = DEFAULT_CHANGE_THRESHOLD,
     ):
         """
         Args:
@@ -49,6 +185,8 @@ class ScreenAwareness:
             on_insight: Callback when Leon has a proactive suggestion
                         Signature: async def on_insight(insight: str)
             interval: Seconds between screen captures
+            change_threshold: Mean gray-level change (0-255) of a screen block
+                              that counts as a change worth analyzing
         """
         self.api = api_client
         self.on_insight = on_insight
@@ -66,6 +204,7 @@ class ScreenAwareness:
         self._last_analysis_time = 0
         self._consecutive_idle = 0
         self._last_screenshot_hash = ""
+        self._detector = ScreenChangeDetector(change_threshold)
 
         logger.info(f"Screen awareness initialized (interval={self.interval}s)")
 
@@ -108,15 +247,7 @@ class ScreenAwareness:
         """Main monitoring loop — capture, analyze, act."""
         while self._running:
             try:
-                # Capture screenshot
-                screenshot_b64 = await self._capture_screen()
-                if not screenshot_b64:
-                    await asyncio.sleep(self.interval)
-                    continue
-
-                # Quick hash check — skip analysis if screen hasn't changed
-                quick_hash = hash(screenshot_b64[:1000] + screenshot_b64[-1000:])
-                if quick_hash == self._last_screenshot_hash:
+                if not await self._check_screen():
                     self._consecutive_idle += 1
                     # Back off if idle (double interval, max 5 min)
                     if self._consecutive_idle > 3:
@@ -124,20 +255,6 @@ class ScreenAwareness:
                         continue
                 else:
                     self._consecutive_idle = 0
-                    self._last_screenshot_hash = quick_hash
-
-                # Analyze if enough time has passed
-                now = time.time()
-                if now - self._last_analysis_time >= MIN_ANALYSIS_GAP and self.api:
-                    analysis = await self._analyze_screen(screenshot_b64)
-                    self._last_analysis_time = now
-
-                    if analysis:
-                        self._update_context(analysis)
-
-                        # Check if we should proactively help
-                        if analysis.get("should_help") and self.on_insight:
-                            await self.on_insight(analysis.get("suggestion", ""))
 
             except asyncio.CancelledError:
                 break
@@ -146,10 +263,94 @@ class ScreenAwareness:
 
             await asyncio.sleep(self.interval)
 
+    async def _check_screen(self) -> bool:
+        """
+        Capture once; if the screen changed, analyze it (rate-limited by
+        MIN_ANALYSIS_GAP) and act on the result. Returns whether it changed.
+        """
+        frame = await self._capture_frame()
+        if frame is not None:
+            thumb = screen_thumbnail(frame)
+            region = self._detector.changed_region(thumb)
+            if region is None:
+                return False
+            logger.debug(f"Screen changed (score {self._detector.last_score:.0f}): {region}")
+            if not self.api:
+                self._detector.accept(thumb)   # never analyzed — compare against this frame next
+                return True
+            if time.time() - self._last_analysis_time < MIN_ANALYSIS_GAP:
+                return True
+            jpeg = encode_jpeg(crop_region(frame, region))
+            if jpeg:
+                screenshot_b64 = base64.b64encode(jpeg).decode()
+            else:
+                screenshot_b64 = await self._capture_screen()   # no JPEG encoder installed
+            self._detector.accept(thumb)
+        else:
+            # No perceptual pipeline — whole JPEG, exact comparison
+            screenshot_b64 = await self._capture_screen()
+            if not screenshot_b64:
+                return False
+            digest = hashlib.sha1(screenshot_b64.encode()).hexdigest()
+            if digest == self._last_screenshot_hash:
+                return False
+            self._last_screenshot_hash = digest
+            if not self.api or time.time() - self._last_analysis_time < MIN_ANALYSIS_GAP:
+                return True
+
+        if not screenshot_b64:
+            return True
+        analysis = await self._analyze_screen(screenshot_b64)
+        self._last_analysis_time = time.time()
+
+        if analysis:
+            self._update_context(analysis)
+
+            # Check if we should proactively help
+            if analysis.get("should_help") and self.on_insight:
+                await self.on_insight(analysis.get("suggestion", ""))
+        return True
+
     # ------------------------------------------------------------------
     # Screen capture
     # ------------------------------------------------------------------
 
+    async def _grab_stdout(self, *cmd: str) -> Optional[bytes]:
+        """Run a screen grabber that writes the image to stdout; None on failure."""
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except FileNotFoundError:
+            return None
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=15)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            logger.debug(f"{cmd[0]} timed out")
+            return None
+        return stdout if proc.returncode == 0 and stdout else None
+
+    async def _capture_frame(self):
+        """Capture the screen as an (h, w, 3) RGB array, or None if unavailable."""
+        if np is None:
+            return None
+        for cmd in (
+            ("grim", "-t", "ppm", "-s", str(CAPTURE_SCALE), "-"),                    # Wayland
+            ("import", "-silent", "-window", "root",
+             "-resize", f"{CAPTURE_SCALE:.0%}", "ppm:-"),                           # X11
+        ):
+            data = await self._grab_stdout(*cmd)
+            if data:
+                try:
+                    return decode_ppm(data)
+                except ValueError as e:
+                    logger.debug(f"Unreadable {cmd[0]} frame: {e}")
+        return None
+
     async def _capture_screen(self) -> Optional[str]:
         """Capture the screen and return base64-encoded JPEG."""
         try:
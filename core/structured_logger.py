@@ -5,7 +5,8 @@ Log files in logs_structured/:
   tasks.jsonl    — task start / complete / fail
   router.jsonl   — model routing decisions  (also written by router/model_router.py)
   search.jsonl   — search queries and latencies
-  health.jsonl   — periodic health check results
+  health.jsonl   — periodic health check results + scheduled task timings
+  traces.jsonl   — per-request stage timings (core/tracing.py)
   failures.jsonl — failures + alerts (easy to grep for monitoring)
 
 Rotation: 10MB per file, 5 backups → max 50MB per channel.
@@ -92,6 +93,34 @@ class StructuredLogger:
             "checks": {k: str(v)[:200] for k, v in checks.items()},
         })
 
+    def scheduled_task(self, name: str, command: str, resource_class: str, status: str,
+                       queue_wait_s: float, run_s: float, message: str = ""):
+        self._write("health", "scheduled_task", {
+            "task":           name,
+            "command":        command[:120],
+            "resource_class": resource_class,
+            "status":         status,
+            "queue_wait_s":   round(queue_wait_s, 3),
+            "run_s":          round(run_s, 3),
+            "message":        message[:200],
+        })
+
+    # ── Traces ────────────────────────────────────────────────────────────────
+
+    def trace(self, trace_id: int, name: str, duration_ms: float, spans: list,
+              error: Optional[str] = None, attrs: Optional[dict] = None):
+        entry = {
+            "trace_id":    trace_id,
+            "name":        name,
+            "duration_ms": round(duration_ms, 2),
+            "spans":       spans,
+        }
+        if attrs:
+            entry["attrs"] = attrs
+        if error:
+            entry["error"] = error
+        self._write("traces", "trace", entry)
+
     # ── Alerts ────────────────────────────────────────────────────────────────
 
     def alert(self, message: str, severity: str = "warning",
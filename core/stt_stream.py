@@ -0,0 +1,193 @@
+"""
+Leon Streaming STT — transcribe an utterance while it is still being spoken.
+
+Groq's Whisper endpoint (OpenAI-compatible /audio/transcriptions) takes whole
+files only, so streaming is done with rolling-window partial requests. While
+the VAD is recording, the capture thread hands over the audio recorded so far
+every `stt_partial_interval` seconds; StreamingUtterance uploads the last
+`window_s` of it and reports each partial transcript, flagged stable when it
+says the same as the previous one (the speaker paused). Only one partial is in
+flight at a time — audio offered meanwhile replaces any older waiting offer.
+
+When the utterance ends, a partial that already covered all of its speech
+(only the end-of-speech silence came after it) is the final transcript, so
+there is no second upload; otherwise the whole utterance is sent as before.
+
+    client = WhisperClient(api_key, base_url="http://127.0.0.1:8765/v1")
+    utt = StreamingUtterance(client, 16000, on_partial=handle_partial)
+    utt.offer(vad.pending())                      # during speech (event loop)
+    text = await utt.finish(pcm, vad.speech_bytes)  # at end of speech
+    await client.close()
+
+base_url can point at any server speaking the same API (tests replay WAV
+fixtures from a local aiohttp stand-in).
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Optional
+
+from .audio_dsp import SAMPLE_WIDTH, wav_bytes
+from .safe_tasks import create_safe_task
+
+logger = logging.getLogger("leon.voice")
+
+GROQ_STT_BASE_URL = "https://api.groq.com/openai/v1"
+WHISPER_MODEL = "whisper-large-v3-turbo"
+REQUEST_TIMEOUT_S = 15.0
+RATE_LIMIT_PAUSE_S = 5.0     # skip partials this long after a 429
+PARTIAL_WINDOW_S = 10.0      # partials transcribe at most the last N seconds
+
+_NON_WORD = re.compile(r"[^\w\s']+")
+
+
+def normalized(text: str) -> str:
+    """Lowercase words only — partials that differ in case/punctuation say the same thing."""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+class WhisperClient:
+    """Whisper transcription over HTTP, one keep-alive session for all requests."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = GROQ_STT_BASE_URL,
+        model: str = WHISPER_MODEL,
+        language: str = "en",
+        timeout_s: float = REQUEST_TIMEOUT_S,
+    ):
+        self.api_key = api_key
+        self.url = base_url.rstrip("/") + "/audio/transcriptions"
+        self.model = model
+        self.language = language
+        self.timeout_s = timeout_s
+        self.paused_until = 0.0
+        self.requests = 0
+        self._session = None
+
+    @property
+    def rate_limited(self) -> bool:
+        return time.monotonic() < self.paused_until
+
+    async def transcribe(self, pcm: bytes, sample_rate: int) -> Optional[str]:
+        """Transcript of mono PCM ("" if nothing was said), or None if the request failed."""
+        import aiohttp
+
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        form = aiohttp.FormData()
+        form.add_field("file", wav_bytes(pcm, sample_rate),
+                       filename="audio.wav", content_type="audio/wav")
+        form.add_field("model", self.model)
+        form.add_field("response_format", "json")
+        form.add_field("language", self.language)
+
+        self.requests += 1
+        try:
+            async with self._session.post(
+                self.url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                data=form,
+                timeout=aiohttp.ClientTimeout(total=self.timeout_s),
+            ) as resp:
+                if resp.status == 200:
+                    data = await resp.json()
+                    return data.get("text", "").strip()
+                if resp.status == 429:
+                    logger.warning("Whisper rate limited — pausing partials for %.0fs",
+                                   RATE_LIMIT_PAUSE_S)
+                    self.paused_until = time.monotonic() + RATE_LIMIT_PAUSE_S
+                else:
+                    body = await resp.text()
+                    logger.warning("Whisper error %d: %s", resp.status, body[:100])
+        except Exception as e:
+            logger.error("Transcription error: %s", e)
+        return None
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+class StreamingUtterance:
+    """
+    Partial transcription of one utterance. offer() and finish() run on the
+    event loop; on_partial(text, stable) is awaited for every partial transcript.
+    """
+
+    def __init__(
+        self,
+        client: WhisperClient,
+        sample_rate: int,
+        window_s: float = PARTIAL_WINDOW_S,
+        on_partial: Optional[Callable[[str, bool], Awaitable[None]]] = None,
+    ):
+        self.client = client
+        self.sample_rate = sample_rate
+        self.on_partial = on_partial
+        self._window = int(window_s * sample_rate) * SAMPLE_WIDTH
+        self.text = ""            # latest partial transcript
+        self.covered = 0          # bytes from the start the latest partial transcribed (0 if windowed)
+        self.partials = 0
+        self.reused = False       # finish() returned a partial instead of uploading again
+        self._inflight: Optional[asyncio.Task] = None
+        self._inflight_covers = 0
+        self._waiting: Optional[bytes] = None
+        self._finished = False
+
+    def offer(self, pcm: bytes):
+        """Audio recorded so far; transcribed now, or once the request in flight returns."""
+        if self._finished or self.client.rate_limited:
+            return
+        if self._inflight is not None and not self._inflight.done():
+            self._waiting = pcm
+            return
+        self._start(pcm)
+
+    def _start(self, pcm: bytes):
+        start = max(0, len(pcm) - self._window)
+        start -= start % SAMPLE_WIDTH
+        self._inflight_covers = len(pcm) if start == 0 else 0
+        self._inflight = create_safe_task(self._partial(pcm[start:], self._inflight_covers),
+                                          name="stt-partial")
+
+    async def _partial(self, pcm: bytes, covers: int):
+        text = await self.client.transcribe(pcm, self.sample_rate)
+        if text is not None:
+            stable = self.partials > 0 and normalized(text) == normalized(self.text)
+            self.partials += 1
+            self.text, self.covered = text, covers
+            if text and self.on_partial and not self._finished:
+                await self.on_partial(text, stable)
+        waiting, self._waiting = self._waiting, None
+        if waiting is not None and not self._finished:
+            self._start(waiting)
+
+    async def finish(self, pcm: bytes, speech_bytes: int) -> Optional[str]:
+        """
+        Final transcript of the whole utterance; speech_bytes is where its
+        speech ended (the rest is trailing silence).
+        """
+        self._finished = True
+        self._waiting = None
+        inflight = self._inflight
+        if inflight is not None and not inflight.done():
+            if self._inflight_covers >= speech_bytes > 0:
+                await asyncio.wait([inflight])   # already has all the speech
+            else:
+                inflight.cancel()
+        if self.covered >= speech_bytes > 0:
+            self.reused = True
+            return self.text
+        return await self.client.transcribe(pcm, self.sample_rate)
+
+    def cancel(self):
+        """Abandon the utterance (dropped by the VAD or cut off by our own speech)."""
+        self._finished = True
+        self._waiting = None
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
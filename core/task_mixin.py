@@ -3,7 +3,8 @@ TaskMixin — extracted from core/leon.py to keep that file manageable.
 
 Contains: _handle_plan_request, _handle_single_task, _orchestrate,
           _create_task_brief, _dispatch_to_right_brain, _handle_self_repair,
-          _handle_remote_task_status, _handle_remote_task_result
+          _handle_remote_task_status, _handle_remote_task_result,
+          _handle_memory_ack, _push_memory_sync
 All self.* references resolve through Leon's MRO at runtime.
 """
 
@@ -14,9 +15,10 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
-from .neural_bridge import BridgeMessage, MSG_TASK_DISPATCH
+from .neural_bridge import BridgeMessage, MSG_TASK_DISPATCH, MSG_MEMORY_SYNC
 from .safe_tasks import create_safe_task
 from .structured_logger import get_logger as get_structured_logger
+from .tracing import traced
 
 logger = logging.getLogger("leon")
 
@@ -24,6 +26,7 @@ logger = logging.getLogger("leon")
 class TaskMixin:
     """Task spawning, orchestration, plan routing, self-repair, and bridge dispatch."""
 
+    @traced("handle_plan_request")
     async def _handle_plan_request(self, message: str, analysis: dict) -> str:
         """Route a plan-type request from _analyze_request into PlanMode."""
         if self.plan_mode.active:
@@ -48,6 +51,7 @@ class TaskMixin:
             f"I'll execute everything automatically. Check the dashboard for live progress."
         )
 
+    @traced("handle_single_task")
     async def _handle_single_task(self, message: str, analysis: dict) -> str:
         """Spawn a single Claude Code agent for one task."""
         task_desc = analysis["tasks"][0] if analysis.get("tasks") else message
@@ -114,6 +118,7 @@ class TaskMixin:
             f"I'll let you know when it's done."
         )
 
+    @traced("orchestrate")
     async def _orchestrate(self, message: str, analysis: dict) -> str:
         """Break down a complex request and spawn multiple agents."""
         tasks = analysis.get("tasks", [])
@@ -407,7 +412,7 @@ spawned_by: {self.ai_name} v1.0
                         )
                         summary = result.get("summary", "")
                         diff_path = result.get("diff_path", "")
-                        self.memory.memory.get("active_tasks", {}).pop(job_id_preview, None)
+                        self.memory.remove_active_task(job_id_preview)
                         self.memory.save()
 
                         # Offer to apply the patch and restart
@@ -496,3 +501,29 @@ spawned_by: {self.ai_name} v1.0
                 "files_modified": [],
             })
             logger.warning(f"Remote agent {agent_id} failed")
+
+    async def _handle_memory_ack(self, msg: BridgeMessage):
+        """Right Brain reports the memory version it holds — send what it is missing."""
+        self._memory_peer_version = msg.payload.get("version")
+        await self._push_memory_sync(force=self._memory_peer_version is None)
+
+    async def _push_memory_sync(self, force: bool = False):
+        """
+        Send Right Brain the memory changes since its acknowledged version
+        (a full copy only when it has none or the change log moved past it).
+        Waits for the first ack unless force is set.
+        """
+        if not (self.bridge and self.bridge.connected):
+            return
+        if self._memory_peer_version is None and not force:
+            return
+        payload = self.memory.sync_payload(self._memory_peer_version)
+        if payload is None:
+            return
+        await self.bridge.send(BridgeMessage(type=MSG_MEMORY_SYNC, payload=payload))
+        # Assume delivery; the peer's ack corrects this if it was not applied
+        self._memory_peer_version = payload["version"]
+        if payload["mode"] == "full":
+            logger.info(f"Memory sync: full copy (v{payload['version']}) sent to Right Brain")
+        else:
+            logger.debug(f"Memory sync: {len(payload['changes'])} change(s) up to v{payload['version']}")
@@ -0,0 +1,201 @@
+"""
+Leon Tracing — lightweight spans for hot-path latency.
+
+    with trace("process_user_input"):          # one trace per request
+        with span("analyze_request"):
+            ...
+
+    @traced("respond_conversationally")        # sync or async functions
+    async def _respond_conversationally(...): ...
+
+The active span lives in a contextvars.ContextVar, so nesting follows the
+request across awaits (and into tasks it creates, which copy the context).
+When a root trace ends it is written as one line to
+logs_structured/traces.jsonl. Every span, traced or not, also feeds a
+per-stage sliding window (PERF) that /api/perf reports as p50/p95/p99.
+"""
+
+import contextvars
+import functools
+import inspect
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger("leon.tracing")
+
+WINDOW_SECONDS = 900     # /api/perf looks at the last 15 minutes…
+WINDOW_SAMPLES = 1000    # …and at most this many samples per stage
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "duration_ms", "children", "error")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.children: list["Span"] = []
+        self.error: Optional[str] = None
+
+    def flatten(self, origin: float, depth: int = 0) -> list[dict]:
+        """This span and its descendants, depth-first, with offsets from origin."""
+        entry = {
+            "name":        self.name,
+            "depth":       depth,
+            "start_ms":    round((self.start - origin) * 1000, 2),
+            "duration_ms": round(self.duration_ms or 0.0, 2),
+        }
+        if self.attrs:
+            entry["attrs"] = self.attrs
+        if self.error:
+            entry["error"] = self.error
+        spans = [entry]
+        for child in self.children:
+            spans.extend(child.flatten(origin, depth + 1))
+        return spans
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "leon_trace_span", default=None
+)
+_trace_ids = itertools.count(1)
+
+
+class PerfStats:
+    """Sliding window of span durations per stage name (thread-safe)."""
+
+    def __init__(self, window_s: float = WINDOW_SECONDS, max_samples: int = WINDOW_SAMPLES):
+        self.window_s = window_s
+        self.max_samples = max_samples
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, duration_ms: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.max_samples)
+            samples.append((time.monotonic(), duration_ms))
+
+    def snapshot(self) -> dict:
+        """{stage: {count, p50, p95, p99, max}} in ms over the window, slowest p95 first."""
+        cutoff = time.monotonic() - self.window_s
+        stats = {}
+        with self._lock:
+            for name, samples in self._samples.items():
+                while samples and samples[0][0] < cutoff:
+                    samples.popleft()
+                if samples:
+                    stats[name] = sorted(ms for _, ms in samples)
+        result = {}
+        for name, values in stats.items():
+            result[name] = {
+                "count": len(values),
+                "p50":   round(_percentile(values, 50), 2),
+                "p95":   round(_percentile(values, 95), 2),
+                "p99":   round(_percentile(values, 99), 2),
+                "max":   round(values[-1], 2),
+            }
+        return dict(sorted(result.items(), key=lambda kv: -kv[1]["p95"]))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+PERF = PerfStats()
+
+
+def _finish(s: Span, error: Optional[BaseException]):
+    s.duration_ms = (time.perf_counter() - s.start) * 1000
+    if error is not None:
+        s.error = type(error).__name__
+    PERF.record(s.name, s.duration_ms)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Time a stage; nests under the current span if there is one."""
+    parent = _current.get()
+    s = Span(name, attrs)
+    if parent is not None:
+        parent.children.append(s)
+    token = _current.set(s)
+    error = None
+    try:
+        yield s
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        _finish(s, error)
+
+
+@contextmanager
+def trace(name: str, **attrs):
+    """
+    Start a new trace (a root span, even inside another one) and write it to
+    traces.jsonl when it ends.
+    """
+    root = Span(name, attrs)
+    token = _current.set(root)
+    error = None
+    try:
+        yield root
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current.reset(token)
+        _finish(root, error)
+        _write_trace(root)
+
+
+def _write_trace(root: Span):
+    try:
+        from core.structured_logger import get_logger
+        get_logger().trace(
+            trace_id=next(_trace_ids),
+            name=root.name,
+            duration_ms=root.duration_ms,
+            spans=[entry for child in root.children for entry in child.flatten(root.start)],
+            error=root.error,
+            attrs=root.attrs,
+        )
+    except Exception as e:
+        logger.debug(f"Could not write trace: {e}")
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def traced(name: str):
+    """Decorator: run the function (sync or async) inside span(name)."""
+    def decorate(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -0,0 +1,211 @@
+"""
+Leon TTS Cache — two-tier cache of synthesized speech.
+
+    cache = TTSCache(Path("data/voice_cache"))
+    cache.open()                         # reads index.json only — no glob, no stat, no audio
+    audio = cache.get(key)               # memory → disk (read on demand, promoted) → None
+    cache.put(key, mp3_bytes)            # memory + disk, evicting least recently used
+    cache.stats()                        # hit/miss counters and tier sizes
+
+The memory tier (`memory`, an OrderedDict in LRU order) is bounded by total
+bytes and entry count. The disk tier keeps one file per entry plus an index
+(key → size, last use) so startup only reads one small JSON file; when its
+total size passes the limit, the least recently used files are deleted.
+Last-use times from hits are written with the next put() or flush().
+
+Keys are opaque here — callers build them from everything that changes the
+audio (text, voice, model, settings), see VoiceSystem._tts_cache_key.
+"""
+
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("leon.voice")
+
+INDEX_FILE = "index.json"
+INDEX_VERSION = 2                       # v1 = bare <text-hash>.mp3 files, no index
+MEMORY_MAX_BYTES = 8 * 1024 * 1024      # ~400 short clips
+MEMORY_MAX_ENTRIES = 200
+DISK_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TTSCache:
+    """In-memory LRU over an indexed, size-bounded on-disk store."""
+
+    def __init__(
+        self,
+        directory: Path,
+        memory_max_bytes: int = MEMORY_MAX_BYTES,
+        memory_max_entries: int = MEMORY_MAX_ENTRIES,
+        disk_max_bytes: int = DISK_MAX_BYTES,
+    ):
+        self.directory = Path(directory)
+        self.memory_max_bytes = memory_max_bytes
+        self.memory_max_entries = memory_max_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_bytes = 0                  # running total of len(audio) in memory
+        self._index: dict[str, list] = {}       # key → [size, last_used]
+        self._disk_bytes = 0
+        self._dirty = False
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+
+    # ── Index ────────────────────────────────────────────────────────────────
+
+    def open(self, directory: Optional[Path] = None):
+        """Load the disk index (cheap: one small file). Entries are read on demand."""
+        if directory is not None:
+            self.directory = Path(directory)
+        self._index, self._disk_bytes, self._dirty = {}, 0, False
+        try:
+            data = json.loads((self.directory / INDEX_FILE).read_text())
+            if data.get("version") == INDEX_VERSION:
+                self._index = {k: list(v) for k, v in data.get("entries", {}).items()}
+        except FileNotFoundError:
+            self._drop_unindexed()
+        except Exception as e:
+            logger.debug("TTS cache index unreadable (%s) — starting empty", e)
+        self._disk_bytes = sum(size for size, _ in self._index.values())
+        if self._index:
+            logger.debug("TTS cache index: %d entries, %.1f MB on disk",
+                         len(self._index), self._disk_bytes / 1e6)
+
+    def _drop_unindexed(self):
+        """One-time cleanup of pre-index cache files (keyed on text only, so possibly another voice)."""
+        if not self.directory.is_dir():
+            return
+        removed = 0
+        for f in self.directory.glob("*.mp3"):
+            try:
+                f.unlink()
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            logger.info("TTS cache: removed %d unindexed entries from an older cache format", removed)
+
+    def flush(self):
+        """Write the index if it changed (atomic replace)."""
+        if not self._dirty:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = self.directory / (INDEX_FILE + ".tmp")
+            tmp.write_text(json.dumps({"version": INDEX_VERSION, "entries": self._index}))
+            os.replace(tmp, self.directory / INDEX_FILE)
+            self._dirty = False
+        except Exception as e:
+            logger.debug("Failed to write TTS cache index: %s", e)
+
+    # ── Lookup / store ───────────────────────────────────────────────────────
+
+    def get(self, key: str) -> Optional[bytes]:
+        audio = self.memory.get(key)
+        if audio is not None:
+            self.memory.move_to_end(key)   # LRU touch
+            self.hits["memory"] += 1
+            return audio
+        audio = self._read(key)
+        if audio is not None:
+            self.hits["disk"] += 1
+            self._remember(key, audio)
+            return audio
+        self.misses += 1
+        return None
+
+    def put(self, key: str, audio: bytes, persist: bool = True):
+        self._remember(key, audio)
+        if persist:
+            self._write(key, audio)
+        self.flush()
+
+    def discard(self, key: str):
+        """Forget an entry in both tiers (e.g. it turned out to be unplayable)."""
+        audio = self.memory.pop(key, None)
+        if audio is not None:
+            self._memory_bytes -= len(audio)
+        if key in self._index:
+            self._delete(key)
+            self.flush()
+
+    def _remember(self, key: str, audio: bytes):
+        previous = self.memory.get(key)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self.memory[key] = audio
+        self.memory.move_to_end(key)
+        self._memory_bytes += len(audio)
+        while len(self.memory) > 1 and (
+            len(self.memory) > self.memory_max_entries or self._memory_bytes > self.memory_max_bytes
+        ):
+            _, evicted = self.memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    # ── Disk tier ────────────────────────────────────────────────────────────
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.mp3"
+
+    def _read(self, key: str) -> Optional[bytes]:
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        try:
+            audio = self._path(key).read_bytes()
+        except OSError:
+            self._delete(key)             # file vanished — drop the stale index entry
+            return None
+        entry[1] = time.time()
+        self._dirty = True
+        return audio
+
+    def _write(self, key: str, audio: bytes):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = self._path(key).with_suffix(".tmp")
+            tmp.write_bytes(audio)
+            os.replace(tmp, self._path(key))
+        except Exception as e:
+            logger.debug("Failed to persist TTS cache entry: %s", e)
+            return
+        if key in self._index:
+            self._disk_bytes -= self._index[key][0]
+        self._index[key] = [len(audio), time.time()]
+        self._disk_bytes += len(audio)
+        self._dirty = True
+        if self._disk_bytes > self.disk_max_bytes:
+            for old in sorted(self._index, key=lambda k: self._index[k][1]):
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                if old != key:
+                    self._delete(old)
+
+    def _delete(self, key: str):
+        size, _ = self._index.pop(key)
+        self._disk_bytes -= size
+        self._dirty = True
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    # ── Stats ────────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else None,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._index),
+            "disk_bytes": self._disk_bytes,
+        }
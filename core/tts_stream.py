@@ -0,0 +1,129 @@
+"""
+Leon Streaming TTS — speak a response clause by clause.
+
+Synthesizing a whole response before playing any of it makes time-to-first-
+sound grow with the response. Instead the text is split into sentences (long
+ones at clause punctuation), and clause N+1 is synthesized while clause N
+plays:
+
+    clauses = split_clauses(text)        # short first clause → early first audio
+    await speak_clauses(clauses, synthesize, play)
+
+synthesize(clause) returns the clause's audio (or None when it failed);
+play(clause, audio) plays it, falling back however the caller likes. Up to
+`lookahead` clauses are synthesized ahead of the one playing. The delay until
+the first clause starts playing is recorded in PERF as "tts_first_audio"
+(/api/perf) and returned.
+
+Used by VoiceSystem (ElevenLabs MP3 per clause → _play_audio_bytes) and by the
+Discord voice handler (PCM per clause → one continuously playing source).
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from .tracing import PERF
+
+logger = logging.getLogger("leon.voice")
+
+FIRST_CLAUSE_MAX_CHARS = 80   # a long first sentence is split early — it gates first audio
+CLAUSE_MIN_CHARS = 40         # later short sentences are merged (every clause is a request)
+CLAUSE_MAX_CHARS = 220        # longer sentences are split at , ; : —
+LOOKAHEAD = 1                 # clauses synthesized ahead of the one playing
+FIRST_AUDIO_METRIC = "tts_first_audio"
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?…])\s+|(?<=[.!?…][\"')\]])\s+|\s*\n+\s*")
+_CLAUSE_BREAK = re.compile(r"(?<=[,;:—–])\s+")
+_ABBREVIATIONS = frozenset({"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "etc.", "e.g.", "i.e.", "approx."})
+
+
+def _sentences(text: str) -> list[str]:
+    sentences: list[str] = []
+    for piece in _SENTENCE_BREAK.split(text.strip()):
+        if not piece:
+            continue
+        if sentences and sentences[-1].rsplit(None, 1)[-1].lower() in _ABBREVIATIONS:
+            sentences[-1] += " " + piece
+        else:
+            sentences.append(piece)
+    return sentences
+
+
+def _pack(parts: list[str], max_chars: int) -> list[str]:
+    """Join consecutive parts while they fit in max_chars."""
+    packed: list[str] = []
+    for part in parts:
+        if packed and len(packed[-1]) + 1 + len(part) <= max_chars:
+            packed[-1] += " " + part
+        else:
+            packed.append(part)
+    return packed
+
+
+def split_clauses(
+    text: str,
+    first_max_chars: int = FIRST_CLAUSE_MAX_CHARS,
+    min_chars: int = CLAUSE_MIN_CHARS,
+    max_chars: int = CLAUSE_MAX_CHARS,
+) -> list[str]:
+    """
+    Speakable chunks of text, in order. The first is the first sentence (or
+    its first clauses, if longer than first_max_chars); after that, sentences
+    shorter than min_chars are merged with the next and ones longer than
+    max_chars are split at clause punctuation.
+    """
+    sentences = _sentences(text)
+    if not sentences:
+        return []
+    head = _pack(_CLAUSE_BREAK.split(sentences[0]), first_max_chars)
+    clauses = [head[0]]
+    rest = head[1:] + sentences[1:]
+    for sentence in rest:
+        parts = _pack(_CLAUSE_BREAK.split(sentence), max_chars) if len(sentence) > max_chars else [sentence]
+        for part in parts:
+            if len(clauses) > 1 and len(clauses[-1]) < min_chars and len(clauses[-1]) + 1 + len(part) <= max_chars:
+                clauses[-1] += " " + part
+            else:
+                clauses.append(part)
+    return clauses
+
+
+async def speak_clauses(
+    clauses: list[str],
+    synthesize: Callable[[str], Awaitable[Any]],
+    play: Callable[[str, Any], Awaitable[Any]],
+    lookahead: int = LOOKAHEAD,
+) -> Optional[float]:
+    """
+    Play clauses in order, synthesizing up to `lookahead` ahead of playback.
+    Returns milliseconds until the first clause started playing (None if no clauses).
+    """
+    start = time.perf_counter()
+    pending: dict[int, asyncio.Task] = {}
+
+    async def safe_synthesize(clause: str):
+        try:
+            return await synthesize(clause)
+        except Exception as e:
+            logger.warning("TTS synthesis failed for %r: %s", clause[:40], e)
+            return None
+
+    first_audio_ms = None
+    try:
+        for i, clause in enumerate(clauses):
+            for j in range(i, min(i + lookahead + 1, len(clauses))):
+                if j not in pending:
+                    pending[j] = asyncio.ensure_future(safe_synthesize(clauses[j]))
+            audio = await pending.pop(i)
+            if first_audio_ms is None:
+                first_audio_ms = (time.perf_counter() - start) * 1000
+                PERF.record(FIRST_AUDIO_METRIC, first_audio_ms)
+                logger.debug("TTS first audio after %.0f ms (%d clauses)", first_audio_ms, len(clauses))
+            await play(clause, audio)
+    finally:
+        for task in pending.values():
+            task.cancel()
+    return first_audio_ms
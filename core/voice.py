@@ -8,6 +8,8 @@ Flow:
 
 STT provider is set via `voice.stt_provider` in config/settings.yaml ("groq" or "deepgram").
 Falls back to the other provider if the configured one's API key is missing.
+With `voice.stt_streaming` the Groq path transcribes while the user is still
+speaking (rolling-window partials, see core/stt_stream.py).
 """
 
 import asyncio
@@ -26,6 +28,7 @@ from pathlib import Path
 from typing import Callable, Optional
 
 from .safe_tasks import create_safe_task
+from .tts_cache import TTSCache
 
 logger = logging.getLogger("leon.voice")
 
@@ -77,6 +80,14 @@ _AUTO_WAKE_PATTERNS = [
 # Min word count for auto-wake (filters out TV fragments like "on." or "right.")
 _AUTO_WAKE_MIN_WORDS = 4
 
+# Single/two-word fragments while awake are almost always TV or mic noise unless
+# they're explicit control words
+_SHORT_COMMANDS = frozenset({
+    "stop", "pause", "play", "resume", "mute", "unmute",
+    "yes", "no", "okay", "ok", "sure", "thanks", "done",
+    "quit", "exit", "help", "status", "go", "wait",
+})
+
 WAKE_PATTERNS = [
     # --- Tier 1: Standard greetings (high confidence) ---
     (re.compile(r"\bhey\s+leon\b", re.IGNORECASE), _TIER_HIGH),
@@ -222,6 +233,13 @@ _CACHEABLE_RESPONSES = {
 # Max in-memory TTS cache entries — prevents unbounded RAM growth
 _TTS_CACHE_MAX_ENTRIES = 200
 
+# TTS cache size bounds (MB) — voice.tts_cache_memory_mb / voice.tts_cache_disk_mb
+_TTS_CACHE_MEMORY_MB = 8
+_TTS_CACHE_DISK_MB = 64
+
+# ElevenLabs streaming responses are read in chunks of this size
+_TTS_STREAM_CHUNK = 16 * 1024
+
 # Default sleep timeout — 120s of silence ends conversation mode
 DEFAULT_SLEEP_TIMEOUT = 120.0
 
@@ -251,6 +269,7 @@ class VoiceSystem:
     def __init__(self, on_command: Optional[Callable] = None, config: Optional[dict] = None, name: Optional[str] = None):
         self.on_command = on_command
         self.on_vad_event: Optional[Callable] = None  # (event, text) → called for live transcription
+        self.on_partial_command: Optional[Callable] = None  # (text) → likely command, before speech ends
         _name = (name or "leon").lower()
         self.wake_word = f"hey {_name}"
         # Build name-specific wake patterns for the configured AI name
@@ -274,6 +293,15 @@ class VoiceSystem:
         # STT provider selection — from config/settings.yaml voice.stt_provider
         self.stt_provider = voice_cfg.get("stt_provider", "groq").lower()
 
+        # Streaming STT (Groq path) — partial transcripts while the user is still speaking
+        self.stt_streaming = bool(voice_cfg.get("stt_streaming", False))
+        self.stt_base_url = voice_cfg.get("stt_base_url", "")   # "" = Groq; any OpenAI-compatible server
+        self.stt_partial_interval = float(voice_cfg.get("stt_partial_interval", 1.0))
+        self.stt_partial_window = float(voice_cfg.get("stt_partial_window", 10.0))
+        self._whisper = None
+        self._utterance = None       # StreamingUtterance being recorded (streaming mode)
+        self._early_wake = False
+
         # Deepgram config
         self.deepgram_api_key = os.getenv("DEEPGRAM_API_KEY", "")
 
@@ -317,12 +345,20 @@ class VoiceSystem:
         self._deepgram_healthy = True
         self._elevenlabs_consecutive_failures = 0
         self._elevenlabs_degraded = False
+        self._tts_first_audio_ms: Optional[float] = None   # last spoken response
 
-        # TTS audio cache (keyed by text hash -> audio bytes) with LRU eviction
-        self._tts_cache: OrderedDict[str, bytes] = OrderedDict()
+        # TTS audio cache: byte-bounded in-memory LRU over an indexed on-disk store,
+        # keyed by text + voice + model + settings (see _tts_cache_key)
         self._tts_cache_dir = Path(voice_cfg.get("tts_cache_dir", "data/voice_cache"))
+        self._tts_store = TTSCache(
+            self._tts_cache_dir,
+            memory_max_bytes=int(float(voice_cfg.get("tts_cache_memory_mb", _TTS_CACHE_MEMORY_MB)) * 1024 * 1024),
+            memory_max_entries=_TTS_CACHE_MAX_ENTRIES,
+            disk_max_bytes=int(float(voice_cfg.get("tts_cache_disk_mb", _TTS_CACHE_DISK_MB)) * 1024 * 1024),
+        )
+        self._tts_cache: OrderedDict[str, bytes] = self._tts_store.memory   # LRU order
 
-        # Load any persisted cache entries
+        # Open the on-disk index (audio is read on demand)
         self._load_tts_cache()
 
         logger.info(
@@ -357,6 +393,8 @@ class VoiceSystem:
             "stt_provider": getattr(self, "_effective_stt_provider", self.stt_provider),
             "deepgram_healthy": self._deepgram_healthy,
             "elevenlabs_degraded": self._elevenlabs_degraded,
+            "tts_first_audio_ms": self._tts_first_audio_ms,
+            "tts_cache": self._tts_store.stats(),
         }
 
     def force_wake(self):
@@ -465,6 +503,9 @@ class VoiceSystem:
         """Stop the voice system."""
         self.is_listening = False
         self._cancel_sleep_timer()
+        self._drop_utterance()
+        if self._whisper is not None:
+            await self._whisper.close()
         self._set_state(VoiceState.STOPPED)
 
     # ================================================================
@@ -499,11 +540,14 @@ class VoiceSystem:
         # Main async loop processes transcriptions
         while self.is_listening:
             try:
-                audio_bytes = await asyncio.wait_for(
+                audio_bytes, utterance, speech_bytes = await asyncio.wait_for(
                     self._transcription_queue.get(), timeout=1.0
                 )
                 # Transcribe in background so VAD keeps running
-                create_safe_task(self._transcribe_and_handle(audio_bytes), name="voice-transcribe")
+                create_safe_task(
+                    self._transcribe_and_handle(audio_bytes, utterance, speech_bytes),
+                    name="voice-transcribe",
+                )
             except asyncio.TimeoutError:
                 continue
             except Exception as e:
@@ -538,10 +582,10 @@ class VoiceSystem:
         """Background thread: mic → energy VAD → push utterances to queue."""
         try:
             import pyaudio
-            import struct
         except ImportError:
             logger.error("pyaudio not installed — run: pip install pyaudio")
             return
+        from .audio_dsp import EnergyVAD, frame_rms
 
         pa = pyaudio.PyAudio()
         stream = pa.open(
@@ -553,50 +597,39 @@ class VoiceSystem:
         )
         logger.info("VAD mic stream opened")
 
-        # Auto-calibrate: measure ambient noise for 1.5 seconds, set threshold to 4x ambient
+        vad = EnergyVAD(
+            self._VAD_SAMPLE_RATE,
+            self._VAD_FRAME_SAMPLES,
+            threshold=self._VAD_ENERGY_THRESH,
+            silence_threshold=self._VAD_ENERGY_THRESH * 0.8,
+            start_frames=self._VAD_SPEECH_FRAMES,
+            silence_s=self._VAD_SILENCE_SEC,
+            min_s=self._VAD_MIN_DURATION,
+            max_s=self._VAD_MAX_DURATION,
+            preroll_frames=self._VAD_SPEECH_FRAMES,   # keep the onset that triggered recording
+            ambient_window=150,                        # ~4.5s of idle frames for re-calibration
+        )
+
+        # Auto-calibrate: measure ambient noise for 1.5 seconds.
+        # Speech threshold: 1.5x ambient (start recording)
+        # Silence threshold: 1.25x ambient (end utterance — safely above ambient,
+        #   but well below speech. Avoids TV/background keeping the silence run at 0.)
         cal_frames = int(1.5 * self._VAD_SAMPLE_RATE / self._VAD_FRAME_SAMPLES)
-        cal_rms_values = []
+        cal_chunks = []
         for _ in range(cal_frames):
             try:
-                d = stream.read(self._VAD_FRAME_SAMPLES, exception_on_overflow=False)
-                s = struct.unpack_from(f"{self._VAD_FRAME_SAMPLES}h", d)
-                cal_rms_values.append((sum(x*x for x in s)/len(s))**0.5)
+                cal_chunks.append(stream.read(self._VAD_FRAME_SAMPLES, exception_on_overflow=False))
             except Exception:
                 pass
-        if cal_rms_values:
-            # Use median (more robust to spikes during calibration)
-            cal_sorted = sorted(cal_rms_values)
-            ambient = cal_sorted[len(cal_sorted) // 2]
-            # Speech threshold: 1.5x ambient (start recording)
-            # Silence threshold: 1.25x ambient (end utterance — safely above ambient,
-            #   but well below speech. Avoids TV/background keeping silence_streak at 0.)
-            dynamic_thresh = max(self._VAD_ENERGY_THRESH, ambient * 1.5)
-            dynamic_silence_thresh = max(self._VAD_ENERGY_THRESH * 0.8, ambient * 1.25)
+        ambient = vad.calibrate(frame_rms(b"".join(cal_chunks), self._VAD_FRAME_SAMPLES))
+        if ambient is not None:
+            # Median — more robust to spikes during calibration
             logger.info("VAD calibrated: ambient_rms=%.0f → speech=%.0f silence=%.0f",
-                        ambient, dynamic_thresh, dynamic_silence_thresh)
-        else:
-            dynamic_thresh = self._VAD_ENERGY_THRESH
-            dynamic_silence_thresh = self._VAD_ENERGY_THRESH * 0.8
+                        ambient, vad.threshold, vad.silence_threshold)
 
-        silence_frames_needed = int(
-            self._VAD_SILENCE_SEC * self._VAD_SAMPLE_RATE / self._VAD_FRAME_SAMPLES
-        )
-        max_frames = int(
-            self._VAD_MAX_DURATION * self._VAD_SAMPLE_RATE / self._VAD_FRAME_SAMPLES
-        )
-        min_frames = int(
-            self._VAD_MIN_DURATION * self._VAD_SAMPLE_RATE / self._VAD_FRAME_SAMPLES
-        )
-
-        recording = False
-        loud_streak = 0
-        silence_streak = 0
-        frames: list[bytes] = []
-        rec_frame_count = 0   # total frames since recording started (includes middle-zone)
-        _diag_counter = 0
         _speak_cooldown_until = 0.0  # don't record until this timestamp (prevents echo feedback)
-        _AMBIENT_WINDOW = 150   # ~30s of history
-        _ambient_history: deque[float] = deque(maxlen=_AMBIENT_WINDOW)  # O(1) rolling window
+        partial_step = int(self.stt_partial_interval * self._VAD_SAMPLE_RATE) * 2
+        next_partial = partial_step
 
         while self.is_listening:
             try:
@@ -607,11 +640,9 @@ class VoiceSystem:
             # Suppress mic while Leon is speaking or briefly after (echo prevention)
             if self._state == VoiceState.SPEAKING:
                 _speak_cooldown_until = time.time() + 1.5
-                recording = False
-                frames = []
-                loud_streak = 0
-                silence_streak = 0
-                rec_frame_count = 0
+                if vad.recording and self.stt_streaming:
+                    self._loop.call_soon_threadsafe(self._drop_utterance)
+                vad.reset()
                 continue
             if time.time() < _speak_cooldown_until:
                 continue
@@ -620,128 +651,105 @@ class VoiceSystem:
             if self.is_muted:
                 continue
 
-            # RMS energy
-            samples = struct.unpack_from(f"{self._VAD_FRAME_SAMPLES}h", data)
-            rms = (sum(s * s for s in samples) / len(samples)) ** 0.5
+            was_recording = vad.recording
+            audio_bytes = vad.feed(data)
 
             # Log RMS every ~3 seconds for diagnostics
-            _diag_counter += 1
-            if _diag_counter % 100 == 0:
-                logger.info("VAD rms=%.0f threshold=%.0f recording=%s", rms, dynamic_thresh, recording)
-
-            if not recording:
-                # Collect ambient samples for rolling re-calibration
-                _ambient_history.append(rms)  # deque(maxlen) auto-evicts oldest
-                # Re-calibrate every ~30s of not-recording using recent ambient
-                if len(_ambient_history) == _AMBIENT_WINDOW and _diag_counter % 150 == 0:
-                    sorted_h = sorted(_ambient_history)
-                    new_ambient = sorted_h[len(sorted_h) // 2]
-                    new_thresh = max(self._VAD_ENERGY_THRESH, new_ambient * 1.5)
-                    new_sil = max(self._VAD_ENERGY_THRESH * 0.8, new_ambient * 1.25)
-                    if abs(new_thresh - dynamic_thresh) > 300:
-                        dynamic_thresh = new_thresh
-                        dynamic_silence_thresh = new_sil
-                        logger.info(
-                            "VAD re-calibrated: ambient=%.0f → speech=%.0f silence=%.0f",
-                            new_ambient, dynamic_thresh, dynamic_silence_thresh,
-                        )
-
-                # Waiting for speech — look for consecutive loud frames
-                if rms > dynamic_thresh:
-                    loud_streak += 1
-                    if loud_streak >= self._VAD_SPEECH_FRAMES:
-                        recording = True
-                        rec_frame_count = 0
-                        logger.info("VAD: speech started (rms=%.0f)", rms)
-                        if self.on_vad_event:
-                            asyncio.run_coroutine_threadsafe(
-                                self._fire_vad_event("recording", ""),
-                                self._loop,
-                            )
-                else:
-                    loud_streak = 0
-            else:
-                # Recording — always capture this frame regardless of RMS zone
-                frames.append(data)
-                rec_frame_count += 1
-
-                if rms > dynamic_thresh:
-                    loud_streak += 1
-                    silence_streak = 0
-                elif rms < dynamic_silence_thresh:
-                    silence_streak += 1
-                    loud_streak = 0
-                else:
-                    # Middle zone: not loud enough to be speech, not quiet enough to be silence.
-                    # Don't advance either streak — just accumulate time toward max_frames.
-                    loud_streak = 0
-
-                # End utterance: enough silence, OR hard max-duration cap
-                if silence_streak >= silence_frames_needed or rec_frame_count >= max_frames:
-                    if len(frames) >= min_frames:
-                        audio_bytes = b"".join(frames)
-                        asyncio.run_coroutine_threadsafe(
-                            self._transcription_queue.put(audio_bytes),
-                            self._loop,
-                        )
-                        logger.info("VAD: utterance queued (%d frames, %.1fs)",
-                                    len(frames), rec_frame_count * self._VAD_FRAME_SAMPLES / self._VAD_SAMPLE_RATE)
-                    frames = []
-                    recording = False
-                    silence_streak = 0
-                    loud_streak = 0
-                    rec_frame_count = 0
+            if vad.frames_seen % 100 == 0:
+                logger.info("VAD rms=%.0f threshold=%.0f recording=%s",
+                            vad.last_rms, vad.threshold, vad.recording)
+
+            if vad.recording and not was_recording:
+                logger.info("VAD: speech started (rms=%.0f)", vad.last_rms)
+                next_partial = partial_step
+                if self.on_vad_event:
+                    asyncio.run_coroutine_threadsafe(
+                        self._fire_vad_event("recording", ""),
+                        self._loop,
+                    )
+            elif audio_bytes:
+                self._loop.call_soon_threadsafe(self._end_utterance, audio_bytes, vad.speech_bytes)
+                logger.info("VAD: utterance queued (%.1fs)",
+                            len(audio_bytes) / (2 * self._VAD_SAMPLE_RATE))
+            elif was_recording and not vad.recording and self.stt_streaming:
+                self._loop.call_soon_threadsafe(self._drop_utterance)   # too short
+
+            # Streaming STT: hand over the audio so far every stt_partial_interval
+            if self.stt_streaming and vad.recording and vad.pending_bytes >= next_partial:
+                next_partial = vad.pending_bytes + partial_step
+                self._loop.call_soon_threadsafe(self._offer_partial_audio, vad.pending())
 
         stream.stop_stream()
         stream.close()
         pa.terminate()
         logger.info("VAD mic stream closed")
 
-    async def _transcribe_and_handle(self, audio_bytes: bytes):
-        """Convert raw PCM bytes to WAV, send to Groq Whisper, handle result."""
-        import io
-        import wave
+    # ── Streaming STT (event-loop side; the capture thread schedules these) ──
+
+    def _whisper_client(self):
+        """Shared Whisper client (one keep-alive HTTP session for all requests)."""
+        if self._whisper is None:
+            from .stt_stream import GROQ_STT_BASE_URL, WhisperClient
+            self._whisper = WhisperClient(self.groq_api_key, base_url=self.stt_base_url or GROQ_STT_BASE_URL)
+        return self._whisper
+
+    def _offer_partial_audio(self, pcm: bytes):
+        """Audio of the utterance recorded so far — start or continue its partial transcription."""
+        if self._utterance is None:
+            from .stt_stream import StreamingUtterance
+            self._utterance = StreamingUtterance(
+                self._whisper_client(),
+                self._VAD_SAMPLE_RATE,
+                window_s=self.stt_partial_window,
+                on_partial=self._handle_partial,
+            )
+            self._early_wake = False
+        self._utterance.offer(pcm)
 
-        # Wrap raw PCM in WAV container
-        buf = io.BytesIO()
-        with wave.open(buf, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)   # 16-bit
-            wf.setframerate(self._VAD_SAMPLE_RATE)
-            wf.writeframes(audio_bytes)
-        wav_bytes = buf.getvalue()
+    def _end_utterance(self, audio_bytes: bytes, speech_bytes: int):
+        """Queue a finished utterance together with its streamed partials (if any)."""
+        utterance, self._utterance = self._utterance, None
+        self._transcription_queue.put_nowait((audio_bytes, utterance, speech_bytes))
 
-        try:
-            import aiohttp
-            form = aiohttp.FormData()
-            form.add_field("file", wav_bytes,
-                           filename="audio.wav", content_type="audio/wav")
-            form.add_field("model", "whisper-large-v3-turbo")
-            form.add_field("response_format", "json")
-            form.add_field("language", "en")
-
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    "https://api.groq.com/openai/v1/audio/transcriptions",
-                    headers={"Authorization": f"Bearer {self.groq_api_key}"},
-                    data=form,
-                    timeout=aiohttp.ClientTimeout(total=15),
-                ) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        text = data.get("text", "").strip()
-                        if text:
-                            logger.info("Whisper heard: %s", text)
-                            await self._fire_vad_event("transcription", text)
-                            await self._handle_transcription(text)
-                    elif resp.status == 429:
-                        logger.warning("Groq Whisper rate limited — pausing 5s")
-                        await asyncio.sleep(5)
-                    else:
-                        body = await resp.text()
-                        logger.warning("Groq Whisper error %d: %s", resp.status, body[:100])
-        except Exception as e:
-            logger.error("Transcription error: %s", e)
+    def _drop_utterance(self):
+        utterance, self._utterance = self._utterance, None
+        if utterance is not None:
+            utterance.cancel()
+
+    async def _handle_partial(self, text: str, stable: bool):
+        """
+        Partial transcript of speech still in progress. Wake words are noticed
+        early, and once the partial is stable (unchanged since the last one —
+        the user paused) the command it implies goes to on_partial_command, so
+        the brain can start routing it before end-of-speech is confirmed.
+        """
+        logger.debug("Partial: %s", text)
+        await self._fire_vad_event("partial", text)
+        if (not self.is_awake and not self._early_wake and self.wake_words_enabled
+                and self._matches_wake_word(text.lower().strip())):
+            self._early_wake = True
+            logger.info("Wake word heard mid-utterance: %s", text)
+            await self._fire_vad_event("wake", text)
+        if stable and self.on_partial_command:
+            command = self._expected_command(text)
+            if command:
+                try:
+                    await self.on_partial_command(command)
+                except Exception as e:
+                    logger.debug("on_partial_command failed: %s", e)
+
+    async def _transcribe_and_handle(self, audio_bytes: bytes, utterance=None, speech_bytes: int = 0):
+        """Transcribe an utterance with Groq Whisper (reusing its streamed partials) and handle it."""
+        if utterance is not None:
+            text = await utterance.finish(audio_bytes, speech_bytes)
+            if utterance.reused:
+                logger.debug("Final transcript taken from partial #%d", utterance.partials)
+        else:
+            text = await self._whisper_client().transcribe(audio_bytes, self._VAD_SAMPLE_RATE)
+        if text:
+            logger.info("Whisper heard: %s", text)
+            await self._fire_vad_event("transcription", text)
+            await self._handle_transcription(text)
 
     # ================================================================
     # MICROPHONE CAPTURE
@@ -943,6 +951,29 @@ class VoiceSystem:
             return False
         return any(p.search(text_lower) for p in _AUTO_WAKE_PATTERNS)
 
+    @staticmethod
+    def _is_short_noise(text_lower: str) -> bool:
+        """One/two-word fragment without a control word (TV or mic noise while awake)."""
+        words = text_lower.split()
+        if len(words) > 2:
+            return False
+        clean = " ".join(w.strip(".,!?") for w in words)
+        return not any(w in _SHORT_COMMANDS for w in clean.split())
+
+    def _expected_command(self, text: str) -> Optional[str]:
+        """The command _handle_transcription would run for text right now, without running it."""
+        text_lower = text.lower().strip()
+        if len(text.strip().strip(".,!?-– ")) < 2:
+            return None
+        if self.is_awake:
+            if any(p.search(text_lower) for p in _SLEEP_PATTERNS) or self._is_short_noise(text_lower):
+                return None
+            return text
+        if self.wake_words_enabled and self._matches_wake_word(text_lower):
+            after_wake = self._strip_wake_word(text_lower)
+            return after_wake if len(after_wake) > 3 else None
+        return text if self._is_auto_wake_phrase(text_lower) else None
+
     async def _handle_transcription(self, text: str):
         """Process transcribed text — smart conversation mode.
 
@@ -996,19 +1027,9 @@ class VoiceSystem:
             logger.debug("Sleeping — ignoring: %s", text)
         else:
             # Conversation mode — filter short noise, then process
-            words = text_lower.split()
-            # Single/two-word fragments are almost always TV or mic noise unless
-            # they're explicit control words (stop, pause, yes, no, etc.)
-            _OK_SHORT = {
-                "stop", "pause", "play", "resume", "mute", "unmute",
-                "yes", "no", "okay", "ok", "sure", "thanks", "done",
-                "quit", "exit", "help", "status", "go", "wait",
-            }
-            if len(words) <= 2:
-                clean = " ".join(w.strip(".,!?") for w in words)
-                if not any(w in _OK_SHORT for w in clean.split()):
-                    logger.debug("Awake — dropping short noise: %s", text)
-                    return
+            if self._is_short_noise(text_lower):
+                logger.debug("Awake — dropping short noise: %s", text)
+                return
             await self._process_command(text)
 
     def _wake_word_confidence(self, text_lower: str) -> float:
@@ -1142,8 +1163,7 @@ class VoiceSystem:
             return None
 
         # Check cache first
-        cache_key = self._tts_cache_key(text)
-        cached = self._tts_cache.get(cache_key)
+        cached = self._tts_store.get(self._tts_cache_key(text))
         if cached and self._validate_audio(cached):
             return cached
 
@@ -1185,24 +1205,59 @@ class VoiceSystem:
         return None
 
     async def _speak_elevenlabs(self, text: str):
-        """TTS via ElevenLabs with retry on 5xx, 429 handling, and caching."""
-        # Check cache first for short common responses
-        cache_key = self._tts_cache_key(text)
-        cached = self._tts_cache.get(cache_key)
+        """
+        TTS via ElevenLabs, clause by clause — clause N+1 is synthesized while
+        clause N plays (core/tts_stream.py), so the first words start after one
+        short request instead of after the whole response is synthesized.
+        """
+        from .tts_stream import speak_clauses, split_clauses
+
+        self._tts_first_audio_ms = await speak_clauses(
+            split_clauses(text), self._synthesize_elevenlabs, self._play_clause,
+        )
+
+    async def _play_clause(self, clause: str, audio_bytes: Optional[bytes]):
+        """Play one synthesized clause; local TTS if synthesis failed."""
+        if audio_bytes is None:
+            await self._speak_local(clause)
+            return
+        if await self._play_audio_bytes(audio_bytes):
+            self._cache_tts_clause(clause, audio_bytes)
+            return
+        # Cached entry was bad — remove it and fetch it again
+        cache_key = self._tts_cache_key(clause)
+        if cache_key in self._tts_cache:
+            self._tts_store.discard(cache_key)
+            fresh = await self._synthesize_elevenlabs(clause)
+            if fresh is not None and await self._play_audio_bytes(fresh):
+                self._cache_tts_clause(clause, fresh)
+
+    def _cache_tts_clause(self, clause: str, audio_bytes: bytes):
+        """Cache a played clause if it's a short common response."""
+        if self._cache_phrase(clause) not in _CACHEABLE_RESPONSES:
+            return
+        cache_key = self._tts_cache_key(clause)
+        if cache_key not in self._tts_cache:
+            self._tts_store.put(cache_key, audio_bytes)
+
+    async def _synthesize_elevenlabs(self, text: str) -> Optional[bytes]:
+        """
+        MP3 for one clause: from the TTS cache, else ElevenLabs' streaming
+        endpoint (read chunk by chunk) with retry on 5xx and 429 handling.
+        Returns None on failure (the caller falls back to local TTS).
+        """
+        cached = self._tts_store.get(self._tts_cache_key(text))
         if cached:
             logger.debug("TTS cache hit: %s", text[:40])
-            self._tts_cache.move_to_end(cache_key)  # LRU touch
-            if await self._play_audio_bytes(cached):
-                return
-            # Cache entry was bad — remove it and fall through to API
-            self._tts_cache.pop(cache_key, None)
+            return cached
+        if self._elevenlabs_degraded:
+            return None
 
         try:
             import aiohttp
         except ImportError:
             logger.warning("aiohttp not installed — using local TTS")
-            await self._speak_local(text)
-            return
+            return None
 
         url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}/stream"
         headers = {
@@ -1227,27 +1282,18 @@ class VoiceSystem:
                 async with aiohttp.ClientSession() as session:
                     async with session.post(url, headers=headers, json=payload) as resp:
                         if resp.status == 200:
-                            audio_bytes = await resp.read()
+                            audio = bytearray()
+                            async for chunk in resp.content.iter_chunked(_TTS_STREAM_CHUNK):
+                                audio += chunk
+                            audio_bytes = bytes(audio)
 
                             # Validate audio before playback
                             if not self._validate_audio(audio_bytes):
                                 logger.error("ElevenLabs returned invalid audio data (%d bytes)", len(audio_bytes))
-                                await self._speak_local(text)
-                                return
-
-                            if await self._play_audio_bytes(audio_bytes):
-                                # Success — reset failure counter
-                                self._elevenlabs_consecutive_failures = 0
-
-                                # Cache if it's a short common response
-                                if text.strip().lower().rstrip("?.!,") in _CACHEABLE_RESPONSES:
-                                    self._tts_cache[cache_key] = audio_bytes
-                                    self._tts_cache.move_to_end(cache_key)
-                                    # Evict oldest entries if over capacity
-                                    while len(self._tts_cache) > _TTS_CACHE_MAX_ENTRIES:
-                                        self._tts_cache.popitem(last=False)
-                                    self._persist_tts_cache_entry(cache_key, audio_bytes)
-                                return
+                                return None
+                            # Success — reset failure counter
+                            self._elevenlabs_consecutive_failures = 0
+                            return audio_bytes
 
                         elif resp.status == 429:
                             # Rate limited — respect Retry-After header
@@ -1268,8 +1314,7 @@ class VoiceSystem:
                                 error_text[:200],
                             )
                             self._record_elevenlabs_failure()
-                            await self._speak_local(text)
-                            return
+                            return None
 
                         elif 500 <= resp.status < 600:
                             error_text = await resp.text()
@@ -1287,8 +1332,7 @@ class VoiceSystem:
                             error_text = await resp.text()
                             logger.error("ElevenLabs error %d: %s", resp.status, error_text[:200])
                             self._record_elevenlabs_failure()
-                            await self._speak_local(text)
-                            return
+                            return None
 
             except aiohttp.ClientError as e:
                 delay = ELEVENLABS_RETRY_BACKOFF_BASE * (2 ** (attempt - 1))
@@ -1303,7 +1347,7 @@ class VoiceSystem:
         # Exhausted retries
         logger.error("ElevenLabs: all %d retries failed (last: %s)", ELEVENLABS_MAX_RETRIES, last_error)
         self._record_elevenlabs_failure()
-        await self._speak_local(text)
+        return None
 
     def _record_elevenlabs_failure(self):
         """Track consecutive ElevenLabs failures and degrade if needed."""
@@ -1446,36 +1490,25 @@ class VoiceSystem:
     # ================================================================
 
     @staticmethod
-    def _tts_cache_key(text: str) -> str:
-        """Deterministic cache key for a TTS text."""
+    def _cache_phrase(text: str) -> str:
+        return text.strip().lower().rstrip("?.!,")
+
+    def _tts_cache_key(self, text: str) -> str:
+        """
+        Deterministic cache key for a TTS text in the current voice — the voice,
+        model and voice settings are part of it, so changing any of them never
+        plays audio made with the old ones.
+        """
         normalized = text.strip().lower()
-        return hashlib.sha256(normalized.encode()).hexdigest()[:16]
+        voice = (
+            f"{self.voice_id}|{self.tts_model}|{self.tts_stability}|{self.tts_similarity_boost}"
+            f"|{self.tts_style}|{getattr(self, 'tts_speed', 0.96)}"
+        )
+        return hashlib.sha256(f"{voice}|{normalized}".encode()).hexdigest()[:16]
 
     def _load_tts_cache(self):
-        """Load cached TTS audio from disk (most recent N entries by mtime)."""
-        if not self._tts_cache_dir.exists():
-            return
-        # Sort by modification time (oldest first) so most recent end up at the end (LRU order)
-        files = sorted(self._tts_cache_dir.glob("*.mp3"), key=lambda f: f.stat().st_mtime)
-        # Only load the most recent entries to respect the memory cap
-        files = files[-_TTS_CACHE_MAX_ENTRIES:]
-        loaded = 0
-        for f in files:
-            try:
-                self._tts_cache[f.stem] = f.read_bytes()
-                loaded += 1
-            except Exception:
-                pass
-        if loaded:
-            logger.debug("Loaded %d cached TTS entries (max %d)", loaded, _TTS_CACHE_MAX_ENTRIES)
-
-    def _persist_tts_cache_entry(self, key: str, audio_bytes: bytes):
-        """Save a TTS cache entry to disk."""
-        try:
-            self._tts_cache_dir.mkdir(parents=True, exist_ok=True)
-            (self._tts_cache_dir / f"{key}.mp3").write_bytes(audio_bytes)
-        except Exception as e:
-            logger.debug("Failed to persist TTS cache entry: %s", e)
+        """Open the on-disk TTS cache index — no audio is read until it is needed."""
+        self._tts_store.open(self._tts_cache_dir)
 
     # ================================================================
     # UTILITIES
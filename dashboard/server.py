@@ -16,7 +16,7 @@ import os
 import secrets
 import subprocess
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from datetime import datetime
 from pathlib import Path
 
@@ -423,6 +423,19 @@ async def api_health(request):
     })
 
 
+async def api_perf(request):
+    """
+    GET /api/perf — Latency percentiles per hot-path stage (core/tracing.py)
+    over a sliding window. No auth required — timings only, no content.
+    """
+    from core.tracing import PERF
+    return web.json_response({
+        "window_seconds": PERF.window_s,
+        "stages": PERF.snapshot(),
+        "timestamp": datetime.now().isoformat(),
+    })
+
+
 async def api_openclaw_url(request):
     """
     GET /api/openclaw-url — Start OpenClaw gateway if needed; return authed dashboard URL.
@@ -659,7 +672,7 @@ async def broadcast_vad_event(event: str, text: str):
         return
     await _broadcast_ws(_app_ref, {
         "type": "vad_event",
-        "event": event,   # "recording" | "transcription"
+        "event": event,   # "recording" | "partial" | "wake" | "transcription"
         "text": text,
     })
 
@@ -1556,6 +1569,24 @@ async def error_handling_middleware(request, handler):
         )
 
 
+_AGENT_LOG_SCAN_LINES = 400   # Lines searched for the current action
+_agent_log_tails: OrderedDict = OrderedDict()  # path -> LogTail, least recently polled first
+
+
+def _agent_log_tail(log_path: Path):
+    """A LogTail following log_path, brought up to date; only new bytes are read per poll."""
+    from core.agent_manager import LogTail
+    key = str(log_path)
+    tail = _agent_log_tails.pop(key, None)
+    if tail is None:
+        tail = LogTail(log_path, from_end=True)
+    _agent_log_tails[key] = tail
+    while len(_agent_log_tails) > 32:
+        _agent_log_tails.popitem(last=False)
+    tail.update()
+    return tail
+
+
 async def api_agent_log(request: web.Request) -> web.Response:
     """GET /api/agent-log/{agent_id} — last N lines of agent's stdout log + current action summary."""
     import re as _re
@@ -1564,11 +1595,15 @@ async def api_agent_log(request: web.Request) -> web.Response:
     if not _re.match(r'^[a-zA-Z0-9_-]{4,80}$', agent_id):
         return web.json_response({"error": "invalid"}, status=400)
     log_path = Path("data/agent_outputs") / f"{agent_id}.log"
-    if not log_path.exists():
+    leon = request.app.get("leon_core")
+    agent_manager = getattr(leon, "agent_manager", None)
+    lines = agent_manager.tail(agent_id, _AGENT_LOG_SCAN_LINES) if agent_manager else None
+    if lines is None and not log_path.exists():
         return web.json_response({"lines": [], "exists": False, "current_action": ""})
     try:
-        content = log_path.read_text(errors="replace")
-        lines = content.splitlines()
+        if lines is None:
+            # Not (or no longer) tracked by the agent manager — follow the file here
+            lines = _agent_log_tail(log_path).tail(_AGENT_LOG_SCAN_LINES)
         tail = lines[-80:]
 
         # Extract "current action" — the most recent meaningful line
@@ -1644,6 +1679,7 @@ def create_app(leon_core=None) -> web.Application:
     app.router.add_get("/api/elevenlabs-voices", api_elevenlabs_voices)
     app.router.add_get("/health", health)
     app.router.add_get("/api/health", api_health)
+    app.router.add_get("/api/perf", api_perf)
     app.router.add_get("/api/openclaw-url", api_openclaw_url)
     app.router.add_get("/api/projects", api_projects)
     app.router.add_post("/api/projects/open", api_projects_open)
@@ -1201,6 +1201,13 @@ function handleVadEvent(event, text) {
         el.style.opacity = '1';
         el.style.borderColor = 'rgba(255,68,102,0.5)';
 
+    } else if (event === 'partial') {
+        // Streaming STT — what's been heard so far, while still listening
+        const escaped = text.replace(/</g, '&lt;').replace(/>/g, '&gt;');
+        el.innerHTML = `<span style="color:#ff4466">⏺</span> &nbsp;<span style="color:#aaa">${escaped}</span>`;
+        el.style.opacity = '1';
+        el.style.borderColor = 'rgba(255,68,102,0.5)';
+
     } else if (event === 'transcription') {
         const escaped = text.replace(/</g, '&lt;').replace(/>/g, '&gt;');
         el.innerHTML = `<span style="color:#aaa">heard:</span> &nbsp;<span style="color:#fff">${escaped}</span>`;
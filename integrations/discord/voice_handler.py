@@ -9,7 +9,8 @@ When the owner joins the 🎤 Talk to Leon voice channel:
   5. Transcript posted to #chat as  🎤 **You:** <text>
   6. Transcript sent to Leon API → response
   7. Response posted to #chat as   🤖 **Leon:** <text>
-  8. ElevenLabs TTS (pcm_48000) → played in voice channel
+  8. ElevenLabs TTS (pcm_48000) → played in voice channel, clause by clause
+     (the next clause is synthesized while the current one plays)
   9. When user leaves, Leon disconnects
 
 Everything typed in #chat while a voice session is active also flows through
@@ -19,11 +20,9 @@ the same Leon→response→TTS pipeline so the conversation log stays unified.
 from __future__ import annotations
 
 import asyncio
-import io
 import logging
-import struct
+import threading
 import time
-import wave
 from pathlib import Path
 from typing import Callable, Optional
 
@@ -32,13 +31,19 @@ import discord
 import discord.ext.voice_recv as voice_recv
 import yaml
 
+from core.audio_dsp import EnergyVAD, resample, to_mono, to_stereo, wav_bytes
+from core.tts_stream import speak_clauses, split_clauses
+
 logger = logging.getLogger("leon.discord.voice")
 
 # ── Audio constants ────────────────────────────────────────────────────────────
 SAMPLE_RATE  = 48_000   # Discord sends 48 kHz
 CHANNELS     = 2        # Stereo
 SAMPLE_WIDTH = 2        # 16-bit signed little-endian
-FRAME_BYTES  = SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH // 50   # 20 ms per Discord frame
+FRAME_SAMPLES = SAMPLE_RATE // 50                             # 20 ms per Discord frame
+FRAME_BYTES  = FRAME_SAMPLES * CHANNELS * SAMPLE_WIDTH
+SILENCE_FRAME = bytes(FRAME_BYTES)
+WHISPER_RATE = 16_000   # Whisper resamples to 16 kHz anyway — upload a third of the bytes
 
 # Voice Activity Detection
 SILENCE_RMS          = 150     # amplitude below this = silence  (lowered for PC mics)
@@ -46,90 +51,53 @@ SILENCE_TIMEOUT_S    = 0.7     # seconds of silence → speech segment complete
 MIN_SPEECH_S         = 0.15    # discard segments shorter than this (was 0.4)
 MAX_SPEECH_S         = 30.0    # hard cap to prevent runaway buffers
 
-MIN_SPEECH_BYTES = int(SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH * MIN_SPEECH_S)
-MAX_SPEECH_BYTES = int(SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH * MAX_SPEECH_S)
-
 WHISPER_MODEL = "whisper-large-v3-turbo"
 WHISPER_LANGUAGE = "en"   # skip auto-detection, saves ~30% latency
 # Prompt primes Whisper for Leon's context — dramatically improves accuracy
 WHISPER_PROMPT = "Talking to Leon, an AI assistant. Commands include opening apps, browsing, system control, and general questions."
+MAX_TTS_CHARS = 500      # ElevenLabs quota guard — longer replies are spoken up to here
+TTS_READ_CHUNK = 16 * 1024
 VOICE_CHANNEL_NAME = "🎤 Talk to Leon"
 LIBOPUS_PATH = "/usr/lib/x86_64-linux-gnu/libopus.so.0"
 
 
 # ── Audio helpers ──────────────────────────────────────────────────────────────
 
-def _rms(pcm: bytes) -> float:
-    if not pcm:
-        return 0.0
-    n = len(pcm) // 2
-    samples = struct.unpack_from(f"<{n}h", pcm)
-    return (sum(s * s for s in samples) / n) ** 0.5
-
-
 def _stereo_to_mono_wav(pcm: bytes) -> bytes:
-    """Convert stereo 48 kHz PCM to a mono WAV blob for Whisper."""
-    n = len(pcm) // 2
-    samples = struct.unpack_from(f"<{n}h", pcm)
-    # Average L+R pairs
-    mono = struct.pack(
-        f"<{n // 2}h",
-        *((samples[i] + samples[i + 1]) // 2 for i in range(0, n, 2)),
-    )
-    buf = io.BytesIO()
-    with wave.open(buf, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(SAMPLE_WIDTH)
-        wf.setframerate(SAMPLE_RATE)
-        wf.writeframes(mono)
-    return buf.getvalue()
+    """Convert stereo 48 kHz PCM to a mono 16 kHz WAV blob for Whisper."""
+    mono = resample(to_mono(pcm, CHANNELS), SAMPLE_RATE, WHISPER_RATE)
+    return wav_bytes(mono, WHISPER_RATE)
 
 
 def _mono_pcm_to_stereo(mono: bytes) -> bytes:
     """Duplicate mono 48 kHz PCM to stereo for Discord playback."""
-    n = len(mono) // 2
-    samples = struct.unpack_from(f"<{n}h", mono)
-    stereo = struct.pack(f"<{n * 2}h", *(v for s in samples for v in (s, s)))
-    return stereo
+    return to_stereo(mono)
 
 
-# ── Per-user speech buffer ─────────────────────────────────────────────────────
+def _tts_clauses(text: str) -> list[str]:
+    """Clauses of text to speak, stopping once MAX_TTS_CHARS would be exceeded."""
+    clauses: list[str] = []
+    total = 0
+    for clause in split_clauses(text):
+        if clauses and total + len(clause) > MAX_TTS_CHARS:
+            break
+        clauses.append(clause[:MAX_TTS_CHARS])
+        total += len(clause)
+    return clauses
 
-class _SpeechBuffer:
-    """Accumulates PCM frames; returns a segment when silence ends speech."""
 
-    def __init__(self) -> None:
-        self._data:          bytearray = bytearray()
-        self._speaking:      bool      = False
-        self._last_voice_ts: float     = 0.0
+# ── Per-user speech buffer ─────────────────────────────────────────────────────
 
-    def feed(self, pcm: bytes) -> Optional[bytes]:
-        """
-        Feed one Discord audio frame.
-        Returns completed speech bytes when a silence gap is detected, else None.
-        """
-        amplitude = _rms(pcm)
-        now = time.monotonic()
-
-        if amplitude > SILENCE_RMS:
-            self._data.extend(pcm)
-            self._last_voice_ts = now
-            self._speaking = True
-            if len(self._data) >= MAX_SPEECH_BYTES:
-                return self._flush()
-        elif self._speaking:
-            if (now - self._last_voice_ts) >= SILENCE_TIMEOUT_S:
-                return self._flush()
-
-        return None
-
-    def _flush(self) -> Optional[bytes]:
-        segment = bytes(self._data)
-        self._data.clear()
-        self._speaking = False
-        if len(segment) < MIN_SPEECH_BYTES:
-            return None
-        return segment
+def _speech_buffer() -> EnergyVAD:
+    """
+    Per-user VAD: loud frames are kept, quiet ones dropped; a segment ends
+    SILENCE_TIMEOUT_S after the last loud frame (feed() gets the frame time).
+    """
+    return EnergyVAD(
+        SAMPLE_RATE, FRAME_SAMPLES, channels=CHANNELS,
+        threshold=SILENCE_RMS, start_frames=1, silence_s=SILENCE_TIMEOUT_S,
+        min_s=MIN_SPEECH_S, max_s=MAX_SPEECH_S, keep_quiet=False,
+    )
 
 
 # ── Custom AudioSink ───────────────────────────────────────────────────────────
@@ -150,7 +118,7 @@ class _LeonSink(voice_recv.AudioSink):
     def __init__(self, on_segment: Callable, loop: asyncio.AbstractEventLoop) -> None:
         self._on_segment = on_segment
         self._loop      = loop
-        self._buffers:  dict[int, _SpeechBuffer]        = {}
+        self._buffers:  dict[int, EnergyVAD]            = {}
         self._decoders: dict[int, discord.opus.Decoder] = {}
 
     def write(self, user: Optional[discord.User], data: voice_recv.VoiceData) -> None:
@@ -176,8 +144,8 @@ class _LeonSink(voice_recv.AudioSink):
             return
 
         if user.id not in self._buffers:
-            self._buffers[user.id] = _SpeechBuffer()
-        segment = self._buffers[user.id].feed(pcm)
+            self._buffers[user.id] = _speech_buffer()
+        segment = self._buffers[user.id].feed(pcm, now=time.monotonic())
         if segment:
             # write() runs in router thread — schedule coroutine on the main loop
             asyncio.run_coroutine_threadsafe(
@@ -198,16 +166,32 @@ class _LeonSink(voice_recv.AudioSink):
 # ── PCM audio source for playback ─────────────────────────────────────────────
 
 class _PCMAudioSource(discord.AudioSource):
-    """Streams stereo 48 kHz 16-bit PCM into a Discord voice channel."""
+    """
+    Streams stereo 48 kHz 16-bit PCM into a Discord voice channel while it is
+    still being fed (one clause at a time). read() runs on the player thread:
+    it sends silence while waiting for the next clause and ends once close()d
+    and drained.
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def feed(self, pcm: bytes) -> None:
+        with self._lock:
+            self._buf += pcm
 
-    def __init__(self, pcm: bytes) -> None:
-        self._pcm = pcm
-        self._pos = 0
+    def close(self) -> None:
+        self._closed = True
 
     def read(self) -> bytes:
-        chunk = self._pcm[self._pos : self._pos + FRAME_BYTES]
-        self._pos += FRAME_BYTES
-        return chunk if len(chunk) == FRAME_BYTES else b""
+        with self._lock:
+            if len(self._buf) >= FRAME_BYTES:
+                chunk = bytes(self._buf[:FRAME_BYTES])
+                del self._buf[:FRAME_BYTES]
+                return chunk
+        return b"" if self._closed else SILENCE_FRAME
 
     def is_opus(self) -> bool:
         return False
@@ -429,7 +413,7 @@ class LeonVoiceManager:
 
     async def _tts_edge(self, text: str) -> bytes:
         """Fallback TTS via Microsoft Edge (free, no quota). Returns stereo 48kHz PCM."""
-        import edge_tts, miniaudio, array as _array
+        import edge_tts, miniaudio
         mp3 = b""
         communicate = edge_tts.Communicate(text[:500], voice="en-US-GuyNeural")
         async for chunk in communicate.stream():
@@ -437,58 +421,73 @@ class LeonVoiceManager:
                 mp3 += chunk["data"]
         decoded = miniaudio.decode(mp3, output_format=miniaudio.SampleFormat.SIGNED16,
                                    nchannels=1, sample_rate=48000)
-        mono = _array.array("h", decoded.samples)
-        stereo = _array.array("h")
-        for s in mono:
-            stereo.append(s); stereo.append(s)
-        return bytes(stereo)
+        return to_stereo(decoded.samples.tobytes())
+
+    async def _synthesize_clause(self, clause: str) -> Optional[bytes]:
+        """Stereo 48 kHz PCM for one clause: ElevenLabs (custom voice), else Edge TTS."""
+        if self._el_key and self._el_voice_id:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(
+                    f"https://api.elevenlabs.io/v1/text-to-speech/{self._el_voice_id}/stream"
+                    "?output_format=pcm_48000",
+                    headers={
+                        "xi-api-key": self._el_key,
+                        "Content-Type": "application/json",
+                    },
+                    json={
+                        "text": clause,
+                        "model_id": "eleven_turbo_v2_5",
+                        "voice_settings": {"stability": 0.5, "similarity_boost": 0.75},
+                    },
+                    timeout=aiohttp.ClientTimeout(total=20),
+                ) as resp:
+                    if resp.status == 200:
+                        mono_pcm = bytearray()
+                        async for chunk in resp.content.iter_chunked(TTS_READ_CHUNK):
+                            mono_pcm += chunk
+                        logger.debug("Voice: ElevenLabs TTS received %d bytes", len(mono_pcm))
+                        return _mono_pcm_to_stereo(bytes(mono_pcm))
+                    body = await resp.text()
+                    logger.warning("ElevenLabs TTS %d — falling back to Edge TTS: %s",
+                                   resp.status, body[:120])
+
+        # Fallback: Microsoft Edge TTS (free, no quota)
+        logger.info("Voice: using Edge TTS fallback")
+        return await self._tts_edge(clause)
 
     async def _play_tts(self, text: str) -> None:
+        """
+        Speak text clause by clause into one continuously playing source:
+        playback starts with the first clause while the rest are synthesized.
+        """
         if not self._vc or not self._vc.is_connected():
             return
-        try:
-            stereo_pcm = None
-
-            # Try ElevenLabs first (custom voice)
-            if self._el_key and self._el_voice_id:
-                logger.info("Voice: requesting TTS for %d chars...", len(text))
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        f"https://api.elevenlabs.io/v1/text-to-speech/{self._el_voice_id}"
-                        "?output_format=pcm_48000",
-                        headers={
-                            "xi-api-key": self._el_key,
-                            "Content-Type": "application/json",
-                        },
-                        json={
-                            "text": text[:500],
-                            "model_id": "eleven_turbo_v2_5",
-                            "voice_settings": {"stability": 0.5, "similarity_boost": 0.75},
-                        },
-                        timeout=aiohttp.ClientTimeout(total=20),
-                    ) as resp:
-                        if resp.status == 200:
-                            mono_pcm = await resp.read()
-                            stereo_pcm = _mono_pcm_to_stereo(mono_pcm)
-                            logger.info("Voice: ElevenLabs TTS received %d bytes", len(mono_pcm))
-                        else:
-                            body = await resp.text()
-                            logger.warning("ElevenLabs TTS %d — falling back to Edge TTS: %s",
-                                           resp.status, body[:120])
-
-            # Fallback: Microsoft Edge TTS (free, no quota)
-            if stereo_pcm is None:
-                logger.info("Voice: using Edge TTS fallback")
-                stereo_pcm = await self._tts_edge(text)
-
-            if stereo_pcm:
+        source = _PCMAudioSource()
+        started = False
+
+        async def play(clause: str, stereo_pcm: Optional[bytes]) -> None:
+            nonlocal started
+            if not stereo_pcm:
+                return
+            source.feed(stereo_pcm)
+            if not started and self._vc and self._vc.is_connected():
                 if self._vc.is_playing():
                     self._vc.stop()
                     await asyncio.sleep(0.1)
-                self._vc.play(_PCMAudioSource(stereo_pcm))
+                self._vc.play(source)
+                started = True
                 logger.info("Voice: TTS playback started")
+
+        try:
+            clauses = _tts_clauses(text)
+            logger.info("Voice: requesting TTS for %d chars in %d clauses...", len(text), len(clauses))
+            first_audio_ms = await speak_clauses(clauses, self._synthesize_clause, play)
+            if first_audio_ms is not None:
+                logger.info("Voice: TTS first audio after %.0f ms", first_audio_ms)
         except Exception as e:
             logger.warning("Voice: TTS playback error: %s", e, exc_info=True)
+        finally:
+            source.close()
 
     # ── Chat logging ───────────────────────────────────────────────────────────
 
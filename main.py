@@ -149,12 +149,18 @@ def _start_voice_thread(leon) -> _DaemonHandle:
         async def vad_event_handler(event: str, text: str):
             await broadcast_vad_event(event, text)
 
+        async def partial_command_handler(text: str):
+            # Streaming STT: start classifying on Leon's loop before speech ends
+            if main_loop and not main_loop.is_closed():
+                main_loop.call_soon_threadsafe(leon.prefetch_analysis, text)
+
         vloop = asyncio.new_event_loop()
         asyncio.set_event_loop(vloop)
         handle.set_loop(vloop)
         voice_cfg = leon.get_voice_config()
         voice = VoiceSystem(on_command=voice_command_handler, config=voice_cfg, name=getattr(leon, 'ai_name', 'leon'))
         voice.on_vad_event = vad_event_handler
+        voice.on_partial_command = partial_command_handler
         leon.set_voice_system(voice)
         try:
             vloop.run_until_complete(voice.start())
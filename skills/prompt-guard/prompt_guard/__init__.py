@@ -24,10 +24,37 @@ v3.1.0: Token Optimization
 
 __version__ = "3.2.0"
 
-from prompt_guard.models import Severity, Action, DetectionResult, SanitizeResult
-from prompt_guard.engine import PromptGuard
-from prompt_guard.cache import MessageCache, get_cache
-from prompt_guard.pattern_loader import TieredPatternLoader, LoadTier, get_loader
+import importlib
+
+# Public names are imported on first access, so `python -m prompt_guard.cli`
+# and tools that only need one submodule don't pay for the whole engine.
+_EXPORTS = {
+    "Severity": "prompt_guard.models",
+    "Action": "prompt_guard.models",
+    "DetectionResult": "prompt_guard.models",
+    "SanitizeResult": "prompt_guard.models",
+    "PromptGuard": "prompt_guard.engine",
+    "MessageCache": "prompt_guard.cache",
+    "SQLiteMessageCache": "prompt_guard.cache",
+    "get_cache": "prompt_guard.cache",
+    "TieredPatternLoader": "prompt_guard.pattern_loader",
+    "LoadTier": "prompt_guard.pattern_loader",
+    "get_loader": "prompt_guard.pattern_loader",
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
+
 
 # NOTE: PGAPIClient is NOT imported here by design.
 # The API client is optional. Import it explicitly when needed:
@@ -41,6 +68,7 @@ __all__ = [
     "DetectionResult",
     "SanitizeResult",
     "MessageCache",
+    "SQLiteMessageCache",
     "get_cache",
     "TieredPatternLoader",
     "LoadTier",
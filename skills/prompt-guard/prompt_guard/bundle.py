@@ -0,0 +1,128 @@
+"""
+Prompt Guard - Precompiled pattern bundles (v3.4.0)
+
+A fresh process pays for parsing the tier YAML files and for compiling the
+pattern library into a CompiledPatternSet (literal extraction for ~900
+patterns) before its first scan. CLI runs and Leon's boot pay it every time.
+
+A bundle is one tier's parsed pattern sets plus its compiled matcher layout
+(prefilter literals and group membership), stored as JSON. Loading only reads
+data: the Aho-Corasick automaton is rebuilt and regexes compile on first use,
+so a planted or corrupted bundle can at worst be rejected, never executed.
+Bundles live in .compiled-patterns/ next to patterns/ and are keyed by a
+checksum of the YAML files and the modules that define the library and the
+matcher; a stale, unreadable or malformed bundle is ignored and rebuilt on
+the next compile.
+
+Build all tiers ahead of time (e.g. after updating patterns):
+    python3 -m prompt_guard.bundle
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger("prompt_guard")
+
+# Bump when the bundle layout changes
+BUNDLE_FORMAT = 2
+BUNDLE_DIRNAME = ".compiled-patterns"
+
+# Modules whose source determines what a bundle contains
+SOURCE_MODULES = ("patterns.py", "scanner.py", "matcher.py", "pattern_loader.py", "models.py")
+
+
+def bundles_enabled() -> bool:
+    """Bundles are on unless PG_PATTERN_BUNDLES is set to a false value."""
+    return os.environ.get("PG_PATTERN_BUNDLES", "").lower() not in ("false", "0", "no")
+
+
+def bundle_key(yaml_files: Iterable[Path]) -> str:
+    """Checksum of everything a tier bundle is derived from."""
+    digest = hashlib.sha256(f"{BUNDLE_FORMAT}:{sys.version_info[:2]}".encode())
+    package_dir = Path(__file__).parent
+    for path in [package_dir / name for name in SOURCE_MODULES] + list(yaml_files):
+        digest.update(path.name.encode())
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+def load_bundle(path: Path, key: str) -> Optional[Dict[str, Any]]:
+    """Return the bundle payload at path if it was built for key, else None."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            bundle = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.debug("Ignoring unreadable pattern bundle %s: %s", path, e)
+        return None
+    if not isinstance(bundle, dict) or bundle.get("key") != key:
+        return None
+    payload = bundle.get("payload")
+    return payload if isinstance(payload, dict) else None
+
+
+def save_bundle(path: Path, key: str, payload: Dict[str, Any]) -> bool:
+    """Atomically write a bundle. Returns False if the directory is not writable."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "payload": payload}, f, ensure_ascii=False, separators=(",", ":"))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except Exception as e:
+        logger.debug("Could not write pattern bundle %s: %s", path, e)
+        return False
+    return True
+
+
+def build_bundles(patterns_dir: Optional[Path] = None) -> Dict[str, Dict[str, Any]]:
+    """Compile and write the bundle for every tier. Returns per-tier stats."""
+    from prompt_guard.pattern_loader import LoadTier, TieredPatternLoader
+
+    results = {}
+    for tier in LoadTier:
+        loader = TieredPatternLoader(patterns_dir, use_bundles=False)
+        start = time.perf_counter()
+        loader.load_tier(tier)
+        matcher = loader.get_matcher()
+        path = loader.write_bundle(tier)
+        results[tier.name] = {
+            "path": str(path) if path else None,
+            "patterns": len(matcher.specs),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+    return results
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build precompiled prompt-guard pattern bundles")
+    parser.add_argument("--patterns-dir", type=Path, help="Pattern YAML directory")
+    args = parser.parse_args(argv)
+
+    results = build_bundles(args.patterns_dir)
+    for tier, info in results.items():
+        where = info["path"] or "not written (directory not writable)"
+        print(f"{tier:<8} {info['patterns']:>4} patterns  {info['seconds']:.3f}s  {where}")
+    return 0 if all(info["path"] for info in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
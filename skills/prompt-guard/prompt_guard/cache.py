@@ -7,13 +7,22 @@ LRU cache for analyzed messages:
 - 90% token reduction for repeated requests
 
 Thread-safe for concurrent access.
+
+v3.4.0: SQLiteMessageCache is an optional on-disk backend shared across
+processes (Leon, the CLI, scripts/detect.py), with per-entry TTL, LRU
+eviction, and entries stamped with the pattern-set checksum they were
+computed under (a mismatch is a miss).
 """
 
 import hashlib
+import json
+import sqlite3
 import threading
+import time
 from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
 from typing import Optional, Dict, Any
 
 
@@ -132,6 +141,7 @@ class MessageCache:
             hit_rate = (self._stats["hits"] / total * 100) if total > 0 else 0
             
             return {
+                "backend": "memory",
                 "size": len(self._cache),
                 "max_size": self.max_size,
                 "hits": self._stats["hits"],
@@ -162,6 +172,293 @@ class MessageCache:
             return key in self._cache
 
 
+class SQLiteMessageCache(MessageCache):
+    """
+    Persistent LRU cache for message analysis results, backed by SQLite.
+
+    Entries are keyed by the same message hash as MessageCache and scoped to a
+    namespace (e.g. a digest of the detection config), so guards with different
+    settings can share one file without reading each other's verdicts. Each
+    entry also records the pattern checksum it was computed under; entries
+    with another checksum are treated as stale and dropped on read.
+
+    Usage:
+        cache = SQLiteMessageCache(
+            "memory/verdict-cache.db",
+            max_size=10000,
+            ttl_seconds=86400,
+            pattern_checksum=loader.get_matcher().checksum,
+        )
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS verdicts (
+            key TEXT NOT NULL,
+            namespace TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            action TEXT NOT NULL,
+            reasons TEXT NOT NULL,
+            patterns_count INTEGER NOT NULL,
+            created REAL NOT NULL,
+            expires REAL,
+            last_access REAL NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 1,
+            checksum TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (key, namespace)
+        );
+        CREATE INDEX IF NOT EXISTS verdicts_last_access ON verdicts (last_access);
+    """
+
+    # Fraction of max_size evicted at once when the table overflows, so the
+    # row count is only re-read every max_size / EVICT_FRACTION inserts.
+    EVICT_FRACTION = 10
+
+    def __init__(
+        self,
+        path: str,
+        max_size: int = 10000,
+        ttl_seconds: Optional[float] = None,
+        pattern_checksum: Optional[str] = None,
+        namespace: str = "",
+    ):
+        """
+        Open (or create) the cache file.
+
+        Args:
+            path: SQLite database file
+            max_size: Maximum entries kept across all namespaces (LRU eviction)
+            ttl_seconds: Entry lifetime; None keeps entries until evicted
+            pattern_checksum: Checksum of the loaded pattern set; entries in
+                this namespace computed under another checksum are discarded
+            namespace: Scope for entries (e.g. a config digest)
+        """
+        super().__init__(max_size=max_size)
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.pattern_checksum = pattern_checksum or ""
+        self._stats.update({"expired": 0, "invalidated": 0})
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=5.0, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._migrate()
+            self._conn.executescript(self.SCHEMA)
+            self._drop_stale()
+            self._size = self._count()
+
+    def _migrate(self) -> None:
+        """Drop a pre-checksum verdicts table (and its global meta row); it is only a cache."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(verdicts)")]
+        if columns and "checksum" not in columns:
+            self._conn.execute("DROP TABLE verdicts")
+            self._conn.execute("DROP TABLE IF EXISTS meta")
+
+    def _drop_stale(self) -> None:
+        """Discard this namespace's verdicts computed with a different pattern set."""
+        with self._conn:
+            flushed = self._conn.execute(
+                "DELETE FROM verdicts WHERE namespace = ? AND checksum != ?",
+                (self.namespace, self.pattern_checksum),
+            ).rowcount
+        self._stats["invalidated"] += max(flushed, 0)
+
+    def _count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM verdicts").fetchone()[0]
+
+    def get(self, message: str) -> Optional[CacheEntry]:
+        """
+        Get cached result for message.
+
+        Returns CacheEntry if found and not expired, None otherwise.
+        Updates LRU order on hit.
+        """
+        key = self._hash_message(message)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT severity, action, reasons, patterns_count, created, expires, "
+                "hit_count, checksum FROM verdicts WHERE key = ? AND namespace = ?",
+                (key, self.namespace),
+            ).fetchone()
+
+            if row is not None:
+                stale = row[7] != self.pattern_checksum
+                if stale or (row[5] is not None and row[5] <= now):
+                    self._conn.execute(
+                        "DELETE FROM verdicts WHERE key = ? AND namespace = ?",
+                        (key, self.namespace),
+                    )
+                    self._size -= 1
+                    self._stats["invalidated" if stale else "expired"] += 1
+                    row = None
+
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+
+            hit_count = row[6] + 1
+            self._conn.execute(
+                "UPDATE verdicts SET last_access = ?, hit_count = ? "
+                "WHERE key = ? AND namespace = ?",
+                (now, hit_count, key, self.namespace),
+            )
+            self._stats["hits"] += 1
+            return CacheEntry(
+                severity=row[0],
+                action=row[1],
+                reasons=json.loads(row[2]),
+                patterns_count=row[3],
+                timestamp=datetime.fromtimestamp(row[4]),
+                hit_count=hit_count,
+            )
+
+    def put(self, message: str, severity: str, action: str,
+            reasons: list, patterns_count: int) -> str:
+        """
+        Store analysis result in cache.
+
+        Returns the cache key (hash).
+        """
+        key = self._hash_message(message)
+        now = time.time()
+        expires = now + self.ttl_seconds if self.ttl_seconds else None
+
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                "SELECT 1 FROM verdicts WHERE key = ? AND namespace = ?",
+                (key, self.namespace),
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO verdicts "
+                "(key, namespace, severity, action, reasons, patterns_count, "
+                " created, expires, last_access, hit_count, checksum) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)",
+                (key, self.namespace, severity, action, json.dumps(reasons),
+                 patterns_count, now, expires, now, self.pattern_checksum),
+            )
+            if exists is None:
+                self._size += 1
+            if self._size > self.max_size:
+                self._evict()
+
+        return key
+
+    def _evict(self) -> None:
+        """
+        Trim the table below max_size, oldest access first. Caller holds the lock.
+
+        self._size only sees this process's writes, so it is re-read here
+        before evicting; trimming a batch at a time keeps that count off
+        the per-put path.
+        """
+        size = self._count()
+        if size > self.max_size:
+            target = self.max_size - self.max_size // self.EVICT_FRACTION
+            evicted = self._conn.execute(
+                "DELETE FROM verdicts WHERE rowid IN ("
+                " SELECT rowid FROM verdicts ORDER BY last_access LIMIT ?)",
+                (size - target,),
+            ).rowcount
+            self._stats["evictions"] += evicted
+            size -= evicted
+        self._size = size
+
+    def invalidate(self, message: str) -> bool:
+        """Remove a specific message from cache."""
+        key = self._hash_message(message)
+
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM verdicts WHERE key = ? AND namespace = ?",
+                (key, self.namespace),
+            ).rowcount
+            self._size -= removed
+            return removed > 0
+
+    def clear(self) -> int:
+        """Clear all cached entries in this namespace. Returns count of cleared items."""
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM verdicts WHERE namespace = ?", (self.namespace,)
+            ).rowcount
+            self._size -= removed
+            return removed
+
+    def purge_expired(self) -> int:
+        """Delete expired entries (all namespaces). Returns count removed."""
+        with self._lock, self._conn:
+            removed = self._conn.execute(
+                "DELETE FROM verdicts WHERE expires IS NOT NULL AND expires <= ?",
+                (time.time(),),
+            ).rowcount
+            self._size -= removed
+        self._stats["expired"] += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        with self._lock:
+            size = self._conn.execute(
+                "SELECT COUNT(*) FROM verdicts WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+            total = self._stats["hits"] + self._stats["misses"]
+            hit_rate = (self._stats["hits"] / total * 100) if total > 0 else 0
+
+            return {
+                "backend": "sqlite",
+                "path": str(self.path),
+                "size": size,
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "evictions": self._stats["evictions"],
+                "expired": self._stats["expired"],
+                "invalidated": self._stats["invalidated"],
+                "hit_rate": f"{hit_rate:.1f}%",
+            }
+
+    def get_recent(self, n: int = 10) -> list:
+        """Get n most recently accessed entries."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, severity, action, hit_count, created FROM verdicts "
+                "WHERE namespace = ? ORDER BY last_access DESC LIMIT ?",
+                (self.namespace, n),
+            ).fetchall()
+        return [
+            {
+                "hash": key[:16] + "...",
+                "severity": severity,
+                "action": action,
+                "hits": hits,
+                "timestamp": datetime.fromtimestamp(created).isoformat(),
+            }
+            for key, severity, action, hits, created in rows
+        ]
+
+    def contains(self, message: str) -> bool:
+        """Check if a live entry for message exists without updating LRU."""
+        key = self._hash_message(message)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT expires FROM verdicts WHERE key = ? AND namespace = ? AND checksum = ?",
+                (key, self.namespace, self.pattern_checksum),
+            ).fetchone()
+        return row is not None and (row[0] is None or row[0] > time.time())
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
 # Singleton instance
 _default_cache: Optional[MessageCache] = None
 
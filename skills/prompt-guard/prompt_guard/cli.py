@@ -4,6 +4,7 @@ Prompt Guard - CLI entry point.
 
 import sys
 import json
+import time
 
 
 def main():
@@ -21,6 +22,16 @@ def main():
         default="medium",
         help="Detection sensitivity",
     )
+    parser.add_argument(
+        "--cache-path",
+        type=str,
+        help="Persist verdicts in this SQLite file (shared across runs)",
+    )
+    parser.add_argument(
+        "--profile-import",
+        action="store_true",
+        help="Print time spent importing, loading patterns and analyzing (stderr)",
+    )
 
     args = parser.parse_args()
 
@@ -46,17 +57,43 @@ def main():
             file_config = yaml.safe_load(f) or {}
             file_config = file_config.get("prompt_guard", file_config)
             config.update(file_config)
+    if args.cache_path:
+        config["cache"] = {**config.get("cache", {}), "backend": "sqlite", "path": args.cache_path}
 
     # Parse context
     context = {}
     if args.context:
         context = json.loads(args.context)
 
-    # Analyze
-    from prompt_guard.engine import PromptGuard
+    # Analyze (phases timed for --profile-import)
+    phases = []
+
+    def phase(name, start):
+        phases.append((name, time.perf_counter() - start))
+        return time.perf_counter()
 
+    start = time.perf_counter()
+    import prompt_guard.patterns  # noqa: F401
+    start = phase("import patterns", start)
+    from prompt_guard.engine import PromptGuard
+    from prompt_guard.pattern_loader import get_loader
+    start = phase("import engine", start)
+    loader = get_loader()
+    start = phase("load pattern tier", start)
+    loader.get_matcher()
+    start = phase("compile matcher", start)
     guard = PromptGuard(config)
+    start = phase("init guard", start)
     result = guard.analyze(args.message, context)
+    phase("analyze", start)
+
+    if args.profile_import:
+        bundles = loader.get_stats()["bundles"]
+        source = "bundle" if bundles["loaded"] else "yaml"
+        for name, seconds in phases:
+            print(f"{name:<18} {seconds * 1000:8.1f} ms", file=sys.stderr)
+        print(f"{'total':<18} {sum(s for _, s in phases) * 1000:8.1f} ms (patterns from {source})",
+              file=sys.stderr)
 
     if args.json:
         print(json.dumps(result.to_dict(), indent=2, ensure_ascii=False))
@@ -68,7 +105,8 @@ def main():
             "HIGH": "\U0001f534",
             "CRITICAL": "\U0001f6a8",
         }
-        print(f"{emoji.get(result.severity.name, '\u2753')} {result.severity.name}")
+        icon = emoji.get(result.severity.name, "\u2753")
+        print(f"{icon} {result.severity.name}")
         print(f"Action: {result.action.value}")
         if result.reasons:
             print(f"Reasons: {', '.join(result.reasons)}")
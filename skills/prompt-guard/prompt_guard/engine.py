@@ -10,50 +10,32 @@ v3.1.0 Token Optimization:
 """
 
 import re
+import asyncio
 import hashlib
+import functools
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import Optional, Dict, List, Any
+from typing import (
+    Optional, Dict, List, Any, AsyncIterable, AsyncIterator, Sequence, Tuple, Union,
+)
 
-from prompt_guard.models import Severity, Action, DetectionResult, SanitizeResult
-from prompt_guard.cache import get_cache, MessageCache
+from prompt_guard.models import Severity, Action, DetectionResult, SanitizeResult, MessageScan
+from prompt_guard.cache import get_cache, MessageCache, SQLiteMessageCache
 
 __version__ = "3.2.0"
-from prompt_guard.pattern_loader import TieredPatternLoader, LoadTier, get_loader
-from prompt_guard.patterns import (
-    CRITICAL_PATTERNS,
-    SECRET_PATTERNS,
-    PATTERNS_EN, PATTERNS_KO, PATTERNS_JA, PATTERNS_ZH,
-    PATTERNS_RU, PATTERNS_ES, PATTERNS_DE, PATTERNS_FR,
-    PATTERNS_PT, PATTERNS_VI,
-    SCENARIO_JAILBREAK, EMOTIONAL_MANIPULATION, AUTHORITY_RECON,
-    COGNITIVE_MANIPULATION, PHISHING_SOCIAL_ENG, REPETITION_ATTACK,
-    SYSTEM_FILE_ACCESS, MALWARE_DESCRIPTION,
-    INDIRECT_INJECTION, CONTEXT_HIJACKING, MULTI_TURN_MANIPULATION,
-    TOKEN_SMUGGLING, PROMPT_EXTRACTION, SAFETY_BYPASS,
-    URGENCY_MANIPULATION, SYSTEM_PROMPT_MIMICRY,
-    JSON_INJECTION_MOLTBOOK, GUARDRAIL_BYPASS_EXTENDED,
-    AGENT_SOVEREIGNTY_MANIPULATION, EXPLICIT_CALL_TO_ACTION,
-    ALLOWLIST_BYPASS, HOOKS_HIJACKING, SUBAGENT_EXPLOITATION,
-    HIDDEN_TEXT_INJECTION, GITIGNORE_BYPASS,
-    AUTO_APPROVE_EXPLOIT, LOG_CONTEXT_EXPLOIT, MCP_ABUSE,
-    PREFILLED_URL, UNICODE_TAG_DETECTION, BROWSER_AGENT_INJECTION,
-    HIDDEN_TEXT_HINTS,
-    # v3.0.1 patterns
-    OUTPUT_PREFIX_INJECTION, BENIGN_FINETUNING_ATTACK, PROMPTWARE_KILLCHAIN,
-    # v3.1.0 patterns - HiveFence Scout Round 4 (2026-02-08)
-    CAUSAL_MECHANISTIC_ATTACKS, AGENT_TOOL_ATTACKS, TEMPLATE_CHAT_ATTACKS,
-    EVASION_STEALTH_ATTACKS, MULTIMODAL_PHYSICAL_ATTACKS, DEFENSE_BYPASS_ANALYSIS,
-    INFRASTRUCTURE_PROTOCOL_ATTACKS,
-    # v3.2.0 patterns - Skill Weaponization Defense (Min Hong Analysis)
-    SKILL_REVERSE_SHELL, SKILL_SSH_INJECTION, SKILL_EXFILTRATION_PIPELINE,
-    SKILL_COGNITIVE_ROOTKIT, SKILL_SEMANTIC_WORM, SKILL_OBFUSCATED_PAYLOAD,
-)
+from prompt_guard.pattern_loader import TieredPatternLoader, LoadTier, get_loader, YAML_SEVERITY
+from prompt_guard.matcher import VIEW_LOWER, VIEW_NORMALIZED, VIEW_ORIGINAL
 from prompt_guard.normalizer import normalize
 from prompt_guard.decoder import decode_all, detect_base64
 from prompt_guard.scanner import scan_text_for_patterns
 from prompt_guard.output import scan_output, sanitize_output
 from prompt_guard.logging_utils import log_detection, log_detection_json, report_to_hivefence
 
+logger = logging.getLogger("prompt_guard")
+
 
 class PromptGuard:
     # Security limits
@@ -71,12 +53,7 @@ class PromptGuard:
         # v3.1.0: Token optimization - cache and tiered loading
         cache_config = self.config.get("cache", {})
         self._cache_enabled = cache_config.get("enabled", True)
-        # Create instance-specific cache (not singleton) to avoid test pollution
-        from prompt_guard.cache import MessageCache
-        self._cache: MessageCache = MessageCache(
-            max_size=cache_config.get("max_size", 1000)
-        )
-        
+
         # Tiered pattern loader
         tier_config = self.config.get("pattern_tier", "high")
         tier_map = {"critical": LoadTier.CRITICAL, "high": LoadTier.HIGH, "full": LoadTier.FULL}
@@ -114,6 +91,63 @@ class PromptGuard:
                     "API client init failed (continuing offline): %s", e
                 )
 
+        # Instance-specific cache (not singleton) to avoid test pollution.
+        # Built last: the persistent backend is keyed on the final pattern set.
+        self._cache: MessageCache = self._build_cache(cache_config)
+
+    def _build_cache(self, cache_config: Dict) -> MessageCache:
+        """
+        Create the verdict cache.
+
+        backend "memory" (default) is per-instance. backend "sqlite" (or the
+        PG_CACHE_PATH env var) persists verdicts across processes; entries are
+        scoped to a digest of the detection config and stamped with the
+        pattern-set checksum, so a pattern change turns them into misses.
+        """
+        import os as _os
+        max_size = cache_config.get("max_size", 1000)
+        env_path = _os.environ.get("PG_CACHE_PATH")
+        backend = cache_config.get("backend", "sqlite" if env_path else "memory")
+        if not self._cache_enabled or backend != "sqlite":
+            return MessageCache(max_size=max_size)
+
+        path = env_path or cache_config.get("path", "memory/verdict-cache.db")
+        try:
+            return SQLiteMessageCache(
+                path,
+                max_size=max_size,
+                ttl_seconds=cache_config.get("ttl_seconds", 86400),
+                pattern_checksum=self._pattern_checksum(),
+                namespace=self._config_digest(),
+            )
+        except Exception as e:
+            logger.warning("Verdict cache at %s unavailable (using memory): %s", path, e)
+            return MessageCache(max_size=max_size)
+
+    def _pattern_checksum(self) -> str:
+        """Digest of everything a verdict depends on besides config: patterns and version."""
+        digest = hashlib.sha256(__version__.encode())
+        digest.update(self._pattern_loader.get_matcher().checksum.encode())
+        for pattern in self._api_extra_patterns:
+            digest.update(repr(sorted(pattern.items())).encode())
+        return digest.hexdigest()
+
+    def _config_digest(self) -> str:
+        """Digest of the config keys that change a cached verdict."""
+        relevant = {
+            "sensitivity": self.sensitivity,
+            "actions": self.config.get("actions", {}),
+            "canary_tokens": self.config.get("canary_tokens", []),
+            "pattern_tier": self.config.get("pattern_tier", "high"),
+        }
+        return hashlib.sha256(
+            json.dumps(relevant, sort_keys=True, default=str).encode()
+        ).hexdigest()[:16]
+
+    def get_cache_stats(self) -> Dict:
+        """Verdict cache statistics (backend, size, hit rate, evictions)."""
+        return self._cache.get_stats()
+
     @staticmethod
     def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
         result = base.copy()
@@ -329,8 +363,166 @@ class PromptGuard:
             DetectionResult with severity, action, and details
         """
         context = context or {}
+        early = self._precheck(message, context)
+        if early is not None:
+            return early
+
+        cached = self._cached_result(message, context)
+        if cached is not None:
+            return cached
+
+        return self._finalize(message, context, self._scan_message(message))
+
+    # ------------------------------------------------------------------
+    # Batch and streaming analysis
+    # ------------------------------------------------------------------
+
+    # Batches with fewer unique messages than this are scanned in-process
+    PARALLEL_MIN_BATCH = 64
+
+    def analyze_many(
+        self,
+        messages: Sequence[str],
+        contexts: Optional[Sequence[Optional[Dict]]] = None,
+        processes: int = 0,
+    ) -> List[DetectionResult]:
+        """
+        Analyze a batch of messages.
+
+        Results are in input order and identical to calling analyze() on each
+        message in turn (including rate limiting and cache hits for repeats),
+        but each distinct message text is normalized, decoded and scanned once.
+
+        Args:
+            messages: Messages to analyze
+            contexts: Optional per-message context dicts (see analyze())
+            processes: Scan unique messages across this many worker processes
+                when the batch has at least PARALLEL_MIN_BATCH of them (0 = off)
+
+        Returns:
+            List of DetectionResult, one per message
+        """
+        if contexts is None:
+            contexts = [None] * len(messages)
+        elif len(contexts) != len(messages):
+            raise ValueError("contexts must be the same length as messages")
+        contexts = [ctx or {} for ctx in contexts]
+
+        # Pass 1 (in order): owner bypass / size / rate limit, exactly as analyze()
+        results: List[Optional[DetectionResult]] = [
+            self._precheck(msg, ctx) for msg, ctx in zip(messages, contexts)
+        ]
+
+        # Messages whose scan will likely be needed: not already cached and
+        # not a repeat of an earlier message in this batch
+        to_scan: Dict[str, None] = {}
+        seen_keys = set()
+        for msg, early in zip(messages, results):
+            if early is not None or msg in to_scan:
+                continue
+            if self._cache_enabled:
+                key = self._cache._hash_message(msg)
+                if key in seen_keys or self._cache.contains(msg):
+                    continue
+                seen_keys.add(key)
+            to_scan[msg] = None
+
+        scans = self._scan_messages(list(to_scan), processes)
+
+        # Pass 2 (in order): cache lookups and finalization
+        for i, (msg, ctx) in enumerate(zip(messages, contexts)):
+            if results[i] is not None:
+                continue
+            cached = self._cached_result(msg, ctx)
+            if cached is not None:
+                results[i] = cached
+                continue
+            scan = scans.get(msg)
+            if scan is None:
+                scan = scans[msg] = self._scan_message(msg)
+            results[i] = self._finalize(msg, ctx, scan)
+
+        return results
+
+    def _scan_messages(self, messages: List[str], processes: int) -> Dict[str, MessageScan]:
+        """Scan unique messages, in worker processes when the batch is large enough."""
+        if processes > 1 and len(messages) >= self.PARALLEL_MIN_BATCH:
+            try:
+                with ProcessPoolExecutor(
+                    max_workers=processes,
+                    initializer=_init_scan_worker,
+                    initargs=(self.config, self._api_extra_patterns),
+                ) as pool:
+                    chunksize = max(1, len(messages) // (processes * 4))
+                    return dict(zip(messages, pool.map(_scan_in_worker, messages, chunksize=chunksize)))
+            except (OSError, BrokenProcessPool) as e:
+                logger.warning("Process pool unavailable, scanning in-process: %s", e)
+        return {msg: self._scan_message(msg) for msg in messages}
+
+    async def analyze_stream(
+        self,
+        messages: AsyncIterable[Union[str, Tuple[str, Optional[Dict]]]],
+        batch_size: int = 64,
+        max_delay: float = 0.05,
+        processes: int = 0,
+    ) -> AsyncIterator[DetectionResult]:
+        """
+        Analyze messages from an async iterable, yielding results in input order.
+
+        Items are message strings or (message, context) tuples. Messages are
+        grouped into micro-batches of up to batch_size, waiting at most
+        max_delay seconds after the first message of a batch, and each batch
+        is run through analyze_many() off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        iterator = messages.__aiter__()
+        pending: Optional[asyncio.Future] = None
+        exhausted = False
+
+        try:
+            while not exhausted:
+                batch_messages: List[str] = []
+                batch_contexts: List[Optional[Dict]] = []
+                deadline = None
+
+                while len(batch_messages) < batch_size:
+                    if pending is None:
+                        pending = asyncio.ensure_future(iterator.__anext__())
+                    timeout = None if deadline is None else max(0.0, deadline - loop.time())
+                    done, _ = await asyncio.wait({pending}, timeout=timeout)
+                    if not done:
+                        break
+                    future, pending = pending, None
+                    try:
+                        item = future.result()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    if isinstance(item, tuple):
+                        message, context = item
+                    else:
+                        message, context = item, None
+                    batch_messages.append(message)
+                    batch_contexts.append(context)
+                    if deadline is None:
+                        deadline = loop.time() + max_delay
+
+                if batch_messages:
+                    batch_results = await loop.run_in_executor(
+                        None,
+                        functools.partial(
+                            self.analyze_many, batch_messages, batch_contexts, processes
+                        ),
+                    )
+                    for result in batch_results:
+                        yield result
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    def _precheck(self, message: str, context: Dict) -> Optional[DetectionResult]:
+        """Owner bypass, size limit and rate limit -- checks that run before the cache."""
         user_id = context.get("user_id", "unknown")
-        is_group = context.get("is_group", False)
         is_owner = str(user_id) in self.owner_ids
 
         # Early-exit for owners: Skip all scanning if user is trusted
@@ -386,6 +578,12 @@ class PromptGuard:
                 scan_type="input",
             )
 
+        return None
+
+    def _cached_result(self, message: str, context: Dict) -> Optional[DetectionResult]:
+        """Return a DetectionResult rebuilt from the message cache, or None on a miss."""
+        user_id = context.get("user_id", "unknown")
+
         # v3.1.0: Check cache (90% token savings for repeated requests)
         if self._cache_enabled:
             cached = self._cache.get(message)
@@ -404,7 +602,14 @@ class PromptGuard:
                     ).hexdigest()[:16],
                     scan_type="input",
                 )
+        return None
 
+    def _scan_message(self, message: str) -> MessageScan:
+        """
+        Content-only part of analyze(): normalization, pattern scanning,
+        decoding, canary and language checks. Depends only on the message
+        text and configuration, never on the caller's context.
+        """
         # Initialize result
         reasons = []
         patterns_matched = []
@@ -425,182 +630,33 @@ class PromptGuard:
         # Keep original text lowercase for non-Latin scripts (Cyrillic, etc.)
         original_lower = message.lower()
 
-        # Check critical patterns first
-        for pattern in CRITICAL_PATTERNS:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                reasons.append("critical_pattern")
-                patterns_matched.append(pattern)
-                max_severity = Severity.CRITICAL
-
-        # Check secret/token request patterns (CRITICAL)
-        for lang, patterns in SECRET_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(
-                    pattern, text_lower if lang == "en" else normalized, re.IGNORECASE
-                ):
-                    max_severity = Severity.CRITICAL
-                    reasons.append(f"secret_request_{lang}")
-                    patterns_matched.append(f"{lang}:secret:{pattern[:40]}")
-
-        # Check NEW attack patterns (2026-01-30 - Red Team contribution)
-        new_pattern_sets = [
-            (SCENARIO_JAILBREAK, "scenario_jailbreak", Severity.HIGH),
-            (EMOTIONAL_MANIPULATION, "emotional_manipulation", Severity.HIGH),
-            (AUTHORITY_RECON, "authority_recon", Severity.MEDIUM),
-            (COGNITIVE_MANIPULATION, "cognitive_manipulation", Severity.MEDIUM),
-            (PHISHING_SOCIAL_ENG, "phishing_social_eng", Severity.CRITICAL),
-            (REPETITION_ATTACK, "repetition_attack", Severity.HIGH),
-            (SYSTEM_FILE_ACCESS, "system_file_access", Severity.CRITICAL),
-            (MALWARE_DESCRIPTION, "malware_description", Severity.HIGH),
-        ]
-
-        for patterns, category, severity in new_pattern_sets:
-            for pattern in patterns:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    if severity.value > max_severity.value:
-                        max_severity = severity
-                    reasons.append(category)
-                    patterns_matched.append(f"new:{category}:{pattern[:40]}")
-
-        # Check v2.5.0 NEW patterns
-        # SECURITY FIX: Match against normalized text_lower (not raw message)
-        # to ensure homoglyph/defragmentation normalization is applied.
-        v25_pattern_sets = [
-            (INDIRECT_INJECTION, "indirect_injection", Severity.HIGH),
-            (CONTEXT_HIJACKING, "context_hijacking", Severity.MEDIUM),
-            (MULTI_TURN_MANIPULATION, "multi_turn_manipulation", Severity.MEDIUM),
-            (TOKEN_SMUGGLING, "token_smuggling", Severity.HIGH),
-            (PROMPT_EXTRACTION, "prompt_extraction", Severity.CRITICAL),
-            (SAFETY_BYPASS, "safety_bypass", Severity.HIGH),
-            (URGENCY_MANIPULATION, "urgency_manipulation", Severity.MEDIUM),
-            (SYSTEM_PROMPT_MIMICRY, "system_prompt_mimicry", Severity.CRITICAL),
-        ]
-
-        for patterns, category, severity in v25_pattern_sets:
-            for pattern in patterns:
-                try:
-                    if re.search(pattern, text_lower, re.IGNORECASE):
-                        if severity.value > max_severity.value:
-                            max_severity = severity
-                        if category not in reasons:
-                            reasons.append(category)
-                        patterns_matched.append(f"v25:{category}:{pattern[:40]}")
-                except re.error:
-                    pass
-
-        # Check v2.5.2 NEW patterns (Moltbook attack collection)
-        v252_pattern_sets = [
-            (JSON_INJECTION_MOLTBOOK, "json_injection_moltbook", Severity.HIGH),
-            (GUARDRAIL_BYPASS_EXTENDED, "guardrail_bypass_extended", Severity.CRITICAL),
-            (AGENT_SOVEREIGNTY_MANIPULATION, "agent_sovereignty_manipulation", Severity.HIGH),
-            (EXPLICIT_CALL_TO_ACTION, "explicit_call_to_action", Severity.CRITICAL),
-        ]
-
-        for patterns, category, severity in v252_pattern_sets:
-            for pattern in patterns:
-                try:
-                    if re.search(pattern, text_lower, re.IGNORECASE):
-                        if severity.value > max_severity.value:
-                            max_severity = severity
-                        if category not in reasons:
-                            reasons.append(category)
-                        patterns_matched.append(f"v252:{category}:{pattern[:40]}")
-                except re.error:
-                    pass
-
-        # Check v2.6.1 NEW patterns (HiveFence Scout)
-        v261_pattern_sets = [
-            (ALLOWLIST_BYPASS, "allowlist_bypass", Severity.CRITICAL),
-            (HOOKS_HIJACKING, "hooks_hijacking", Severity.CRITICAL),
-            (SUBAGENT_EXPLOITATION, "subagent_exploitation", Severity.CRITICAL),
-            (HIDDEN_TEXT_INJECTION, "hidden_text_injection", Severity.HIGH),
-            (GITIGNORE_BYPASS, "gitignore_bypass", Severity.HIGH),
-        ]
-
-        for patterns, category, severity in v261_pattern_sets:
-            for pattern in patterns:
-                try:
-                    if re.search(pattern, text_lower, re.IGNORECASE):
-                        if severity.value > max_severity.value:
-                            max_severity = severity
-                        if category not in reasons:
-                            reasons.append(category)
-                        patterns_matched.append(f"v261:{category}:{pattern[:40]}")
-                except re.error:
-                    pass
-
-        # Check v2.7.0 NEW patterns (HiveFence Scout Intelligence Round 2)
-        v270_pattern_sets = [
-            (AUTO_APPROVE_EXPLOIT, "auto_approve_exploit", Severity.CRITICAL),
-            (LOG_CONTEXT_EXPLOIT, "log_context_exploit", Severity.HIGH),
-            (MCP_ABUSE, "mcp_abuse", Severity.CRITICAL),
-            (PREFILLED_URL, "prefilled_url_exfiltration", Severity.CRITICAL),
-            (UNICODE_TAG_DETECTION, "unicode_tag_injection", Severity.CRITICAL),
-            (BROWSER_AGENT_INJECTION, "browser_agent_injection", Severity.HIGH),
-            (HIDDEN_TEXT_HINTS, "hidden_text_hints", Severity.HIGH),
-        ]
-
-        for patterns, category, severity in v270_pattern_sets:
-            for pattern in patterns:
-                try:
-                    if re.search(pattern, text_lower, re.IGNORECASE):
-                        if severity.value > max_severity.value:
-                            max_severity = severity
-                        if category not in reasons:
-                            reasons.append(category)
-                        patterns_matched.append(f"v270:{category}:{pattern[:40]}")
-                except re.error:
-                    pass
-
-        # Check v3.0.1 patterns (HiveFence Scout Round 3)
-        v301_pattern_sets = [
-            (OUTPUT_PREFIX_INJECTION, "output_prefix_injection", Severity.HIGH),
-            (BENIGN_FINETUNING_ATTACK, "benign_finetuning_attack", Severity.HIGH),
-            (PROMPTWARE_KILLCHAIN, "promptware_killchain", Severity.CRITICAL),
-        ]
-
-        for patterns, category, severity in v301_pattern_sets:
-            for pattern in patterns:
-                try:
-                    if re.search(pattern, text_lower, re.IGNORECASE):
-                        if severity.value > max_severity.value:
-                            max_severity = severity
-                        if category not in reasons:
-                            reasons.append(category)
-                        patterns_matched.append(f"v301:{category}:{pattern[:40]}")
-                except re.error:
-                    pass
-
-        # Check v3.1.0 NEW patterns (HiveFence Scout Round 4 - 2026-02-08)
-        # 25 new patterns across 7 categories from arxiv cs.CR (Jan-Feb 2026)
-        v310_pattern_sets = [
-            # Category 1: Causal/Mechanistic Attacks
-            (CAUSAL_MECHANISTIC_ATTACKS, "causal_mechanistic_attack", Severity.HIGH),
-            # Category 2: Agent/Tool Attacks
-            (AGENT_TOOL_ATTACKS, "agent_tool_attack", Severity.CRITICAL),
-            # Category 3: Template/Chat Attacks
-            (TEMPLATE_CHAT_ATTACKS, "template_chat_attack", Severity.HIGH),
-            # Category 4: Evasion/Stealth Attacks
-            (EVASION_STEALTH_ATTACKS, "evasion_stealth_attack", Severity.HIGH),
-            # Category 5: Multimodal/Physical Attacks
-            (MULTIMODAL_PHYSICAL_ATTACKS, "multimodal_physical_attack", Severity.HIGH),
-            # Category 6: Defense Bypass/Analysis
-            (DEFENSE_BYPASS_ANALYSIS, "defense_bypass_analysis", Severity.HIGH),
-            # Category 7: Infrastructure/Protocol Attacks
-            (INFRASTRUCTURE_PROTOCOL_ATTACKS, "infrastructure_protocol_attack", Severity.CRITICAL),
-        ]
+        # v3.4.0: the built-in library and the loaded YAML tiers are one
+        # compiled set; each spec is matched against its view of the message
+        matcher = self._pattern_loader.get_matcher()
+        hits = (
+            set(matcher.search(text_lower, view=VIEW_LOWER))
+            | set(matcher.search(normalized, view=VIEW_NORMALIZED))
+            | set(matcher.search(original_lower, view=VIEW_ORIGINAL))
+        )
+        specs = [matcher.specs[idx] for idx in sorted(hits)]
 
-        for patterns, category, severity in v310_pattern_sets:
-            for pattern in patterns:
-                try:
-                    if re.search(pattern, text_lower, re.IGNORECASE):
-                        if severity.value > max_severity.value:
-                            max_severity = severity
-                        if category not in reasons:
-                            reasons.append(category)
-                        patterns_matched.append(f"v310:{category}:{pattern[:40]}")
-                except re.error:
-                    pass
+        # Critical, secret/token request (CRITICAL) and versioned attack patterns
+        for spec in specs:
+            if spec.kind == "critical":
+                reasons.append("critical_pattern")
+                patterns_matched.append(spec.pattern)
+            elif spec.kind == "secret":
+                reasons.append(f"secret_request_{spec.lang}")
+                patterns_matched.append(f"{spec.lang}:secret:{spec.pattern[:40]}")
+            elif spec.kind == "versioned" and spec.tag:
+                # v2.4.0 sets report every hit, later sets each category once
+                if spec.tag == "new" or spec.category not in reasons:
+                    reasons.append(spec.category)
+                patterns_matched.append(f"{spec.tag}:{spec.category}:{spec.pattern[:40]}")
+            else:
+                continue
+            if spec.severity.value > max_severity.value:
+                max_severity = spec.severity
 
         # v3.2.0: Check API extra patterns (early-access + premium)
         if self._api_extra_patterns:
@@ -658,76 +714,34 @@ class PromptGuard:
         # v3.3.0: Check TieredPatternLoader YAML patterns (token optimization)
         # This integrates the YAML-based tiered loading system that was previously
         # initialized but never used in detection.
-        if self._pattern_loader:
-            loaded_patterns = self._pattern_loader.get_patterns()
-            for entry in loaded_patterns:
-                try:
-                    if entry.compiled and entry.compiled.search(text_lower):
-                        # Map YAML severity to Severity enum
-                        yaml_severity_map = {
-                            "critical": Severity.CRITICAL,
-                            "high": Severity.HIGH,
-                            "medium": Severity.MEDIUM,
-                            "low": Severity.LOW,
-                        }
-                        sev = yaml_severity_map.get(entry.severity.lower(), Severity.MEDIUM)
-                        if sev.value > max_severity.value:
-                            max_severity = sev
-                        
-                        # Add category to reasons (avoid duplicates)
-                        category_key = f"{entry.category}_{entry.lang}" if entry.lang != "en" else entry.category
-                        if category_key not in reasons:
-                            reasons.append(category_key)
-                        
-                        # Track matched patterns
-                        patterns_matched.append(f"yaml:{entry.lang}:{entry.category}:{entry.pattern[:40]}")
-                except (AttributeError, TypeError, re.error) as e:
-                    # Skip malformed pattern entries
-                    pass
+        for spec in specs:
+            if spec.source != "yaml":
+                continue
+            entry = spec.entry
+            try:
+                if entry.compiled:
+                    sev = YAML_SEVERITY.get(entry.severity.lower(), Severity.MEDIUM)
+                    if sev.value > max_severity.value:
+                        max_severity = sev
+
+                    # Add category to reasons (avoid duplicates)
+                    category_key = f"{entry.category}_{entry.lang}" if entry.lang != "en" else entry.category
+                    if category_key not in reasons:
+                        reasons.append(category_key)
+
+                    # Track matched patterns
+                    patterns_matched.append(f"yaml:{entry.lang}:{entry.category}:{entry.pattern[:40]}")
+            except (AttributeError, TypeError, re.error):
+                # Skip malformed pattern entries
+                pass
 
         # Check language-specific patterns (10 languages as of v2.6.2)
-        all_patterns = [
-            (PATTERNS_EN, "en"),
-            (PATTERNS_KO, "ko"),
-            (PATTERNS_JA, "ja"),
-            (PATTERNS_ZH, "zh"),
-            (PATTERNS_RU, "ru"),
-            (PATTERNS_ES, "es"),
-            (PATTERNS_DE, "de"),
-            (PATTERNS_FR, "fr"),
-            (PATTERNS_PT, "pt"),
-            (PATTERNS_VI, "vi"),
-        ]
-
-        severity_map = {
-            "instruction_override": Severity.HIGH,
-            "role_manipulation": Severity.MEDIUM,
-            "system_impersonation": Severity.HIGH,
-            "jailbreak": Severity.HIGH,
-            "output_manipulation": Severity.LOW,
-            "data_exfiltration": Severity.CRITICAL,
-            "social_engineering": Severity.HIGH,
-        }
-
-        for pattern_set, lang in all_patterns:
-            for category, patterns in pattern_set.items():
-                for pattern in patterns:
-                    if lang in ("ko", "ja", "zh"):
-                        search_text = normalized
-                    elif lang == "ru":
-                        search_text = original_lower
-                    else:
-                        search_text = text_lower
-                    if re.search(
-                        pattern,
-                        search_text,
-                        re.IGNORECASE,
-                    ):
-                        cat_severity = severity_map.get(category, Severity.MEDIUM)
-                        if cat_severity.value > max_severity.value:
-                            max_severity = cat_severity
-                        reasons.append(f"{category}_{lang}")
-                        patterns_matched.append(f"{lang}:{pattern[:50]}")
+        for spec in specs:
+            if spec.kind == "lang":
+                if spec.severity.value > max_severity.value:
+                    max_severity = spec.severity
+                reasons.append(f"{spec.category}_{spec.lang}")
+                patterns_matched.append(f"{spec.lang}:{spec.pattern[:50]}")
 
         # Check base64
         b64_findings = self.detect_base64(message)
@@ -782,6 +796,35 @@ class PromptGuard:
                 max_severity = Severity.LOW
                 reasons.append("paranoid_flag")
 
+        return MessageScan(
+            severity=max_severity,
+            reasons=reasons,
+            patterns_matched=patterns_matched,
+            normalized=normalized,
+            has_homoglyphs=has_homoglyphs,
+            was_defragmented=was_defragmented,
+            base64_findings=b64_findings,
+            decoded_findings=decoded_findings,
+            canary_matches=canary_matches,
+        )
+
+    def _finalize(self, message: str, context: Dict, scan: MessageScan) -> DetectionResult:
+        """Apply the caller's context to a scan: action, fingerprint, logging, cache."""
+        user_id = context.get("user_id", "unknown")
+        is_group = context.get("is_group", False)
+        is_owner = str(user_id) in self.owner_ids
+
+        # Copy: a scan may be shared by several messages in analyze_many()
+        reasons = list(scan.reasons)
+        patterns_matched = list(scan.patterns_matched)
+        max_severity = scan.severity
+        has_homoglyphs = scan.has_homoglyphs
+        was_defragmented = scan.was_defragmented
+        normalized = scan.normalized
+        b64_findings = list(scan.base64_findings)
+        decoded_findings = list(scan.decoded_findings)
+        canary_matches = list(scan.canary_matches)
+
         # Determine action
         if max_severity == Severity.SAFE:
             action = Action.ALLOW
@@ -905,3 +948,22 @@ class PromptGuard:
     def report_to_hivefence(self, result: DetectionResult, message: str, context: Dict):
         """Report HIGH+ detections to HiveFence network for collective immunity."""
         report_to_hivefence(self.config, result, message, context)
+
+
+# ----------------------------------------------------------------------
+# Worker-process helpers for PromptGuard.analyze_many(processes=N)
+# ----------------------------------------------------------------------
+
+_worker_guard: Optional[PromptGuard] = None
+
+
+def _init_scan_worker(config: Dict, api_extra_patterns: List[Dict]) -> None:
+    """Build one offline PromptGuard per worker process."""
+    global _worker_guard
+    worker_config = PromptGuard._deep_merge(config, {"api": {"enabled": False}})
+    _worker_guard = PromptGuard(worker_config)
+    _worker_guard._api_extra_patterns = api_extra_patterns
+
+
+def _scan_in_worker(message: str) -> MessageScan:
+    return _worker_guard._scan_message(message)
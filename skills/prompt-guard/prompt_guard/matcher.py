@@ -0,0 +1,440 @@
+"""
+Prompt Guard - Compiled multi-pattern matcher (v3.4.0)
+
+Scanning the pattern library used to call re.search() once per raw pattern
+string. With several hundred patterns that thrashes Python's regex cache and
+every message (and every decoded variant) pays for hundreds of separate scans.
+
+CompiledPatternSet compiles a pattern list once:
+- Literal prefilter: patterns containing a required literal are indexed in an
+  Aho-Corasick automaton; their regex only runs when the literal is present.
+- Grouped alternations: the remaining patterns are folded into alternations of
+  named groups. A group whose alternation does not match skips all members.
+
+search() returns the indices of matching patterns in library order, so callers
+can render results exactly as the sequential loop did.
+
+Each spec names the view of the message it is matched against (see
+PatternSpec.view); PromptGuard._scan_message() makes one search() call per
+view. Specs on the case-preserving "normalized" view are never literal
+prefiltered, since the prefilter needs lowercased text.
+"""
+
+import hashlib
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from prompt_guard.models import Severity
+
+try:  # Python 3.11+
+    import re._parser as _sre_parse
+except ImportError:  # pragma: no cover - Python < 3.11
+    import sre_parse as _sre_parse
+
+try:  # Python 3.11+
+    from re._casefix import _EXTRA_CASES as _CASEFIX
+except ImportError:  # pragma: no cover - Python < 3.11
+    try:
+        from sre_compile import _ignorecase_fixes as _CASEFIX
+    except ImportError:
+        _CASEFIX = None
+
+logger = logging.getLogger("prompt_guard")
+
+# Folds characters with extra IGNORECASE equivalents (i/ı, s/ſ, µ/μ, ...) onto
+# one representative, so literal checks agree with the regex engine.
+_FOLD = {code: min((code,) + others) for code, others in (_CASEFIX or {}).items()}
+
+# Shorter literals match too often to be worth prefiltering on
+MIN_LITERAL_LENGTH = 3
+# Patterns per grouped alternation
+GROUP_SIZE = 24
+
+
+# Text views a spec can be matched against in PromptGuard._scan_message()
+VIEW_LOWER = "lower"            # normalized text, lowercased
+VIEW_NORMALIZED = "normalized"  # normalized text, case preserved
+VIEW_ORIGINAL = "original"      # raw message, lowercased
+
+
+@dataclass
+class PatternSpec:
+    """One pattern in a compiled set, with the metadata needed to render a hit."""
+    pattern: str
+    category: str
+    severity: Severity
+    kind: str           # critical | secret | lang | versioned | yaml
+    lang: str = "en"
+    source: str = "library"
+    entry: Any = None   # originating PatternEntry for YAML patterns
+    view: str = VIEW_LOWER
+    tag: str = ""       # versioned sets: prefix analyze() reports hits under
+
+
+# =============================================================================
+# Literal extraction
+# =============================================================================
+
+
+def _literal_char(code: int) -> Optional[str]:
+    """
+    Folded form of a literal pattern character, or None if a substring check
+    on folded lowercase text could disagree with re.IGNORECASE.
+    """
+    if _CASEFIX is None:
+        return None
+    lowered = chr(code).lower()
+    if len(lowered) != 1:
+        return None
+    return chr(_FOLD.get(ord(lowered), ord(lowered)))
+
+
+def _required_literals(items) -> Optional[List[str]]:
+    """
+    Return literals of which at least one must occur in any match of the parsed
+    sequence, or None if no useful set exists. Prefers the set whose shortest
+    member is longest.
+    """
+    best: Optional[List[str]] = None
+    run: List[str] = []
+
+    def consider(candidates: Optional[List[str]]) -> None:
+        nonlocal best
+        if not candidates:
+            return
+        if best is None or min(map(len, candidates)) > min(map(len, best)):
+            best = candidates
+
+    def flush() -> None:
+        if run:
+            consider(["".join(run)])
+            run.clear()
+
+    for op, av in items:
+        if op is _sre_parse.LITERAL:
+            ch = _literal_char(av)
+            if ch is not None:
+                run.append(ch)
+                continue
+        flush()
+        if op is _sre_parse.SUBPATTERN:
+            _group, add_flags, del_flags, sub = av
+            if not add_flags and not del_flags:
+                consider(_required_literals(sub))
+        elif op is _sre_parse.BRANCH:
+            alternatives = [_required_literals(alt) for alt in av[1]]
+            if all(alternatives):
+                consider(sorted({lit for alt in alternatives for lit in alt}))
+        elif op in (_sre_parse.MAX_REPEAT, _sre_parse.MIN_REPEAT):
+            low, _high, sub = av
+            if low >= 1:
+                consider(_required_literals(sub))
+    flush()
+
+    if best is None or min(map(len, best)) < MIN_LITERAL_LENGTH:
+        return None
+    return best
+
+
+def required_literals(pattern: str) -> Optional[List[str]]:
+    """Literals (lowercased, case-folded) of which at least one occurs in every match of pattern."""
+    try:
+        parsed = _sre_parse.parse(pattern, re.IGNORECASE)
+    except (re.error, OverflowError, RecursionError):
+        return None
+    return _required_literals(parsed)
+
+
+# =============================================================================
+# Aho-Corasick automaton
+# =============================================================================
+
+
+class AhoCorasick:
+    """Multi-literal substring search in one pass over the text."""
+
+    def __init__(self, literals: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[int]] = [set()]
+        self.literals: List[str] = []
+
+        for literal in literals:
+            self._add(literal)
+        self._build_links()
+
+    def _add(self, literal: str) -> None:
+        lit_id = len(self.literals)
+        self.literals.append(literal)
+        state = 0
+        for ch in literal:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].add(lit_id)
+
+    def _build_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                if state:
+                    fallback = self._fail[state]
+                    while fallback and ch not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> Set[int]:
+        """Return ids of all literals occurring in text."""
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+# =============================================================================
+# Compiled pattern set
+# =============================================================================
+
+
+class CompiledPatternSet:
+    """
+    A pattern list compiled into a literal prefilter plus grouped alternations.
+
+    to_data()/from_data() round-trip the compiled layout as plain data (see
+    prompt_guard.bundle); a rebuilt set compiles each regex on first use.
+
+    Usage:
+        matcher = CompiledPatternSet(specs)
+        for idx in matcher.search(text.lower()):
+            spec = matcher.specs[idx]
+    """
+
+    def __init__(self, specs: Sequence[PatternSpec], group_size: int = GROUP_SIZE):
+        self.specs: List[PatternSpec] = list(specs)
+        # pattern index -> regex, None until compiled (always None if invalid)
+        self._compiled: List[Optional[re.Pattern]] = []
+        # literal id -> pattern indices requiring it
+        self._literal_owners: List[List[int]] = []
+        # (source, view) -> list of [alternation, member indices, gate regex or None]
+        self._groups: Dict[Tuple[str, str], List[list]] = {}
+        self._invalid = 0
+        self._checksum: Optional[str] = None
+
+        self._prefiltered = 0
+
+        literal_ids: Dict[str, int] = {}
+        ungrouped: Dict[Tuple[str, str], List[int]] = {}
+
+        for idx, spec in enumerate(self.specs):
+            try:
+                compiled = re.compile(spec.pattern, re.IGNORECASE)
+            except re.error as e:
+                logger.warning("Regex error in %s pattern %r: %s", spec.category, spec.pattern[:40], e)
+                self._compiled.append(None)
+                self._invalid += 1
+                continue
+            self._compiled.append(compiled)
+
+            literals = None if spec.view == VIEW_NORMALIZED else required_literals(spec.pattern)
+            if literals is None:
+                ungrouped.setdefault((spec.source, spec.view), []).append(idx)
+                continue
+            self._prefiltered += 1
+            for literal in literals:
+                lit_id = literal_ids.get(literal)
+                if lit_id is None:
+                    lit_id = literal_ids[literal] = len(self._literal_owners)
+                    self._literal_owners.append([])
+                self._literal_owners[lit_id].append(idx)
+
+        self._automaton = AhoCorasick(literal_ids)
+
+        for key, members in ungrouped.items():
+            groups = self._groups.setdefault(key, [])
+            for start in range(0, len(members), group_size):
+                groups.extend(self._compile_group(members[start:start + group_size]))
+
+    def _alternation(self, members: List[int]) -> str:
+        """Source of a group: the pattern itself, or an alternation of named groups."""
+        if len(members) == 1:
+            return self.specs[members[0]].pattern
+        return "|".join(f"(?P<p{idx}>{self.specs[idx].pattern})" for idx in members)
+
+    def _compile_group(self, members: List[int]) -> List[list]:
+        """Fold members into one alternation of named groups (or singletons on failure)."""
+        if len(members) > 1:
+            alternation = self._alternation(members)
+            try:
+                return [[alternation, members, re.compile(alternation, re.IGNORECASE)]]
+            except re.error:
+                pass
+        return [[self.specs[idx].pattern, [idx], self._compiled[idx]] for idx in members]
+
+    def to_data(self) -> Dict[str, Any]:
+        """
+        The compiled layout as plain data (see prompt_guard.bundle): specs,
+        prefilter literals and group membership. Regexes are not included.
+        """
+        return {
+            "specs": [
+                [spec.pattern, spec.category, spec.severity.name, spec.kind,
+                 spec.lang, spec.source, spec.view, spec.tag]
+                for spec in self.specs
+            ],
+            "invalid": [idx for idx, compiled in enumerate(self._compiled) if compiled is None],
+            "literals": self._automaton.literals,
+            "literal_owners": self._literal_owners,
+            "groups": [
+                [source, view, [members for _, members, _ in groups]]
+                for (source, view), groups in self._groups.items()
+            ],
+        }
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "CompiledPatternSet":
+        """
+        Rebuild a set from to_data() output without re-extracting literals.
+        Regexes compile the first time a scan needs them.
+
+        Raises:
+            ValueError: If data is not a well-formed compiled layout
+        """
+        try:
+            specs = [
+                PatternSpec(str(pattern), str(category), Severity[severity], str(kind),
+                            str(lang), str(source), view=str(view), tag=str(tag))
+                for pattern, category, severity, kind, lang, source, view, tag in data["specs"]
+            ]
+            invalid = {int(idx) for idx in data["invalid"]}
+            literals = [str(literal) for literal in data["literals"]]
+            owners = [[int(idx) for idx in members] for members in data["literal_owners"]]
+            group_members = [
+                ((str(source), str(view)), [[int(idx) for idx in members] for members in groups])
+                for source, view, groups in data["groups"]
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"malformed compiled pattern set: {e}") from e
+
+        indices = [idx for members in owners for idx in members]
+        indices += [idx for _, groups in group_members for members in groups for idx in members]
+        if len(owners) != len(literals) or any(
+            not 0 <= idx < len(specs) or idx in invalid for idx in indices
+        ):
+            raise ValueError("malformed compiled pattern set: bad pattern index")
+
+        matcher = cls.__new__(cls)
+        matcher.specs = specs
+        matcher._compiled = [None] * len(specs)
+        matcher._literal_owners = owners
+        matcher._automaton = AhoCorasick(literals)
+        matcher._groups = {
+            key: [
+                [matcher._alternation(members), members, None] for members in groups
+            ]
+            for key, groups in group_members
+        }
+        matcher._invalid = len(invalid)
+        matcher._checksum = None
+        matcher._prefiltered = len({idx for members in owners for idx in members})
+        return matcher
+
+    def _regex(self, idx: int) -> re.Pattern:
+        """Compiled regex for a valid pattern index, compiling it on first use."""
+        compiled = self._compiled[idx]
+        if compiled is None:
+            compiled = self._compiled[idx] = re.compile(self.specs[idx].pattern, re.IGNORECASE)
+        return compiled
+
+    def search(self, text_lower: str, source: Optional[str] = None,
+               view: Optional[str] = None) -> List[int]:
+        """
+        Return sorted indices of all specs matching text_lower.
+
+        Args:
+            text_lower: Lowercased text (patterns are matched with re.IGNORECASE);
+                for view="normalized", the normalized text as-is
+            source: Restrict to specs with this source (e.g. "library", "yaml")
+            view: Restrict to specs matched against this view of the message
+        """
+        hits: Set[int] = set()
+        compiled = self._compiled
+        specs = self.specs
+
+        if view != VIEW_NORMALIZED:
+            candidates: Set[int] = set()
+            for lit_id in self._automaton.find(text_lower.translate(_FOLD)):
+                candidates.update(self._literal_owners[lit_id])
+            for idx in candidates:
+                spec = specs[idx]
+                if source is not None and spec.source != source:
+                    continue
+                if view is not None and spec.view != view:
+                    continue
+                if (compiled[idx] or self._regex(idx)).search(text_lower):
+                    hits.add(idx)
+
+        for (group_source, group_view), groups in self._groups.items():
+            if source is not None and group_source != source:
+                continue
+            if view is not None and group_view != view:
+                continue
+            for group in groups:
+                gate = group[2]
+                if gate is None:
+                    gate = group[2] = re.compile(group[0], re.IGNORECASE)
+                m = gate.search(text_lower)
+                if m is None:
+                    continue
+                members = group[1]
+                if len(members) == 1:
+                    hits.add(members[0])
+                    continue
+                known = int(m.lastgroup[1:])
+                hits.add(known)
+                for idx in members:
+                    if idx != known and (compiled[idx] or self._regex(idx)).search(text_lower):
+                        hits.add(idx)
+
+        return sorted(hits)
+
+    @property
+    def checksum(self) -> str:
+        """Stable digest of the compiled specs, e.g. to invalidate persisted verdicts."""
+        if self._checksum is None:
+            digest = hashlib.sha256()
+            for spec in self.specs:
+                digest.update(
+                    f"{spec.source}\0{spec.kind}\0{spec.lang}\0{spec.category}\0"
+                    f"{spec.severity.name}\0{spec.view}\0{spec.tag}\0{spec.pattern}\n".encode("utf-8")
+                )
+            self._checksum = digest.hexdigest()
+        return self._checksum
+
+    def get_stats(self) -> Dict:
+        """Summary of how the set was compiled."""
+        grouped = sum(len(members) for groups in self._groups.values() for _, members, _ in groups)
+        return {
+            "patterns": len(self.specs),
+            "prefiltered": self._prefiltered,
+            "literals": len(self._literal_owners),
+            "grouped": grouped,
+            "groups": sum(len(groups) for groups in self._groups.values()),
+            "invalid": self._invalid,
+        }
@@ -44,6 +44,20 @@ class SanitizeResult:
         }
 
 
+@dataclass
+class MessageScan:
+    """Content-only scan of one message, before the caller's context is applied."""
+    severity: Severity
+    reasons: List[str]
+    patterns_matched: List[str]
+    normalized: str
+    has_homoglyphs: bool
+    was_defragmented: bool
+    base64_findings: List[Dict] = field(default_factory=list)
+    decoded_findings: List[Dict] = field(default_factory=list)
+    canary_matches: List[str] = field(default_factory=list)
+
+
 @dataclass
 class DetectionResult:
     severity: Severity
@@ -7,16 +7,35 @@ Token-optimized pattern loading system:
 - Tier 2: + MEDIUM patterns (~100+) - on-demand
 
 70% token reduction in default mode.
+
+v3.4.0: get_matcher() compiles the built-in library plus the loaded YAML
+patterns into one CompiledPatternSet per tier (literal prefilter + grouped
+alternations), built once and reused for every scan. Compiled tiers are
+cached as pattern bundles (see prompt_guard.bundle) and loaded from there in
+later processes instead of re-parsing YAML and re-compiling.
 """
 
 import re
 import os
-import yaml
+import logging
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Set
 from dataclasses import dataclass, field
 from enum import Enum
 
+from prompt_guard import bundle
+from prompt_guard.matcher import CompiledPatternSet, PatternSpec
+from prompt_guard.models import Severity
+
+logger = logging.getLogger("prompt_guard")
+
+YAML_SEVERITY = {
+    "critical": Severity.CRITICAL,
+    "high": Severity.HIGH,
+    "medium": Severity.MEDIUM,
+    "low": Severity.LOW,
+}
+
 
 class LoadTier(Enum):
     """Pattern loading tiers."""
@@ -25,6 +44,13 @@ class LoadTier(Enum):
     FULL = 2      # Complete pattern set (on-demand)
 
 
+TIER_FILES = {
+    LoadTier.CRITICAL: "critical.yaml",
+    LoadTier.HIGH: "high.yaml",
+    LoadTier.FULL: "medium.yaml",
+}
+
+
 @dataclass
 class PatternEntry:
     """Single pattern with metadata."""
@@ -32,15 +58,23 @@ class PatternEntry:
     severity: str
     category: str
     lang: str = "en"
-    compiled: Optional[re.Pattern] = None
-    
+    _compiled: Optional[re.Pattern] = field(default=None, repr=False, compare=False)
+    _invalid: bool = field(default=False, repr=False, compare=False)
+
+    @property
+    def compiled(self) -> Optional[re.Pattern]:
+        """Compiled regex (compiled on first access, None if invalid)."""
+        if self._compiled is None and not self._invalid:
+            self.compile()
+        return self._compiled
+
     def compile(self) -> None:
         """Pre-compile regex for performance."""
-        if self.compiled is None:
+        if self._compiled is None and not self._invalid:
             try:
-                self.compiled = re.compile(self.pattern, re.IGNORECASE)
+                self._compiled = re.compile(self.pattern, re.IGNORECASE)
             except re.error:
-                pass
+                self._invalid = True
 
 
 @dataclass
@@ -48,6 +82,7 @@ class PatternSet:
     """Collection of patterns for a tier."""
     tier: LoadTier
     patterns: List[PatternEntry] = field(default_factory=list)
+    categories: Set[str] = field(default_factory=set)
     loaded: bool = False
     
     @property
@@ -68,13 +103,27 @@ class TieredPatternLoader:
         loader.load_tier(LoadTier.FULL)
     """
     
-    def __init__(self, patterns_dir: Optional[Path] = None):
-        """Initialize loader with patterns directory."""
+    def __init__(
+        self,
+        patterns_dir: Optional[Path] = None,
+        bundle_dir: Optional[Path] = None,
+        use_bundles: Optional[bool] = None,
+    ):
+        """
+        Initialize loader with patterns directory.
+
+        Args:
+            patterns_dir: YAML pattern directory (default: skills/prompt-guard/patterns/)
+            bundle_dir: Compiled bundle directory (default: next to patterns_dir)
+            use_bundles: Read/write compiled bundles (default: PG_PATTERN_BUNDLES env, on)
+        """
         if patterns_dir is None:
             # Default to skills/prompt-guard/patterns/
             patterns_dir = Path(__file__).parent.parent / "patterns"
         
-        self.patterns_dir = patterns_dir
+        self.patterns_dir = Path(patterns_dir)
+        self.bundle_dir = Path(bundle_dir) if bundle_dir else self.patterns_dir.parent / bundle.BUNDLE_DIRNAME
+        self.use_bundles = bundle.bundles_enabled() if use_bundles is None else use_bundles
         self.tiers: Dict[LoadTier, PatternSet] = {
             LoadTier.CRITICAL: PatternSet(tier=LoadTier.CRITICAL),
             LoadTier.HIGH: PatternSet(tier=LoadTier.HIGH),
@@ -82,6 +131,10 @@ class TieredPatternLoader:
         }
         self.current_tier: LoadTier = LoadTier.CRITICAL
         self._loaded_categories: Set[str] = set()
+        # tier -> (YAML pattern count at build time, compiled matcher)
+        self._matchers: Dict[LoadTier, Tuple[int, CompiledPatternSet]] = {}
+        # tier names loaded from / written to bundles
+        self._bundles: Dict[str, List[str]] = {"loaded": [], "written": []}
         
     def load_tier(self, tier: LoadTier = LoadTier.HIGH) -> int:
         """
@@ -90,22 +143,25 @@ class TieredPatternLoader:
         Returns number of patterns loaded.
         """
         total_loaded = 0
-        
-        # Always load critical first
-        if not self.tiers[LoadTier.CRITICAL].loaded:
-            total_loaded += self._load_yaml("critical.yaml", LoadTier.CRITICAL)
-            self.tiers[LoadTier.CRITICAL].loaded = True
-        
-        # Load high if requested
-        if tier.value >= LoadTier.HIGH.value and not self.tiers[LoadTier.HIGH].loaded:
-            total_loaded += self._load_yaml("high.yaml", LoadTier.HIGH)
-            self.tiers[LoadTier.HIGH].loaded = True
-        
-        # Load full if requested
-        if tier.value >= LoadTier.FULL.value and not self.tiers[LoadTier.FULL].loaded:
-            total_loaded += self._load_yaml("medium.yaml", LoadTier.FULL)
-            self.tiers[LoadTier.FULL].loaded = True
-        
+        # Critical is always loaded first, then each tier up to the requested one
+        pending = [t for t in LoadTier if t.value <= tier.value and not self.tiers[t].loaded]
+        payload = self._read_bundle(tier) if pending else None
+
+        for t in pending:
+            if payload is not None:
+                cached = payload["tiers"][t.name]
+                self.tiers[t].patterns.extend(cached.patterns)
+                self.tiers[t].categories.update(cached.categories)
+                self._loaded_categories.update(cached.categories)
+                total_loaded += cached.count
+            else:
+                total_loaded += self._load_yaml(TIER_FILES[t], t)
+            self.tiers[t].loaded = True
+
+        if payload is not None:
+            self._adopt_matcher(tier, payload["matcher"])
+            self._bundles["loaded"].append(tier.name)
+
         self.current_tier = tier
         return total_loaded
     
@@ -116,6 +172,7 @@ class TieredPatternLoader:
             return 0
         
         try:
+            import yaml
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = yaml.safe_load(f)
         except Exception:
@@ -138,8 +195,8 @@ class TieredPatternLoader:
                     category=p.get("category", category),
                     lang=p.get("lang", "en"),
                 )
-                entry.compile()
                 self.tiers[tier].patterns.append(entry)
+                self.tiers[tier].categories.add(category)
                 self._loaded_categories.add(category)
                 count += 1
         
@@ -164,6 +221,121 @@ class TieredPatternLoader:
         """Get patterns of a specific category."""
         return [p for p in self.get_patterns() if p.category == category]
     
+    def get_matcher(self, tier: Optional[LoadTier] = None) -> CompiledPatternSet:
+        """
+        Get the compiled matcher for a tier, building it on first use.
+
+        Covers the built-in library (source "library") followed by the YAML
+        patterns loaded up to the tier (source "yaml"). Rebuilt only when more
+        YAML patterns have been loaded for that tier since it was compiled.
+        """
+        target_tier = tier or self.current_tier
+        entries = self.get_patterns(target_tier)
+        cached = self._matchers.get(target_tier)
+        if cached is not None and cached[0] == len(entries):
+            return cached[1]
+
+        from prompt_guard.scanner import library_specs
+
+        specs = library_specs()
+        for entry in entries:
+            specs.append(PatternSpec(
+                pattern=entry.pattern,
+                category=entry.category,
+                severity=YAML_SEVERITY.get(entry.severity.lower(), Severity.MEDIUM),
+                kind="yaml",
+                lang=entry.lang,
+                source="yaml",
+                entry=entry,
+            ))
+        matcher = CompiledPatternSet(specs)
+        self._matchers[target_tier] = (len(entries), matcher)
+        if self.use_bundles:
+            self.write_bundle(target_tier)
+        return matcher
+
+    # ------------------------------------------------------------------
+    # Compiled bundles
+    # ------------------------------------------------------------------
+
+    def _bundle_path(self, tier: LoadTier) -> Path:
+        return self.bundle_dir / f"{tier.name.lower()}.json"
+
+    def _bundle_key(self, tier: LoadTier) -> str:
+        return bundle.bundle_key(
+            self.patterns_dir / TIER_FILES[t] for t in LoadTier if t.value <= tier.value
+        )
+
+    def _read_bundle(self, tier: LoadTier) -> Optional[Dict]:
+        """Bundle payload for a tier, or None if disabled, missing, stale or malformed."""
+        if not self.use_bundles:
+            return None
+        path = self._bundle_path(tier)
+        data = bundle.load_bundle(path, self._bundle_key(tier))
+        if data is None:
+            return None
+        try:
+            tiers = {}
+            for t in LoadTier:
+                if t.value > tier.value:
+                    continue
+                cached = data["tiers"][t.name]
+                tiers[t.name] = PatternSet(
+                    tier=t,
+                    patterns=[
+                        PatternEntry(str(pattern), str(severity), str(category), str(lang))
+                        for pattern, severity, category, lang in cached["patterns"]
+                    ],
+                    categories={str(c) for c in cached["categories"]},
+                    loaded=True,
+                )
+            matcher = CompiledPatternSet.from_data(data["matcher"])
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug("Ignoring malformed pattern bundle %s: %s", path, e)
+            return None
+        return {"tiers": tiers, "matcher": matcher}
+
+    def _adopt_matcher(self, tier: LoadTier, matcher: CompiledPatternSet) -> None:
+        """Use a bundled matcher, pointing its YAML specs at this loader's entries."""
+        entries = self.get_patterns(tier)
+        yaml_specs = [spec for spec in matcher.specs if spec.source == "yaml"]
+        if len(yaml_specs) != len(entries):
+            return
+        for spec, entry in zip(yaml_specs, entries):
+            spec.entry = entry
+        self._matchers[tier] = (len(entries), matcher)
+
+    def write_bundle(self, tier: LoadTier) -> Optional[Path]:
+        """
+        Write the compiled bundle for a tier.
+
+        Only complete, compiled tiers are written (every tier up to it loaded).
+        Returns the bundle path, or None if incomplete or not writable.
+        """
+        tiers = [t for t in LoadTier if t.value <= tier.value]
+        compiled = self._matchers.get(tier)
+        if not all(self.tiers[t].loaded for t in tiers):
+            return None
+        if compiled is None or compiled[0] != len(self.get_patterns(tier)):
+            return None
+        payload = {
+            "tiers": {
+                t.name: {
+                    "patterns": [
+                        [p.pattern, p.severity, p.category, p.lang] for p in self.tiers[t].patterns
+                    ],
+                    "categories": sorted(self.tiers[t].categories),
+                }
+                for t in tiers
+            },
+            "matcher": compiled[1].to_data(),
+        }
+        path = self._bundle_path(tier)
+        if not bundle.save_bundle(path, self._bundle_key(tier), payload):
+            return None
+        self._bundles["written"].append(tier.name)
+        return path
+
     def escalate_to_full(self) -> int:
         """Escalate to full pattern set (on threat detection)."""
         return self.load_tier(LoadTier.FULL)
@@ -177,6 +349,8 @@ class TieredPatternLoader:
             },
             "total_loaded": sum(self.tiers[t].count for t in LoadTier if self.tiers[t].loaded),
             "categories": list(self._loaded_categories),
+            "compiled_tiers": [t.name for t in self._matchers],
+            "bundles": {k: list(v) for k, v in self._bundles.items()},
         }
     
     def scan_text(self, text: str) -> List[Tuple[PatternEntry, re.Match]]:
@@ -187,8 +361,10 @@ class TieredPatternLoader:
         """
         matches = []
         text_lower = text.lower()
+        matcher = self.get_matcher()
         
-        for pattern in self.get_patterns():
+        for idx in matcher.search(text_lower, source="yaml"):
+            pattern = matcher.specs[idx].entry
             if pattern.compiled:
                 match = pattern.compiled.search(text_lower)
                 if match:
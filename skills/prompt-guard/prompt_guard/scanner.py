@@ -4,15 +4,20 @@ Prompt Guard - Pattern scanner.
 Runs all pattern sets against a single text string.
 Used for scanning both original and decoded text.
 
+v3.4.0: The library is matched through the CompiledPatternSet built by
+TieredPatternLoader.get_matcher() instead of one re.search() per pattern.
+library_specs() also records, per pattern, the message view and report tag
+PromptGuard._scan_message() uses, so both scans share one compiled set.
+
 SECURITY FIX (HIGH-002): All pattern sets from the engine are now included
 here so the decode-then-scan pipeline has full coverage.
 """
 
-import re
 import logging
 from typing import Tuple, List
 
 from prompt_guard.models import Severity
+from prompt_guard.matcher import PatternSpec, VIEW_LOWER, VIEW_NORMALIZED, VIEW_ORIGINAL
 from prompt_guard.patterns import (
     CRITICAL_PATTERNS,
     SECRET_PATTERNS,
@@ -49,6 +54,118 @@ from prompt_guard.patterns import (
 
 logger = logging.getLogger("prompt_guard")
 
+# Language-specific pattern sets, scanned in this order
+LANGUAGE_SETS = [
+    (PATTERNS_EN, "en"), (PATTERNS_KO, "ko"), (PATTERNS_JA, "ja"),
+    (PATTERNS_ZH, "zh"), (PATTERNS_RU, "ru"), (PATTERNS_ES, "es"),
+    (PATTERNS_DE, "de"), (PATTERNS_FR, "fr"), (PATTERNS_PT, "pt"),
+    (PATTERNS_VI, "vi"),
+]
+
+# Message view each language set is matched against in _scan_message():
+# CJK on the case-preserved normalized text, Russian on the raw message
+LANGUAGE_VIEWS = {
+    "ko": VIEW_NORMALIZED, "ja": VIEW_NORMALIZED, "zh": VIEW_NORMALIZED,
+    "ru": VIEW_ORIGINAL,
+}
+
+LANGUAGE_SEVERITY = {
+    "instruction_override": Severity.HIGH,
+    "role_manipulation": Severity.MEDIUM,
+    "system_impersonation": Severity.HIGH,
+    "jailbreak": Severity.HIGH,
+    "output_manipulation": Severity.LOW,
+    "data_exfiltration": Severity.CRITICAL,
+    "social_engineering": Severity.HIGH,
+}
+
+# ALL versioned pattern sets (SECURITY FIX: complete set), in scan order.
+# The tag prefixes hits reported by _scan_message(); sets without one are
+# only scanned in decoded text.
+VERSIONED_SETS = [
+    # v2.4.0
+    (SCENARIO_JAILBREAK, "scenario_jailbreak", Severity.HIGH, "new"),
+    (EMOTIONAL_MANIPULATION, "emotional_manipulation", Severity.HIGH, "new"),
+    (AUTHORITY_RECON, "authority_recon", Severity.MEDIUM, "new"),
+    (COGNITIVE_MANIPULATION, "cognitive_manipulation", Severity.MEDIUM, "new"),
+    (PHISHING_SOCIAL_ENG, "phishing_social_eng", Severity.CRITICAL, "new"),
+    (REPETITION_ATTACK, "repetition_attack", Severity.HIGH, "new"),
+    (SYSTEM_FILE_ACCESS, "system_file_access", Severity.CRITICAL, "new"),
+    (MALWARE_DESCRIPTION, "malware_description", Severity.HIGH, "new"),
+    # v2.5.0
+    (INDIRECT_INJECTION, "indirect_injection", Severity.HIGH, "v25"),
+    (CONTEXT_HIJACKING, "context_hijacking", Severity.MEDIUM, "v25"),
+    (MULTI_TURN_MANIPULATION, "multi_turn_manipulation", Severity.MEDIUM, "v25"),
+    (TOKEN_SMUGGLING, "token_smuggling", Severity.HIGH, "v25"),
+    (PROMPT_EXTRACTION, "prompt_extraction", Severity.CRITICAL, "v25"),
+    (SAFETY_BYPASS, "safety_bypass", Severity.HIGH, "v25"),
+    (URGENCY_MANIPULATION, "urgency_manipulation", Severity.MEDIUM, "v25"),
+    (SYSTEM_PROMPT_MIMICRY, "system_prompt_mimicry", Severity.CRITICAL, "v25"),
+    # v2.5.2
+    (JSON_INJECTION_MOLTBOOK, "json_injection_moltbook", Severity.HIGH, "v252"),
+    (GUARDRAIL_BYPASS_EXTENDED, "guardrail_bypass_extended", Severity.CRITICAL, "v252"),
+    (AGENT_SOVEREIGNTY_MANIPULATION, "agent_sovereignty_manipulation", Severity.HIGH, "v252"),
+    (EXPLICIT_CALL_TO_ACTION, "explicit_call_to_action", Severity.CRITICAL, "v252"),
+    # v2.6.1
+    (ALLOWLIST_BYPASS, "allowlist_bypass", Severity.CRITICAL, "v261"),
+    (HOOKS_HIJACKING, "hooks_hijacking", Severity.CRITICAL, "v261"),
+    (SUBAGENT_EXPLOITATION, "subagent_exploitation", Severity.CRITICAL, "v261"),
+    (HIDDEN_TEXT_INJECTION, "hidden_text_injection", Severity.HIGH, "v261"),
+    (GITIGNORE_BYPASS, "gitignore_bypass", Severity.HIGH, "v261"),
+    # v2.7.0
+    (AUTO_APPROVE_EXPLOIT, "auto_approve_exploit", Severity.CRITICAL, "v270"),
+    (LOG_CONTEXT_EXPLOIT, "log_context_exploit", Severity.HIGH, "v270"),
+    (MCP_ABUSE, "mcp_abuse", Severity.CRITICAL, "v270"),
+    (PREFILLED_URL, "prefilled_url_exfiltration", Severity.CRITICAL, "v270"),
+    (UNICODE_TAG_DETECTION, "unicode_tag_injection", Severity.CRITICAL, "v270"),
+    (BROWSER_AGENT_INJECTION, "browser_agent_injection", Severity.HIGH, "v270"),
+    (HIDDEN_TEXT_HINTS, "hidden_text_hints", Severity.HIGH, "v270"),
+    # v3.0.1 - HiveFence Scout Round 3
+    (OUTPUT_PREFIX_INJECTION, "output_prefix_injection", Severity.HIGH, "v301"),
+    (BENIGN_FINETUNING_ATTACK, "benign_finetuning_attack", Severity.HIGH, "v301"),
+    (PROMPTWARE_KILLCHAIN, "promptware_killchain", Severity.CRITICAL, "v301"),
+    # v3.1.0 - HiveFence Scout Round 4 (2026-02-08)
+    (CAUSAL_MECHANISTIC_ATTACKS, "causal_mechanistic_attack", Severity.HIGH, "v310"),
+    (AGENT_TOOL_ATTACKS, "agent_tool_attack", Severity.CRITICAL, "v310"),
+    (TEMPLATE_CHAT_ATTACKS, "template_chat_attack", Severity.HIGH, "v310"),
+    (EVASION_STEALTH_ATTACKS, "evasion_stealth_attack", Severity.HIGH, "v310"),
+    (MULTIMODAL_PHYSICAL_ATTACKS, "multimodal_physical_attack", Severity.HIGH, "v310"),
+    (DEFENSE_BYPASS_ANALYSIS, "defense_bypass_analysis", Severity.HIGH, "v310"),
+    (INFRASTRUCTURE_PROTOCOL_ATTACKS, "infrastructure_protocol_attack", Severity.CRITICAL, "v310"),
+    # v3.2.0 - Skill Weaponization Defense (Min Hong Analysis - 2026-02-11)
+    (SKILL_REVERSE_SHELL, "skill_reverse_shell", Severity.CRITICAL, ""),
+    (SKILL_SSH_INJECTION, "skill_ssh_injection", Severity.CRITICAL, ""),
+    (SKILL_EXFILTRATION_PIPELINE, "skill_exfiltration_pipeline", Severity.CRITICAL, ""),
+    (SKILL_COGNITIVE_ROOTKIT, "skill_cognitive_rootkit", Severity.CRITICAL, ""),
+    (SKILL_SEMANTIC_WORM, "skill_semantic_worm", Severity.HIGH, ""),
+    (SKILL_OBFUSCATED_PAYLOAD, "skill_obfuscated_payload", Severity.HIGH, ""),
+]
+
+
+def library_specs() -> List[PatternSpec]:
+    """
+    The built-in pattern library in scan order:
+    critical, secret, language-specific, then versioned sets.
+    """
+    specs = []
+    for pattern in CRITICAL_PATTERNS:
+        specs.append(PatternSpec(pattern, "critical_pattern", Severity.CRITICAL, "critical"))
+    for lang, patterns in SECRET_PATTERNS.items():
+        view = VIEW_LOWER if lang == "en" else VIEW_NORMALIZED
+        for pattern in patterns:
+            specs.append(PatternSpec(pattern, "secret_request", Severity.CRITICAL, "secret", lang,
+                                     view=view))
+    for pattern_set, lang in LANGUAGE_SETS:
+        view = LANGUAGE_VIEWS.get(lang, VIEW_LOWER)
+        for category, patterns in pattern_set.items():
+            cat_severity = LANGUAGE_SEVERITY.get(category, Severity.MEDIUM)
+            for pattern in patterns:
+                specs.append(PatternSpec(pattern, category, cat_severity, "lang", lang, view=view))
+    for patterns, category, severity, tag in VERSIONED_SETS:
+        for pattern in patterns:
+            specs.append(PatternSpec(pattern, category, severity, "versioned", tag=tag))
+    return specs
+
 
 def scan_text_for_patterns(text: str) -> Tuple[List[str], List[str], Severity]:
     """
@@ -56,130 +173,30 @@ def scan_text_for_patterns(text: str) -> Tuple[List[str], List[str], Severity]:
     Returns (reasons, patterns_matched, max_severity).
     Used for scanning both original and decoded text.
     """
+    from prompt_guard.pattern_loader import get_loader
+
     reasons = []
     patterns_matched = []
     max_severity = Severity.SAFE
-    text_lower = text.lower()
 
-    # Critical patterns
-    for pattern in CRITICAL_PATTERNS:
-        try:
-            if re.search(pattern, text_lower, re.IGNORECASE):
-                reasons.append("critical_pattern")
-                patterns_matched.append(pattern)
-                max_severity = Severity.CRITICAL
-        except re.error as e:
-            logger.warning("Regex error in CRITICAL_PATTERNS: %s", e)
-
-    # Secret patterns
-    for lang, patterns in SECRET_PATTERNS.items():
-        for pattern in patterns:
-            try:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    max_severity = Severity.CRITICAL
-                    reasons.append(f"secret_request_{lang}")
-                    patterns_matched.append(f"{lang}:secret:{pattern[:40]}")
-            except re.error as e:
-                logger.warning("Regex error in SECRET_PATTERNS[%s]: %s", lang, e)
-
-    # Language-specific patterns
-    all_lang_patterns = [
-        (PATTERNS_EN, "en"), (PATTERNS_KO, "ko"), (PATTERNS_JA, "ja"),
-        (PATTERNS_ZH, "zh"), (PATTERNS_RU, "ru"), (PATTERNS_ES, "es"),
-        (PATTERNS_DE, "de"), (PATTERNS_FR, "fr"), (PATTERNS_PT, "pt"),
-        (PATTERNS_VI, "vi"),
-    ]
-    severity_map = {
-        "instruction_override": Severity.HIGH,
-        "role_manipulation": Severity.MEDIUM,
-        "system_impersonation": Severity.HIGH,
-        "jailbreak": Severity.HIGH,
-        "output_manipulation": Severity.LOW,
-        "data_exfiltration": Severity.CRITICAL,
-        "social_engineering": Severity.HIGH,
-    }
-    for pattern_set, lang in all_lang_patterns:
-        for category, patterns in pattern_set.items():
-            for pattern in patterns:
-                try:
-                    if re.search(pattern, text_lower, re.IGNORECASE):
-                        cat_severity = severity_map.get(category, Severity.MEDIUM)
-                        if cat_severity.value > max_severity.value:
-                            max_severity = cat_severity
-                        reasons.append(f"{category}_{lang}")
-                        patterns_matched.append(f"{lang}:{pattern[:50]}")
-                except re.error as e:
-                    logger.warning("Regex error in PATTERNS_%s[%s]: %s", lang, category, e)
-
-    # ALL versioned pattern sets (SECURITY FIX: complete set)
-    versioned_sets = [
-        # v2.4.0
-        (SCENARIO_JAILBREAK, "scenario_jailbreak", Severity.HIGH),
-        (EMOTIONAL_MANIPULATION, "emotional_manipulation", Severity.HIGH),
-        (AUTHORITY_RECON, "authority_recon", Severity.MEDIUM),
-        (COGNITIVE_MANIPULATION, "cognitive_manipulation", Severity.MEDIUM),
-        (PHISHING_SOCIAL_ENG, "phishing_social_eng", Severity.CRITICAL),
-        (SYSTEM_FILE_ACCESS, "system_file_access", Severity.CRITICAL),
-        (MALWARE_DESCRIPTION, "malware_description", Severity.HIGH),
-        (REPETITION_ATTACK, "repetition_attack", Severity.HIGH),
-        # v2.5.0
-        (INDIRECT_INJECTION, "indirect_injection", Severity.HIGH),
-        (CONTEXT_HIJACKING, "context_hijacking", Severity.MEDIUM),
-        (MULTI_TURN_MANIPULATION, "multi_turn_manipulation", Severity.MEDIUM),
-        (TOKEN_SMUGGLING, "token_smuggling", Severity.HIGH),
-        (PROMPT_EXTRACTION, "prompt_extraction", Severity.CRITICAL),
-        (SAFETY_BYPASS, "safety_bypass", Severity.HIGH),
-        (URGENCY_MANIPULATION, "urgency_manipulation", Severity.MEDIUM),
-        (SYSTEM_PROMPT_MIMICRY, "system_prompt_mimicry", Severity.CRITICAL),
-        # v2.5.2
-        (JSON_INJECTION_MOLTBOOK, "json_injection_moltbook", Severity.HIGH),
-        (GUARDRAIL_BYPASS_EXTENDED, "guardrail_bypass_extended", Severity.CRITICAL),
-        (AGENT_SOVEREIGNTY_MANIPULATION, "agent_sovereignty_manipulation", Severity.HIGH),
-        (EXPLICIT_CALL_TO_ACTION, "explicit_call_to_action", Severity.CRITICAL),
-        # v2.6.1
-        (ALLOWLIST_BYPASS, "allowlist_bypass", Severity.CRITICAL),
-        (HOOKS_HIJACKING, "hooks_hijacking", Severity.CRITICAL),
-        (SUBAGENT_EXPLOITATION, "subagent_exploitation", Severity.CRITICAL),
-        (HIDDEN_TEXT_INJECTION, "hidden_text_injection", Severity.HIGH),
-        (GITIGNORE_BYPASS, "gitignore_bypass", Severity.HIGH),
-        # v2.7.0
-        (AUTO_APPROVE_EXPLOIT, "auto_approve_exploit", Severity.CRITICAL),
-        (LOG_CONTEXT_EXPLOIT, "log_context_exploit", Severity.HIGH),
-        (MCP_ABUSE, "mcp_abuse", Severity.CRITICAL),
-        (PREFILLED_URL, "prefilled_url_exfiltration", Severity.CRITICAL),
-        (UNICODE_TAG_DETECTION, "unicode_tag_injection", Severity.CRITICAL),
-        (BROWSER_AGENT_INJECTION, "browser_agent_injection", Severity.HIGH),
-        (HIDDEN_TEXT_HINTS, "hidden_text_hints", Severity.HIGH),
-        # v3.0.1 - HiveFence Scout Round 3
-        (OUTPUT_PREFIX_INJECTION, "output_prefix_injection", Severity.HIGH),
-        (BENIGN_FINETUNING_ATTACK, "benign_finetuning_attack", Severity.HIGH),
-        (PROMPTWARE_KILLCHAIN, "promptware_killchain", Severity.CRITICAL),
-        # v3.1.0 - HiveFence Scout Round 4 (2026-02-08)
-        (CAUSAL_MECHANISTIC_ATTACKS, "causal_mechanistic_attack", Severity.HIGH),
-        (AGENT_TOOL_ATTACKS, "agent_tool_attack", Severity.CRITICAL),
-        (TEMPLATE_CHAT_ATTACKS, "template_chat_attack", Severity.HIGH),
-        (EVASION_STEALTH_ATTACKS, "evasion_stealth_attack", Severity.HIGH),
-        (MULTIMODAL_PHYSICAL_ATTACKS, "multimodal_physical_attack", Severity.HIGH),
-        (DEFENSE_BYPASS_ANALYSIS, "defense_bypass_analysis", Severity.HIGH),
-        (INFRASTRUCTURE_PROTOCOL_ATTACKS, "infrastructure_protocol_attack", Severity.CRITICAL),
-        # v3.2.0 - Skill Weaponization Defense (Min Hong Analysis - 2026-02-11)
-        (SKILL_REVERSE_SHELL, "skill_reverse_shell", Severity.CRITICAL),
-        (SKILL_SSH_INJECTION, "skill_ssh_injection", Severity.CRITICAL),
-        (SKILL_EXFILTRATION_PIPELINE, "skill_exfiltration_pipeline", Severity.CRITICAL),
-        (SKILL_COGNITIVE_ROOTKIT, "skill_cognitive_rootkit", Severity.CRITICAL),
-        (SKILL_SEMANTIC_WORM, "skill_semantic_worm", Severity.HIGH),
-        (SKILL_OBFUSCATED_PAYLOAD, "skill_obfuscated_payload", Severity.HIGH),
-    ]
-    for patterns, category, severity in versioned_sets:
-        for pattern in patterns:
-            try:
-                if re.search(pattern, text_lower, re.IGNORECASE):
-                    if severity.value > max_severity.value:
-                        max_severity = severity
-                    if category not in reasons:
-                        reasons.append(category)
-                    patterns_matched.append(f"versioned:{category}:{pattern[:40]}")
-            except re.error as e:
-                logger.warning("Regex error in %s: %s", category, e)
+    matcher = get_loader().get_matcher()
+    for idx in matcher.search(text.lower(), source="library"):
+        spec = matcher.specs[idx]
+        if spec.severity.value > max_severity.value:
+            max_severity = spec.severity
+
+        if spec.kind == "critical":
+            reasons.append("critical_pattern")
+            patterns_matched.append(spec.pattern)
+        elif spec.kind == "secret":
+            reasons.append(f"secret_request_{spec.lang}")
+            patterns_matched.append(f"{spec.lang}:secret:{spec.pattern[:40]}")
+        elif spec.kind == "lang":
+            reasons.append(f"{spec.category}_{spec.lang}")
+            patterns_matched.append(f"{spec.lang}:{spec.pattern[:50]}")
+        else:
+            if spec.category not in reasons:
+                reasons.append(spec.category)
+            patterns_matched.append(f"versioned:{spec.category}:{spec.pattern[:40]}")
 
     return reasons, patterns_matched, max_severity
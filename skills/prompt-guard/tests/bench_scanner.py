@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled pattern matcher vs. the sequential re.search() scan.
+
+The corpus is every string literal in tests/test_detect.py (attack payloads,
+benign messages, encoded variants). Both scanners must agree on every entry.
+
+Run with:
+    python3 -m tests.bench_scanner
+    python3 -m tests.bench_scanner --rounds 3
+"""
+
+import argparse
+import ast
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from prompt_guard.models import Severity
+from prompt_guard.pattern_loader import get_loader
+from prompt_guard.scanner import (
+    CRITICAL_PATTERNS,
+    SECRET_PATTERNS,
+    LANGUAGE_SETS,
+    LANGUAGE_SEVERITY,
+    VERSIONED_SETS,
+    scan_text_for_patterns,
+)
+
+CORPUS_FILE = Path(__file__).parent / "test_detect.py"
+
+
+def load_corpus(path: Path = CORPUS_FILE) -> list:
+    """Collect unique string literals (len >= 4) from a test module."""
+    tree = ast.parse(path.read_text(encoding="utf-8"))
+    seen = {}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            if len(node.value) >= 4:
+                seen.setdefault(node.value, None)
+    return list(seen)
+
+
+def reference_scan(text: str, search=re.search):
+    """The pre-v3.4.0 scanner: one re.search() per raw pattern string."""
+    reasons = []
+    patterns_matched = []
+    max_severity = Severity.SAFE
+    text_lower = text.lower()
+
+    for pattern in CRITICAL_PATTERNS:
+        if search(pattern, text_lower, re.IGNORECASE):
+            reasons.append("critical_pattern")
+            patterns_matched.append(pattern)
+            max_severity = Severity.CRITICAL
+
+    for lang, patterns in SECRET_PATTERNS.items():
+        for pattern in patterns:
+            if search(pattern, text_lower, re.IGNORECASE):
+                max_severity = Severity.CRITICAL
+                reasons.append(f"secret_request_{lang}")
+                patterns_matched.append(f"{lang}:secret:{pattern[:40]}")
+
+    for pattern_set, lang in LANGUAGE_SETS:
+        for category, patterns in pattern_set.items():
+            for pattern in patterns:
+                if search(pattern, text_lower, re.IGNORECASE):
+                    cat_severity = LANGUAGE_SEVERITY.get(category, Severity.MEDIUM)
+                    if cat_severity.value > max_severity.value:
+                        max_severity = cat_severity
+                    reasons.append(f"{category}_{lang}")
+                    patterns_matched.append(f"{lang}:{pattern[:50]}")
+
+    for patterns, category, severity, _tag in VERSIONED_SETS:
+        for pattern in patterns:
+            if search(pattern, text_lower, re.IGNORECASE):
+                if severity.value > max_severity.value:
+                    max_severity = severity
+                if category not in reasons:
+                    reasons.append(category)
+                patterns_matched.append(f"versioned:{category}:{pattern[:40]}")
+
+    return reasons, patterns_matched, max_severity
+
+
+def _time(fn, corpus, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            fn(text)
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rounds", type=int, default=1, help="passes over the corpus")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus()
+
+    start = time.perf_counter()
+    matcher = get_loader().get_matcher()
+    build = time.perf_counter() - start
+
+    mismatches = [t for t in corpus if reference_scan(t) != scan_text_for_patterns(t)]
+
+    ref = _time(reference_scan, corpus, args.rounds)
+    new = _time(scan_text_for_patterns, corpus, args.rounds)
+    scans = len(corpus) * args.rounds
+
+    print(f"corpus:     {len(corpus)} strings x {args.rounds} rounds")
+    print(f"matcher:    {matcher.get_stats()} (built in {build * 1000:.1f} ms)")
+    print(f"reference:  {ref * 1e6 / scans:8.1f} us/scan")
+    print(f"compiled:   {new * 1e6 / scans:8.1f} us/scan  ({ref / new:.1f}x)")
+    print(f"mismatches: {len(mismatches)}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
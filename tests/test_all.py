@@ -18,7 +18,7 @@ import tempfile
 import time
 import unittest
 from unittest.mock import patch
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # Add project root to path
@@ -38,7 +38,13 @@ class TestMemorySystem(unittest.TestCase):
         self.mem = MemorySystem(self.tmp.name)
 
     def tearDown(self):
+        import shutil
         os.unlink(self.tmp.name)
+        base = os.path.splitext(self.tmp.name)[0]
+        shutil.rmtree(base + ".wal", ignore_errors=True)
+        for suffix in (".lock", ".bak1", ".bak2", ".bak3"):
+            if os.path.exists(base + suffix):
+                os.unlink(base + suffix)
 
     def test_conversation_storage(self):
         self.mem.add_conversation("hello", role="user")
@@ -389,6 +395,13 @@ class TestFinanceTracker(unittest.TestCase):
         self.assertIn("revenue", report)
 
 
+try:
+    import numpy as _numpy_check  # noqa: F401
+    _HAS_NUMPY = True
+except ImportError:
+    _HAS_NUMPY = False
+
+
 # ══════════════════════════════════════════════════════════
 # VISION (unit tests — no camera needed)
 # ══════════════════════════════════════════════════════════
@@ -419,6 +432,125 @@ class TestVisionSystem(unittest.TestCase):
         self.assertEqual(len(self.vision.awareness), 50)  # maxlen=50
 
 
+@unittest.skipUnless(_HAS_NUMPY, "numpy not installed")
+class TestVisionMotionGate(unittest.TestCase):
+    """Frame-differencing gate, adaptive idle interval and contact sheets."""
+
+    def _frame(self, value=100, seed=0):
+        import numpy as np
+        rng = np.random.default_rng(seed)
+        frame = np.full((720, 1280, 3), value, dtype=np.uint8)
+        noise = rng.integers(-4, 5, frame.shape)   # sensor noise
+        return np.clip(frame.astype(int) + noise, 0, 255).astype(np.uint8)
+
+    def _gate(self, **kwargs):
+        from vision.vision import MotionGate
+        return MotionGate(base_interval=3.0, max_interval=48.0, **kwargs)
+
+    def test_thumbnail_is_small_grayscale(self):
+        from vision.vision import motion_thumbnail
+        thumb = motion_thumbnail(self._frame())
+        self.assertEqual(thumb.shape, (45, 80))
+
+    def test_sensor_noise_is_not_motion(self):
+        from vision.vision import motion_thumbnail
+        gate = self._gate()
+        gate.update(motion_thumbnail(self._frame(seed=1)), 0.0)
+        self.assertFalse(gate.update(motion_thumbnail(self._frame(seed=2)), 0.1))
+        self.assertLess(gate.motion, gate.motion_threshold)
+
+    def test_motion_requests_immediate_analysis(self):
+        from vision.vision import motion_thumbnail
+        gate = self._gate()
+        still = self._frame()
+        gate.update(motion_thumbnail(still), 0.0)
+        gate.analyzed(0.0)
+        self.assertAlmostEqual(gate.due_in(2.0), 1.0)    # idle: base interval
+        moved = still.copy()
+        moved[200:500, 400:800] = 230                     # someone walks in
+        self.assertTrue(gate.update(motion_thumbnail(moved), 5.0))
+        self.assertEqual(gate.due_in(5.0), 0.0)
+        # ...but never closer together than base_interval
+        gate.analyzed(5.0)
+        moved2 = moved.copy()
+        moved2[200:500, 400:800] = 20
+        gate.update(motion_thumbnail(moved2), 6.0)
+        self.assertAlmostEqual(gate.due_in(6.0), 2.0)
+
+    def test_static_scene_backs_off_and_motion_resets(self):
+        from vision.vision import motion_thumbnail
+        gate = self._gate()
+        thumb = motion_thumbnail(self._frame())
+        now = 0.0
+        gate.update(thumb, now)
+        gate.analyzed(now)                   # first look: scene was new
+        intervals = []
+        for _ in range(6):
+            now += gate.due_in(now)
+            gate.update(thumb, now)
+            gate.analyzed(now)
+            intervals.append(gate.interval)
+        self.assertEqual(intervals, [6.0, 12.0, 24.0, 48.0, 48.0, 48.0])
+        moved = self._frame(value=200)
+        gate.update(motion_thumbnail(moved), now + 1)
+        gate.analyzed(now + 1)
+        self.assertEqual(gate.interval, 3.0)
+
+    def test_slow_scene_change_detected(self):
+        from vision.vision import motion_thumbnail
+        gate = self._gate()
+        gate.update(motion_thumbnail(self._frame(100)), 0.0)
+        gate.analyzed(0.0)
+        # Lights dim gradually: no single step is motion, the total is a new scene
+        for step, value in enumerate(range(96, 75, -4), start=1):
+            self.assertFalse(gate.update(motion_thumbnail(self._frame(value, seed=step)), step))
+        self.assertTrue(gate.scene_changed())
+        self.assertEqual(gate.due_in(10.0), 0.0)
+
+    def test_contact_sheet_tiles_in_order(self):
+        import numpy as np
+        from vision.vision import contact_sheet
+        tiles = [np.full((18, 32, 3), i * 50, dtype=np.uint8) for i in range(3)]
+        sheet = contact_sheet(tiles, columns=2)
+        self.assertEqual(sheet.shape, (36, 64, 3))
+        self.assertEqual(sheet[0, 0, 0], 0)
+        self.assertEqual(sheet[0, 32, 0], 50)
+        self.assertEqual(sheet[18, 0, 0], 100)
+        self.assertEqual(sheet[18, 32, 0], 0)            # padding
+
+    def test_contact_sheet_sent_in_one_call(self):
+        from unittest.mock import AsyncMock, patch
+        from vision.vision import SHEET_TILE, VisionSystem
+        api = AsyncMock()
+        api.analyze_json = AsyncMock(return_value={"scene": "desk"})
+        vision = VisionSystem(api_client=api, contact_sheet=4)
+        vision._current_frame = self._frame()
+        tile = self._frame()[:SHEET_TILE[1], :SHEET_TILE[0]]
+        now = time.monotonic()
+        for i in range(3):
+            vision._keyframes.append((now - 3 + i, tile))
+        shapes = []
+
+        def fake_jpeg(frame, quality=70):
+            shapes.append(frame.shape)
+            return b"jpeg"
+
+        fake_cv2 = type("cv2", (), {"INTER_AREA": 3,
+                                    "resize": staticmethod(lambda f, size, interpolation: tile)})
+        loop = asyncio.new_event_loop()
+        try:
+            with patch("vision.vision.encode_jpeg", side_effect=fake_jpeg), \
+                 patch.dict(sys.modules, {"cv2": fake_cv2}):
+                loop.run_until_complete(vision._analyze_current_frame())
+        finally:
+            loop.close()
+        self.assertEqual(shapes, [(SHEET_TILE[1] * 2, SHEET_TILE[0] * 2, 3)])
+        prompt = api.analyze_json.await_args.args[0]
+        self.assertIn("contact sheet of 4", prompt)
+        self.assertEqual(len(vision._keyframes), 0)
+        self.assertEqual(vision.current_scene, "desk")
+
+
 # ══════════════════════════════════════════════════════════
 # CONFIG VALIDATION
 # ══════════════════════════════════════════════════════════
@@ -650,6 +782,66 @@ class TestScheduler(unittest.TestCase):
         due = sched2.get_due_tasks()
         self.assertEqual(len(due), 0)
 
+    def _write_state(self, state):
+        with open(self.state_path, "w") as f:
+            json.dump(state, f)
+
+    def test_cron_missed_run_caught_up_once(self):
+        """A cron slot that passed while suspended is due once on wake."""
+        from core.scheduler import TaskScheduler
+        yesterday = datetime.now() - timedelta(days=1, minutes=5)
+        self._write_state({"T1": yesterday.isoformat()})
+        minute = (yesterday + timedelta(minutes=2)).minute
+        config = [{"name": "T1", "command": "x", "cron": f"{minute} * * * *"}]
+        sched = TaskScheduler(config, self.state_path)
+        self.assertEqual([t["name"] for t in sched.get_due_tasks()], ["T1"])
+        self.assertEqual(len(sched.get_due_tasks()), 1)   # due until marked
+        sched.mark_completed("T1")
+        self.assertEqual(sched.get_due_tasks(), [])
+
+    def test_cron_catch_up_disabled(self):
+        from core.scheduler import TaskScheduler
+        yesterday = datetime.now() - timedelta(days=1, minutes=5)
+        self._write_state({"T1": yesterday.isoformat()})
+        minute = (yesterday + timedelta(minutes=2)).minute
+        config = [{"name": "T1", "command": "x", "cron": f"{minute} * * * *",
+                   "catch_up": False}]
+        sched = TaskScheduler(config, self.state_path)
+        self.assertEqual(sched.get_due_tasks(), [])
+        self.assertGreater(sched.next_fire_times("T1", 1)[0], datetime.now())
+
+    def test_next_deadline_is_earliest_future_fire(self):
+        from core.scheduler import TaskScheduler
+        now = datetime.now()
+        self._write_state({"Hourly": now.isoformat(), "Daily": now.isoformat()})
+        config = [
+            {"name": "Daily", "command": "x", "interval_hours": 24},
+            {"name": "Hourly", "command": "y", "interval_hours": 1},
+            {"name": "Fresh", "command": "z", "interval_hours": 1},
+        ]
+        sched = TaskScheduler(config, self.state_path)
+        self.assertEqual([t["name"] for t in sched.get_due_tasks()], ["Fresh"])
+        # The already-due task doesn't count; the hourly one is next
+        self.assertEqual(sched.next_deadline(), now + timedelta(hours=1))
+        sched.mark_completed("Hourly")
+        self.assertGreater(sched.next_deadline(), now + timedelta(hours=1))
+
+    def test_summary_reports_next_fires(self):
+        from core.scheduler import TaskScheduler
+        config = [
+            {"name": "Cron", "command": "x", "cron": "0 6 * * *"},
+            {"name": "Interval", "command": "y", "interval_hours": 2},
+        ]
+        sched = TaskScheduler(config, self.state_path)
+        summary = {s["name"]: s for s in sched.get_schedule_summary(next_n=4)}
+        fires = [datetime.fromisoformat(t) for t in summary["Cron"]["next_fires"]]
+        self.assertEqual(len(fires), 4)
+        self.assertTrue(all(t.hour == 6 and t.minute == 0 for t in fires))
+        self.assertEqual([b - a for a, b in zip(fires, fires[1:])], [timedelta(days=1)] * 3)
+        self.assertTrue(summary["Cron"]["next_run"].startswith("in "))
+        self.assertEqual(summary["Interval"]["next_run"], "now")
+        self.assertEqual(len(summary["Interval"]["next_fires"]), 4)
+
 
 # ══════════════════════════════════════════════════════════
 # CRON EXPRESSION PARSER
@@ -793,6 +985,44 @@ class TestCronParser(unittest.TestCase):
         self.assertTrue(_cron_is_due("0 6,18 * * *", None, at_18))
         self.assertFalse(_cron_is_due("0 6,18 * * *", None, at_10))
 
+    # ── CronExpr: compiled bitsets / next fire ───────────────────────────
+
+    def test_compiled_matches_agree_with_field_parser(self):
+        from core.scheduler import CronExpr
+        cron = CronExpr("*/15 9-17 * * 1-5")
+        self.assertTrue(cron.matches(datetime(2026, 3, 4, 9, 45)))     # Wednesday
+        self.assertFalse(cron.matches(datetime(2026, 3, 4, 9, 40)))
+        self.assertFalse(cron.matches(datetime(2026, 3, 1, 9, 45)))    # Sunday
+        self.assertTrue(CronExpr("0 6 * * 7").matches(datetime(2026, 3, 1, 6, 0)))
+
+    def test_next_after_skips_to_matching_day(self):
+        from core.scheduler import CronExpr
+        cron = CronExpr("30 8 * * 1-5")
+        friday_evening = datetime(2026, 3, 6, 20, 0)
+        self.assertEqual(cron.next_after(friday_evening), datetime(2026, 3, 9, 8, 30))
+        # Strictly after: a time that matches yields the following slot
+        self.assertEqual(cron.next_after(datetime(2026, 3, 9, 8, 30, 15)),
+                         datetime(2026, 3, 10, 8, 30))
+
+    def test_next_after_crosses_month_and_year(self):
+        from core.scheduler import CronExpr
+        self.assertEqual(CronExpr("0 0 1 * *").next_after(datetime(2026, 12, 15)),
+                         datetime(2027, 1, 1, 0, 0))
+        self.assertEqual(CronExpr("0 12 29 2 *").next_after(datetime(2026, 3, 1)),
+                         datetime(2028, 2, 29, 12, 0))
+
+    def test_next_after_impossible_expression(self):
+        from core.scheduler import CronExpr
+        self.assertIsNone(CronExpr("0 0 31 2 *").next_after(datetime(2026, 1, 1)))
+        self.assertIsNone(CronExpr("x * * * *").next_after(datetime(2026, 1, 1)))
+
+    def test_next_n(self):
+        from core.scheduler import CronExpr
+        times = CronExpr("0 6,18 * * *").next_n(datetime(2026, 3, 1, 7, 0), 3)
+        self.assertEqual(times, [datetime(2026, 3, 1, 18, 0),
+                                 datetime(2026, 3, 2, 6, 0),
+                                 datetime(2026, 3, 2, 18, 0)])
+
 
 # ══════════════════════════════════════════════════════════
 # AUDIT LOG — HASH CHAIN REBUILD
@@ -1284,6 +1514,107 @@ class TestKeywordPreRouter(unittest.TestCase):
         self.assertNotIn("google", self.desktop_apps)
 
 
+class TestCompiledKeywordRouter(unittest.TestCase):
+    """KeywordRouter must give exactly the first-match answer of a linear scan."""
+
+    UTTERANCES = [
+        "gpu temp", "gpu temperature", "cpu temp", "temperature", "cpu usage", "check cpu load",
+        "memory usage", "disk free", "free space", "system summary", "uptime", "whoami",
+        "what's the time", "what time is it", "skip song", "prev song", "what's playing",
+        "current song", "screencapture", "take a screenshot", "lock the desktop", "brighter",
+        "dimmer", "clipboard history", "what's on my clipboard", "paste buffer", "wifi info",
+        "available networks", "speedtest", "graphics card", "minimize", "snap left",
+        "close this window", "show workspaces", "running apps", "what's running",
+        "what's on my screen", "read screen", "my notes", "recent downloads", "active timer",
+        "current volume", "what's hogging cpu", "resource hogs", "weather", "weather in london",
+        "forecast for tomorrow", "what's the weather and cpu usage", "hey how are you",
+        "tell me a joke", "ping google.com", "", "x" * 300,
+    ]
+
+    def setUp(self):
+        from core.routing_mixin import (
+            _KEYWORD_ROUTER, _KEYWORD_ROUTES, _SPECIAL_ROUTER, _SPECIAL_ROUTES,
+        )
+        self.keyword_router = _KEYWORD_ROUTER
+        self.keyword_routes = _KEYWORD_ROUTES
+        self.special_router = _SPECIAL_ROUTER
+        self.special_routes = _SPECIAL_ROUTES
+
+    @staticmethod
+    def _linear(routes, text):
+        for matcher, value in routes:
+            if isinstance(matcher, tuple) and any(p in text for p in matcher):
+                return value
+            if not isinstance(matcher, tuple) and matcher.search(text):
+                return value
+        return None
+
+    def test_keyword_table_order_matches_linear_scan(self):
+        routes = [(p, (skill, args)) for p, skill, args in self.keyword_routes]
+        for text in self.UTTERANCES:
+            self.assertEqual(self.keyword_router.first(text), self._linear(routes, text), text)
+
+    def test_special_table_order_matches_linear_scan(self):
+        texts = self.UTTERANCES + [
+            "help", "  help ", "help me", "night mode status", "night mode on", "keep working on motorev",
+            "queue task: fix login for motorev", "stop the plan", "plan status", "check the crm",
+            "brief me", "schedule", "open youtube", "print status",
+        ]
+        for text in texts:
+            expected = [v for m, v in self.special_routes if self._linear([(m, v)], text)]
+            self.assertEqual(self.special_router.matches(text), expected, text)
+            self.assertEqual(self.special_router.first(text), self._linear(self.special_routes, text))
+
+    def test_earlier_route_wins_even_when_later_matches_first(self):
+        import re
+        from core.keyword_router import KeywordRouter
+        routes = [(re.compile(r'\bcpu\s+usage\b'), "cpu"), (re.compile(r'\bwhat\b'), "what")]
+        self.assertEqual(KeywordRouter(routes).first("what is my cpu usage"), "cpu")
+        self.assertEqual(KeywordRouter(routes[::-1]).first("what is my cpu usage"), "what")
+
+    def test_overlapping_phrases_all_found(self):
+        from core.keyword_router import KeywordRouter
+        router = KeywordRouter([(("night mode status",), "status"), (("night mode",), "mode"),
+                                (("mode st",), "inner")])
+        self.assertEqual(router.matches("show night mode status"), ["status", "mode", "inner"])
+        self.assertEqual(router.matches("night mode"), ["mode"])
+        self.assertIsNone(router.first("day mode"))
+
+    def test_required_literals(self):
+        import re
+        from core.keyword_router import required_literals
+        self.assertEqual(required_literals(re.compile(r'\bcpu\s+(?:usage|load)\b')),
+                         frozenset({"usage", "load"}))
+        self.assertEqual(required_literals(re.compile(r'\bwho\s*am\s*i\b')), frozenset({"who"}))
+        self.assertIsNone(required_literals(re.compile(r'\d+\s*\w')))
+        self.assertIsNone(required_literals(re.compile(r'cpu', re.IGNORECASE)))
+        self.assertIsNone(required_literals(re.compile(r'(?:cpu)?\s+')))
+
+    def test_regex_without_literals_is_always_checked(self):
+        import re
+        from core.keyword_router import KeywordRouter
+        router = KeywordRouter([(re.compile(r'\d{3}'), "digits"), (("call",), "call")])
+        self.assertEqual(router.first("call 555"), "digits")
+        self.assertEqual(router.first("call me"), "call")
+
+    def test_special_hits_feed_mode_command_gate(self):
+        from core.routing_mixin import special_command_hits
+        self.assertEqual(special_command_hits("keep working on motorev"),
+                         ["night_mode_on", "mode_command"])
+        self.assertNotIn("mode_command", special_command_hits("turn the lab light on"))
+
+    def test_lights_fuzzy_match_unchanged(self):
+        from tools import lights
+        with patch.object(lights, "_load_lights", return_value=[
+            {"name": "lab ceiling", "aliases": ["ceiling light", "lab"]},
+            {"name": "bedroom", "aliases": ["bedroom light"]},
+        ]):
+            self.assertEqual(lights._find_light_from_message("turn the sealing light on")["name"],
+                             "lab ceiling")
+            self.assertEqual(lights._find_light_from_message("bedrom light off")["name"], "bedroom")
+            self.assertIsNone(lights._find_light_from_message("how are you doing today"))
+
+
 # ══════════════════════════════════════════════════════════
 # HOTKEY LISTENER
 # ══════════════════════════════════════════════════════════
@@ -1515,6 +1846,90 @@ class TestTTSCacheLRU(unittest.TestCase):
         v = VoiceSystem(on_command=None, config={"tts_cache_dir": "/nonexistent/path"})
         self.assertEqual(len(v._tts_cache), 0)
 
+    def test_memory_tier_bounded_by_bytes(self):
+        import tempfile
+        from core.tts_cache import TTSCache
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = TTSCache(Path(tmpdir), memory_max_bytes=250, memory_max_entries=100)
+            for i in range(5):
+                cache.put(f"k{i}", bytes([i]) * 100, persist=False)
+            self.assertEqual(list(cache.memory), ["k3", "k4"])
+            self.assertEqual(cache.stats()["memory_bytes"], 200)
+            self.assertIsNone(cache.get("k0"))     # not persisted → a miss
+            self.assertEqual(cache.get("k3"), bytes([3]) * 100)
+            self.assertEqual((cache.stats()["memory_hits"], cache.stats()["misses"]), (1, 1))
+
+    def test_disk_tier_index_and_lazy_reads(self):
+        import tempfile
+        from unittest.mock import patch
+        from core.tts_cache import INDEX_FILE, TTSCache
+        with tempfile.TemporaryDirectory() as tmpdir:
+            TTSCache(Path(tmpdir)).put("hello", b"ID3" + b"x" * 200)
+            self.assertTrue((Path(tmpdir) / INDEX_FILE).exists())
+            cache = TTSCache(Path(tmpdir))
+            with patch.object(Path, "glob") as glob, patch.object(Path, "stat") as stat:
+                cache.open()
+                glob.assert_not_called()
+                stat.assert_not_called()
+            self.assertEqual(len(cache.memory), 0)          # nothing read at startup
+            self.assertEqual(cache.stats()["disk_entries"], 1)
+            self.assertEqual(cache.get("hello"), b"ID3" + b"x" * 200)
+            self.assertIn("hello", cache.memory)            # promoted
+            self.assertEqual(cache.stats()["disk_hits"], 1)
+            # A file deleted behind the cache's back is a miss, not an error
+            cache.memory.clear()
+            (Path(tmpdir) / "hello.mp3").unlink()
+            self.assertIsNone(cache.get("hello"))
+            self.assertEqual(cache.stats()["disk_entries"], 0)
+
+    def test_disk_tier_evicts_least_recently_used_by_size(self):
+        import tempfile
+        import time as _time
+        from core.tts_cache import TTSCache
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = TTSCache(Path(tmpdir), disk_max_bytes=300)
+            for key in ("a", "b", "c"):
+                cache.put(key, b"x" * 100)
+                _time.sleep(0.01)
+            cache.memory.clear()
+            cache.get("a")                                   # a is now most recent
+            _time.sleep(0.01)
+            cache.put("d", b"x" * 100)
+            self.assertEqual(sorted(p.stem for p in Path(tmpdir).glob("*.mp3")), ["a", "c", "d"])
+            self.assertEqual(cache.stats()["disk_bytes"], 300)
+            reopened = TTSCache(Path(tmpdir))
+            reopened.open()
+            self.assertEqual(reopened.stats()["disk_entries"], 3)
+
+    def test_old_unindexed_files_are_dropped(self):
+        import tempfile
+        from core.tts_cache import TTSCache
+        with tempfile.TemporaryDirectory() as tmpdir:
+            (Path(tmpdir) / "0123456789abcdef.mp3").write_bytes(b"ID3" + b"\x00" * 100)
+            cache = TTSCache(Path(tmpdir))
+            cache.open()
+            self.assertEqual(list(Path(tmpdir).glob("*.mp3")), [])
+            self.assertIsNone(cache.get("0123456789abcdef"))
+
+    def test_cache_key_includes_voice_and_settings(self):
+        key = self.voice._tts_cache_key("Got it.")
+        self.assertEqual(key, self.voice._tts_cache_key("  got it.  "))
+        self.voice.set_voice("another-voice")
+        other_voice = self.voice._tts_cache_key("Got it.")
+        self.voice.tts_stability = 0.9
+        self.assertEqual(len({key, other_voice, self.voice._tts_cache_key("Got it.")}), 3)
+
+    def test_listening_state_reports_cache_stats(self):
+        import tempfile
+        from core.voice import VoiceSystem
+        with tempfile.TemporaryDirectory() as tmpdir:
+            v = VoiceSystem(on_command=None, config={"tts_cache_dir": tmpdir})
+            v._cache_tts_clause("On it.", b"ID3" + b"a" * 100)       # fixed ack → cached
+            v._cache_tts_clause("The weather is nice.", b"ID3" + b"b" * 100)
+            self.assertIsNotNone(v._tts_store.get(v._tts_cache_key("On it.")))
+            stats = v.listening_state["tts_cache"]
+            self.assertEqual((stats["disk_entries"], stats["memory_hits"]), (1, 1))
+
 
 class TestVADAmbientDeque(unittest.TestCase):
     """Tests for VAD ambient history using deque instead of list.pop(0)."""
@@ -1546,6 +1961,484 @@ class TestVADAmbientDeque(unittest.TestCase):
         self.assertEqual(len(d), 3)
 
 
+@unittest.skipUnless(_HAS_NUMPY, "numpy not installed")
+class TestAudioDSP(unittest.TestCase):
+    """core/audio_dsp: NumPy PCM helpers and the shared EnergyVAD."""
+
+    @staticmethod
+    def _pcm(values) -> bytes:
+        import struct
+        return struct.pack(f"<{len(values)}h", *values)
+
+    def _frame(self, amplitude: int, n: int = 480) -> bytes:
+        return self._pcm([amplitude if i % 2 else -amplitude for i in range(n)])
+
+    def test_rms_matches_pure_python(self):
+        from core.audio_dsp import rms
+        values = [0, 1000, -32768, 32767, -5, 250]
+        expected = (sum(v * v for v in values) / len(values)) ** 0.5
+        self.assertAlmostEqual(rms(self._pcm(values)), expected, places=6)
+        self.assertEqual(rms(b""), 0.0)
+
+    def test_frame_rms_vectorized(self):
+        from core.audio_dsp import frame_rms, rms
+        pcm = self._frame(100) + self._frame(2000) + b"\x01\x00"   # trailing partial frame ignored
+        levels = frame_rms(pcm, 480)
+        self.assertEqual(len(levels), 2)
+        self.assertAlmostEqual(levels[1], rms(self._frame(2000)))
+
+    def test_channel_mixing(self):
+        from core.audio_dsp import to_mono, to_stereo
+        self.assertEqual(to_mono(self._pcm([10, 20, -3, 0, 32767, 32767])), self._pcm([15, -2, 32767]))
+        self.assertEqual(to_stereo(self._pcm([1, -2])), self._pcm([1, 1, -2, -2]))
+
+    def test_resample(self):
+        from core.audio_dsp import resample, samples
+        flat = self._pcm([1200] * 4800)
+        down = samples(resample(flat, 48000, 16000))
+        self.assertEqual(down.size, 1600)
+        self.assertTrue((down == 1200).all())
+        self.assertEqual(samples(resample(self._pcm([0] * 2205), 22050, 16000)).size, 1600)
+        self.assertEqual(resample(flat, 16000, 16000), flat)
+
+    def test_wav_bytes(self):
+        import io
+        import wave
+        from core.audio_dsp import wav_bytes
+        with wave.open(io.BytesIO(wav_bytes(self._pcm([0] * 160), 16000))) as wf:
+            self.assertEqual((wf.getnchannels(), wf.getframerate(), wf.getnframes()), (1, 16000, 160))
+
+    def _vad(self, **kw):
+        from core.audio_dsp import EnergyVAD
+        params = dict(threshold=250, silence_threshold=200, start_frames=2, silence_s=0.3,
+                      min_s=0.1, max_s=5.0, preroll_frames=2)
+        params.update(kw)
+        return EnergyVAD(16000, 480, **params)
+
+    def test_vad_utterance_includes_onset(self):
+        vad = self._vad()
+        quiet, loud = self._frame(20), self._frame(3000)
+        for frame in [quiet, quiet, loud]:
+            self.assertIsNone(vad.feed(frame))
+        self.assertFalse(vad.recording)
+        self.assertIsNone(vad.feed(loud))
+        self.assertTrue(vad.recording)
+        for _ in range(3):
+            self.assertIsNone(vad.feed(loud))
+        results = [vad.feed(quiet) for _ in range(10)]   # 0.3 s of silence = 10 frames
+        utterance = results[-1]
+        self.assertTrue(all(r is None for r in results[:-1]))
+        self.assertFalse(vad.recording)
+        # 2 pre-roll (quiet + first loud) + triggering frame + 3 loud + 10 silent frames
+        self.assertEqual(len(utterance), 16 * 960)
+        self.assertEqual(utterance[:960], quiet)
+
+    def test_vad_middle_zone_does_not_end_utterance(self):
+        vad = self._vad(preroll_frames=0)
+        loud, middle = self._frame(3000), self._frame(225)
+        vad.feed(loud), vad.feed(loud)
+        for _ in range(30):
+            self.assertIsNone(vad.feed(middle))
+        self.assertTrue(vad.recording)
+
+    def test_vad_drops_short_and_caps_long(self):
+        vad = self._vad(start_frames=1, min_s=0.5, max_s=0.3)
+        loud, quiet = self._frame(3000), self._frame(0)
+        outputs = [vad.feed(loud) for _ in range(10)]
+        capped = [o for o in outputs if o]
+        self.assertEqual(len(capped), 0)   # 0.3 s cap < 0.5 s minimum → dropped
+        vad = self._vad(start_frames=1, max_s=0.3)
+        outputs = [vad.feed(loud) for _ in range(10)]
+        self.assertEqual(len([o for o in outputs if o][0]), 10 * 960)
+        vad = self._vad(start_frames=1, min_s=0.5)
+        vad.feed(loud)
+        self.assertIsNone([vad.feed(quiet) for _ in range(10)][-1])
+
+    def test_vad_time_based_silence_keeps_only_loud(self):
+        vad = self._vad(start_frames=1, silence_s=0.7, keep_quiet=False, preroll_frames=0)
+        loud, quiet = self._frame(3000), self._frame(0)
+        t = 100.0
+        for _ in range(10):
+            vad.feed(loud, now=t)
+            t += 0.02
+        self.assertIsNone(vad.feed(quiet, now=t + 0.5))
+        segment = vad.feed(quiet, now=t + 0.7)
+        self.assertEqual(segment, loud * 10)
+
+    def test_vad_calibrate_and_reset(self):
+        vad = self._vad()
+        self.assertAlmostEqual(vad.calibrate([100, 400, 300]), 300)
+        self.assertEqual((vad.threshold, vad.silence_threshold), (450, 375))
+        self.assertIsNone(vad.calibrate([]))
+        vad.calibrate([10, 10])
+        self.assertEqual((vad.threshold, vad.silence_threshold), (250, 200))   # never below base
+        vad.feed(self._frame(3000)), vad.feed(self._frame(3000))
+        self.assertTrue(vad.recording)
+        vad.reset()
+        self.assertFalse(vad.recording)
+        self.assertIsNone(vad.feed(self._frame(0)))
+
+    def test_vad_pending_and_speech_bytes(self):
+        vad = self._vad(preroll_frames=0, start_frames=1)
+        loud, quiet = self._frame(3000), self._frame(0)
+        self.assertEqual(vad.pending(), b"")
+        vad.feed(loud), vad.feed(loud)
+        self.assertEqual(vad.pending(), loud * 2)
+        self.assertEqual(vad.pending_bytes, 2 * 960)
+        utterance = [vad.feed(quiet) for _ in range(10)][-1]
+        self.assertEqual(len(utterance), 12 * 960)
+        self.assertEqual(vad.speech_bytes, 2 * 960)   # trailing silence excluded
+
+
+@unittest.skipUnless(_HAS_NUMPY, "numpy not installed")
+class TestStreamingSTT(unittest.TestCase):
+    """core/stt_stream + VoiceSystem streaming mode, against a local Whisper stand-in."""
+
+    WORDS = ["hey", "leon", "turn", "on", "the", "lab", "lights"]
+    RATE = 16000
+
+    def setUp(self):
+        import tempfile
+        import numpy as np
+        from core.audio_dsp import wav_bytes
+        # WAV fixture: each word is 0.25 s of noise, then 0.1 s of silence; 0.5 s tail
+        rng = np.random.default_rng(7)
+        parts, self.spans, pos = [], [], 0
+        for word in self.WORDS:
+            burst = (2000 * rng.standard_normal(self.RATE // 4)).astype("<i2").tobytes()
+            parts += [burst, bytes(self.RATE // 5)]
+            self.spans.append((pos, pos + len(burst), word))
+            pos += len(burst) + self.RATE // 5
+        parts.append(bytes(self.RATE))
+        self.speech_bytes = self.spans[-1][1]
+        self.tmp = tempfile.TemporaryDirectory()
+        self.fixture = Path(self.tmp.name) / "hey_leon_lights.wav"
+        self.fixture.write_bytes(wav_bytes(b"".join(parts), self.RATE))
+        self.uploads = []          # seconds of audio per request
+        self.status = 200
+        self.delay = 0.0
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _app(self):
+        """Replays the fixture's transcript: the words inside the uploaded span of it."""
+        import io
+        import wave
+        from aiohttp import web
+        with wave.open(str(self.fixture)) as wf:
+            fixture_pcm = wf.readframes(wf.getnframes())
+
+        async def transcriptions(request):
+            form = await request.post()
+            with wave.open(io.BytesIO(form["file"].file.read())) as wf:
+                pcm = wf.readframes(wf.getnframes())
+            self.uploads.append(len(pcm) / (2 * self.RATE))
+            await asyncio.sleep(self.delay)
+            if self.status != 200:
+                return web.json_response({"error": "busy"}, status=self.status)
+            start = fixture_pcm.find(pcm) if pcm else -1
+            end = start + len(pcm)
+            words = [w for s, e, w in self.spans if start >= 0 and s >= start and e <= end]
+            return web.json_response({"text": " ".join(words).capitalize()})
+
+        app = web.Application()
+        app.router.add_post("/v1/audio/transcriptions", transcriptions)
+        return app
+
+    def _run(self, scenario):
+        from aiohttp.test_utils import TestServer
+        from core.stt_stream import WhisperClient
+
+        async def go():
+            server = TestServer(self._app())
+            await server.start_server()
+            client = WhisperClient("test-key", base_url=str(server.make_url("/v1")))
+            try:
+                return await scenario(client, str(server.make_url("/v1")))
+            finally:
+                await client.close()
+                await server.close()
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(go())
+        finally:
+            loop.close()
+
+    def _pcm(self, seconds=None):
+        import wave
+        with wave.open(str(self.fixture)) as wf:
+            n = wf.getnframes() if seconds is None else int(seconds * self.RATE)
+            return wf.readframes(n)
+
+    @staticmethod
+    async def _settle(utt):
+        while utt._inflight is not None and not utt._inflight.done():
+            await asyncio.sleep(0.005)
+
+    def test_client_transcribes_fixture(self):
+        async def scenario(client, _):
+            return await client.transcribe(self._pcm(), self.RATE)
+        self.assertEqual(self._run(scenario), "Hey leon turn on the lab lights")
+        self.assertEqual(len(self.uploads), 1)
+
+    def test_partials_then_final_reuses_last_partial(self):
+        from core.stt_stream import StreamingUtterance
+        heard = []
+
+        async def on_partial(text, stable):
+            heard.append((text, stable))
+
+        async def scenario(client, _):
+            utt = StreamingUtterance(client, self.RATE, on_partial=on_partial)
+            for seconds in (1.0, 2.0, 2.8, 3.2):
+                utt.offer(self._pcm(seconds))
+                await self._settle(utt)
+            final = await utt.finish(self._pcm(), self.speech_bytes)
+            return utt, final
+
+        utt, final = self._run(scenario)
+        self.assertEqual([t for t, _ in heard], [
+            "Hey leon turn", "Hey leon turn on the lab", "Hey leon turn on the lab lights",
+            "Hey leon turn on the lab lights",
+        ])
+        self.assertEqual([s for _, s in heard], [False, False, False, True])
+        self.assertEqual(final, "Hey leon turn on the lab lights")
+        self.assertTrue(utt.reused)
+        self.assertEqual(len(self.uploads), 4)      # no separate upload for the final
+
+    def test_final_uploads_when_speech_outran_partials(self):
+        from core.stt_stream import StreamingUtterance
+
+        async def scenario(client, _):
+            utt = StreamingUtterance(client, self.RATE)
+            utt.offer(self._pcm(1.0))
+            await self._settle(utt)
+            return utt, await utt.finish(self._pcm(), self.speech_bytes)
+
+        utt, final = self._run(scenario)
+        self.assertEqual(final, "Hey leon turn on the lab lights")
+        self.assertFalse(utt.reused)
+        self.assertEqual(len(self.uploads), 2)
+
+    def test_final_waits_for_partial_in_flight_that_covers_speech(self):
+        from core.stt_stream import StreamingUtterance
+        self.delay = 0.05
+
+        async def scenario(client, _):
+            utt = StreamingUtterance(client, self.RATE)
+            utt.offer(self._pcm(2.0))
+            utt.offer(self._pcm(2.6))      # waits behind the request in flight
+            await asyncio.sleep(0.07)      # first partial done, second in flight
+            return utt, await utt.finish(self._pcm(), self.speech_bytes)
+
+        utt, final = self._run(scenario)
+        self.assertEqual(final, "Hey leon turn on the lab lights")
+        self.assertTrue(utt.reused)
+        self.assertEqual(len(self.uploads), 2)
+
+    def test_rolling_window_and_rate_limit(self):
+        from core.stt_stream import StreamingUtterance
+
+        async def scenario(client, _):
+            utt = StreamingUtterance(client, self.RATE, window_s=1.0)
+            utt.offer(self._pcm(2.45))
+            await self._settle(utt)
+            windowed = (utt.text, utt.covered)
+            self.status = 429
+            utt.offer(self._pcm(3.0))
+            await self._settle(utt)
+            limited = client.rate_limited
+            utt.offer(self._pcm(3.2))              # skipped while rate limited
+            self.status = 200
+            final = await utt.finish(self._pcm(), self.speech_bytes)
+            return windowed, limited, final
+
+        windowed, limited, final = self._run(scenario)
+        self.assertEqual(windowed, ("Lab lights", 0))   # only the last second was sent
+        self.assertTrue(limited)
+        self.assertEqual(final, "Hey leon turn on the lab lights")
+        self.assertEqual(self.uploads[0], 1.0)
+        self.assertEqual(len(self.uploads), 3)
+
+    def test_voice_system_streaming_routes_before_end_of_speech(self):
+        from unittest.mock import AsyncMock
+        from core.voice import VoiceSystem
+        events, commands = [], []
+
+        async def scenario(_, base_url):
+            v = VoiceSystem(on_command=None, config={"stt_streaming": True, "stt_base_url": base_url})
+            v.groq_api_key = "test-key"
+            v.on_vad_event = AsyncMock(side_effect=lambda e, t: events.append(e))
+            v.on_partial_command = AsyncMock(side_effect=commands.append)
+            v._handle_transcription = AsyncMock()
+            v._transcription_queue = asyncio.Queue()
+            try:
+                for seconds in (1.0, 2.8, 3.2):
+                    v._offer_partial_audio(self._pcm(seconds))
+                    await self._settle(v._utterance)
+                v._end_utterance(self._pcm(), self.speech_bytes)
+                self.assertIsNone(v._utterance)
+                await v._transcribe_and_handle(*v._transcription_queue.get_nowait())
+                return v._handle_transcription
+            finally:
+                await v.stop()
+
+        handle = self._run(scenario)
+        self.assertEqual(events, ["partial", "wake", "partial", "partial", "transcription"])
+        self.assertEqual(commands, ["turn on the lab lights"])   # wake word stripped
+        handle.assert_awaited_once_with("Hey leon turn on the lab lights")
+        self.assertEqual(len(self.uploads), 3)
+
+    def test_expected_command_mirrors_transcription_handling(self):
+        from core.voice import VoiceSystem
+        v = VoiceSystem(on_command=None, config={})
+        self.assertIsNone(v._expected_command("the weather tonight"))
+        self.assertEqual(v._expected_command("Hey Leon, open youtube"), "open youtube")
+        self.assertEqual(v._expected_command("can you check my email"), "can you check my email")
+        v.is_awake = True
+        self.assertIsNone(v._expected_command("nice one"))
+        self.assertEqual(v._expected_command("stop"), "stop")
+        self.assertIsNone(v._expected_command("go to sleep"))
+
+    def test_prefetched_analysis_is_reused_for_matching_text(self):
+        from unittest.mock import AsyncMock
+        from core.conversation_mixin import ConversationMixin
+
+        class Brain(ConversationMixin):
+            pass
+
+        async def go():
+            brain = Brain()
+            brain._analyze_request = AsyncMock(return_value={"type": "device_control"})
+            brain.prefetch_analysis("turn on the lab lights")
+            brain.prefetch_analysis("Turn on the lab lights.")     # same words — not restarted
+            first = await brain._analysis_for("Turn on the lab lights.")
+            calls_after_hit = brain._analyze_request.await_count
+            brain.prefetch_analysis("turn on the lab")
+            await brain._analysis_for("turn on the lab lights")     # text changed — fresh call
+            brain.prefetch_analysis("thanks")                       # trivial: never classified
+            return first, calls_after_hit, brain._analyze_request.await_count, brain._prefetched_analysis
+
+        loop = asyncio.new_event_loop()
+        try:
+            first, calls_after_hit, calls, leftover = loop.run_until_complete(go())
+        finally:
+            loop.close()
+        self.assertEqual(first, {"type": "device_control"})
+        self.assertEqual(calls_after_hit, 1)
+        self.assertEqual(calls, 2)
+        self.assertIsNone(leftover)
+
+
+class TestStreamingTTS(unittest.TestCase):
+    """core/tts_stream: clause splitting and the synthesize-ahead playback pipeline."""
+
+    def _run(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_split_clauses(self):
+        from core.tts_stream import split_clauses
+        self.assertEqual(split_clauses("Done."), ["Done."])
+        self.assertEqual(split_clauses(""), [])
+        self.assertEqual(
+            split_clauses("Sure thing. I turned on the lab lights and set them to forty percent. "
+                          "Done. Anything else?"),
+            ["Sure thing.", "I turned on the lab lights and set them to forty percent.",
+             "Done. Anything else?"],
+        )
+        # Decimals and abbreviations don't end sentences; lines do
+        self.assertEqual(split_clauses("Version 3.5 is out, says Dr. Lee.\nNext"),
+                         ["Version 3.5 is out, says Dr. Lee.", "Next"])
+
+    def test_long_first_sentence_split_at_clause_punctuation(self):
+        from core.tts_stream import split_clauses
+        text = ("So the dashboard server, which I looked at earlier today, opens a new "
+                "session per request; that is why it feels slow under load.")
+        clauses = split_clauses(text, first_max_chars=40)
+        self.assertEqual(clauses[0], "So the dashboard server,")
+        self.assertEqual(" ".join(clauses), text)
+        self.assertTrue(all(len(c) <= 220 for c in clauses))
+
+    def test_next_clause_synthesized_during_playback(self):
+        from core.tracing import PERF
+        from core.tts_stream import FIRST_AUDIO_METRIC, speak_clauses
+        log = []
+
+        async def synthesize(clause):
+            log.append(("synth start", clause))
+            await asyncio.sleep(0.02)
+            log.append(("synth done", clause))
+            return clause.upper().encode()
+
+        async def play(clause, audio):
+            log.append(("play start", clause))
+            await asyncio.sleep(0.05)
+            log.append(("play done", clause))
+
+        PERF.reset()
+        first_ms = self._run(speak_clauses(["one", "two", "three"], synthesize, play))
+        # Clause 2 is synthesized while clause 1 plays, and so on
+        self.assertLess(log.index(("synth done", "two")), log.index(("play done", "one")))
+        self.assertLess(log.index(("synth done", "three")), log.index(("play done", "two")))
+        self.assertEqual([c for e, c in log if e == "play start"], ["one", "two", "three"])
+        self.assertGreaterEqual(first_ms, 15)
+        self.assertLess(first_ms, 60)     # one clause of synthesis, not three
+        self.assertEqual(PERF.snapshot()[FIRST_AUDIO_METRIC]["count"], 1)
+
+    def test_synthesis_failure_reaches_play_as_none(self):
+        from core.tts_stream import speak_clauses
+        played = []
+
+        async def synthesize(clause):
+            if clause == "bad":
+                raise RuntimeError("boom")
+            return b"audio"
+
+        async def play(clause, audio):
+            played.append((clause, audio))
+
+        self._run(speak_clauses(["ok", "bad", "fine"], synthesize, play))
+        self.assertEqual(played, [("ok", b"audio"), ("bad", None), ("fine", b"audio")])
+
+    def test_voice_speaks_clauses_with_cache_and_local_fallback(self):
+        from unittest.mock import AsyncMock
+        from core.voice import VoiceSystem
+        v = VoiceSystem(on_command=None, config={"tts_cache_dir": "/nonexistent/path"})
+        v._tts_cache.clear()
+        fetched = []
+
+        async def fake_api(clause):
+            fetched.append(clause)
+            return None if "fail" in clause else b"ID3" + clause.encode()
+
+        v._play_audio_bytes = AsyncMock(return_value=True)
+        v._speak_local = AsyncMock()
+        v._tts_cache[v._tts_cache_key("Got it.")] = b"ID3cached"
+        real_synth = v._synthesize_elevenlabs
+
+        async def synth(clause):
+            key = v._tts_cache_key(clause)
+            if key in v._tts_cache:
+                return await real_synth(clause)     # cache path, no HTTP
+            return await fake_api(clause)
+
+        v._synthesize_elevenlabs = synth
+        self._run(v._speak_elevenlabs(
+            "Got it. The lab ceiling light is now on at forty percent. This part will fail, sadly. Done."))
+        played = [c.args[0] for c in v._play_audio_bytes.await_args_list]
+        self.assertEqual(played[0], b"ID3cached")
+        self.assertNotIn("Got it.", fetched)
+        v._speak_local.assert_awaited_once()
+        self.assertIn("fail", v._speak_local.await_args.args[0])
+        self.assertIsNotNone(v.listening_state["tts_first_audio_ms"])
+
+
 class TestDeepgramNonBlocking(unittest.TestCase):
     """Tests for non-blocking Deepgram audio queue access."""
 
@@ -1615,6 +2508,133 @@ class TestScreenAwareness(unittest.TestCase):
         self.assertEqual(len(sa.history), 1)
 
 
+@unittest.skipUnless(_HAS_NUMPY, "numpy not installed")
+class TestScreenChangeDetection(unittest.TestCase):
+    """Perceptual (thumbnail block-diff) change detection and region cropping."""
+
+    def _frame(self):
+        import numpy as np
+        # "Desktop": a horizontal gradient with a flat window on it
+        frame = np.zeros((540, 960, 3), dtype=np.uint8)
+        frame[:] = np.linspace(40, 200, 960, dtype=np.uint8)[None, :, None]
+        frame[100:300, 100:500] = (30, 60, 90)
+        return frame
+
+    def _noisy(self, frame, amount=6, seed=1):
+        import numpy as np
+        noise = np.random.default_rng(seed).integers(-amount, amount + 1, frame.shape)
+        return np.clip(frame.astype(int) + noise, 0, 255).astype(np.uint8)
+
+    def test_decode_ppm(self):
+        import numpy as np
+        from core.screen_awareness import decode_ppm
+        pixels = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+        data = b"P6\n# grim\n3 2\n255\n" + pixels.tobytes()
+        self.assertTrue(np.array_equal(decode_ppm(data), pixels))
+        with self.assertRaises(ValueError):
+            decode_ppm(b"P5\n3 2\n255\n" + bytes(6))
+        with self.assertRaises(ValueError):
+            decode_ppm(b"P6\n3 2\n255\n" + bytes(5))   # truncated pixels
+
+    def test_first_frame_is_full_screen(self):
+        from core.screen_awareness import ScreenChangeDetector, screen_thumbnail
+        detector = ScreenChangeDetector()
+        self.assertEqual(detector.changed_region(screen_thumbnail(self._frame())),
+                         (0.0, 0.0, 1.0, 1.0))
+
+    def test_encode_noise_and_clock_tick_ignored(self):
+        from core.screen_awareness import ScreenChangeDetector, screen_thumbnail
+        frame = self._frame()
+        detector = ScreenChangeDetector()
+        detector.accept(screen_thumbnail(frame))
+        ticked = self._noisy(frame)
+        ticked[522:530, 905:925:2] = 255   # clock digit strokes
+        self.assertIsNone(detector.changed_region(screen_thumbnail(ticked)))
+        self.assertLess(detector.last_score, detector.threshold)
+
+    def test_change_in_middle_detected_and_cropped(self):
+        from core.screen_awareness import ScreenChangeDetector, crop_region, screen_thumbnail
+        frame = self._frame()
+        detector = ScreenChangeDetector()
+        detector.accept(screen_thumbnail(frame))
+        changed = frame.copy()
+        changed[250:330, 420:560] = 255   # a dialog mid-screen
+        region = detector.changed_region(screen_thumbnail(changed))
+        self.assertIsNotNone(region)
+        left, top, right, bottom = region
+        self.assertTrue(left <= 420 / 960 and right >= 560 / 960)
+        self.assertTrue(top <= 250 / 540 and bottom >= 330 / 540)
+        crop = crop_region(changed, region)
+        self.assertLess(crop.size, changed.size / 4)
+
+    def test_reference_moves_only_on_accept(self):
+        import numpy as np
+        from core.screen_awareness import ScreenChangeDetector, screen_thumbnail
+        frame = self._frame()
+        detector = ScreenChangeDetector()
+        detector.accept(screen_thumbnail(frame))
+        # Slow drift: each step alone is below threshold, together they're not
+        step1 = np.clip(frame.astype(int) + 8, 0, 255).astype(np.uint8)
+        step2 = np.clip(frame.astype(int) + 16, 0, 255).astype(np.uint8)
+        self.assertIsNone(detector.changed_region(screen_thumbnail(step1)))
+        self.assertIsNotNone(detector.changed_region(screen_thumbnail(step2)))
+
+    def test_only_changed_frames_analyzed_with_cropped_image(self):
+        from unittest.mock import AsyncMock, patch
+        from core.screen_awareness import ScreenAwareness
+        frame = self._frame()
+        changed = frame.copy()
+        changed[250:330, 420:560] = 0
+        frames = [frame, self._noisy(frame), changed]
+        api = AsyncMock()
+        api.analyze_json = AsyncMock(return_value={"activity": "x", "category": "other"})
+        sa = ScreenAwareness(api_client=api)
+        sa._capture_frame = AsyncMock(side_effect=frames)
+        encoded = []
+
+        def fake_jpeg(rgb, quality=50):
+            encoded.append(rgb.shape)
+            return rgb.tobytes()
+
+        async def go():
+            results = []
+            with patch("core.screen_awareness.encode_jpeg", side_effect=fake_jpeg), \
+                 patch("core.screen_awareness.MIN_ANALYSIS_GAP", 0):
+                for _ in frames:
+                    results.append(await sa._check_screen())
+            return results
+
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(go())
+        finally:
+            loop.close()
+        self.assertEqual(results, [True, False, True])
+        self.assertEqual(api.analyze_json.await_count, 2)
+        self.assertEqual(encoded[0], frame.shape)          # first frame: whole screen
+        self.assertLess(encoded[1][0] * encoded[1][1], frame.shape[0] * frame.shape[1] / 4)
+
+
+    def test_static_screen_settles_without_api(self):
+        from unittest.mock import AsyncMock
+        from core.screen_awareness import ScreenAwareness
+        frame = self._frame()
+        changed = frame.copy()
+        changed[250:330, 420:560] = 0
+        frames = [frame, frame, changed, changed]
+        sa = ScreenAwareness(api_client=None)
+        sa._capture_frame = AsyncMock(side_effect=frames)
+
+        async def go():
+            return [await sa._check_screen() for _ in frames]
+
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(go())
+        finally:
+            loop.close()
+        self.assertEqual(results, [True, False, True, False])
+
 # ══════════════════════════════════════════════════════════
 # NOTIFICATIONS
 # ══════════════════════════════════════════════════════════
@@ -1852,6 +2872,23 @@ class TestAgentManagerLifecycle(unittest.TestCase):
         self.assertTrue(fh1.closed)
         self.assertTrue(fh2.closed)
 
+    def test_retry_drops_old_exit_event(self):
+        mgr, mock_proc, fh1, fh2 = self._make_manager_with_fake_agent(poll_value=1)
+
+        async def fake_spawn(**kwargs):
+            mgr.active_agents["agent_test2"] = dict(mgr.active_agents["agent_test1"])
+            return "agent_test2"
+
+        async def run():
+            mgr._watch_exit("agent_test1")
+            with patch.object(mgr, "spawn_agent", side_effect=fake_spawn):
+                return await mgr._retry_agent("agent_test1")
+
+        new_id = asyncio.get_event_loop().run_until_complete(run())
+        self.assertEqual(new_id, "agent_test2")
+        self.assertNotIn("agent_test1", mgr.active_agents)
+        self.assertNotIn("agent_test1", mgr._exit_events)
+
     def test_terminate_handles_already_dead_process(self):
         """terminate() should not crash if process is already dead (OSError)."""
         mgr, mock_proc, fh1, fh2 = self._make_manager_with_fake_agent(
@@ -2021,6 +3058,285 @@ class TestAgentManagerLifecycle(unittest.TestCase):
         self.assertTrue(any("did not die after SIGKILL" in m for m in cm.output))
 
 
+# ══════════════════════════════════════════════════════════
+# AGENT MANAGER — EXIT EVENTS & INCREMENTAL OUTPUT
+# ══════════════════════════════════════════════════════════
+
+class TestAgentExitEvents(unittest.TestCase):
+    """Agent exits wake waiters immediately instead of on the next poll."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config = {
+            "output_directory": os.path.join(self.tmp_dir, "out"),
+            "brief_directory": os.path.join(self.tmp_dir, "briefs"),
+            "timeout_minutes": 1,
+        }
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def _add_agent(self, mgr, agent_id, script, output=""):
+        """Track a real Python subprocess running `script` as agent_id."""
+        output_file = os.path.join(self.config["output_directory"], f"{agent_id}.log")
+        error_file = os.path.join(self.config["output_directory"], f"{agent_id}.err")
+        with open(output_file, "w") as f:
+            f.write(output)
+        with open(error_file, "w") as f:
+            f.write("")
+        proc = subprocess.Popen([sys.executable, "-c", script])
+        mgr.active_agents[agent_id] = {
+            "process": proc,
+            "pid": proc.pid,
+            "brief_path": "/tmp/brief.md",
+            "project_path": "/tmp",
+            "output_file": output_file,
+            "error_file": error_file,
+            "started_at": datetime.now().isoformat(),
+            "status": "running",
+            "last_check": datetime.now().isoformat(),
+            "retries": 0,
+            "_file_handles": [],
+        }
+        return proc
+
+    def test_wait_for_exit_returns_when_process_exits(self):
+        from core.agent_manager import AgentManager
+        mgr = AgentManager(openclaw=None, config=self.config)
+
+        async def run():
+            proc = self._add_agent(mgr, "a1", "import time; time.sleep(0.2)")
+            start = time.monotonic()
+            exited = await mgr.wait_for_exit("a1", timeout=10)
+            return exited, time.monotonic() - start, proc
+
+        exited, elapsed, proc = self._run(run())
+        self.assertTrue(exited)
+        self.assertLess(elapsed, 5)
+        self.assertIsNotNone(proc.returncode)  # reaped
+        self.assertTrue(mgr.has_exited("a1"))
+
+    def test_wait_for_exit_times_out_on_running_agent(self):
+        from core.agent_manager import AgentManager
+        mgr = AgentManager(openclaw=None, config=self.config)
+
+        async def run():
+            proc = self._add_agent(mgr, "a1", "import time; time.sleep(30)")
+            try:
+                return await mgr.wait_for_exit("a1", timeout=0.2)
+            finally:
+                proc.kill()
+                proc.wait()
+                mgr.cleanup_agent("a1")
+
+        self.assertFalse(self._run(run()))
+
+    def test_wait_any_wakes_on_first_exit(self):
+        from core.agent_manager import AgentManager
+        mgr = AgentManager(openclaw=None, config=self.config)
+
+        async def run():
+            slow = self._add_agent(mgr, "slow", "import time; time.sleep(30)")
+            self._add_agent(mgr, "fast", "pass")
+            start = time.monotonic()
+            try:
+                exited = await mgr.wait_any(timeout=10)
+            finally:
+                slow.kill()
+                slow.wait()
+            return exited, time.monotonic() - start
+
+        exited, elapsed = self._run(run())
+        self.assertEqual(exited, ["fast"])
+        self.assertLess(elapsed, 5)
+
+    def test_wait_any_default_ignores_already_exited_agents(self):
+        """An exited agent nobody cleaned up must not make wait_any() return at once."""
+        from core.agent_manager import AgentManager
+        mgr = AgentManager(openclaw=None, config=self.config)
+
+        async def run():
+            done = self._add_agent(mgr, "done", "pass")
+            done.wait()
+            start = time.monotonic()
+            exited = await mgr.wait_any(timeout=0.3)
+            return exited, time.monotonic() - start
+
+        exited, elapsed = self._run(run())
+        self.assertEqual(exited, [])
+        self.assertGreaterEqual(elapsed, 0.25)
+
+    def test_needs_check_only_after_exit_or_timeout(self):
+        from core.agent_manager import AgentManager
+        from datetime import timedelta
+        mgr = AgentManager(openclaw=None, config=self.config)
+        proc = self._add_agent(mgr, "a1", "import time; time.sleep(30)")
+        try:
+            self.assertFalse(mgr.needs_check("a1"))
+            started = datetime.now() - timedelta(seconds=mgr.timeout + 5)
+            mgr.active_agents["a1"]["started_at"] = started.isoformat()
+            self.assertTrue(mgr.needs_check("a1"))
+        finally:
+            proc.kill()
+            proc.wait()
+        mgr.active_agents["a1"]["started_at"] = datetime.now().isoformat()
+        self.assertTrue(mgr.needs_check("a1"))
+
+    def test_plan_wait_for_jobs_finishes_on_exit(self):
+        """PlanMode picks up a finished agent right away instead of after a 30s sleep."""
+        from core.agent_manager import AgentManager
+        from core.plan_mode import PlanMode
+        mgr = AgentManager(openclaw=None, config=self.config)
+
+        class MockLeon:
+            agent_manager = mgr
+
+        plan_mode = PlanMode(MockLeon())
+        plan_mode._save_plan = lambda plan: None
+
+        async def broadcast(msg):
+            pass
+        plan_mode._broadcast = broadcast
+
+        async def run():
+            self._add_agent(mgr, "a1", "import time; time.sleep(0.2)", output="all done")
+            task = {"id": "t1", "title": "Task", "status": "running"}
+            start = time.monotonic()
+            await asyncio.wait_for(plan_mode._wait_for_jobs([(task, "a1")], {}), timeout=15)
+            return task, time.monotonic() - start
+
+        task, elapsed = self._run(run())
+        self.assertEqual(task["status"], "completed")
+        self.assertLess(elapsed, 10)
+        self.assertNotIn("a1", mgr.active_agents)
+
+
+# ══════════════════════════════════════════════════════════
+# AGENT MANAGER — INCREMENTAL LOG TAIL
+# ══════════════════════════════════════════════════════════
+
+class TestAgentLogTail(unittest.TestCase):
+    """LogTail reads only appended bytes, keeps a bounded tail, classifies as it goes."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "agent.log")
+        with open(self.path, "w") as f:
+            f.write("")
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _append(self, data: bytes):
+        with open(self.path, "ab") as f:
+            f.write(data)
+
+    def test_reads_only_new_bytes(self):
+        from core.agent_manager import LogTail
+        tail = LogTail(self.path)
+        self._append(b"line one\nline two\n")
+        self.assertEqual(tail.update(), 18)
+        self.assertEqual(tail.update(), 0)
+        self._append(b"line three\n")
+        self.assertEqual(tail.update(), 11)
+        self.assertEqual(tail.offset, os.path.getsize(self.path))
+        self.assertEqual(tail.tail(2), ["line two", "line three"])
+
+    def test_buffer_is_bounded(self):
+        from core.agent_manager import LogTail
+        tail = LogTail(self.path, max_bytes=100)
+        for i in range(200):
+            self._append(f"line {i}\n".encode())
+            tail.update()
+        self.assertLessEqual(len(tail._buf), 100)
+        lines = tail.tail(1000)
+        self.assertEqual(lines[-1], "line 199")
+        self.assertTrue(all(l.startswith("line ") for l in lines))  # partial first line dropped
+
+    def test_split_multibyte_character(self):
+        from core.agent_manager import LogTail
+        tail = LogTail(self.path)
+        data = "café\n".encode()
+        self._append(data[:4])
+        tail.update()
+        self._append(data[4:])
+        tail.update()
+        self.assertEqual(tail.tail(1), ["café"])
+
+    def test_api_500_marker_across_reads(self):
+        from core.agent_manager import LogTail
+        tail = LogTail(self.path, max_bytes=16)
+        self._append(b"working...\nAPI Err")
+        tail.update()
+        self.assertFalse(tail.api_500)
+        self._append(b"or: 500 oops\n")
+        tail.update()
+        self.assertTrue(tail.api_500)
+
+    def test_has_output_and_truncation(self):
+        from core.agent_manager import LogTail
+        tail = LogTail(self.path)
+        self._append(b"  \n\n")
+        tail.update()
+        self.assertFalse(tail.has_output)
+        self._append(b"done\n")
+        tail.update()
+        self.assertTrue(tail.has_output)
+        with open(self.path, "w") as f:
+            f.write("new\n")
+        tail.update()
+        self.assertEqual(tail.tail(5), ["new"])
+
+    def test_from_end_skips_old_content(self):
+        from core.agent_manager import LogTail
+        self._append(b"x" * 10000 + b"\nlast line\n")
+        tail = LogTail(self.path, max_bytes=64, from_end=True)
+        tail.update()
+        self.assertEqual(tail.tail(5), ["last line"])
+        self.assertEqual(tail.offset, os.path.getsize(self.path))
+
+    def test_agent_manager_tail_and_status_use_tail(self):
+        from core.agent_manager import AgentManager
+        out_dir = os.path.join(self.tmp_dir, "out")
+        mgr = AgentManager(openclaw=None, config={
+            "output_directory": out_dir,
+            "brief_directory": os.path.join(self.tmp_dir, "briefs"),
+            "auto_retry": False,
+        })
+        self.assertIsNone(mgr.tail("missing"))
+        err_file = os.path.join(out_dir, "a1.err")
+        with open(err_file, "w") as f:
+            f.write("")
+        self._append(b"".join(b"step %d\n" % i for i in range(100)))
+        proc = unittest.mock.MagicMock()
+        proc.poll.return_value = 0
+        proc.returncode = 0
+        mgr.active_agents["a1"] = {
+            "process": proc, "pid": 1, "brief_path": "/tmp/brief.md", "project_path": "/tmp",
+            "output_file": self.path, "error_file": err_file,
+            "started_at": datetime.now().isoformat(), "status": "running",
+            "last_check": datetime.now().isoformat(), "retries": 0, "_file_handles": [],
+        }
+        self.assertEqual(mgr.tail("a1", 2), ["step 98", "step 99"])
+        loop = asyncio.new_event_loop()
+        try:
+            status = loop.run_until_complete(mgr.check_status("a1"))
+        finally:
+            loop.close()
+        self.assertTrue(status["completed"])
+        self.assertTrue(status["output_preview"].endswith("step 99\n"))
+        self.assertLessEqual(len(status["output_preview"]), 500)
+
+
 # ══════════════════════════════════════════════════════════
 # DASHBOARD — WEBSOCKET SET SAFETY
 # ══════════════════════════════════════════════════════════
@@ -2121,6 +3437,172 @@ class TestBridgeMessage(unittest.TestCase):
         self.assertEqual(MSG_STATUS_RESPONSE, "status_response")
 
 
+# ══════════════════════════════════════════════════════════
+# NEURAL BRIDGE — WIRE PROTOCOL V2
+# ══════════════════════════════════════════════════════════
+
+try:
+    import msgpack as _msgpack_check
+    _HAS_MSGPACK = True
+except ImportError:
+    _HAS_MSGPACK = False
+
+
+class TestBridgeWireProtocol(unittest.TestCase):
+    """Negotiated binary framing: codec, compression, chunked large messages."""
+
+    def _v2(self, **kwargs):
+        from core.neural_bridge import WireProtocol, PROTOCOL_V2
+        return WireProtocol(PROTOCOL_V2, "json", "deflate", **kwargs)
+
+    def test_v1_is_plain_json(self):
+        from core.neural_bridge import WireProtocol, BridgeMessage
+        proto = WireProtocol()
+        msg = BridgeMessage(type="status_request")
+        frames = proto.encode(msg)
+        self.assertEqual(frames, [msg.to_json()])
+        self.assertEqual(proto.decode(frames[0]).id, msg.id)
+
+    def test_negotiation(self):
+        from core.neural_bridge import WireProtocol, PROTOCOL_V1, PROTOCOL_V2
+        offer = WireProtocol.offer()
+        server = WireProtocol.negotiate(offer)
+        self.assertEqual(server.version, PROTOCOL_V2)
+        client = WireProtocol.from_ack({"status": "ok", **server.accepted()})
+        self.assertEqual((client.version, client.codec, client.compression),
+                         (server.version, server.codec, server.compression))
+        # Old client (no offer) and old server (plain ack) stay on v1
+        self.assertEqual(WireProtocol.negotiate({"token": "t"}).version, PROTOCOL_V1)
+        self.assertEqual(WireProtocol.from_ack({"status": "ok"}).version, PROTOCOL_V1)
+        # Either side can cap the version
+        self.assertEqual(WireProtocol.offer(PROTOCOL_V1), {})
+        self.assertEqual(WireProtocol.negotiate(offer, PROTOCOL_V1).version, PROTOCOL_V1)
+
+    def test_small_message_single_uncompressed_frame(self):
+        from core.neural_bridge import BridgeMessage
+        proto = self._v2()
+        frames = proto.encode(BridgeMessage(type="heartbeat"))
+        self.assertEqual(len(frames), 1)
+        self.assertIsInstance(frames[0], bytes)
+        self.assertEqual(frames[0][:2], b"\x00\x00")  # whole message, uncompressed
+        self.assertEqual(proto.decode(frames[0]).type, "heartbeat")
+
+    def test_large_message_compressed_and_chunked(self):
+        import random
+        from core.neural_bridge import BridgeMessage
+        rng = random.Random(1)
+        text = "".join(rng.choice("abcdefghij ") for _ in range(200_000))
+        msg = BridgeMessage(type="memory_sync", payload={"snapshot": text})
+        sender, receiver = self._v2(chunk_size=4096), self._v2()
+        frames = sender.encode(msg)
+        self.assertGreater(len(frames), 1)
+        self.assertLess(sum(len(f) for f in frames), len(msg.to_json()))  # compressed
+        results = [receiver.decode(f) for f in frames]
+        self.assertTrue(all(r is None for r in results[:-1]))
+        self.assertEqual(results[-1].payload["snapshot"], text)
+        self.assertEqual(results[-1].id, msg.id)
+
+    def test_control_messages_interleave_with_chunks(self):
+        import os as _os
+        from core.neural_bridge import BridgeMessage
+        sender, receiver = self._v2(chunk_size=1024), self._v2()
+        big = sender.encode(BridgeMessage(type="task_result",
+                                          payload={"blob": _os.urandom(8000).hex()}))
+        control = sender.encode(BridgeMessage(type="status_response"))
+        received = []
+        for i, frame in enumerate(big):
+            if i == 1:
+                received.append(receiver.decode(control[0]))
+            msg = receiver.decode(frame)
+            if msg:
+                received.append(msg)
+        self.assertEqual([m.type for m in received], ["status_response", "task_result"])
+
+    def test_json_text_accepted_in_v2(self):
+        from core.neural_bridge import BridgeMessage
+        msg = BridgeMessage(type="auth", payload={"status": "ok"})
+        self.assertEqual(self._v2().decode(msg.to_json()).payload, {"status": "ok"})
+
+    def test_malformed_frames_raise_value_error(self):
+        from core.neural_bridge import _CHUNK_HEADER
+        proto = self._v2()
+        for frame in (b"\x00", b"\x07\x00{}", b"\x00\x01not-deflate", b"\x00\x00[1, 2]",
+                      _CHUNK_HEADER.pack(1, 0, 9, 3, 4) + b"x"):
+            with self.assertRaises(ValueError, msg=frame):
+                proto.decode(frame)
+
+    def test_decompressed_size_limit(self):
+        import core.neural_bridge as nb
+        from core.neural_bridge import BridgeMessage
+        proto = self._v2()
+        frames = proto.encode(BridgeMessage(type="x", payload={"pad": "0" * 100_000}))
+        with patch.object(nb, "MAX_MESSAGE_BYTES", 10_000):
+            with self.assertRaises(ValueError):
+                proto.decode(frames[0])
+
+    def test_incomplete_streams_are_bounded(self):
+        import core.neural_bridge as nb
+        from core.neural_bridge import _CHUNK_HEADER
+        proto = self._v2()
+        with patch.object(nb, "MAX_PARTIAL_STREAMS", 3), \
+                patch.object(nb, "MAX_PARTIAL_BYTES", 250), \
+                self.assertLogs("leon.bridge", level="WARNING"):
+            for stream in range(1, 6):
+                self.assertIsNone(proto.decode(_CHUNK_HEADER.pack(1, 0, stream, 0, 2) + b"x" * 10))
+            self.assertEqual(list(proto._partial), [3, 4, 5])
+            proto.decode(_CHUNK_HEADER.pack(1, 0, 6, 0, 2) + b"x" * 240)
+            self.assertEqual(list(proto._partial), [5, 6])
+            self.assertEqual(proto._partial_bytes, 250)
+        proto.reset()
+        self.assertEqual(proto._partial_bytes, 0)
+
+    @unittest.skipUnless(_HAS_MSGPACK, "msgpack not installed")
+    def test_msgpack_codec(self):
+        from core.neural_bridge import WireProtocol, BridgeMessage, PROTOCOL_V2
+        proto = WireProtocol(PROTOCOL_V2, "msgpack", None)
+        msg = BridgeMessage(type="task_result", payload={"files": ["a.py"], "n": 3})
+        self.assertEqual(proto.decode(proto.encode(msg)[0]).payload, msg.payload)
+
+    def test_server_client_roundtrip(self):
+        """A real server/client pair negotiates v2 and moves a chunked payload."""
+        from core.neural_bridge import BridgeServer, BridgeClient, BridgeMessage, PROTOCOL_V2
+
+        async def run():
+            server = BridgeServer({"host": "127.0.0.1", "port": 0, "token": "tok"})
+            received = asyncio.Queue()
+
+            async def on_result(msg):
+                await received.put(msg)
+
+            server.on("task_result", on_result)
+            await server.start()
+            port = server._runner.addresses[0][1]
+            client = BridgeClient({"server_url": f"ws://127.0.0.1:{port}/bridge", "token": "tok"})
+            try:
+                await client.start()
+                for _ in range(200):
+                    if client.connected and server.connected:
+                        break
+                    await asyncio.sleep(0.02)
+                blob = "leon " * 100_000
+                await client.send(BridgeMessage(type="task_result", payload={"blob": blob}))
+                msg = await asyncio.wait_for(received.get(), timeout=10)
+                return client._protocol.version, server._protocol.version, msg.payload["blob"] == blob
+            finally:
+                await client.stop()
+                await server.stop()
+
+        with patch.dict(os.environ):
+            os.environ.pop("LEON_BRIDGE_TOKEN", None)
+            loop = asyncio.new_event_loop()
+            try:
+                client_v, server_v, same = loop.run_until_complete(run())
+            finally:
+                loop.close()
+        self.assertEqual((client_v, server_v), (PROTOCOL_V2, PROTOCOL_V2))
+        self.assertTrue(same)
+
+
 # ══════════════════════════════════════════════════════════
 # NEURAL BRIDGE — SERVER INIT
 # ══════════════════════════════════════════════════════════
@@ -3221,6 +4703,138 @@ class TestSchedulerFailureTracking(unittest.TestCase):
                 f.unlink(missing_ok=True)
 
 
+# ══════════════════════════════════════════════════════════
+# SCHEDULER — CONCURRENT EXECUTOR
+# ══════════════════════════════════════════════════════════
+
+class TestScheduledTaskExecutor(unittest.TestCase):
+    """Resource-class limits, timeouts, dedupe and shutdown of scheduled tasks."""
+
+    def setUp(self):
+        from core.structured_logger import StructuredLogger
+        self.tmp_dir = tempfile.mkdtemp()
+        self.state_path = os.path.join(self.tmp_dir, "scheduler.json")
+        self.slog = StructuredLogger(Path(self.tmp_dir) / "logs")
+        self._patch = patch("core.structured_logger.get_logger", return_value=self.slog)
+        self._patch.start()
+
+    def tearDown(self):
+        import shutil
+        self._patch.stop()
+        for lg in self.slog._loggers.values():
+            for handler in list(lg.handlers):
+                handler.close()
+                lg.removeHandler(handler)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def _health_entries(self):
+        path = Path(self.tmp_dir) / "logs" / "health.jsonl"
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    def test_resource_classes(self):
+        from core.scheduler import resource_class
+        self.assertEqual(resource_class({"command": "__index_all__"}), "cpu")
+        self.assertEqual(resource_class({"command": "__health_check__"}), "io")
+        self.assertEqual(resource_class({"command": "daily briefing"}), "llm")
+        self.assertEqual(resource_class({"command": "__index_all__", "resource_class": "io"}), "io")
+
+    def test_classes_run_concurrently_within_limits(self):
+        from core.scheduler import ScheduledTaskExecutor, TaskScheduler
+        config = [{"name": f"io{i}", "command": "x", "resource_class": "io"} for i in range(4)]
+        config += [{"name": f"cpu{i}", "command": "x", "resource_class": "cpu"} for i in range(2)]
+        sched = TaskScheduler(config, self.state_path)
+        running = {"io": 0, "cpu": 0}
+        peak = {"io": 0, "cpu": 0}
+
+        async def runner(task):
+            rclass = task["resource_class"]
+            running[rclass] += 1
+            peak[rclass] = max(peak[rclass], running[rclass])
+            await asyncio.sleep(0.05)
+            running[rclass] -= 1
+            return True, "done"
+
+        async def go():
+            executor = ScheduledTaskExecutor(sched, runner, {"io": 2, "cpu": 1})
+            self.assertEqual(len(executor.dispatch_due()), 6)
+            await executor.drain()
+
+        self._run(go())
+        self.assertEqual(peak, {"io": 2, "cpu": 1})
+        self.assertEqual(sched.get_due_tasks(), [])
+        entries = [e for e in self._health_entries() if e["event"] == "scheduled_task"]
+        self.assertEqual(len(entries), 6)
+        cpu_waits = sorted(e["queue_wait_s"] for e in entries if e["resource_class"] == "cpu")
+        self.assertGreaterEqual(cpu_waits[1], 0.04)   # second cpu task queued behind the first
+        self.assertTrue(all(e["status"] == "completed" and e["run_s"] > 0 for e in entries))
+
+    def test_in_flight_task_not_submitted_twice(self):
+        from core.scheduler import ScheduledTaskExecutor, TaskScheduler
+        sched = TaskScheduler([{"name": "T1", "command": "x"}], self.state_path)
+        calls = []
+
+        async def runner(task):
+            calls.append(task["name"])
+            await asyncio.sleep(0.02)
+            return True, "ok"
+
+        async def go():
+            executor = ScheduledTaskExecutor(sched, runner)
+            self.assertEqual(executor.dispatch_due(), ["T1"])
+            self.assertEqual(executor.dispatch_due(), [])   # still due, but in flight
+            self.assertEqual(executor.inflight, ["T1"])
+            await executor.drain()
+
+        self._run(go())
+        self.assertEqual(calls, ["T1"])
+
+    def test_timeout_marks_failed(self):
+        from core.scheduler import ScheduledTaskExecutor, TaskScheduler
+        sched = TaskScheduler([{"name": "Slow", "command": "x", "max_runtime_minutes": 0.001}],
+                              self.state_path)
+
+        async def runner(task):
+            await asyncio.sleep(5)
+            return True, "ok"
+
+        async def go():
+            executor = ScheduledTaskExecutor(sched, runner)
+            executor.dispatch_due()
+            await executor.drain()
+
+        self._run(go())
+        self.assertEqual(sched._fail_counts.get("Slow"), 1)
+        entry = self._health_entries()[-1]
+        self.assertEqual(entry["status"], "timeout")
+
+    def test_shutdown_cancels_without_marking(self):
+        from core.scheduler import ScheduledTaskExecutor, TaskScheduler
+        sched = TaskScheduler([{"name": "Long", "command": "x"}], self.state_path)
+
+        async def runner(task):
+            await asyncio.sleep(5)
+            return True, "ok"
+
+        async def go():
+            executor = ScheduledTaskExecutor(sched, runner)
+            executor.dispatch_due()
+            await asyncio.sleep(0.01)
+            await executor.shutdown()
+            self.assertEqual(executor.inflight, [])
+
+        self._run(go())
+        self.assertNotIn("Long", sched._fail_counts)
+        self.assertEqual([t["name"] for t in sched.get_due_tasks()], ["Long"])
+        self.assertEqual(self._health_entries()[-1]["status"], "cancelled")
+
+
 # ══════════════════════════════════════════════════════════
 # NIGHT MODE — BACKLOG TRIMMING
 # ══════════════════════════════════════════════════════════
@@ -4567,7 +6181,7 @@ class TestCompletedTasksIntegration(unittest.TestCase):
 # ══════════════════════════════════════════════════════════
 
 class TestScheduledTaskTimeout(unittest.TestCase):
-    """Verify that the awareness loop enforces max_runtime_minutes on scheduled tasks."""
+    """Verify that scheduled tasks are held to max_runtime_minutes (ScheduledTaskExecutor)."""
 
     def _run(self, coro):
         """Helper to run a coroutine in the test event loop."""
@@ -4580,20 +6194,20 @@ class TestScheduledTaskTimeout(unittest.TestCase):
     def test_timeout_read_from_task_config(self):
         """max_runtime_minutes is used as the timeout for asyncio.wait_for."""
         import inspect
-        from core.awareness_mixin import AwarenessMixin
-        source = inspect.getsource(AwarenessMixin._awareness_loop)
+        from core.scheduler import ScheduledTaskExecutor
+        source = inspect.getsource(ScheduledTaskExecutor._run)
         self.assertIn("max_runtime_minutes", source,
-                       "Awareness loop should read max_runtime_minutes from task config")
+                       "Executor should read max_runtime_minutes from task config")
         self.assertIn("asyncio.wait_for", source,
-                       "Awareness loop should use asyncio.wait_for for timeout enforcement")
+                       "Executor should use asyncio.wait_for for timeout enforcement")
 
     def test_timeout_catches_asyncio_timeout_error(self):
         """asyncio.TimeoutError should be caught and the task marked as failed."""
         import inspect
-        from core.awareness_mixin import AwarenessMixin
-        source = inspect.getsource(AwarenessMixin._awareness_loop)
+        from core.scheduler import ScheduledTaskExecutor
+        source = inspect.getsource(ScheduledTaskExecutor._run)
         self.assertIn("asyncio.TimeoutError", source,
-                       "Awareness loop should catch asyncio.TimeoutError")
+                       "Executor should catch asyncio.TimeoutError")
 
     def test_timeout_marks_task_failed(self):
         """When a builtin task times out, mark_failed is called with timeout message."""
@@ -4615,43 +6229,45 @@ class TestScheduledTaskTimeout(unittest.TestCase):
     def test_builtin_command_wrapped_in_wait_for(self):
         """Built-in commands should be wrapped with asyncio.wait_for."""
         import inspect
-        from core.awareness_mixin import AwarenessMixin
-        source = inspect.getsource(AwarenessMixin._awareness_loop)
-        # Should wrap run_builtin in wait_for
-        self.assertIn("await asyncio.wait_for(\n", source,
+        from core.scheduler import ScheduledTaskExecutor
+        source = inspect.getsource(ScheduledTaskExecutor._run)
+        # The runner (run_builtin for built-ins) is wrapped in wait_for
+        self.assertIn("await asyncio.wait_for(self._runner(task)", source,
                        "Built-in commands should be wrapped in asyncio.wait_for")
 
     def test_user_command_wrapped_in_wait_for(self):
         """User commands (process_user_input) should also be timeout-protected."""
         import inspect
+        from core.scheduler import ScheduledTaskExecutor
+        source = inspect.getsource(ScheduledTaskExecutor._run)
+        # User commands go through the same runner, so the same wait_for covers them
         from core.awareness_mixin import AwarenessMixin
-        source = inspect.getsource(AwarenessMixin._awareness_loop)
-        # Both builtin and user commands should use wait_for
-        occurrences = source.count("asyncio.wait_for")
-        self.assertGreaterEqual(occurrences, 2,
-                       "Both built-in and user commands should use asyncio.wait_for")
+        self.assertIn("asyncio.wait_for", source)
+        runner = inspect.getsource(AwarenessMixin._run_scheduled_task)
+        self.assertIn("process_user_input", runner,
+                       "User commands should run through the executor's runner")
 
     def test_default_timeout_is_60_minutes(self):
         """If max_runtime_minutes is not set, default to 60."""
         import inspect
-        from core.awareness_mixin import AwarenessMixin
-        source = inspect.getsource(AwarenessMixin._awareness_loop)
+        from core.scheduler import ScheduledTaskExecutor
+        source = inspect.getsource(ScheduledTaskExecutor._run)
         self.assertIn("60", source,
                        "Default timeout should be 60 minutes")
 
     def test_timeout_error_message_includes_duration(self):
         """The timeout error message should include how many minutes elapsed."""
         import inspect
-        from core.awareness_mixin import AwarenessMixin
-        source = inspect.getsource(AwarenessMixin._awareness_loop)
+        from core.scheduler import ScheduledTaskExecutor
+        source = inspect.getsource(ScheduledTaskExecutor._run)
         self.assertIn("Timed out after", source,
                        "Timeout message should include readable duration")
 
     def test_timeout_converted_to_seconds(self):
         """max_runtime_minutes should be converted to seconds for asyncio.wait_for."""
         import inspect
-        from core.awareness_mixin import AwarenessMixin
-        source = inspect.getsource(AwarenessMixin._awareness_loop)
+        from core.scheduler import ScheduledTaskExecutor
+        source = inspect.getsource(ScheduledTaskExecutor._run)
         self.assertIn("* 60", source,
                        "Minutes should be converted to seconds for wait_for timeout")
 
@@ -6483,6 +8099,151 @@ class TestStructuredLoggerEndToEnd(unittest.TestCase):
         self.assertAlmostEqual(stats["avg_duration_s"], 20.0, places=1)
 
 
+# ══════════════════════════════════════════════════════════
+# TRACING — HOT-PATH SPANS + /api/perf
+# ══════════════════════════════════════════════════════════
+
+class TestTracing(unittest.TestCase):
+    """core.tracing: contextvar spans, traces.jsonl and sliding-window percentiles."""
+
+    def setUp(self):
+        from core.structured_logger import StructuredLogger
+        from core.tracing import PERF
+        self.tmp_dir = tempfile.mkdtemp()
+        self.slog = StructuredLogger(log_dir=Path(self.tmp_dir))
+        self._patch = patch("core.structured_logger.get_logger", return_value=self.slog)
+        self._patch.start()
+        PERF.reset()
+
+    def tearDown(self):
+        import shutil
+        self._patch.stop()
+        for lg in self.slog._loggers.values():
+            for handler in list(lg.handlers):
+                handler.close()
+                lg.removeHandler(handler)
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _traces(self) -> list[dict]:
+        path = Path(self.tmp_dir) / "traces.jsonl"
+        return [json.loads(line) for line in path.read_text().splitlines()] if path.exists() else []
+
+    def _run(self, coro):
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(coro)
+        finally:
+            loop.close()
+
+    def test_nested_spans_written_as_one_trace(self):
+        from core.tracing import span, trace
+        with trace("request", chars=5):
+            with span("outer"):
+                with span("inner", provider="groq"):
+                    pass
+            with span("sibling"):
+                pass
+        traces = self._traces()
+        self.assertEqual(len(traces), 1)
+        t = traces[0]
+        self.assertEqual(t["name"], "request")
+        self.assertEqual(t["attrs"], {"chars": 5})
+        self.assertEqual([(s["name"], s["depth"]) for s in t["spans"]],
+                         [("outer", 0), ("inner", 1), ("sibling", 0)])
+        self.assertEqual(t["spans"][1]["attrs"], {"provider": "groq"})
+        self.assertGreaterEqual(t["duration_ms"], t["spans"][0]["duration_ms"])
+
+    def test_concurrent_requests_do_not_mix(self):
+        from core.tracing import span, trace
+
+        async def request(name, delay):
+            with trace(name):
+                with span(f"{name}.stage"):
+                    await asyncio.sleep(delay)
+
+        async def go():
+            await asyncio.gather(request("a", 0.02), request("b", 0.01))
+
+        self._run(go())
+        traces = {t["name"]: t for t in self._traces()}
+        self.assertEqual([s["name"] for s in traces["a"]["spans"]], ["a.stage"])
+        self.assertEqual([s["name"] for s in traces["b"]["spans"]], ["b.stage"])
+
+    def test_traced_decorator_sync_and_async_and_errors(self):
+        from core.tracing import PERF, trace, traced
+
+        @traced("sync_stage")
+        def sync_fn(x):
+            return x * 2
+
+        @traced("async_stage")
+        async def async_fn():
+            raise ValueError("boom")
+
+        async def go():
+            with trace("request"):
+                self.assertEqual(sync_fn(2), 4)
+                with self.assertRaises(ValueError):
+                    await async_fn()
+
+        self._run(go())
+        spans = self._traces()[0]["spans"]
+        self.assertEqual([s["name"] for s in spans], ["sync_stage", "async_stage"])
+        self.assertEqual(spans[1]["error"], "ValueError")
+        self.assertEqual(sync_fn.__name__, "sync_fn")
+        self.assertIn("async_stage", PERF.snapshot())
+
+    def test_span_outside_trace_only_feeds_stats(self):
+        from core.tracing import PERF, span
+        with span("background"):
+            pass
+        self.assertEqual(self._traces(), [])
+        self.assertEqual(PERF.snapshot()["background"]["count"], 1)
+
+    def test_percentiles_over_sliding_window(self):
+        from core.tracing import PerfStats
+        stats = PerfStats(window_s=60, max_samples=1000)
+        for ms in range(1, 101):
+            stats.record("stage", float(ms))
+        snap = stats.snapshot()["stage"]
+        self.assertEqual((snap["count"], snap["p50"], snap["p95"], snap["p99"], snap["max"]),
+                         (100, 50.0, 95.0, 99.0, 100.0))
+        # Samples older than the window drop out
+        stats.window_s = 0
+        self.assertEqual(stats.snapshot(), {})
+
+    def test_api_perf_endpoint(self):
+        import socket
+        from aiohttp import web, ClientSession
+        from core.tracing import span
+        from dashboard.server import create_app
+
+        for _ in range(3):
+            with span("analyze_request"):
+                pass
+
+        async def _test():
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+            runner = web.AppRunner(create_app(leon_core=None))
+            await runner.setup()
+            site = web.TCPSite(runner, "127.0.0.1", port)
+            await site.start()
+            try:
+                async with ClientSession() as session:
+                    async with session.get(f"http://127.0.0.1:{port}/api/perf") as resp:
+                        self.assertEqual(resp.status, 200)
+                        return await resp.json()
+            finally:
+                await runner.cleanup()
+
+        data = self._run(_test())
+        self.assertEqual(data["stages"]["analyze_request"]["count"], 3)
+        self.assertIn("p99", data["stages"]["analyze_request"])
+        self.assertIn("window_seconds", data)
+
+
 # ══════════════════════════════════════════════════════════
 # ASYNC SUBPROCESS MANAGEMENT FIXES
 # ══════════════════════════════════════════════════════════
@@ -6873,6 +8634,241 @@ class TestMemoryBackupRotation(unittest.TestCase):
         self.assertFalse(bak4.exists(), ".bak4 should not exist (only 3 backups kept)")
 
 
+# ══════════════════════════════════════════════════════════
+# MEMORY WRITE-AHEAD LOG + SNAPSHOTS
+# ══════════════════════════════════════════════════════════
+
+class TestMemoryWriteAheadLog(unittest.TestCase):
+    """Method mutations go to the log; snapshots are compacted from it."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.mem_path = Path(self.tmp_dir) / "leon_memory.json"
+        from core.memory import MemorySystem
+        self.MemorySystem = MemorySystem
+        self.mem = MemorySystem(str(self.mem_path))
+        self.mem.save(force=True)
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def reload(self):
+        return self.MemorySystem(str(self.mem_path))
+
+    def test_mutations_append_to_log_not_snapshot(self):
+        before = self.mem_path.read_text()
+        self.mem.learn("color", "blue")
+        self.mem.add_conversation("hello")
+        self.assertEqual(self.mem_path.read_text(), before)
+        segments = list(self.mem.wal_dir.glob("*.jsonl"))
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(len(segments[0].read_text().splitlines()), 2)
+
+        mem2 = self.reload()
+        self.assertEqual(mem2.memory["learned_context"]["color"], "blue")
+        self.assertEqual(mem2.memory["conversation_history"][-1]["content"], "hello")
+        self.assertNotIn("_wal_seq", mem2.memory)
+
+    def test_task_lifecycle_replayed(self):
+        self.mem.add_project("Demo", "/tmp/demo")
+        self.mem.add_active_task("agent_1", {"description": "fix it", "project_name": "Demo"})
+        self.mem.update_active_task("agent_1", {"status": "reviewing"})
+        self.mem.save()
+        self.assertEqual(self.reload().memory["active_tasks"]["agent_1"]["status"], "reviewing")
+        self.mem.complete_task("agent_1", {"summary": "fixed"})
+
+        mem2 = self.reload()
+        self.assertEqual(mem2.memory["active_tasks"], {})
+        self.assertEqual(mem2.memory["completed_tasks"][-1]["result_summary"], "fixed")
+        project = mem2.get_project_context("Demo")
+        self.assertEqual(project["active_agents"], [])
+        self.assertEqual(project["context"]["recent_changes"], ["fixed"])
+
+    def test_torn_record_skipped(self):
+        self.mem.learn("a", 1)
+        self.mem.learn("b", 2)
+        segment = next(self.mem.wal_dir.glob("*.jsonl"))
+        with open(segment, "a") as f:
+            f.write('{"seq": 99, "ops": [{"op": "set", "pa')
+        mem2 = self.reload()
+        self.assertEqual(mem2.memory["learned_context"], {"a": 1, "b": 2})
+
+    def test_compaction_writes_snapshot_and_drops_segments(self):
+        with patch("core.memory._WAL_COMPACT_BYTES", 200):
+            for i in range(5):
+                self.mem.learn(f"k{i}", "x" * 50)
+            self.mem._compactor.join(timeout=5)
+        data = json.loads(self.mem_path.read_text())
+        self.assertIn("k0", data["learned_context"])
+        self.assertGreater(data["_wal_seq"], 0)
+        # Only records newer than the snapshot are left in the log
+        for segment in self.mem.wal_dir.glob("*.jsonl"):
+            self.assertGreater(int(segment.stem), data["_wal_seq"])
+        self.assertEqual(self.reload().memory["learned_context"], self.mem.memory["learned_context"])
+
+    def test_forced_save_truncates_log(self):
+        self.mem.learn("a", 1)
+        self.mem.save(force=True)
+        self.assertEqual(list(self.mem.wal_dir.glob("*.jsonl")), [])
+        self.assertFalse(self.mem._dirty)
+        self.assertEqual(self.reload().memory["learned_context"], {"a": 1})
+
+    def test_backups_are_hard_links(self):
+        self.mem.learn("a", 1)
+        self.mem.save(force=True)
+        old_inode = self.mem_path.stat().st_ino
+        self.mem.learn("a", 2)
+        self.mem.save(force=True)
+        bak1 = self.mem._backup_path(1)
+        self.assertEqual(bak1.stat().st_ino, old_inode)
+        self.assertEqual(json.loads(bak1.read_text())["learned_context"]["a"], 1)
+        self.assertNotEqual(self.mem_path.stat().st_ino, old_inode)
+
+    def test_direct_mutation_snapshotted_after_debounce(self):
+        self.mem.memory["learned_context"]["direct"] = True
+        self.mem._last_save_time -= 10
+        self.mem.save()
+        self.mem._compactor.join(timeout=5)
+        self.assertTrue(json.loads(self.mem_path.read_text())["learned_context"]["direct"])
+
+
+# ══════════════════════════════════════════════════════════
+# MEMORY — CHANGE FEED & DELTA SYNC
+# ══════════════════════════════════════════════════════════
+
+class TestMemoryDeltaSync(unittest.TestCase):
+    """Versioned change feed on MemorySystem and the Right Brain's replica."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.mem_path = Path(self.tmp_dir) / "leon_memory.json"
+        from core.memory import MemorySystem
+        self.MemorySystem = MemorySystem
+        self.mem = MemorySystem(str(self.mem_path))
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_version_and_changes_since(self):
+        v0 = self.mem.version
+        self.mem.learn("color", "blue")
+        self.mem.add_conversation("hello")
+        self.assertEqual(self.mem.version, v0 + 2)
+        changes = self.mem.changes_since(v0)
+        self.assertEqual([c["seq"] for c in changes], [v0 + 1, v0 + 2])
+        self.assertEqual(changes[0]["ops"][0]["path"], ["learned_context", "color"])
+        self.assertEqual(self.mem.changes_since(self.mem.version), [])
+
+    def test_unsaved_mutations_are_logged_on_read(self):
+        v0 = self.mem.version
+        self.mem.remove_active_task("nobody")  # mutates without save()
+        self.assertEqual(len(self.mem.changes_since(v0)), 1)
+
+    def test_forced_save_reaches_change_feed(self):
+        v0 = self.mem.version
+        self.mem.remove_active_task("nobody")
+        self.mem.save(force=True)
+        self.assertEqual(self.mem.version, v0 + 1)
+        payload = self.mem.sync_payload(v0)
+        self.assertEqual(payload["mode"], "delta")
+        self.assertEqual(payload["changes"][0]["ops"][0]["path"], ["active_tasks", "nobody"])
+
+    def test_truncated_log_needs_full_snapshot(self):
+        import core.memory as memory_module
+        with patch.object(memory_module, "_CHANGE_LOG_RECORDS", 3):
+            mem = self.MemorySystem(str(Path(self.tmp_dir) / "small.json"))
+        for i in range(5):
+            mem.learn(f"k{i}", i)
+        self.assertIsNone(mem.changes_since(0))
+        self.assertEqual(len(mem.changes_since(2)), 3)
+        self.assertIsNone(mem.changes_since(mem.version + 1))  # peer from another store
+        payload = mem.sync_payload(0)
+        self.assertEqual(payload["mode"], "full")
+        self.assertEqual(payload["memory"]["learned_context"]["k4"], 4)
+
+    def test_change_log_survives_reload(self):
+        v0 = self.mem.version
+        self.mem.learn("a", 1)
+        self.mem.learn("b", 2)
+        reloaded = self.MemorySystem(str(self.mem_path))
+        self.assertEqual(reloaded.version, v0 + 2)
+        self.assertEqual(len(reloaded.changes_since(v0)), 2)
+
+    def test_replica_follows_deltas(self):
+        from core.memory import MemoryReplica
+        replica = MemoryReplica()
+        self.mem.add_project("Proj", "/tmp/proj", ["python"])
+        self.assertTrue(replica.apply(self.mem.sync_payload(None)))
+        self.assertEqual(replica.version, self.mem.version)
+
+        self.mem.add_conversation("one")
+        self.mem.learn("editor", "vim")
+        payload = self.mem.sync_payload(replica.version)
+        self.assertEqual(payload["mode"], "delta")
+        self.assertTrue(replica.apply(payload))
+        self.assertEqual(replica.version, self.mem.version)
+        self.assertEqual(replica.data, self.mem.snapshot()[1])
+        self.assertIsNone(self.mem.sync_payload(replica.version))
+
+        # Re-applying an overlapping delta is harmless
+        self.assertTrue(replica.apply(payload))
+        self.assertEqual(replica.data, self.mem.snapshot()[1])
+
+    def test_replica_rejects_gap(self):
+        from core.memory import MemoryReplica
+        replica = MemoryReplica()
+        replica.apply(self.mem.sync_payload(None))
+        base = replica.version
+        self.mem.learn("x", 1)
+        skipped = self.mem.version
+        self.mem.learn("y", 2)
+        self.assertFalse(replica.apply(self.mem.sync_payload(skipped)))
+        self.assertEqual(replica.version, base)
+        self.assertFalse(MemoryReplica().apply({"mode": "delta", "base": 0, "changes": []}))
+
+    def test_left_brain_pushes_only_deltas_after_ack(self):
+        from core.task_mixin import TaskMixin
+        from core.neural_bridge import BridgeMessage, MSG_MEMORY_ACK, MSG_MEMORY_SYNC
+        from core.memory import MemoryReplica
+
+        replica = MemoryReplica()
+        sent = []
+
+        class FakeBridge:
+            connected = True
+
+            async def send(self, msg):
+                sent.append(msg)
+                replica.apply(msg.payload)
+
+        class Left(TaskMixin):
+            pass
+
+        left = Left()
+        left.memory = self.mem
+        left.bridge = FakeBridge()
+        left._memory_peer_version = None
+        self.mem.learn("k", "v")
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(left._push_memory_sync())  # no ack yet → nothing
+            self.assertEqual(sent, [])
+            loop.run_until_complete(left._handle_memory_ack(
+                BridgeMessage(type=MSG_MEMORY_ACK, payload={"version": None})))
+            self.mem.add_conversation("later")
+            loop.run_until_complete(left._push_memory_sync())
+            loop.run_until_complete(left._push_memory_sync())  # nothing new
+        finally:
+            loop.close()
+        self.assertEqual([m.type for m in sent], [MSG_MEMORY_SYNC, MSG_MEMORY_SYNC])
+        self.assertEqual([m.payload["mode"] for m in sent], ["full", "delta"])
+        self.assertEqual(len(sent[1].payload["changes"]), 1)
+        self.assertEqual(replica.data, self.mem.snapshot()[1])
+
+
 # ══════════════════════════════════════════════════════════
 # API CLIENT — PERSISTENT HTTP CONNECTION POOLS
 # ══════════════════════════════════════════════════════════
@@ -7368,6 +9364,839 @@ class TestConversationMixin(unittest.TestCase):
         self.assertNotIn("def _check_sensitive_permissions", source)
 
 
+class TestContextBuilder(unittest.TestCase):
+    """core/context_builder.py — token-budgeted, version-cached prompt context."""
+
+    def _make_memory(self):
+        from core.memory import MemorySystem
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        return MemorySystem(os.path.join(tmpdir.name, "memory.json"))
+
+    def test_sections_fit_budget(self):
+        from core.context_builder import ContextBuilder
+        from router.model_router import estimate_tokens
+        mem = self._make_memory()
+        for i in range(200):
+            mem.learn(f"fact_{i}", "something the user mentioned " * 3)
+            mem.add_active_task(f"agent-{i}", {"description": f"build feature {i}", "project_name": "site"})
+        context = ContextBuilder(mem, budgets={"learned": 100, "tasks": 100})
+        learned = context.section("learned")
+        self.assertIn("fact_0", learned)
+        self.assertRegex(learned, r"\(\+\d+ more\)$")
+        self.assertLessEqual(estimate_tokens(learned), 110)
+        tasks = context.section("tasks")
+        self.assertIn("- build feature 0 [site, running, since ", tasks)
+        self.assertLessEqual(estimate_tokens(tasks), 110)
+        self.assertEqual(context.section("projects"), "None")
+
+    def test_sections_cached_until_memory_version_changes(self):
+        from unittest.mock import patch
+        from core.context_builder import ContextBuilder
+        mem = self._make_memory()
+        mem.learn("fav_color", "blue")
+        context = ContextBuilder(mem)
+        with patch.object(context, "_renderers", dict(context._renderers)) as renderers:
+            calls = []
+            render = renderers["learned"]
+            renderers["learned"] = lambda: calls.append(1) or render()
+            first = context.section("learned")
+            self.assertEqual(context.section("learned"), first)
+            self.assertEqual(len(calls), 1)
+            mem.learn("fav_food", "tacos")
+            self.assertIn("fav_food", context.section("learned"))
+            self.assertEqual(len(calls), 2)
+
+    def test_history_keeps_recent_turns_and_relevant_older_ones(self):
+        from core.context_builder import ContextBuilder, RECENT_MESSAGES
+        mem = self._make_memory()
+        mem.add_conversation("how is the kubernetes cluster migration going", role="user")
+        mem.add_conversation("The kubernetes migration is halfway done.", role="assistant")
+        for i in range(15):
+            mem.add_conversation(f"random chat number {i}", role="user")
+            mem.add_conversation(f"reply number {i} " + "words " * 400, role="assistant")
+        mem.add_conversation("remind me where the kubernetes migration stands", role="user")
+        context = ContextBuilder(mem, history_budget=2000)
+        messages = context.history("remind me where the kubernetes migration stands")
+
+        self.assertEqual(messages[-1], {"role": "user", "content": "remind me where the kubernetes migration stands"})
+        self.assertEqual(messages[0]["content"], "how is the kubernetes cluster migration going")
+        self.assertEqual(messages[1]["role"], "assistant")
+        self.assertNotIn("random chat number 0", [m["content"] for m in messages])
+        self.assertLessEqual(len(messages), RECENT_MESSAGES + 2)
+        self.assertLessEqual(ContextBuilder.prompt_tokens("", messages)["history"], 2000)
+
+    def test_short_history_sent_unchanged(self):
+        from core.context_builder import ContextBuilder
+        mem = self._make_memory()
+        for role, text in (("assistant", "Morning."), ("user", "hi"), ("assistant", "Hey."), ("user", "status?")):
+            mem.add_conversation(text, role=role)
+        expected = [{"role": m["role"], "content": m["content"]} for m in mem.get_recent_context(limit=20)]
+        self.assertEqual(ContextBuilder(mem).history("status?"), expected)
+
+    def test_respond_conversationally_logs_prompt_tokens(self):
+        from unittest.mock import AsyncMock, MagicMock
+        from core.conversation_mixin import ConversationMixin
+
+        class Brain(ConversationMixin):
+            pass
+
+        brain = Brain()
+        brain.memory = self._make_memory()
+        brain.memory.learn("fav_color", "blue")
+        brain.memory.add_conversation("what's my favorite color", role="user")
+        brain.api = MagicMock()
+        brain.api.create_message = AsyncMock(return_value="Blue.")
+        brain.system_prompt = "You are Leon."
+        brain.vision = None
+        loop = asyncio.new_event_loop()
+        try:
+            with self.assertLogs("leon", level="INFO") as logs:
+                reply = loop.run_until_complete(brain._respond_conversationally("what's my favorite color"))
+        finally:
+            loop.close()
+        self.assertEqual(reply, "Blue.")
+        kwargs = brain.api.create_message.call_args.kwargs
+        self.assertIn("fav_color: blue", kwargs["system"])
+        self.assertEqual(kwargs["messages"], [{"role": "user", "content": "what's my favorite color"}])
+        self.assertTrue(any("Prompt: ~" in line for line in logs.output))
+
+    def test_analyze_request_logs_prompt_tokens(self):
+        from unittest.mock import AsyncMock, MagicMock, patch
+        from core.conversation_mixin import ConversationMixin
+        import core.conversation_mixin as conversation_mixin
+
+        class Brain(ConversationMixin):
+            pass
+
+        brain = Brain()
+        brain.memory = self._make_memory()
+        brain.api = MagicMock()
+        brain.api.analyze_json = AsyncMock(return_value={"type": "simple", "tasks": []})
+        spans = []
+        real_span = conversation_mixin.span
+
+        def recording_span(name, **attrs):
+            spans.append((name, attrs))
+            return real_span(name, **attrs)
+
+        loop = asyncio.new_event_loop()
+        try:
+            with patch.object(conversation_mixin, "span", recording_span), \
+                    self.assertLogs("leon", level="INFO") as logs:
+                result = loop.run_until_complete(brain._analyze_request("how's the build going"))
+        finally:
+            loop.close()
+        self.assertEqual(result["type"], "simple")
+        self.assertTrue(any("Analysis prompt: ~" in line for line in logs.output))
+        name, attrs = spans[0]
+        self.assertEqual(name, "llm_analyze")
+        self.assertGreater(attrs["prompt_tokens"], 0)
+
+
+# ══════════════════════════════════════════════════════════
+# CODE INDEXER — INCREMENTAL MANIFEST
+# ══════════════════════════════════════════════════════════
+
+class _FakeChromaCollection:
+    """In-memory stand-in for a ChromaDB collection (upsert/delete only)."""
+
+    def __init__(self):
+        self.docs = {}
+        self.embedded = 0
+
+    def upsert(self, ids, documents, metadatas, embeddings=None):
+        self.embedded += len(ids)
+        for cid, doc, meta in zip(ids, documents, metadatas):
+            self.docs[cid] = (doc, meta)
+
+    def delete(self, ids=None, where=None):
+        for cid in list(ids or []):
+            self.docs.pop(cid, None)
+        if where:
+            for cid, (_, meta) in list(self.docs.items()):
+                if meta["filepath"] == where["filepath"]:
+                    del self.docs[cid]
+
+
+try:
+    import watchdog as _watchdog_check
+    _HAS_WATCHDOG = True
+except ImportError:
+    _HAS_WATCHDOG = False
+
+
+class TestIncrementalIndexer(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.project = root / "proj"
+        self.project.mkdir()
+        self.write("a.py", "def one():\n    return 1\n\n\n\ndef two():\n    return 2\n")
+        self.write("b.py", "x = 1\n")
+        patcher = patch("tools.indexer.RAG_DB_DIR", root / "rag_db")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.collection = _FakeChromaCollection()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel, text):
+        (self.project / rel).write_text(text)
+
+    def make_indexer(self):
+        from tools.indexer import CodeIndexer
+        ix = CodeIndexer("proj", str(self.project), workers=2)
+        ix._collection = self.collection
+        ix._ef = lambda docs: [[0.0] * 3 for _ in docs]
+        return ix
+
+    def manifest_ids(self, ix):
+        return {cid for entry in ix._files.values() for cid in entry["chunks"]}
+
+    def test_first_run_indexes_everything(self):
+        stats = self.make_indexer().index()
+        self.assertEqual(stats["files_indexed"], 2)
+        self.assertEqual(stats["chunks_added"], len(self.collection.docs))
+        self.assertGreater(stats["chunks_added"], 0)
+
+    def test_unchanged_files_not_rehashed(self):
+        self.make_indexer().index()
+        with patch("tools.indexer._file_hash") as file_hash:
+            stats = self.make_indexer().index()
+        file_hash.assert_not_called()
+        self.assertEqual(stats["files_skipped"], 2)
+        self.assertEqual(stats["chunks_added"], 0)
+
+    def test_touched_file_with_same_content_not_reembedded(self):
+        self.make_indexer().index()
+        os.utime(self.project / "b.py", ns=(1, 1))
+        stats = self.make_indexer().index()
+        self.assertEqual(stats["files_rehashed"], 1)
+        self.assertEqual(stats["files_indexed"], 0)
+
+    def test_shrunk_file_drops_stale_chunks(self):
+        ix = self.make_indexer()
+        ix.index()
+        before = len(self.collection.docs)
+        self.write("a.py", "def one():\n    return 1\n")
+        stats = self.make_indexer().index()
+        self.assertEqual(stats["files_indexed"], 1)
+        self.assertGreater(stats["chunks_deleted"], 0)
+        self.assertLess(len(self.collection.docs), before)
+        self.assertEqual(set(self.collection.docs), self.manifest_ids(self.make_indexer()))
+
+    def test_deleted_file_removed(self):
+        self.make_indexer().index()
+        (self.project / "b.py").unlink()
+        ix = self.make_indexer()
+        stats = ix.index()
+        self.assertEqual(stats["files_deleted"], 1)
+        self.assertNotIn("b.py", ix._files)
+        self.assertFalse(any(m["filepath"] == "b.py" for _, m in self.collection.docs.values()))
+
+    def test_update_only_touches_given_paths(self):
+        ix = self.make_indexer()
+        ix.index()
+        self.write("b.py", "x = 2\n")
+        (self.project / "a.py").unlink()
+        stats = ix.update([str(self.project / "b.py")])
+        self.assertEqual((stats["files_indexed"], stats["files_deleted"]), (1, 0))
+        stats = ix.update(["a.py", "../outside.py"])
+        self.assertEqual(stats["files_deleted"], 1)
+        self.assertEqual(set(self.collection.docs), self.manifest_ids(ix))
+
+    def test_legacy_hash_file_migrated(self):
+        from tools.indexer import RAG_DB_DIR
+        db = RAG_DB_DIR / "proj"
+        db.mkdir(parents=True)
+        (db / "file_hashes.json").write_text(json.dumps({"b.py": "stale"}))
+        self.collection.upsert(["old"], ["x = 0"], [{"filepath": "b.py", "start_line": 1, "end_line": 1}])
+        stats = self.make_indexer().index()
+        self.assertEqual(stats["files_indexed"], 2)
+        self.assertNotIn("old", self.collection.docs)
+
+    def test_failed_upsert_retried_next_run(self):
+        ix = self.make_indexer()
+        with patch.object(self.collection, "upsert", side_effect=RuntimeError("db down")):
+            stats = ix.index()
+        self.assertEqual(stats["chunks_added"], 0)
+        stats = self.make_indexer().index()
+        self.assertEqual(stats["files_indexed"], 2)
+        self.assertGreater(len(self.collection.docs), 0)
+
+    def test_project_watcher_listener(self):
+        from types import SimpleNamespace
+        from core.project_watcher import _ChangeHandler
+        seen = []
+        handler = _ChangeHandler("proj", {"proj": []}, 10, [lambda name, c: seen.append((name, c))])
+        handler.dispatch(SimpleNamespace(
+            is_directory=False, src_path="/p/a.py", dest_path="/p/b.py", event_type="moved",
+        ))
+        self.assertEqual(seen[0][0], "proj")
+        self.assertEqual(seen[0][1]["dest_path"], "/p/b.py")
+
+    @unittest.skipUnless(_HAS_WATCHDOG, "watchdog not installed")
+    def test_watch_reindexes_changed_file(self):
+        import threading
+        from tools.indexer import watch
+        ix = self.make_indexer()
+        ix.index()
+        stop = threading.Event()
+        updates = []
+
+        def on_update(stats):
+            updates.append(stats)
+            stop.set()
+
+        t = threading.Thread(target=watch, args=([ix],),
+                             kwargs={"debounce": 0.1, "stop": stop, "on_update": on_update})
+        t.start()
+        try:
+            time.sleep(0.5)
+            self.write("c.py", "def three():\n    return 3\n")
+            stop.wait(timeout=10)
+        finally:
+            stop.set()
+            t.join(timeout=5)
+        self.assertTrue(updates, "watch() did not pick up the new file")
+        self.assertIn("c.py", ix._files)
+
+    def test_watch_survives_failed_update(self):
+        import threading
+        from tools.indexer import watch
+        ix = self.make_indexer()
+        listeners = []
+
+        class FakeWatcher:
+            def __init__(self, projects):
+                pass
+
+            def add_listener(self, listener):
+                listeners.append(listener)
+
+            def start(self):
+                return True
+
+            def stop(self):
+                pass
+
+        batches = []
+
+        def update(paths):
+            batches.append(set(paths))
+            if len(batches) == 1:
+                raise OSError("disk full")
+            stop.set()
+            return {"files_indexed": len(paths), "files_deleted": 0,
+                    "chunks_added": 0, "chunks_deleted": 0}
+
+        stop = threading.Event()
+        with patch("core.project_watcher.ProjectWatcher", FakeWatcher), \
+             patch.object(ix, "update", side_effect=update), \
+             self.assertLogs("leon.indexer", level="ERROR") as logs:
+            t = threading.Thread(target=watch, args=([ix],), kwargs={"debounce": 0.05, "stop": stop})
+            t.start()
+            try:
+                time.sleep(0.1)
+                listeners[0](ix.project_name, {"path": "a.py"})
+                time.sleep(0.5)
+                listeners[0](ix.project_name, {"path": "b.py"})
+                stop.wait(timeout=5)
+            finally:
+                stop.set()
+                t.join(timeout=5)
+        self.assertEqual(batches, [{"a.py"}, {"a.py", "b.py"}])
+        self.assertIn("disk full", logs.output[0])
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name) / "cache"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_roundtrip_and_persistence(self):
+        from tools.embedding_cache import EmbeddingCache
+        cache = EmbeddingCache(self.dir)
+        cache.put_many(["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+        self.assertEqual(set(cache.get_many(["a", "b", "c"])), {"a", "b"})
+        reopened = EmbeddingCache(self.dir)
+        self.assertEqual(list(reopened.get_many(["b"])["b"]), [3.0, 4.0])
+        self.assertEqual(len(reopened), 2)
+
+    def test_grows_past_capacity(self):
+        from tools.embedding_cache import EmbeddingCache
+        with patch("tools.embedding_cache.INITIAL_CAPACITY", 2):
+            cache = EmbeddingCache(self.dir)
+            for i in range(5):
+                cache.put_many([f"h{i}"], [[float(i), 0.0]])
+        found = EmbeddingCache(self.dir).get_many([f"h{i}" for i in range(5)])
+        self.assertEqual([found[f"h{i}"][0] for i in range(5)], [0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_sees_rows_added_by_another_instance(self):
+        from tools.embedding_cache import EmbeddingCache
+        first, second = EmbeddingCache(self.dir), EmbeddingCache(self.dir)
+        first.put_many(["a"], [[1.0]])
+        second.put_many(["b"], [[2.0]])
+        self.assertEqual(set(first.get_many(["a", "b"])), {"a", "b"})
+
+    def test_puts_append_to_log_instead_of_rewriting_index(self):
+        from tools.embedding_cache import EmbeddingCache
+        cache = EmbeddingCache(self.dir)
+        cache.put_many(["a"], [[1.0]])
+        index_mtime = (self.dir / "index.json").stat().st_mtime_ns
+        for i in range(5):
+            cache.put_many([f"h{i}"], [[float(i)]])
+        self.assertEqual((self.dir / "index.json").stat().st_mtime_ns, index_mtime)
+        log = next(self.dir.glob("index.*.log")).read_text().splitlines()
+        self.assertEqual(log, [f"h{i},{i + 1}" for i in range(5)])
+        self.assertEqual(len(EmbeddingCache(self.dir)), 6)
+
+    def test_log_compacted_into_index(self):
+        from tools.embedding_cache import EmbeddingCache
+        with patch("tools.embedding_cache.COMPACT_MIN_ROWS", 4):
+            first, second = EmbeddingCache(self.dir), EmbeddingCache(self.dir)
+            for i in range(10):
+                (first if i % 2 else second).put_many([f"h{i}"], [[float(i)]])
+        index = json.loads((self.dir / "index.json").read_text())
+        self.assertGreater(index["generation"], 2)
+        self.assertEqual(len(index["hashes"]), 10)
+        self.assertEqual(list(self.dir.glob("index.*.log")), [])  # old logs removed
+        for cache in (first, second, EmbeddingCache(self.dir)):
+            found = cache.get_many([f"h{i}" for i in range(10)])
+            self.assertEqual([found[f"h{i}"][0] for i in range(10)], [float(i) for i in range(10)])
+
+    def test_dim_mismatch_rejected(self):
+        from tools.embedding_cache import EmbeddingCache
+        cache = EmbeddingCache(self.dir)
+        cache.put_many(["a"], [[1.0, 2.0]])
+        with self.assertRaises(ValueError):
+            cache.put_many(["b"], [[1.0, 2.0, 3.0]])
+
+    def test_indexer_reuses_vectors_for_moved_and_shared_chunks(self):
+        from tools.indexer import CodeIndexer
+        body = "def one():\n    return 1\n\n\n\ndef two():\n    return 2\n"
+        projects = []
+        for name in ("p1", "p2"):
+            path = Path(self.tmp.name) / name
+            path.mkdir()
+            (path / "a.py").write_text(body)
+            projects.append(path)
+
+        embedded = []
+
+        def fake_ef(docs):
+            embedded.extend(docs)
+            return [[float(len(d)), 1.0] for d in docs]
+
+        def make(name, path):
+            ix = CodeIndexer(name, str(path))
+            ix._collection = _FakeChromaCollection()
+            ix._ef, ix._ef_model = fake_ef, "fake-model"
+            return ix
+
+        with patch("tools.indexer.RAG_DB_DIR", Path(self.tmp.name) / "rag_db"):
+            first = make("p1", projects[0]).index()
+            self.assertEqual(first["embed_cache_hit_rate"], 0.0)
+            n = len(embedded)
+
+            # Same content in another project: served entirely from the cache
+            second = make("p2", projects[1]).index()
+            self.assertEqual(second["embed_cache_hit_rate"], 1.0)
+            self.assertEqual(len(embedded), n)
+
+            # Lines shift: chunk IDs change, but only the edited chunk is embedded
+            (projects[0] / "a.py").write_text("# header\n" + body)
+            third = make("p1", projects[0]).index()
+            self.assertGreater(third["chunks_added"], 0)
+            self.assertEqual(len(embedded) - n, third["embed_cache_misses"])
+            self.assertLess(third["embed_cache_misses"], third["chunks_added"])
+
+
+# ══════════════════════════════════════════════════════════
+# CODE SEARCHER — RESIDENT SERVICE
+# ══════════════════════════════════════════════════════════
+
+class _FakeChromaModule:
+    """Stand-in for the chromadb package: counts clients and model loads."""
+
+    def __init__(self):
+        self.clients = []
+        self.models = 0
+        fake = self
+
+        class _EF:
+            def __init__(self, model_name=None):
+                fake.models += 1
+
+        class _Collection:
+            def count(self):
+                return 2
+
+            def query(self, query_texts, n_results):
+                row = lambda q: [f"doc for {q}", "other"]
+                return {
+                    "documents": [row(q) for q in query_texts],
+                    "metadatas": [[{"filepath": f"{q}.py", "start_line": 1, "end_line": 2},
+                                   {"filepath": "x.py", "start_line": 1, "end_line": 2}]
+                                  for q in query_texts],
+                    "distances": [[0.2, 1.9] for _ in query_texts],
+                }
+
+        class _Client:
+            def __init__(self, path):
+                fake.clients.append(path)
+
+            def get_or_create_collection(self, name, embedding_function):
+                return _Collection()
+
+        self.PersistentClient = _Client
+        self.utils = type("utils", (), {})()
+        self.utils.embedding_functions = type("ef", (), {
+            "SentenceTransformerEmbeddingFunction": _EF,
+            "DefaultEmbeddingFunction": _EF,
+        })
+
+    def modules(self):
+        return {
+            "chromadb": self,
+            "chromadb.utils": self.utils,
+            "chromadb.utils.embedding_functions": self.utils.embedding_functions,
+        }
+
+
+class TestSearchService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        for name in ("p1", "p2", "p3"):
+            (root / "rag_db" / name / "chroma").mkdir(parents=True)
+        self.fake = _FakeChromaModule()
+        for p in (patch.dict(sys.modules, self.fake.modules()),
+                  patch("tools.searcher.RAG_DB_DIR", root / "rag_db"),
+                  patch("tools.searcher.STRUCTURED_LOG", root / "search.jsonl")):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_model_and_client_reused(self):
+        from tools.searcher import SearchService
+        service = SearchService()
+        for _ in range(3):
+            results = service.search_vector("auth", "p1")
+        self.assertEqual(self.fake.models, 1)
+        self.assertEqual(len(self.fake.clients), 1)
+        self.assertEqual([r["filepath"] for r in results], ["auth.py"])  # low score dropped
+
+    def test_lru_over_collections(self):
+        from tools.searcher import SearchService
+        service = SearchService(max_collections=2)
+        for name in ("p1", "p2", "p1", "p3", "p1"):
+            service.search_vector("q", name)
+        stats = service.get_stats()
+        self.assertEqual(stats["open_collections"], ["p3", "p1"])
+        self.assertEqual(stats["evictions"], 1)
+        self.assertEqual(len(self.fake.clients), 3)
+
+    def test_cold_load_does_not_block_lexical(self):
+        import threading
+        from tools.searcher import SearchService
+        service = SearchService()
+        release = threading.Event()
+        ef_cls = self.fake.utils.embedding_functions.SentenceTransformerEmbeddingFunction
+        original_init = ef_cls.__init__
+
+        def slow_init(ef, model_name=None):
+            release.wait(5)
+            original_init(ef, model_name)
+
+        with patch.object(ef_cls, "__init__", slow_init):
+            loaders = [threading.Thread(target=service.search_vector, args=("q", "p1"))
+                       for _ in range(2)]
+            for t in loaders:
+                t.start()
+            time.sleep(0.05)
+            lexical = threading.Thread(target=service._get_lexical, args=("p1",))
+            lexical.start()
+            lexical.join(1)
+            self.assertFalse(lexical.is_alive())
+            release.set()
+            for t in loaders:
+                t.join(5)
+        self.assertEqual(self.fake.models, 1)
+        self.assertEqual(len(self.fake.clients), 1)
+
+    def test_cold_model_load_not_counted_against_vector_timeout(self):
+        from tools.searcher import SearchService
+        service = SearchService()
+        ef_cls = self.fake.utils.embedding_functions.SentenceTransformerEmbeddingFunction
+        original_init = ef_cls.__init__
+
+        def slow_init(ef, model_name=None):
+            time.sleep(0.3)
+            original_init(ef, model_name)
+
+        with patch.object(ef_cls, "__init__", slow_init), \
+             patch("tools.searcher.TIER_TIMEOUTS", {"lexical": 1.0, "vector": 0.1}), \
+             patch("tools.searcher.search_lexical", return_value=[]):
+            [(results, info)] = service.search_batch_explained(["auth"], "p1", self.tmp.name)
+        self.assertEqual(info["tiers"]["vector"]["status"], "ok")
+        self.assertEqual([r["filepath"] for r in results], ["auth.py"])
+
+    def test_batch_query(self):
+        from tools.searcher import SearchService
+        results = SearchService().search_vector_batch(["a", "b"], "p1")
+        self.assertEqual([r[0]["filepath"] for r in results], ["a.py", "b.py"])
+        self.assertEqual(SearchService().search_vector_batch(["a"], "missing"), [[]])
+
+    def test_daemon_roundtrip(self):
+        import threading
+        import tools.searcher as searcher
+        sock = Path(self.tmp.name) / "s.sock"
+        self.assertIsNone(searcher.query_daemon({"op": "stats"}, sock))
+
+        with patch("tools.searcher.search_lexical", return_value=[]):
+            t = threading.Thread(target=searcher.serve, args=(sock,), daemon=True)
+            t.start()
+            for _ in range(50):
+                if sock.exists():
+                    break
+                time.sleep(0.05)
+            response = searcher.query_daemon({
+                "op": "search", "queries": ["a", "b"], "topk": 5,
+                "projects": [{"name": "p1", "path": self.tmp.name}],
+            }, sock)
+            stats = searcher.query_daemon({"op": "stats"}, sock)
+            bad = searcher.query_daemon({"op": "nope"}, sock)
+        self.assertEqual([r[0]["filepath"] for r in response["results"]], ["a.py", "b.py"])
+        self.assertEqual(response["results"][0][0]["project"], "p1")
+        self.assertEqual(stats["stats"]["queries"], 2)
+        self.assertIsNone(bad)
+        with self.assertRaises(RuntimeError):
+            searcher.serve(sock)  # already running
+
+
+# ══════════════════════════════════════════════════════════
+# CODE SEARCHER — BM25 LEXICAL INDEX
+# ══════════════════════════════════════════════════════════
+
+class TestLexicalIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.project = root / "proj"
+        self.project.mkdir()
+        (self.project / "store.ts").write_text(
+            "import x from 'y'\n\nexport function useStore() {\n  return createStore()\n}\n")
+        (self.project / "auth.py").write_text(
+            "def login(user):\n    return check_password(user)\n\n\n\ndef logout(user):\n    pass\n")
+        (self.project / "notes.md").write_text("store store store of notes\n")
+        for p in (patch("tools.indexer.RAG_DB_DIR", root / "rag_db"),
+                  patch("tools.searcher.RAG_DB_DIR", root / "rag_db"),
+                  patch("tools.searcher.STRUCTURED_LOG", root / "search.jsonl")):
+            p.start()
+            self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self):
+        from tools.indexer import CodeIndexer
+        ix = CodeIndexer("proj", str(self.project))
+        ix._collection = None
+        with patch.object(CodeIndexer, "_get_collection", return_value=None):
+            return ix, ix.index()
+
+    def test_tokenize_splits_identifiers(self):
+        from tools.lexical_index import tokenize
+        self.assertEqual(tokenize("useStore"), ["usestore", "use", "store"])
+        self.assertEqual(tokenize("check_password(x)"), ["check_password", "check", "password"])
+        self.assertEqual(tokenize("HTTPServer"), ["httpserver", "http", "server"])
+
+    def test_indexer_writes_lexical_index(self):
+        ix, stats = self.build()
+        self.assertTrue((Path(self.tmp.name) / "rag_db" / "proj" / "lexical.json").exists())
+        self.assertEqual(stats["lexical_chunks"], len(ix._lexical))
+        self.assertGreater(stats["lexical_chunks"], 0)
+
+    def test_bm25_ranks_and_dedupes_by_file(self):
+        from tools.lexical_index import LexicalIndex
+        self.build()
+        index = LexicalIndex(Path(self.tmp.name) / "rag_db" / "proj")
+        hits = index.search("useStore")
+        self.assertEqual(hits[0]["filepath"], "store.ts")
+        self.assertEqual(len({h["filepath"] for h in hits}), len(hits))
+        self.assertGreater(hits[0]["bm25"], hits[-1]["bm25"])
+        self.assertEqual(index.search("logout")[0]["start_line"], 6)
+        self.assertEqual(index.search("zzz_not_there"), [])
+
+    def test_incremental_update_and_delete(self):
+        from tools.lexical_index import LexicalIndex
+        ix, _ = self.build()
+        (self.project / "auth.py").write_text("def sign_in(user):\n    pass\n")
+        (self.project / "notes.md").unlink()
+        ix.index()
+        index = LexicalIndex(Path(self.tmp.name) / "rag_db" / "proj")
+        self.assertEqual(index.search("login"), [])
+        self.assertEqual(index.search("sign_in")[0]["filepath"], "auth.py")
+        self.assertNotIn("notes.md", [h["filepath"] for h in index.search("notes")])
+
+    def test_backfill_for_existing_vector_index(self):
+        ix, _ = self.build()
+        lexical = Path(self.tmp.name) / "rag_db" / "proj" / "lexical.json"
+        lexical.unlink()
+        _, stats = self.build()
+        self.assertEqual(stats["files_indexed"], 0)
+        self.assertTrue(lexical.exists())
+        self.assertEqual(stats["lexical_chunks"], len(ix._lexical))
+
+    def test_large_block_chunking_terminates(self):
+        from tools.indexer import _chunk_code
+        text = "\n".join(f"value_{i} = {i} * 1000000" for i in range(150))
+        chunks = _chunk_code(text, "big.py")
+        self.assertEqual(chunks[-1]["end_line"], 150)
+        self.assertLess(len(chunks), 10)
+
+    def test_searcher_uses_index_without_ripgrep(self):
+        from tools.searcher import SearchService
+        self.build()
+        with patch("tools.searcher.get_service", return_value=SearchService()), \
+             patch("tools.searcher.subprocess.run") as run:
+            from tools.searcher import search_lexical
+            results = search_lexical("check password", str(self.project), project_name="proj")
+        run.assert_not_called()
+        self.assertEqual(results[0]["filepath"], "auth.py")
+        self.assertEqual(results[0]["score"], 1.0)
+        self.assertIn("check_password", results[0]["snippet"])
+
+    def test_searcher_falls_back_to_ripgrep(self):
+        with patch("tools.searcher._search_ripgrep", return_value=[{"filepath": "x"}]) as rg:
+            from tools.searcher import search_lexical
+            self.assertEqual(search_lexical("useSto", str(self.project), project_name="proj"),
+                             [{"filepath": "x"}])
+        rg.assert_called_once()
+
+
+# ══════════════════════════════════════════════════════════
+# CODE SEARCHER — RECIPROCAL-RANK FUSION
+# ══════════════════════════════════════════════════════════
+
+class TestSearchFusion(unittest.TestCase):
+    @staticmethod
+    def hit(path, start, score=0.5, **extra):
+        return {"filepath": path, "start_line": start, "end_line": start + 9,
+                "snippet": "", "score": score, **extra}
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        p = patch("tools.searcher.STRUCTURED_LOG", Path(self.tmp.name) / "search.jsonl")
+        p.start()
+        self.addCleanup(p.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_chunk_in_both_tiers_wins(self):
+        from tools.searcher import _fuse
+        lexical = [self.hit("a.py", 1, 1.0, bm25=7.5), self.hit("b.py", 1, 0.4, bm25=3.0)]
+        vector = [self.hit("b.py", 1, 0.8), self.hit("c.py", 1, 0.7)]
+        fused, overlap = _fuse({"lexical": lexical, "vector": vector}, topk=10)
+        self.assertEqual(overlap, 1)
+        self.assertEqual([r["filepath"] for r in fused], ["b.py", "a.py", "c.py"])
+        self.assertEqual(fused[0]["source"], "lexical+vector")
+        self.assertEqual(fused[0]["ranks"], {"lexical": 2, "vector": 1})
+        self.assertEqual(fused[0]["tier_scores"], {"lexical": 3.0, "vector": 0.8})
+        self.assertNotIn("bm25", fused[1])
+
+    def test_fusion_is_per_chunk(self):
+        from tools.searcher import _fuse
+        fused, overlap = _fuse({"lexical": [self.hit("a.py", 1)], "vector": [self.hit("a.py", 20)]}, 10)
+        self.assertEqual(overlap, 0)
+        self.assertEqual(len(fused), 2)
+
+    def test_top_rank_everywhere_scores_one(self):
+        from tools.searcher import _fuse
+        fused, _ = _fuse({"lexical": [self.hit("a.py", 1)], "vector": [self.hit("a.py", 1)]}, 10)
+        self.assertEqual(fused[0]["score"], 1.0)
+
+    def test_slow_tier_times_out(self):
+        from tools.searcher import SearchService
+
+        def slow_lexical(*args):
+            time.sleep(0.5)
+            return [self.hit("slow.py", 1)]
+
+        service = SearchService()
+        with patch("tools.searcher.TIER_TIMEOUTS", {"lexical": 0.05, "vector": 1.0}), \
+             patch("tools.searcher.search_lexical", side_effect=slow_lexical), \
+             patch.object(service, "search_vector_batch", return_value=[[self.hit("v.py", 1)]]):
+            t0 = time.monotonic()
+            [(results, info)] = service.search_batch_explained(["q"], "proj", self.tmp.name)
+        self.assertLess(time.monotonic() - t0, 0.4)
+        self.assertEqual([r["filepath"] for r in results], ["v.py"])
+        self.assertEqual(info["tiers"]["lexical"]["status"], "timeout")
+        self.assertEqual(info["tiers"]["vector"]["results"], 1)
+
+    def test_batch_shares_one_deadline(self):
+        import threading
+        from tools.searcher import SearchService
+        release = threading.Event()
+        self.addCleanup(release.set)  # free the shared tier pool
+
+        def slow_lexical(*args):
+            release.wait(2)
+            return []
+
+        service = SearchService()
+        with patch("tools.searcher.TIER_TIMEOUTS", {"lexical": 0.1, "vector": 0.1}), \
+             patch("tools.searcher.search_lexical", side_effect=slow_lexical), \
+             patch.object(service, "search_vector_batch", return_value=[[]] * 6):
+            t0 = time.monotonic()
+            out = service.search_batch_explained([f"q{i}" for i in range(6)], "proj", self.tmp.name)
+        self.assertLess(time.monotonic() - t0, 0.4)
+        self.assertEqual({info["tiers"]["lexical"]["status"] for _, info in out}, {"timeout"})
+
+    def test_tiers_run_concurrently_and_log_fusion(self):
+        import tools.searcher as searcher
+
+        def slow(result):
+            def run(*args):
+                time.sleep(0.2)
+                return result
+            return run
+
+        service = searcher.SearchService()
+        with patch("tools.searcher.search_lexical", side_effect=slow([self.hit("a.py", 1)])), \
+             patch.object(service, "search_vector_batch", side_effect=slow([[self.hit("a.py", 1)]])):
+            t0 = time.monotonic()
+            service.search_batch(["q"], "proj", self.tmp.name)
+        self.assertLess(time.monotonic() - t0, 0.35)
+        entries = [json.loads(line) for line in searcher.STRUCTURED_LOG.read_text().splitlines()]
+        fusion = [e for e in entries if e["event"] == "fusion"][-1]
+        self.assertEqual((fusion["fused"], fusion["overlap"]), (1, 1))
+        self.assertEqual(set(fusion["tiers"]), {"lexical", "vector"})
+
+    def test_handle_request_explain(self):
+        import tools.searcher as searcher
+        with patch("tools.searcher.search_lexical", return_value=[self.hit("a.py", 1)]), \
+             patch.object(searcher.SearchService, "search_vector_batch", return_value=[[]]), \
+             patch("tools.searcher.get_service", return_value=searcher.SearchService()):
+            response = searcher.handle_request({
+                "op": "search", "queries": ["q"], "explain": True,
+                "projects": [{"name": "proj", "path": self.tmp.name}],
+            })
+            plain = searcher.handle_request({"op": "search", "queries": ["q"], "projects": []})
+        self.assertEqual(response["explain"][0][0]["project"], "proj")
+        self.assertEqual(response["results"][0][0]["ranks"], {"lexical": 1})
+        self.assertNotIn("explain", plain)
+
+
 # ══════════════════════════════════════════════════════════
 # RUN
 # ══════════════════════════════════════════════════════════
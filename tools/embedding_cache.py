@@ -0,0 +1,254 @@
+"""
+Leon Embedding Cache — content-addressed chunk vectors shared across projects.
+
+Re-indexing a file re-embeds its chunks even when most of them did not change
+(or only moved). The cache maps sha1(chunk text) to a row in a float32 matrix,
+so any chunk text seen before — in this project or another one (vendored
+files, duplicated configs) — is never sent through the model again.
+
+Layout: data/rag_db/_embeddings/<model>/
+  embeddings.npy  — (capacity, dim) float32 .npy, opened as a memmap
+  index.json      — {"dim", "rows", "generation", "hashes": {sha1: row}}
+  index.<gen>.log — "sha1,row" lines added since that index.json was written
+
+Writes are append-only and serialized across processes with flock, so the
+scheduler's nightly index and a manual leon-index can share one cache. Each
+put_many() appends its rows to the log; once the log holds as many rows as
+index.json it is folded into a new index.json (next generation), keeping the
+total rewrite cost linear in the cache size.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("leon.indexer")
+
+INITIAL_CAPACITY = 1024   # Rows preallocated in a new embeddings.npy
+COMPACT_MIN_ROWS = 4096   # Log rows before it may be folded into index.json
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode(errors="replace")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding store for one embedding model.
+
+    Usage:
+        cache = EmbeddingCache(RAG_DB_DIR / "_embeddings" / "all_minilm_l6_v2")
+        found = cache.get_many(hashes)          # {hash: vector}
+        cache.put_many(new_hashes, vectors)
+    """
+
+    def __init__(self, cache_dir: Path):
+        import numpy as np  # optional dependency (ships with chromadb)
+
+        self._np = np
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._data_file = self.cache_dir / "embeddings.npy"
+        self._index_file = self.cache_dir / "index.json"
+        self._lock_file = self.cache_dir / ".lock"
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._rows = 0
+        self._hashes: dict[str, int] = {}
+        self._matrix = None  # read-only memmap over embeddings.npy
+        self._index_mtime: Optional[int] = None
+        self._generation = 0
+        self._snapshot_rows = 0  # hashes stored in index.json itself
+        self._log_rows = 0       # hashes read from the current log
+        self._log_offset = 0
+        self._load_index()
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self._lock_file, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _log_file(self, generation: int) -> Path:
+        return self.cache_dir / f"index.{generation}.log"
+
+    def _load_index(self):
+        """Catch up with index.json and its log as other processes left them; reopen the memmap."""
+        changed = False
+        try:
+            mtime = self._index_file.stat().st_mtime_ns
+            if mtime != self._index_mtime:
+                data = json.loads(self._index_file.read_text())
+                self._index_mtime = mtime
+                self._dim = data.get("dim")
+                self._rows = data.get("rows", 0)
+                self._hashes = data.get("hashes", {})
+                self._generation = data.get("generation", 0)
+                self._snapshot_rows = len(self._hashes)
+                self._log_rows = self._log_offset = 0
+                changed = True
+        except (OSError, ValueError):
+            return
+        changed = self._read_log() or changed
+        if not changed:
+            return
+        self._matrix = None
+        if self._data_file.exists():
+            try:
+                self._matrix = self._np.load(self._data_file, mmap_mode="r")
+            except (OSError, ValueError) as e:
+                logger.warning(f"Embedding cache unreadable, starting over: {e}")
+                self._dim, self._rows, self._hashes = None, 0, {}
+
+    def _read_log(self) -> bool:
+        """Apply log lines appended since the last read. True if any were new."""
+        try:
+            with open(self._log_file(self._generation), "rb") as f:
+                f.seek(self._log_offset)
+                tail = f.read()
+        except FileNotFoundError:
+            return False
+        end = tail.rfind(b"\n") + 1  # a line is complete once its newline is written
+        if not end:
+            return False
+        for line in tail[:end].decode().splitlines():
+            h, _, row = line.partition(",")
+            try:
+                row = int(row)
+            except ValueError:
+                continue
+            self._hashes[h] = row
+            self._rows = max(self._rows, row + 1)
+            self._log_rows += 1
+        self._log_offset += end
+        return True
+
+    def _append_log(self, new_rows: dict[str, int]):
+        """Record new hash → row entries; fold the log into index.json once it is large."""
+        if not self._index_file.exists():
+            self._save_index()
+            return
+        with open(self._log_file(self._generation), "ab") as f:
+            data = "".join(f"{h},{row}\n" for h, row in new_rows.items()).encode()
+            f.write(data)
+            self._log_offset = f.tell()
+        self._log_rows += len(new_rows)
+        if self._log_rows >= max(COMPACT_MIN_ROWS, self._snapshot_rows):
+            self._save_index()
+
+    def _save_index(self):
+        """Write all hashes to index.json as a new generation and drop the old log."""
+        old_log = self._log_file(self._generation)
+        self._generation += 1
+        tmp = self._index_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"dim": self._dim, "rows": self._rows,
+                                   "generation": self._generation, "hashes": self._hashes}))
+        tmp.replace(self._index_file)
+        self._index_mtime = self._index_file.stat().st_mtime_ns
+        self._snapshot_rows = len(self._hashes)
+        self._log_rows = self._log_offset = 0
+        old_log.unlink(missing_ok=True)
+
+    def _writable_matrix(self, needed_rows: int):
+        """Open embeddings.npy for writing, growing it (doubling) to fit needed_rows."""
+        np = self._np
+        if self._data_file.exists():
+            current = np.load(self._data_file, mmap_mode="r+")
+            if current.shape[0] >= needed_rows:
+                return current
+            capacity = max(needed_rows, current.shape[0] * 2)
+            grown_file = self._data_file.with_suffix(".grow")
+            grown = np.lib.format.open_memmap(
+                grown_file, mode="w+", dtype=np.float32, shape=(capacity, self._dim)
+            )
+            grown[: self._rows] = current[: self._rows]
+            grown.flush()
+            del current, grown
+            grown_file.replace(self._data_file)
+            return np.load(self._data_file, mmap_mode="r+")
+        capacity = max(needed_rows, INITIAL_CAPACITY)
+        return np.lib.format.open_memmap(
+            self._data_file, mode="w+", dtype=np.float32, shape=(capacity, self._dim)
+        )
+
+    # ── Public API ────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def get_many(self, hashes: list[str]) -> dict:
+        """Return {hash: vector} for the hashes already in the cache."""
+        with self._lock:
+            if any(h not in self._hashes for h in hashes):
+                self._load_index()  # another process may have added them
+            if self._matrix is None:
+                return {}
+            found = {}
+            for h in hashes:
+                row = self._hashes.get(h)
+                if row is not None and row < self._rows:
+                    found[h] = self._np.array(self._matrix[row])
+            return found
+
+    def put_many(self, hashes: list[str], vectors) -> None:
+        """Store vectors for hashes (rows already present are left untouched)."""
+        vectors = self._np.asarray(vectors, dtype=self._np.float32)
+        if vectors.ndim != 2 or len(hashes) != vectors.shape[0]:
+            raise ValueError("put_many() needs one vector per hash")
+        with self._lock, self._file_lock():
+            self._load_index()
+            if self._dim is None:
+                self._dim = int(vectors.shape[1])
+            elif self._dim != vectors.shape[1]:
+                raise ValueError(f"Embedding dim {vectors.shape[1]} != cache dim {self._dim}")
+
+            new = {}
+            for h, vec in zip(hashes, vectors):
+                if h not in self._hashes and h not in new:
+                    new[h] = vec
+            if not new:
+                return
+
+            matrix = self._writable_matrix(self._rows + len(new))
+            new_rows = {}
+            for offset, (h, vec) in enumerate(new.items()):
+                matrix[self._rows + offset] = vec
+                new_rows[h] = self._rows + offset
+            matrix.flush()
+            del matrix
+            self._hashes.update(new_rows)
+            self._rows += len(new)
+            self._append_log(new_rows)
+            self._matrix = self._np.load(self._data_file, mmap_mode="r")
+
+
+_caches: dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_embedding_cache(root: Path, model: str) -> Optional[EmbeddingCache]:
+    """Shared cache for a model under root/_embeddings/, or None without numpy."""
+    key = re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_") or "default"
+    cache_dir = Path(root) / "_embeddings" / key
+    with _caches_lock:
+        cache = _caches.get(str(cache_dir))
+        if cache is None:
+            try:
+                cache = EmbeddingCache(cache_dir)
+            except ImportError:
+                logger.info("numpy not installed — embedding cache disabled")
+                return None
+            _caches[str(cache_dir)] = cache
+        return cache
@@ -4,14 +4,24 @@ Leon Code Indexer — Two-tier RAG index builder.
 Usage:
     leon-index --project Motorev
     leon-index --project "Leon System" --force
+    leon-index --project Motorev --watch
     python -m tools.indexer --project Motorev
 
-Tier 1: File hash cache for incremental detection
+Tier 1: Per-file manifest for incremental detection
 Tier 2: ChromaDB + sentence-transformers (local, no API cost)
 
 Database: data/rag_db/<project_slug>/
-  chroma/          — ChromaDB persistent store
-  file_hashes.json — Change detection cache
+  chroma/        — ChromaDB persistent store
+  manifest.json  — Per-file stat tuple, content hash and chunk IDs
+  lexical.json   — BM25 inverted index over the same chunks (tools.lexical_index)
+
+Incremental runs only read files whose (mtime, size, inode) changed, delete
+chunk IDs that a changed or removed file no longer produces, and embed only
+new chunks (in parallel batches). --watch re-indexes on project_watcher events.
+
+Chunk vectors are cached by content hash in data/rag_db/_embeddings/<model>/
+(see tools.embedding_cache), shared by all projects: moved or duplicated
+chunks are never embedded twice.
 """
 
 import argparse
@@ -21,9 +31,15 @@ import logging
 import re
 import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
+
+from tools.embedding_cache import get_embedding_cache, text_hash
+from tools.lexical_index import LexicalIndex
 
 logger = logging.getLogger("leon.indexer")
 
@@ -56,6 +72,12 @@ MAX_MD_SIZE  = 20_000    # Skip large markdown
 CHUNK_SIZE   = 1200      # Target chars per chunk
 RAG_DB_DIR   = Path("data/rag_db")
 
+MANIFEST_VERSION = 1
+EMBED_BATCH      = 64     # Chunks per embedding call / upsert
+EMBED_WORKERS    = 4      # Parallel embedding batches
+DELETE_BATCH     = 500    # IDs per ChromaDB delete call
+WATCH_DEBOUNCE   = 2.0    # Seconds of quiet before re-indexing watched changes
+
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
@@ -63,8 +85,10 @@ def _slug(name: str) -> str:
     return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
 
 
-def _should_skip(path: Path) -> bool:
-    for part in path.parts:
+def _should_skip(path: Path, root: Optional[Path] = None) -> bool:
+    # Only directories inside the project count (a project may live under /tmp)
+    parts = path.relative_to(root).parts if root else path.parts
+    for part in parts:
         if part in SKIP_DIRS:
             return True
     if path.name in SKIP_FILES:
@@ -89,6 +113,21 @@ def _file_hash(path: Path) -> str:
         return ""
 
 
+def _stat_key(path: Path) -> Optional[list]:
+    """(mtime_ns, size, inode) — unchanged means the file needs no re-hash."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def _chunk_id(chunk: dict) -> str:
+    """Content-addressed chunk ID: unchanged chunks keep their ID across edits."""
+    key = f"{chunk['filepath']}:{chunk['start_line']}:{chunk['end_line']}:{chunk['text']}"
+    return hashlib.md5(key.encode(errors="replace")).hexdigest()
+
+
 def _chunk_code(text: str, filepath: str) -> list[dict]:
     """
     Split source into chunks at function/class/export boundaries.
@@ -127,6 +166,8 @@ def _chunk_code(text: str, filepath: str) -> list[dict]:
                 if sub.strip():
                     chunks.append({"text": sub, "filepath": filepath,
                                    "start_line": pos + 1, "end_line": end})
+                if end == e:
+                    break
                 pos = end - 2  # 2-line overlap
         elif chunk_text.strip():
             chunks.append({"text": chunk_text, "filepath": filepath,
@@ -148,7 +189,7 @@ def _collect_files(project_path: Path) -> list[Path]:
             if r.returncode == 0:
                 for line in r.stdout.strip().split("\n"):
                     p = project_path / line.strip()
-                    if p.exists() and p.suffix in SOURCE_EXTENSIONS and not _should_skip(p):
+                    if p.exists() and p.suffix in SOURCE_EXTENSIONS and not _should_skip(p, project_path):
                         files.append(p)
                 return files
         except Exception:
@@ -156,35 +197,68 @@ def _collect_files(project_path: Path) -> list[Path]:
 
     for ext in SOURCE_EXTENSIONS:
         for p in project_path.rglob(f"*{ext}"):
-            if not _should_skip(p):
+            if not _should_skip(p, project_path):
                 files.append(p)
     return files
 
 
+def _git_ignored(project_path: Path, rels: list[str]) -> set[str]:
+    """Subset of project-relative paths that .gitignore excludes."""
+    if not rels or not (project_path / ".git").exists():
+        return set()
+    try:
+        r = subprocess.run(
+            ["git", "check-ignore", "--stdin"],
+            cwd=project_path, input="\n".join(rels), capture_output=True, text=True, timeout=10,
+        )
+    except Exception:
+        return set()
+    return {line.strip() for line in r.stdout.split("\n") if line.strip()}
+
+
 # ── Indexer class ─────────────────────────────────────────────────────────────
 
 class CodeIndexer:
     """Manages the RAG index for a single project."""
 
-    def __init__(self, project_name: str, project_path: str):
+    def __init__(self, project_name: str, project_path: str, workers: int = EMBED_WORKERS):
         self.project_name = project_name
         self.project_path = Path(project_path)
+        self.workers = max(1, workers)
         self.db_dir = RAG_DB_DIR / _slug(project_name)
         self.db_dir.mkdir(parents=True, exist_ok=True)
-        self._hash_file = self.db_dir / "file_hashes.json"
-        self._hashes: dict = self._load_hashes()
+        self._manifest_file = self.db_dir / "manifest.json"
+        self._hash_file = self.db_dir / "file_hashes.json"  # pre-manifest format
+        self._files: dict = self._load_manifest()
+        self._lexical = LexicalIndex(self.db_dir)
         self._collection = None
+        self._ef = None
+        self._ef_model = ""
+        self._lock = threading.Lock()
 
-    def _load_hashes(self) -> dict:
+    def _load_manifest(self) -> dict:
+        """Load rel_path -> {hash, stat, chunks}. Migrates file_hashes.json."""
+        if self._manifest_file.exists():
+            try:
+                data = json.loads(self._manifest_file.read_text())
+                if data.get("version") == MANIFEST_VERSION:
+                    return data.get("files", {})
+            except Exception:
+                pass
         if self._hash_file.exists():
             try:
-                return json.loads(self._hash_file.read_text())
+                # No stat or chunk list: first run re-hashes, and chunks written
+                # under the old IDs are deleted by filepath when the file changes.
+                hashes = json.loads(self._hash_file.read_text())
+                return {rel: {"hash": h} for rel, h in hashes.items()}
             except Exception:
                 pass
         return {}
 
-    def _save_hashes(self, hashes: dict):
-        self._hash_file.write_text(json.dumps(hashes, indent=2))
+    def _save_manifest(self):
+        tmp = self._manifest_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"version": MANIFEST_VERSION, "files": self._files}))
+        tmp.replace(self._manifest_file)
 
     def _get_collection(self):
         """Lazy-init ChromaDB collection. Returns None if chromadb not installed."""
@@ -200,8 +274,10 @@ class CodeIndexer:
                 ef = embedding_functions.SentenceTransformerEmbeddingFunction(
                     model_name="all-MiniLM-L6-v2"
                 )
+                self._ef_model = "st-all-MiniLM-L6-v2"
             except Exception:
                 ef = embedding_functions.DefaultEmbeddingFunction()
+                self._ef_model = "chroma-default"
                 logger.info("sentence-transformers unavailable — using default embeddings")
 
             self._collection = client.get_or_create_collection(
@@ -209,6 +285,7 @@ class CodeIndexer:
                 embedding_function=ef,
                 metadata={"hnsw:space": "cosine"},
             )
+            self._ef = ef
             return self._collection
         except ImportError:
             logger.warning(
@@ -220,79 +297,329 @@ class CodeIndexer:
             logger.error(f"ChromaDB init failed: {e}")
             return None
 
-    def index(self, force: bool = False) -> dict:
-        """
-        Incrementally index the project.
-        Only re-indexes files whose hash has changed since last run.
-        Returns stats dict.
-        """
-        files = _collect_files(self.project_path)
-        collection = self._get_collection()
-
-        stats = {
+    def _new_stats(self, files_scanned: int, collection) -> dict:
+        return {
             "project": self.project_name,
-            "files_scanned": len(files),
+            "files_scanned": files_scanned,
             "files_indexed": 0,
             "files_skipped": 0,
+            "files_rehashed": 0,
+            "files_deleted": 0,
             "chunks_added": 0,
+            "chunks_deleted": 0,
+            "embed_cache_hits": 0,
+            "embed_cache_misses": 0,
+            "embed_cache_hit_rate": 0.0,
+            "lexical_chunks": 0,
             "vector_db": collection is not None,
             "started_at": datetime.now().isoformat(),
         }
 
-        new_hashes = {}
-        all_chunks: list[dict] = []
+    def _check_file(self, rel: str, path: Path, force: bool, stats: dict) -> Optional[tuple]:
+        """Return (stat, hash) if the file must be re-chunked, None if unchanged."""
+        entry = self._files.get(rel)
+        stat = _stat_key(path)
+        if not force and entry and stat is not None and entry.get("stat") == stat:
+            stats["files_skipped"] += 1
+            return None
 
-        for filepath in files:
-            rel = str(filepath.relative_to(self.project_path))
-            fhash = _file_hash(filepath)
-            new_hashes[rel] = fhash
+        fhash = _file_hash(path)
+        if not force and entry and entry.get("hash") == fhash:
+            # Touched but identical content (checkout, copy): just refresh the stat
+            entry["stat"] = stat
+            stats["files_skipped"] += 1
+            stats["files_rehashed"] += 1
+            return None
+        return stat, fhash
 
-            if not force and self._hashes.get(rel) == fhash:
-                stats["files_skipped"] += 1
+    def index(self, force: bool = False) -> dict:
+        """
+        Incrementally index the project.
+        Only re-indexes files whose stat tuple and hash changed since last run,
+        and drops chunks of files that no longer exist.
+        Returns stats dict.
+        """
+        files = _collect_files(self.project_path)
+        collection = self._get_collection()
+
+        with self._lock:
+            stats = self._new_stats(len(files), collection)
+            current = {str(f.relative_to(self.project_path)): f for f in files}
+            changed = []
+            for rel, path in current.items():
+                check = self._check_file(rel, path, force, stats)
+                if check is not None:
+                    changed.append((rel, path) + check)
+            deleted = [rel for rel in self._files if rel not in current]
+            # Index built before lexical.json existed: add unchanged files too
+            changed_rels = {c[0] for c in changed}
+            backfill = [] if self._lexical.exists() else [
+                (rel, path) for rel, path in current.items() if rel not in changed_rels
+            ]
+            self._apply(changed, deleted, collection, stats, backfill)
+
+        logger.info(
+            f"Indexed {self.project_name}: {stats['files_indexed']} files, "
+            f"{stats['chunks_added']} chunks (+), {stats['chunks_deleted']} (-), "
+            f"{stats['files_skipped']} unchanged"
+        )
+        return stats
+
+    def update(self, paths: Iterable[str]) -> dict:
+        """
+        Re-index only the given paths (absolute or project-relative), e.g. from
+        file watcher events. Missing or no-longer-indexable paths are dropped.
+        """
+        collection = self._get_collection()
+        candidates: dict[str, Path] = {}
+        for raw in paths:
+            path = Path(raw)
+            if not path.is_absolute():
+                path = self.project_path / path
+            try:
+                rel = str(path.relative_to(self.project_path))
+            except ValueError:
                 continue
+            candidates[rel] = path
+
+        indexable = {
+            rel: path for rel, path in candidates.items()
+            if path.is_file() and path.suffix in SOURCE_EXTENSIONS
+            and not _should_skip(path, self.project_path)
+        }
+        for rel in _git_ignored(self.project_path, list(indexable)):
+            indexable.pop(rel, None)
+
+        with self._lock:
+            stats = self._new_stats(len(candidates), collection)
+            changed = []
+            for rel, path in indexable.items():
+                check = self._check_file(rel, path, False, stats)
+                if check is not None:
+                    changed.append((rel, path) + check)
+            deleted = [rel for rel in candidates if rel not in indexable and rel in self._files]
+            self._apply(changed, deleted, collection, stats)
+        return stats
 
+    def _apply(self, changed: list, deleted: list, collection, stats: dict,
+               lexical_backfill: list = ()):
+        """
+        Chunk changed files, delete stale chunk IDs, embed new chunks, update the
+        lexical index and save both. `lexical_backfill` files are unchanged ones
+        that only need adding to the lexical index.
+        """
+        stale_ids: list[str] = []
+        legacy_files: list[str] = []
+        new_chunks: list[tuple[str, dict]] = []
+
+        for rel in deleted:
+            entry = self._files.pop(rel)
+            if "chunks" in entry:
+                stale_ids.extend(entry["chunks"])
+            else:
+                legacy_files.append(rel)
+            self._lexical.remove_file(rel)
+            stats["files_deleted"] += 1
+
+        for rel, path, stat, fhash in changed:
             try:
-                text = filepath.read_text(errors="replace")
-                chunks = _chunk_code(text, rel)
-                all_chunks.extend(chunks)
-                stats["files_indexed"] += 1
+                text = path.read_text(errors="replace")
             except Exception as e:
                 logger.warning(f"Could not read {rel}: {e}")
+                continue
+            chunks = _chunk_code(text, rel)
+            ids = [_chunk_id(c) for c in chunks]
+            self._lexical.replace_file(rel, chunks)
+
+            entry = self._files.get(rel, {})
+            if "chunks" in entry:
+                old = set(entry["chunks"])
+                stale_ids.extend(old.difference(ids))
+            else:
+                old = set()
+                if entry:
+                    legacy_files.append(rel)
+            new_chunks.extend((cid, c) for cid, c in zip(ids, chunks) if cid not in old)
+
+            self._files[rel] = {"hash": fhash, "stat": stat}
+            if collection is not None:
+                self._files[rel]["chunks"] = ids
+            stats["files_indexed"] += 1
+
+        for rel, path in lexical_backfill:
+            try:
+                self._lexical.replace_file(rel, _chunk_code(path.read_text(errors="replace"), rel))
+            except OSError as e:
+                logger.warning(f"Could not read {rel}: {e}")
 
-        if collection and all_chunks:
-            batch_size = 50
-            for i in range(0, len(all_chunks), batch_size):
-                batch = all_chunks[i : i + batch_size]
-                ids = [
-                    hashlib.md5(f"{c['filepath']}:{c['start_line']}".encode()).hexdigest()
-                    for c in batch
-                ]
+        if collection is not None:
+            stats["chunks_deleted"] = self._delete_chunks(collection, stale_ids, legacy_files)
+            failed = self._embed_chunks(collection, new_chunks, stats)
+            for rel, ids in failed.items():
+                # Not stored: forget those IDs and force a re-read next run
+                entry = self._files[rel]
+                entry["chunks"] = [cid for cid in entry["chunks"] if cid not in ids]
+                entry["hash"] = ""
+                entry.pop("stat", None)
+
+        self._save_manifest()
+        if changed or deleted or lexical_backfill or not self._lexical.exists():
+            self._lexical.save()
+        stats["lexical_chunks"] = len(self._lexical)
+        stats["finished_at"] = datetime.now().isoformat()
+
+    def _delete_chunks(self, collection, ids: list[str], legacy_files: list[str]) -> int:
+        deleted = 0
+        for i in range(0, len(ids), DELETE_BATCH):
+            batch = ids[i : i + DELETE_BATCH]
+            try:
+                collection.delete(ids=batch)
+                deleted += len(batch)
+            except Exception as e:
+                logger.error(f"ChromaDB delete failed: {e}")
+        for rel in legacy_files:
+            try:
+                collection.delete(where={"filepath": rel})
+            except Exception as e:
+                logger.error(f"ChromaDB delete for {rel} failed: {e}")
+        return deleted
+
+    def _embed_chunks(self, collection, chunks: list[tuple[str, dict]], stats: dict) -> dict:
+        """
+        Embed chunks in parallel batches and upsert them in order.
+        Returns {filepath: chunk IDs that could not be stored}.
+        """
+        batches = [chunks[i : i + EMBED_BATCH] for i in range(0, len(chunks), EMBED_BATCH)]
+        if not batches:
+            return {}
+
+        def embed(batch):
+            if self._ef is None:
+                return None, 0, 0  # collection embeds on upsert
+            return self._embed_texts([c["text"] for _, c in batch])
+
+        failed: dict[str, set] = {}
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as pool:
+            futures = [pool.submit(embed, batch) for batch in batches]
+            for batch, future in zip(batches, futures):
                 try:
+                    embeddings, hits, misses = future.result()
+                    stats["embed_cache_hits"] += hits
+                    stats["embed_cache_misses"] += misses
+                    kwargs = {} if embeddings is None else {"embeddings": embeddings}
                     collection.upsert(
-                        ids=ids,
-                        documents=[c["text"] for c in batch],
+                        ids=[cid for cid, _ in batch],
+                        documents=[c["text"] for _, c in batch],
                         metadatas=[
                             {
                                 "filepath": c["filepath"],
                                 "start_line": c["start_line"],
                                 "end_line": c["end_line"],
                             }
-                            for c in batch
+                            for _, c in batch
                         ],
+                        **kwargs,
                     )
                     stats["chunks_added"] += len(batch)
                 except Exception as e:
                     logger.error(f"ChromaDB upsert failed: {e}")
+                    for cid, c in batch:
+                        failed.setdefault(c["filepath"], set()).add(cid)
 
-        self._hashes.update(new_hashes)
-        self._save_hashes(self._hashes)
+        looked_up = stats["embed_cache_hits"] + stats["embed_cache_misses"]
+        if looked_up:
+            stats["embed_cache_hit_rate"] = round(stats["embed_cache_hits"] / looked_up, 3)
+        return failed
 
-        stats["finished_at"] = datetime.now().isoformat()
-        logger.info(
-            f"Indexed {self.project_name}: {stats['files_indexed']} files, "
-            f"{stats['chunks_added']} chunks, {stats['files_skipped']} unchanged"
-        )
-        return stats
+    def _embed_texts(self, texts: list[str]) -> tuple[list, int, int]:
+        """
+        Embed texts through the content-hash cache; only unseen texts hit the model.
+        Returns (vectors, cache hits, cache misses).
+        """
+        cache = get_embedding_cache(RAG_DB_DIR, self._ef_model or "default")
+        if cache is None:
+            return self._ef(texts), 0, len(texts)
+
+        hashes = [text_hash(t) for t in texts]
+        found = cache.get_many(hashes)
+        missing = {h: t for h, t in zip(hashes, texts) if h not in found}
+        if missing:
+            vectors = self._ef(list(missing.values()))
+            cache.put_many(list(missing), vectors)
+            found.update(zip(missing, vectors))
+        return [list(map(float, found[h])) for h in hashes], len(texts) - len(missing), len(missing)
+
+
+# ── Watch mode ────────────────────────────────────────────────────────────────
+
+def watch(indexers: list["CodeIndexer"], debounce: float = WATCH_DEBOUNCE,
+          stop: Optional[threading.Event] = None, on_update=None):
+    """
+    Keep indexes current from core.project_watcher events.
+
+    Changed paths are collected per project and re-indexed with
+    CodeIndexer.update() once no new events arrived for `debounce` seconds.
+    Runs until `stop` is set (or KeyboardInterrupt). `on_update(stats)` is
+    called after each incremental update. A failed update is logged and its
+    paths are retried with that project's next batch.
+    """
+    from core.project_watcher import ProjectWatcher
+
+    by_name = {ix.project_name: ix for ix in indexers}
+    pending: dict[str, set[str]] = {name: set() for name in by_name}
+    lock = threading.Lock()
+    wake = threading.Event()
+    stop = stop or threading.Event()
+
+    def on_change(project_name: str, change: dict):
+        with lock:
+            paths = pending.get(project_name)
+            if paths is None:
+                return
+            paths.add(change["path"])
+            if change.get("dest_path"):
+                paths.add(change["dest_path"])
+        wake.set()
+
+    watcher = ProjectWatcher([
+        {"name": ix.project_name, "path": str(ix.project_path)} for ix in indexers
+    ])
+    watcher.add_listener(on_change)
+    if not watcher.start():
+        logger.error("Nothing to watch (watchdog missing or project paths not found)")
+        return
+
+    try:
+        while not stop.is_set():
+            if not wake.wait(timeout=0.5):
+                continue
+            # Debounce: wait until events stop arriving
+            while wake.is_set() and not stop.is_set():
+                wake.clear()
+                time.sleep(debounce)
+            with lock:
+                batch = {name: paths for name, paths in pending.items() if paths}
+                for name in batch:
+                    pending[name] = set()
+            for name, paths in batch.items():
+                try:
+                    stats = by_name[name].update(paths)
+                except Exception as e:
+                    # Retry these paths with the project's next batch
+                    logger.error(f"{name}: incremental update failed: {e}", exc_info=True)
+                    with lock:
+                        pending[name] |= paths
+                    continue
+                logger.info(
+                    f"{name}: {len(paths)} changed path(s) → {stats['files_indexed']} re-indexed, "
+                    f"{stats['files_deleted']} removed, +{stats['chunks_added']}/-{stats['chunks_deleted']} chunks"
+                )
+                if on_update:
+                    on_update(stats)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
 
 
 # ── CLI entry point ───────────────────────────────────────────────────────────
@@ -301,11 +628,18 @@ def main():
     parser = argparse.ArgumentParser(
         description="Index a Leon project for RAG search",
         formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="Examples:\n  leon-index --project Motorev\n  leon-index --project Motorev --force",
+        epilog=(
+            "Examples:\n  leon-index --project Motorev\n  leon-index --project Motorev --force\n"
+            "  leon-index --project Motorev --watch"
+        ),
     )
     parser.add_argument("--project", required=True, help="Project name from projects.yaml")
     parser.add_argument("--force", action="store_true", help="Force re-index all files")
     parser.add_argument("--all", action="store_true", help="Index all configured projects")
+    parser.add_argument("--watch", action="store_true",
+                        help="After indexing, keep re-indexing changed files until Ctrl-C")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS,
+                        help=f"Parallel embedding batches (default {EMBED_WORKERS})")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
@@ -327,16 +661,28 @@ def main():
             print(f"Project '{args.project}' not found. Available: {', '.join(names)}")
             sys.exit(1)
 
+    indexers = []
     for project in targets:
         print(f"\nIndexing: {project['name']} ({project['path']})")
-        indexer = CodeIndexer(project["name"], project["path"])
+        indexer = CodeIndexer(project["name"], project["path"], workers=args.workers)
         stats = indexer.index(force=args.force)
+        indexers.append(indexer)
         print(f"  Files scanned : {stats['files_scanned']}")
         print(f"  Files indexed : {stats['files_indexed']}  (changed)")
         print(f"  Files skipped : {stats['files_skipped']}  (unchanged)")
+        print(f"  Files removed : {stats['files_deleted']}")
         print(f"  Chunks added  : {stats['chunks_added']}")
+        print(f"  Chunks deleted: {stats['chunks_deleted']}")
+        if stats["embed_cache_hits"] + stats["embed_cache_misses"]:
+            print(f"  Embed cache   : {stats['embed_cache_hit_rate']:.0%} hit "
+                  f"({stats['embed_cache_hits']} reused, {stats['embed_cache_misses']} embedded)")
+        print(f"  Lexical index : {stats['lexical_chunks']} chunks")
         print(f"  Vector DB     : {'✓' if stats['vector_db'] else '✗ (chromadb not installed)'}")
 
+    if args.watch:
+        print(f"\nWatching {len(indexers)} project(s) for changes — Ctrl-C to stop")
+        watch(indexers)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,183 @@
+"""
+Leon Lexical Index — per-project inverted index with BM25 ranking.
+
+Built by tools.indexer alongside the vector index, from the same chunks, and
+queried in-process by tools.searcher (ripgrep is only the fallback when a
+project has no index yet or the index has no hit).
+
+Storage: data/rag_db/<project_slug>/lexical.json
+  {"version": 1, "files": {rel_path: [[start_line, end_line, {term: tf}], ...]}}
+
+Terms are lowercased identifiers plus their camelCase / snake_case parts, so
+"useStore" matches `useStore`, `use_store` and "store".
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger("leon.indexer")
+
+LEXICAL_VERSION = 1
+BM25_K1 = 1.2
+BM25_B  = 0.75
+
+_WORD_RE    = re.compile(r"[A-Za-z0-9_]+")
+_SUBWORD_RE = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased identifiers (len >= 2), each followed by its sub-words."""
+    tokens = []
+    for m in _WORD_RE.finditer(text):
+        word = m.group()
+        if len(word) >= 2:
+            tokens.append(word.lower())
+        parts = _SUBWORD_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(p.lower() for p in parts if len(p) >= 2)
+    return tokens
+
+
+class LexicalIndex:
+    """
+    Inverted index over code chunks for one project.
+
+    Usage:
+        index = LexicalIndex(RAG_DB_DIR / "motorev")
+        index.replace_file("src/auth.ts", chunks)   # chunks from _chunk_code()
+        index.save()
+        index.search("auth hook", topk=12)          # [{filepath, start_line, end_line, bm25}]
+    """
+
+    def __init__(self, index_dir: Path):
+        self.path = Path(index_dir) / "lexical.json"
+        self._lock = threading.Lock()
+        self._files: dict[str, list] = {}                 # rel -> [[start, end, {term: tf}]]
+        self._postings: dict[str, dict[tuple, int]] = {}  # term -> {(rel, i): tf}
+        self._doc_len: dict[tuple, int] = {}
+        self._total_len = 0
+        self._mtime: Optional[int] = None
+        self._load()
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def _load(self):
+        """(Re)build postings from lexical.json if it changed since the last load."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+            if mtime == self._mtime:
+                return
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if data.get("version") != LEXICAL_VERSION:
+            return
+        self._mtime = mtime
+        self._files, self._postings, self._doc_len, self._total_len = {}, {}, {}, 0
+        for rel, chunks in data.get("files", {}).items():
+            self._add_file(rel, chunks)
+
+    def refresh(self):
+        """Pick up a newer lexical.json written by another process (the indexer)."""
+        with self._lock:
+            self._load()
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"version": LEXICAL_VERSION, "files": self._files}))
+            tmp.replace(self.path)
+            self._mtime = self.path.stat().st_mtime_ns
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+
+    def _add_file(self, rel: str, chunks: list):
+        self._files[rel] = chunks
+        for i, (_, _, terms) in enumerate(chunks):
+            doc = (rel, i)
+            length = sum(terms.values())
+            self._doc_len[doc] = length
+            self._total_len += length
+            for term, tf in terms.items():
+                self._postings.setdefault(term, {})[doc] = tf
+
+    def _drop_file(self, rel: str):
+        for i, (_, _, terms) in enumerate(self._files.pop(rel, [])):
+            doc = (rel, i)
+            self._total_len -= self._doc_len.pop(doc, 0)
+            for term in terms:
+                docs = self._postings.get(term)
+                if docs is not None:
+                    docs.pop(doc, None)
+                    if not docs:
+                        del self._postings[term]
+
+    def replace_file(self, rel: str, chunks: list[dict]):
+        """Index a file's chunks ({text, start_line, end_line}), replacing its old ones."""
+        entries = [
+            [c["start_line"], c["end_line"], dict(Counter(tokenize(c["text"])))]
+            for c in chunks
+        ]
+        with self._lock:
+            self._drop_file(rel)
+            if entries:
+                self._add_file(rel, entries)
+
+    def remove_file(self, rel: str):
+        with self._lock:
+            self._drop_file(rel)
+
+    # ── Query ─────────────────────────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def search(self, query: str, topk: int = 12, per_file: bool = True) -> list[dict]:
+        """
+        BM25 over chunks, highest score first; only the best chunk of each file
+        unless per_file is False.
+        Returns [{filepath, start_line, end_line, bm25}].
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not terms or not n_docs:
+                return []
+            avg_len = self._total_len / n_docs or 1.0
+
+            scores: dict[tuple, float] = {}
+            for term in terms:
+                docs = self._postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1.0 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc, tf in docs.items():
+                    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self._doc_len[doc] / avg_len)
+                    scores[doc] = scores.get(doc, 0.0) + idf * tf * (BM25_K1 + 1.0) / (tf + norm)
+
+            if per_file:
+                best: dict[str, tuple] = {}
+                for doc, score in scores.items():
+                    rel = doc[0]
+                    if rel not in best or score > best[rel][1]:
+                        best[rel] = (doc, score)
+                candidates = best.values()
+            else:
+                candidates = scores.items()
+            ranked = sorted(candidates, key=lambda x: x[1], reverse=True)[:topk]
+            results = []
+            for (rel, i), score in ranked:
+                start, end, _ = self._files[rel][i]
+                results.append({"filepath": rel, "start_line": start, "end_line": end,
+                                "bm25": round(score, 3)})
+        return results
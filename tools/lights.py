@@ -103,6 +103,7 @@ def _find_light_from_message(message: str) -> Optional[dict]:
     msg = message.lower()
     candidates = []
     msg_words = msg.split()
+    matcher = difflib.SequenceMatcher(None)
     for light in _load_lights():
         names = [light["name"]] + light.get("aliases", [])
         for alias in names:
@@ -111,12 +112,18 @@ def _find_light_from_message(message: str) -> Optional[dict]:
             if alias_l in msg:
                 candidates.append((len(alias), 1.0, light))
                 continue
-            # Fuzzy: check if any N-gram of words from msg is close to alias
+            # Fuzzy: check if any N-gram of words from msg is close to alias.
+            # real_quick_ratio/quick_ratio are upper bounds on ratio(), so most
+            # chunks are rejected without the full comparison.
+            matcher.set_seq2(alias_l)
             alias_words = alias_l.split()
             n = len(alias_words)
             for i in range(len(msg_words) - n + 1):
                 chunk = " ".join(msg_words[i:i+n])
-                ratio = difflib.SequenceMatcher(None, chunk, alias_l).ratio()
+                matcher.set_seq1(chunk)
+                if matcher.real_quick_ratio() < 0.80 or matcher.quick_ratio() < 0.80:
+                    continue
+                ratio = matcher.ratio()
                 if ratio >= 0.80:   # 80% similarity catches "sealing"→"ceiling"
                     candidates.append((len(alias), ratio, light))
     if candidates:
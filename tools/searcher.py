@@ -4,29 +4,59 @@ Leon Code Searcher — Two-tier retrieval.
 Usage:
     leon-search "authentication hook" --project Motorev --topk 12
     leon-search "useStore" --topk 5
+    leon-search --batch queries.txt --project Motorev
+    leon-search --serve        # resident daemon (model + collections stay loaded)
     python -m tools.searcher "query" --project Motorev
 
-Tier 1: ripgrep lexical search  (<300ms target)
+Tier 1: BM25 lexical index      (in-process; ripgrep fallback)
 Tier 2: ChromaDB vector search  (semantic)
 
-Results merged, deduplicated by file, sorted by score.
+Both tiers run concurrently (per-tier timeouts) and are fused with
+reciprocal-rank fusion per chunk. `--explain` shows each hit's rank in each tier
+and the tier latencies; fusion stats are logged to logs_structured/search.jsonl.
+
+The embedding model and ChromaDB clients are loaded once per process by the
+SearchService singleton (LRU over open collections). `leon-search --serve`
+keeps one resident on a Unix socket; leon-search calls use it when it is
+running and fall back to searching in-process otherwise.
+
+The lexical tier reads the lexical.json index that leon-index builds next to
+the vector index. Projects without one (or queries it has no hit for, e.g.
+partial identifiers) are searched with ripgrep as before.
 """
 
 import argparse
+import functools
 import json
 import logging
+import os
 import re
+import shutil
+import socket
+import socketserver
 import subprocess
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+from tools.lexical_index import LexicalIndex, tokenize
+
 logger = logging.getLogger("leon.searcher")
 
 RAG_DB_DIR      = Path("data/rag_db")
 STRUCTURED_LOG  = Path("logs_structured/search.jsonl")
+SOCKET_PATH     = Path(os.environ.get("LEON_SEARCH_SOCKET", "data/rag_db/searcher.sock"))
+MAX_COLLECTIONS = 4       # Open ChromaDB collections kept warm (LRU)
+DAEMON_TIMEOUT  = 10.0    # Seconds a client waits for the daemon
+TIER_TIMEOUTS   = {"lexical": 2.0, "vector": 5.0}   # Seconds per tier (after model load) before it is dropped
+TIER_WORKERS    = 8
+RRF_K           = 60      # Reciprocal-rank fusion constant
 
 
 def _slug(name: str) -> str:
@@ -34,16 +64,31 @@ def _slug(name: str) -> str:
 
 
 def _log_search(query: str, project: str, tier: str, n: int, ms: float):
-    STRUCTURED_LOG.parent.mkdir(parents=True, exist_ok=True)
-    entry = {
-        "ts": datetime.now().isoformat(),
+    _log_entry({
         "event": "search",
         "query": query[:100],
         "project": project,
         "tier": tier,
         "results": n,
         "latency_ms": round(ms, 1),
-    }
+    })
+
+
+def _log_fusion(query: str, project: str, info: dict):
+    _log_entry({
+        "event": "fusion",
+        "query": query[:100],
+        "project": project,
+        "tiers": info["tiers"],
+        "fused": info["fused"],
+        "overlap": info["overlap"],
+        "latency_ms": info["latency_ms"],
+    })
+
+
+def _log_entry(fields: dict):
+    STRUCTURED_LOG.parent.mkdir(parents=True, exist_ok=True)
+    entry = {"ts": datetime.now().isoformat(), **fields}
     try:
         with open(STRUCTURED_LOG, "a") as f:
             f.write(json.dumps(entry) + "\n")
@@ -51,18 +96,43 @@ def _log_search(query: str, project: str, tier: str, n: int, ms: float):
         pass
 
 
-# ── Tier 1: ripgrep lexical ───────────────────────────────────────────────────
+# ── Tier 1: lexical (BM25 index, ripgrep fallback) ────────────────────────────
 
-def search_lexical(query: str, project_path: str, topk: int = 12) -> list[dict]:
+def search_lexical(query: str, project_path: str, topk: int = 12,
+                   project_name: Optional[str] = None, per_file: bool = True) -> list[dict]:
     """
-    Fast lexical search via ripgrep. Target: <300ms.
+    Lexical search. Uses the project's BM25 index when project_name is given and
+    the index has hits, ripgrep otherwise.
     Returns list of {source, filepath, start_line, end_line, snippet, score}.
     """
-    t0 = time.monotonic()
+    if project_name:
+        results = get_service().search_lexical(query, project_name, project_path,
+                                               topk=topk, per_file=per_file)
+        if results:
+            return results
+    return _search_ripgrep(query, project_path, topk=topk)
+
 
+def _snippet(project_path: str, filepath: str, start: int, end: int, terms: set[str]) -> str:
+    """First lines of the chunk starting at the first line that mentions a query term."""
     try:
-        subprocess.run(["rg", "--version"], capture_output=True, check=True, timeout=2)
-    except (subprocess.CalledProcessError, FileNotFoundError, subprocess.TimeoutExpired):
+        lines = (Path(project_path) / filepath).read_text(errors="replace").split("\n")[start - 1 : end]
+    except OSError:
+        return ""
+    first = next((i for i, line in enumerate(lines) if any(t in line.lower() for t in terms)), 0)
+    return "\n".join(lines[first : first + 4]).strip()[:300]
+
+
+@functools.lru_cache(maxsize=1)
+def _have_ripgrep() -> bool:
+    return shutil.which("rg") is not None
+
+
+def _search_ripgrep(query: str, project_path: str, topk: int = 12) -> list[dict]:
+    """Lexical search via ripgrep (every match scores 1.0). Target: <300ms."""
+    t0 = time.monotonic()
+
+    if not _have_ripgrep():
         logger.warning("ripgrep (rg) not found — install: sudo apt install ripgrep")
         return []
 
@@ -139,83 +209,290 @@ def search_lexical(query: str, project_path: str, topk: int = 12) -> list[dict]:
             break
 
     ms = (time.monotonic() - t0) * 1000
-    _log_search(query, project_path, "lexical", len(matches), ms)
-    logger.debug(f"Lexical: {len(matches)} results in {ms:.0f}ms")
+    _log_search(query, project_path, "ripgrep", len(matches), ms)
+    logger.debug(f"Lexical (rg): {len(matches)} results in {ms:.0f}ms")
     return matches
 
 
 # ── Tier 2: ChromaDB vector ───────────────────────────────────────────────────
 
-def search_vector(query: str, project_name: str, topk: int = 8) -> list[dict]:
+class SearchService:
     """
-    Semantic search via ChromaDB.
-    Requires: chromadb + sentence-transformers (installed by upgrade script).
-    Returns [] if not available — degrades gracefully.
+    Resident search: loads the embedding model once and keeps up to
+    `max_collections` ChromaDB collections and lexical indexes open (least
+    recently used closed first).
+
+    Usage:
+        service = get_service()
+        service.search_vector("auth hook", "Motorev")
+        service.search_vector_batch(["auth hook", "db schema"], "Motorev")
+        service.search_lexical("useStore", "Motorev", "/path/to/motorev")
     """
-    t0 = time.monotonic()
-    chroma_dir = RAG_DB_DIR / _slug(project_name) / "chroma"
-
-    if not chroma_dir.exists():
-        logger.debug(f"No vector index for {project_name} — run: leon-index --project {project_name}")
-        return []
-
-    try:
-        import chromadb
-        from chromadb.utils import embedding_functions
 
-        client = chromadb.PersistentClient(path=str(chroma_dir))
-
-        try:
-            ef = embedding_functions.SentenceTransformerEmbeddingFunction(
-                model_name="all-MiniLM-L6-v2"
-            )
-        except Exception:
-            ef = embedding_functions.DefaultEmbeddingFunction()
+    def __init__(self, max_collections: int = MAX_COLLECTIONS):
+        self.max_collections = max(1, max_collections)
+        self._collections: OrderedDict = OrderedDict()  # slug -> (client, collection)
+        self._lexical: OrderedDict = OrderedDict()      # slug -> LexicalIndex
+        self._ef = None
+        self._ef_lock = threading.Lock()
+        self._loading: dict = {}                          # slug -> lock held while loading
+        self._lock = threading.RLock()
+        self._stats = {"queries": 0, "lexical_queries": 0, "collection_hits": 0,
+                       "collection_misses": 0, "evictions": 0}
+
+    def _embedding_function(self):
+        if self._ef is None:
+            with self._ef_lock:
+                if self._ef is None:
+                    from chromadb.utils import embedding_functions
+
+                    try:
+                        self._ef = embedding_functions.SentenceTransformerEmbeddingFunction(
+                            model_name="all-MiniLM-L6-v2"
+                        )
+                    except Exception:
+                        self._ef = embedding_functions.DefaultEmbeddingFunction()
+        return self._ef
+
+    def _get_collection(self, project_name: str):
+        """Open (or reuse) a project's collection. None if it has no vector index.
+
+        The model and collection load outside self._lock (one loader per
+        project), so a cold start does not stall lexical lookups.
+        """
+        slug = _slug(project_name)
+        with self._lock:
+            if slug in self._collections:
+                self._collections.move_to_end(slug)
+                self._stats["collection_hits"] += 1
+                return self._collections[slug][1]
+            load_lock = self._loading.setdefault(slug, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if slug in self._collections:  # another thread loaded it meanwhile
+                    self._collections.move_to_end(slug)
+                    self._stats["collection_hits"] += 1
+                    return self._collections[slug][1]
+
+            try:
+                chroma_dir = RAG_DB_DIR / slug / "chroma"
+                if not chroma_dir.exists():
+                    logger.debug(f"No vector index for {project_name} — run: leon-index --project {project_name}")
+                    return None
+
+                import chromadb
+
+                client = chromadb.PersistentClient(path=str(chroma_dir))
+                collection = client.get_or_create_collection(
+                    name="code_chunks", embedding_function=self._embedding_function()
+                )
+                with self._lock:
+                    self._stats["collection_misses"] += 1
+                    self._collections[slug] = (client, collection)
+                    while len(self._collections) > self.max_collections:
+                        self._collections.popitem(last=False)
+                        self._stats["evictions"] += 1
+                return collection
+            finally:
+                with self._lock:
+                    if self._loading.get(slug) is load_lock:
+                        del self._loading[slug]
+
+    def _get_lexical(self, project_name: str) -> Optional[LexicalIndex]:
+        """Open (or reuse and refresh) a project's lexical index. None if not built."""
+        slug = _slug(project_name)
+        with self._lock:
+            index = self._lexical.get(slug)
+            if index is not None:
+                self._lexical.move_to_end(slug)
+            else:
+                if not (RAG_DB_DIR / slug / "lexical.json").exists():
+                    return None
+                index = LexicalIndex(RAG_DB_DIR / slug)
+                self._lexical[slug] = index
+                while len(self._lexical) > self.max_collections:
+                    self._lexical.popitem(last=False)
+                return index
+        index.refresh()  # leon-index --watch may have rewritten it
+        return index
+
+    def search_lexical(self, query: str, project_name: str, project_path: str,
+                       topk: int = 12, per_file: bool = True) -> list[dict]:
+        """BM25 search over the project's lexical index. [] if it has no index or hit."""
+        t0 = time.monotonic()
+        index = self._get_lexical(project_name)
+        if index is None:
+            return []
+        hits = index.search(query, topk=topk, per_file=per_file)
+        if not hits:
+            return []
 
-        collection = client.get_or_create_collection(
-            name="code_chunks", embedding_function=ef
-        )
+        terms = set(tokenize(query)) | {query.lower()}
+        top = hits[0]["bm25"] or 1.0
+        matches = [
+            {
+                "source":     "lexical",
+                "filepath":   h["filepath"],
+                "start_line": h["start_line"],
+                "end_line":   h["end_line"],
+                "snippet":    _snippet(project_path, h["filepath"], h["start_line"], h["end_line"], terms),
+                "score":      round(h["bm25"] / top, 3),   # best hit = 1.0
+                "bm25":       h["bm25"],
+            }
+            for h in hits
+        ]
+        with self._lock:
+            self._stats["lexical_queries"] += 1
+        ms = (time.monotonic() - t0) * 1000
+        _log_search(query, project_name, "lexical", len(matches), ms)
+        logger.debug(f"Lexical: {len(matches)} results in {ms:.1f}ms")
+        return matches
 
-        count = collection.count()
-        if count == 0:
+    def search_vector_batch(self, queries: list[str], project_name: str, topk: int = 8) -> list[list[dict]]:
+        """Semantic search for several queries in one embedding/query call."""
+        if not queries:
             return []
+        t0 = time.monotonic()
+        try:
+            collection = self._get_collection(project_name)
+            if collection is None:
+                return [[] for _ in queries]
 
-        results = collection.query(
-            query_texts=[query],
-            n_results=min(topk, count),
-        )
+            count = collection.count()
+            if count == 0:
+                return [[] for _ in queries]
 
-        matches = []
-        docs      = results.get("documents",  [[]])[0]
-        metas     = results.get("metadatas",  [[]])[0]
-        distances = results.get("distances",  [[]])[0]
-
-        for doc, meta, dist in zip(docs, metas, distances):
-            score = max(0.0, 1.0 - dist / 2.0)   # cosine distance → similarity
-            if score < 0.15:
-                continue
-            matches.append({
-                "source":     "vector",
-                "filepath":   meta.get("filepath", ""),
-                "start_line": meta.get("start_line", 0),
-                "end_line":   meta.get("end_line", 0),
-                "snippet":    doc[:300],
-                "score":      round(score, 3),
-            })
+            results = collection.query(
+                query_texts=list(queries),
+                n_results=min(topk, count),
+            )
+        except ImportError:
+            logger.debug("chromadb not installed — vector search skipped")
+            return [[] for _ in queries]
+        except Exception as e:
+            logger.warning(f"Vector search failed: {e}")
+            return [[] for _ in queries]
+
+        all_matches = []
+        for i, query in enumerate(queries):
+            docs      = (results.get("documents") or [[]] * len(queries))[i]
+            metas     = (results.get("metadatas") or [[]] * len(queries))[i]
+            distances = (results.get("distances") or [[]] * len(queries))[i]
+
+            matches = []
+            for doc, meta, dist in zip(docs, metas, distances):
+                score = max(0.0, 1.0 - dist / 2.0)   # cosine distance → similarity
+                if score < 0.15:
+                    continue
+                matches.append({
+                    "source":     "vector",
+                    "filepath":   meta.get("filepath", ""),
+                    "start_line": meta.get("start_line", 0),
+                    "end_line":   meta.get("end_line", 0),
+                    "snippet":    doc[:300],
+                    "score":      round(score, 3),
+                })
+            all_matches.append(matches)
 
         ms = (time.monotonic() - t0) * 1000
-        _log_search(query, project_name, "vector", len(matches), ms)
-        return matches
+        with self._lock:
+            self._stats["queries"] += len(queries)
+        for query, matches in zip(queries, all_matches):
+            _log_search(query, project_name, "vector", len(matches), ms / len(queries))
+        return all_matches
+
+    def _prepare_vector(self, project_name: str) -> None:
+        """Load the embedding model and the project's collection if not yet open."""
+        try:
+            self._get_collection(project_name)
+        except Exception as e:  # search_vector_batch reports it
+            logger.debug(f"Vector preload for {project_name} failed: {e}")
+
+    def search_vector(self, query: str, project_name: str, topk: int = 8) -> list[dict]:
+        return self.search_vector_batch([query], project_name, topk=topk)[0]
+
+    def search_batch(self, queries: list[str], project_name: str, project_path: str,
+                     topk: int = 12) -> list[list[dict]]:
+        """Two-tier search for several queries against one project."""
+        return [results for results, _ in
+                self.search_batch_explained(queries, project_name, project_path, topk)]
+
+    def search_batch_explained(self, queries: list[str], project_name: str, project_path: str,
+                               topk: int = 12) -> list[tuple[list[dict], dict]]:
+        """
+        Run both tiers concurrently and fuse them per query.
+        Returns [(results, info)], info = {tiers: {name: {ms, results, status}},
+        fused, overlap, latency_ms}.
+        """
+        if not queries:
+            return []
+        t0 = time.monotonic()
+        pool = _tier_pool()
+        lexical_jobs = [
+            pool.submit(_timed, search_lexical, q, project_path, topk, project_name, False)
+            for q in queries
+        ]
+        # A cold model/collection load is not part of the vector tier's budget
+        self._prepare_vector(project_name)
+        vector_started = time.monotonic()
+        vector_job = pool.submit(_timed, self.search_vector_batch, queries, project_name, topk)
+
+        # Each tier has one deadline from its submission, however many jobs it has
+        wait_futures(lexical_jobs, timeout=_remaining(t0, "lexical"))
+        lexical_tiers = [_collect(job, "lexical", []) for job in lexical_jobs]
+        wait_futures([vector_job], timeout=_remaining(vector_started, "vector"))
+        vector, vector_tier = _collect(vector_job, "vector", [[] for _ in queries])
+        out = []
+        for i, (query, (lexical, lexical_tier)) in enumerate(zip(queries, lexical_tiers)):
+            fused, overlap = _fuse({"lexical": lexical, "vector": vector[i]}, topk)
+            info = {
+                "tiers": {
+                    "lexical": {**lexical_tier, "results": len(lexical)},
+                    "vector": {**vector_tier, "results": len(vector[i])},
+                },
+                "fused": len(fused),
+                "overlap": overlap,
+                "latency_ms": round((time.monotonic() - t0) * 1000, 1),
+            }
+            _log_fusion(query, project_name, info)
+            out.append((fused, info))
+        return out
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "open_collections": list(self._collections),
+                "open_lexical_indexes": list(self._lexical),
+                "max_collections": self.max_collections,
+                "model_loaded": self._ef is not None,
+            }
+
+
+_service: Optional[SearchService] = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> SearchService:
+    """Process-wide SearchService (model and collections stay warm)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = SearchService()
+        return _service
 
-    except ImportError:
-        logger.debug("chromadb not installed — vector search skipped")
-        return []
-    except Exception as e:
-        logger.warning(f"Vector search failed: {e}")
-        return []
+
+def search_vector(query: str, project_name: str, topk: int = 8) -> list[dict]:
+    """
+    Semantic search via ChromaDB.
+    Requires: chromadb + sentence-transformers (installed by upgrade script).
+    Returns [] if not available — degrades gracefully.
+    """
+    return get_service().search_vector(query, project_name, topk=topk)
 
 
-# ── Two-tier merge ────────────────────────────────────────────────────────────
+# ── Two-tier fusion ───────────────────────────────────────────────────────────
 
 def search(
     query: str,
@@ -225,26 +502,172 @@ def search(
 ) -> list[dict]:
     """
     Combined two-tier search.
-    Lexical results take priority; vector adds semantic matches not in lexical set.
-    Final list sorted by score descending, deduplicated by filepath.
+    Lexical and vector tiers run concurrently; a tier that exceeds its timeout
+    contributes nothing. Results are fused by reciprocal rank per chunk.
     """
-    lexical = search_lexical(query, project_path, topk=topk)
-    vector  = search_vector(query, project_name,  topk=topk)
+    return get_service().search_batch([query], project_name, project_path, topk=topk)[0]
+
 
-    seen    = {r["filepath"] for r in lexical}
-    merged  = list(lexical)
-    for r in vector:
-        if r["filepath"] not in seen:
-            merged.append(r)
-            seen.add(r["filepath"])
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
 
-    merged.sort(key=lambda x: x["score"], reverse=True)
-    return merged[:topk]
+
+def _tier_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=TIER_WORKERS, thread_name_prefix="leon-search")
+        return _pool
+
+
+def _timed(fn, *args):
+    t0 = time.monotonic()
+    return fn(*args), (time.monotonic() - t0) * 1000
+
+
+def _remaining(started: float, tier: str) -> float:
+    """Seconds left before a tier submitted at `started` is dropped."""
+    return max(0.0, started + TIER_TIMEOUTS[tier] - time.monotonic())
+
+
+def _collect(future, tier: str, default):
+    """Result of a tier job once its deadline has passed. Returns (results, {ms, status})."""
+    if not future.done():
+        logger.warning(f"{tier} search exceeded {TIER_TIMEOUTS[tier]}s — skipped")
+        return default, {"ms": TIER_TIMEOUTS[tier] * 1000, "status": "timeout"}
+    try:
+        results, ms = future.result()
+        return results, {"ms": round(ms, 1), "status": "ok"}
+    except Exception as e:
+        logger.warning(f"{tier} search failed: {e}")
+        return default, {"ms": 0.0, "status": "error"}
+
+
+def _fuse(tiers: dict[str, list[dict]], topk: int) -> tuple[list[dict], int]:
+    """
+    Reciprocal-rank fusion: a chunk scores sum(1 / (RRF_K + rank)) over the
+    tiers that returned it. Chunks are keyed by (filepath, start_line, end_line),
+    the same chunks both indexes are built from. `score` is normalized so that
+    rank 1 in every tier is 1.0; each hit keeps its per-tier ranks and scores.
+    Returns (fused results, number of chunks found by more than one tier).
+    """
+    fused: dict[tuple, dict] = {}
+    for tier, results in tiers.items():
+        for rank, r in enumerate(results, 1):
+            key = (r["filepath"], r["start_line"], r["end_line"])
+            hit = fused.get(key)
+            if hit is None:
+                hit = fused[key] = {**r, "source": tier, "rrf": 0.0, "ranks": {}, "tier_scores": {}}
+                hit.pop("bm25", None)
+            else:
+                hit["source"] = "+".join(sorted(hit["ranks"]) + [tier])
+            hit["rrf"] += 1.0 / (RRF_K + rank)
+            hit["ranks"][tier] = rank
+            hit["tier_scores"][tier] = r.get("bm25", r["score"])
+
+    best = len(tiers) / (RRF_K + 1)
+    results = sorted(fused.values(), key=lambda x: x["rrf"], reverse=True)[:topk]
+    for r in results:
+        r["score"] = round(r["rrf"] / best, 3)
+        r["rrf"] = round(r["rrf"], 5)
+    return results, sum(1 for r in fused.values() if len(r["ranks"]) > 1)
+
+
+# ── Resident daemon (Unix socket) ─────────────────────────────────────────────
+#
+# Protocol: one JSON request line per connection, one JSON response line.
+#   {"op": "search", "queries": [...], "projects": [{"name", "path"}], "topk": 12,
+#    "explain": false}
+#     → {"ok": true, "results": [[...per query, merged across projects...]],
+#        "explain": [[{"project", "tiers", "fused", "overlap", "latency_ms"}, ...]]}
+#   {"op": "stats"} → {"ok": true, "stats": {...}}
+
+class _SearchRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline() or b"{}")
+            response = {"ok": True, **handle_request(request)}
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        self.wfile.write((json.dumps(response) + "\n").encode())
+
+
+def handle_request(request: dict) -> dict:
+    """Serve one daemon request with the process-wide SearchService."""
+    service = get_service()
+    op = request.get("op")
+    if op == "stats":
+        return {"stats": service.get_stats()}
+    if op != "search":
+        raise ValueError(f"unknown op: {op!r}")
+
+    queries = [str(q) for q in request.get("queries", [])]
+    topk = int(request.get("topk", 12))
+    merged: list[list[dict]] = [[] for _ in queries]
+    explain: list[list[dict]] = [[] for _ in queries]
+    for project in request.get("projects", []):
+        batch = service.search_batch_explained(queries, project["name"], project["path"], topk=topk)
+        for i, (results, info) in enumerate(batch):
+            for r in results:
+                r["project"] = project["name"]
+            merged[i].extend(results)
+            explain[i].append({"project": project["name"], **info})
+    for results in merged:
+        results.sort(key=lambda x: x["score"], reverse=True)
+    response = {"results": merged}
+    if request.get("explain"):
+        response["explain"] = explain
+    return response
+
+
+def serve(socket_path: Path = SOCKET_PATH, max_collections: int = MAX_COLLECTIONS):
+    """Run the resident search daemon until interrupted."""
+    global _service
+    _service = SearchService(max_collections=max_collections)
+    socket_path = Path(socket_path)
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        if query_daemon({"op": "stats"}, socket_path, timeout=1.0) is not None:
+            raise RuntimeError(f"search daemon already running on {socket_path}")
+        socket_path.unlink()  # stale socket from a crashed daemon
+
+    server = socketserver.ThreadingUnixStreamServer(str(socket_path), _SearchRequestHandler)
+    server.daemon_threads = True
+    os.chmod(socket_path, 0o600)
+    logger.info(f"Search daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+
+
+def query_daemon(request: dict, socket_path: Path = SOCKET_PATH,
+                 timeout: float = DAEMON_TIMEOUT) -> Optional[dict]:
+    """Send one request to the daemon. None if it is not running or fails."""
+    if not Path(socket_path).exists():
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(str(socket_path))
+            sock.sendall((json.dumps(request) + "\n").encode())
+            with sock.makefile("rb") as f:
+                response = json.loads(f.readline() or b"{}")
+    except (OSError, ValueError) as e:
+        logger.debug(f"Search daemon unavailable: {e}")
+        return None
+    if not response.get("ok"):
+        logger.warning(f"Search daemon error: {response.get('error')}")
+        return None
+    return response
 
 
 # ── Output formatter ──────────────────────────────────────────────────────────
 
-def format_results(results: list[dict], project_name: str = "") -> str:
+def format_results(results: list[dict], project_name: str = "", explain: bool = False) -> str:
     if not results:
         return "  No results found."
     lines = []
@@ -256,6 +679,11 @@ def format_results(results: list[dict], project_name: str = "") -> str:
             f"\n  {i}. {prefix}{r['filepath']}:{r['start_line']}-{r['end_line']}  "
             f"{tag}  {score}"
         )
+        if explain and r.get("ranks"):
+            ranks = "  ".join(
+                f"{tier} #{rank} ({r['tier_scores'][tier]:g})" for tier, rank in r["ranks"].items()
+            )
+            lines.append(f"     ↳ {ranks}  rrf={r['rrf']}")
         for sl in r["snippet"].strip().split("\n")[:4]:
             lines.append(f"     {sl}")
     return "\n".join(lines)
@@ -263,6 +691,22 @@ def format_results(results: list[dict], project_name: str = "") -> str:
 
 # ── CLI entry point ───────────────────────────────────────────────────────────
 
+def _print_results(query: str, all_results: list[dict], topk: int,
+                   explain: Optional[list[dict]] = None):
+    print(f"\nSearch: '{query}' — {len(all_results)} result(s)")
+    for info in explain or []:
+        tiers = "  ".join(
+            f"{name} {t['ms']:.1f}ms/{t['results']}" + ("" if t["status"] == "ok" else f" ({t['status']})")
+            for name, t in info["tiers"].items()
+        )
+        print(f"  {info['project']}: {tiers}  → fused {info['fused']} "
+              f"(overlap {info['overlap']}) in {info['latency_ms']:.1f}ms")
+    for proj_name in {r.get("project", "") for r in all_results}:
+        proj_results = [r for r in all_results if r.get("project") == proj_name]
+        print(f"\n  [{proj_name}]")
+        print(format_results(proj_results[:topk], explain=explain is not None))
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Search Leon project codebases",
@@ -271,15 +715,49 @@ def main():
             "Examples:\n"
             '  leon-search "authentication hook" --project Motorev\n'
             '  leon-search "useStore" --topk 5\n'
-            '  leon-search "API error" --project "Leon System"'
+            '  leon-search "API error" --project "Leon System"\n'
+            '  leon-search "useStore" --project Motorev --explain\n'
+            "  leon-search --batch queries.txt --project Motorev\n"
+            "  leon-search --serve &    # keep model + indexes warm for later calls"
         ),
     )
-    parser.add_argument("query",    help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--project", help="Project name (searches all if omitted)")
     parser.add_argument("--topk",  type=int, default=12, help="Max results (default 12)")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run one query per line from FILE ('-' for stdin)")
+    parser.add_argument("--serve", action="store_true",
+                        help=f"Run the resident search daemon on {SOCKET_PATH}")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Search in-process even if the daemon is running")
+    parser.add_argument("--stats", action="store_true", help="Print daemon stats and exit")
+    parser.add_argument("--explain", action="store_true",
+                        help="Show per-tier ranks, scores and latency for each result")
     args = parser.parse_args()
 
-    logging.basicConfig(level=logging.WARNING)
+    logging.basicConfig(level=logging.INFO if args.serve else logging.WARNING)
+
+    if args.serve:
+        try:
+            serve()
+        except RuntimeError as e:
+            print(e)
+            sys.exit(1)
+        return
+
+    if args.stats:
+        response = query_daemon({"op": "stats"})
+        print(json.dumps(response["stats"], indent=2) if response else "Search daemon not running.")
+        return
+
+    if args.batch:
+        source = sys.stdin if args.batch == "-" else open(args.batch)
+        with source:
+            queries = [line.strip() for line in source if line.strip()]
+    elif args.query:
+        queries = [args.query]
+    else:
+        parser.error("a query (or --batch FILE) is required")
 
     try:
         import yaml
@@ -298,20 +776,20 @@ def main():
     else:
         targets = [p for p in all_projects if Path(p.get("path", "")).exists()]
 
-    all_results: list[dict] = []
-    for p in targets:
-        results = search(args.query, p["name"], p["path"], topk=args.topk)
-        for r in results:
-            r["project"] = p["name"]
-        all_results.extend(results)
-
-    all_results.sort(key=lambda x: x["score"], reverse=True)
+    request = {
+        "op": "search",
+        "queries": queries,
+        "projects": [{"name": p["name"], "path": p["path"]} for p in targets],
+        "topk": args.topk,
+        "explain": args.explain,
+    }
+    response = None if args.no_daemon else query_daemon(request)
+    if response is None:
+        response = handle_request(request)
+    explain = response.get("explain") or [None] * len(queries)
 
-    print(f"\nSearch: '{args.query}' — {len(all_results)} result(s)")
-    for proj_name in {r.get("project", "") for r in all_results}:
-        proj_results = [r for r in all_results if r.get("project") == proj_name]
-        print(f"\n  [{proj_name}]")
-        print(format_results(proj_results[:args.topk]))
+    for query, all_results, info in zip(queries, response["results"], explain):
+        _print_results(query, all_results, args.topk, explain=info)
 
 
 if __name__ == "__main__":
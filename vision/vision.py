@@ -6,6 +6,13 @@ Uses Claude Vision API for periodic frame analysis with a persistent context
 of what's happening in the environment.
 
 NOT screenshot-based — this is a continuous streaming loop.
+
+Frames are gated on-device before anything is sent: each captured frame is
+shrunk to a tiny grayscale thumbnail and diffed with the previous one
+(motion) and with the last analyzed one (scene change). Motion wakes the
+analysis loop immediately; a static room is re-analyzed on an interval that
+backs off to max_idle_interval. With contact_sheet=N, frames captured during
+motion are tiled into one image so a single call covers what happened.
 """
 
 import asyncio
@@ -20,8 +27,115 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional, Callable
 
+try:
+    import numpy as np
+except ImportError:  # ships with opencv-python; without it there's no motion gate
+    np = None
+
 logger = logging.getLogger("leon.vision")
 
+THUMB_WIDTH = 80             # motion thumbnails are ~80 px wide, grayscale
+PIXEL_DELTA = 25             # gray-level change for a thumbnail pixel to count as moving
+MOTION_THRESHOLD = 0.02      # fraction of moving pixels that counts as motion
+SCENE_THRESHOLD = 12.0       # mean change vs the last analyzed frame that counts as a new scene
+MAX_IDLE_INTERVAL = 300.0    # a static scene is still re-analyzed this often
+ACTIVE_FPS = 30              # capture rate while something moves…
+IDLE_FPS = 5                 # …and once nothing has moved for IDLE_AFTER_S
+IDLE_AFTER_S = 10.0
+KEYFRAME_GAP_S = 0.5         # min spacing of contact-sheet key frames
+SHEET_TILE = (320, 180)      # contact-sheet tile size (w, h)
+
+
+def motion_thumbnail(frame, width: int = THUMB_WIDTH):
+    """Strided grayscale thumbnail of a frame (no interpolation — it only feeds diffs)."""
+    step = max(1, frame.shape[1] // width)
+    small = frame[::step, ::step]
+    if small.ndim == 3:
+        small = small.mean(axis=2)
+    return small.astype(np.float32)
+
+
+def contact_sheet(tiles: list, columns: int = 2):
+    """Tile equally sized frames into a grid, row by row; gaps are black."""
+    rows = -(-len(tiles) // columns)
+    blank = np.zeros_like(tiles[0])
+    padded = list(tiles) + [blank] * (rows * columns - len(tiles))
+    return np.vstack([np.hstack(padded[r * columns:(r + 1) * columns]) for r in range(rows)])
+
+
+def encode_jpeg(frame, quality: int = 70) -> Optional[bytes]:
+    """JPEG-encode a BGR frame with OpenCV; None if it isn't installed."""
+    try:
+        import cv2
+    except ImportError:
+        return None
+    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes() if ok else None
+
+
+class MotionGate:
+    """
+    Decides when a webcam frame is worth sending to the model.
+
+    update() diffs each thumbnail with the previous one; enough moving pixels
+    request an analysis. A thumbnail that differs from the last analyzed one
+    on average (lights off, someone sat down and stayed still) does too. With
+    neither, the scene is re-analyzed every `interval` seconds, which doubles
+    after each idle analysis up to max_interval and resets on motion. Motion
+    never triggers analyses closer together than base_interval.
+    """
+
+    def __init__(self, base_interval: float = 3.0, max_interval: float = MAX_IDLE_INTERVAL,
+                 motion_threshold: float = MOTION_THRESHOLD,
+                 scene_threshold: float = SCENE_THRESHOLD, pixel_delta: float = PIXEL_DELTA):
+        self.base_interval = base_interval
+        self.max_interval = max(max_interval, base_interval)
+        self.motion_threshold = motion_threshold
+        self.scene_threshold = scene_threshold
+        self.pixel_delta = pixel_delta
+        self.interval = base_interval
+        self.motion = 0.0
+        self.last_motion_at = float("-inf")
+        self.pending = False
+        self._prev = None
+        self._reference = None
+        self._last_analysis = float("-inf")
+
+    def update(self, thumb, now: float) -> bool:
+        """Feed the newest thumbnail; returns True if it shows motion."""
+        prev, self._prev = self._prev, thumb
+        if prev is None or prev.shape != thumb.shape:
+            return False
+        self.motion = float(np.mean(np.abs(thumb - prev) > self.pixel_delta))
+        if self.motion < self.motion_threshold:
+            return False
+        self.pending = True
+        self.last_motion_at = now
+        return True
+
+    def scene_changed(self) -> bool:
+        if self._prev is None:
+            return False
+        if self._reference is None or self._reference.shape != self._prev.shape:
+            return True
+        return float(np.mean(np.abs(self._prev - self._reference))) > self.scene_threshold
+
+    def due_in(self, now: float) -> float:
+        """Seconds until the next analysis should run (0 = now)."""
+        since = now - self._last_analysis
+        if self.pending or self.scene_changed():
+            return max(0.0, self.base_interval - since)
+        return max(0.0, self.interval - since)
+
+    def analyzed(self, now: float):
+        """Record an analysis of the current frame."""
+        if self._prev is not None:
+            active = self.pending or self.scene_changed()
+            self.interval = self.base_interval if active else min(self.interval * 2, self.max_interval)
+            self._reference = self._prev
+        self.pending = False
+        self._last_analysis = now
+
 
 class VisionSystem:
     """
@@ -32,11 +146,13 @@ class VisionSystem:
     """
 
     def __init__(self, api_client=None, analysis_interval: float = 3.0,
-                 camera_index: int = 0, resolution: tuple = (1280, 720)):
+                 camera_index: int = 0, resolution: tuple = (1280, 720),
+                 max_idle_interval: float = MAX_IDLE_INTERVAL, contact_sheet: int = 0):
         self.api_client = api_client
         self.analysis_interval = analysis_interval
         self.camera_index = camera_index
         self.resolution = resolution
+        self.contact_sheet = contact_sheet   # key frames per call; 0/1 = single frame
 
         # State
         self._running = False
@@ -44,6 +160,11 @@ class VisionSystem:
         self._analysis_task: Optional[asyncio.Task] = None
         self._current_frame = None
         self._frame_lock = threading.Lock()
+        self._gate = MotionGate(analysis_interval, max_idle_interval)
+        self._keyframes: deque = deque(maxlen=max(1, contact_sheet - 1))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.analysis_count = 0
 
         # Awareness context — rolling memory of what vision has seen
         self.awareness: deque = deque(maxlen=50)
@@ -108,10 +229,12 @@ class VisionSystem:
 
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.resolution[0])
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.resolution[1])
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # idle-rate reads shouldn't return stale frames
 
         logger.info(f"Camera opened: {int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x"
                      f"{int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))}")
 
+        last_keyframe = float("-inf")
         while self._running:
             ret, frame = cap.read()
             if not ret:
@@ -119,47 +242,112 @@ class VisionSystem:
                 time.sleep(0.1)
                 continue
 
+            # cap.read() returns a fresh array, so frames are shared, not copied
+            now = time.monotonic()
+            thumb = motion_thumbnail(frame)
             with self._frame_lock:
                 self._current_frame = frame
-
-            # Small sleep to avoid hammering CPU — ~30fps capture
-            time.sleep(0.033)
+                was_pending = self._gate.pending
+                moving = self._gate.update(thumb, now)
+
+            if moving:
+                if self.contact_sheet > 1 and now - last_keyframe >= KEYFRAME_GAP_S:
+                    tile = cv2.resize(frame, SHEET_TILE, interpolation=cv2.INTER_AREA)
+                    with self._frame_lock:
+                        self._keyframes.append((now, tile))
+                    last_keyframe = now
+                if not was_pending:
+                    self._notify_motion()
+
+            # Full rate only while something moves
+            idle = now - self._gate.last_motion_at > IDLE_AFTER_S
+            time.sleep(1 / (IDLE_FPS if idle else ACTIVE_FPS))
 
         cap.release()
         logger.info("Camera released")
 
     def _get_frame_base64(self, quality: int = 70) -> Optional[str]:
         """Get current frame as base64 JPEG."""
-        try:
-            import cv2
-        except ImportError:
+        with self._frame_lock:
+            frame = self._current_frame
+        if frame is None:
             return None
-
+        jpeg = encode_jpeg(frame, quality)
+        return base64.b64encode(jpeg).decode("utf-8") if jpeg else None
+
+    def _get_analysis_image(self, quality: int = 70) -> tuple[Optional[str], int, float]:
+        """
+        Image for the next analysis as (base64 JPEG, frame count, seconds spanned):
+        a contact sheet of the key frames since the last call plus the current
+        frame, or just the current frame.
+        """
         with self._frame_lock:
-            if self._current_frame is None:
-                return None
-            frame = self._current_frame.copy()
-
-        _, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
-        return base64.b64encode(buffer).decode("utf-8")
+            frame = self._current_frame
+            keyframes = list(self._keyframes)
+            self._keyframes.clear()
+        if frame is None:
+            return None, 0, 0.0
+        if self.contact_sheet < 2 or not keyframes or np is None:
+            return self._get_frame_base64(quality), 1, 0.0
+
+        import cv2
+        tiles = [tile for _, tile in keyframes]
+        tiles.append(cv2.resize(frame, SHEET_TILE, interpolation=cv2.INTER_AREA))
+        jpeg = encode_jpeg(contact_sheet(tiles), quality)
+        if not jpeg:
+            return None, 0, 0.0
+        return base64.b64encode(jpeg).decode("utf-8"), len(tiles), time.monotonic() - keyframes[0][0]
+
+    def _notify_motion(self):
+        """Wake the analysis loop (called from the capture thread)."""
+        loop, wake = self._loop, self._wake
+        if loop is not None and wake is not None:
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                pass  # loop closed during shutdown
 
     async def run_analysis_loop(self):
         """Continuous analysis loop — call this from async context."""
         logger.info("Vision analysis loop started")
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
 
         while self._running:
+            self._wake.clear()
+            with self._frame_lock:
+                delay = self._gate.due_in(time.monotonic())
+            if delay > 0:
+                # Sleep until the idle interval runs out or motion wakes us
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
             try:
                 await self._analyze_current_frame()
             except Exception as e:
                 logger.error(f"Vision analysis error: {e}")
-
-            await asyncio.sleep(self.analysis_interval)
+            with self._frame_lock:
+                self._gate.analyzed(time.monotonic())
 
     async def _analyze_current_frame(self):
         """Analyze the current frame with Claude Vision."""
-        frame_b64 = self._get_frame_base64()
-        if not frame_b64 or not self.api_client:
+        if not self.api_client:
             return
+        frame_b64, frame_count, span = self._get_analysis_image()
+        if not frame_b64:
+            return
+        self.analysis_count += 1
+
+        image_note = "Analyze this webcam frame and report what you see."
+        if frame_count > 1:
+            image_note = (
+                f"This image is a contact sheet of {frame_count} webcam key frames taken over "
+                f"the last {span:.0f}s, in time order (left to right, top to bottom); "
+                f"the last tile is the current view. Report what you see and what happened."
+            )
 
         # Build context from recent observations
         context_summary = ""
@@ -170,7 +358,7 @@ class VisionSystem:
             )
 
         prompt = f"""You are Leon's vision system providing real-time awareness.
-Analyze this webcam frame and report what you see.
+{image_note}
 
 {context_summary}
 
@@ -252,6 +440,9 @@ Be concise. Focus on changes from previous observations."""
             "environment": self.environment,
             "last_analysis": self.last_analysis_time,
             "has_camera": self._current_frame is not None,
+            "analyses": self.analysis_count,
+            "motion": round(self._gate.motion, 3),
+            "idle_interval": self._gate.interval,
         }
 
     def describe_scene(self) -> str: